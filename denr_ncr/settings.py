@@ -154,4 +154,7 @@ LOGIN_REDIRECT_URL = '/dashboard/'
 LOGOUT_REDIRECT_URL = '/login/'
 
 # Login URL
-LOGIN_URL = '/login/'
\ No newline at end of file
+LOGIN_URL = '/login/'
+
+# Employees per payroll batch: late, restored and moved employees only join a batch with room
+PAYROLL_BATCH_CAPACITY = 15
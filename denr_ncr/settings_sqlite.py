@@ -0,0 +1,19 @@
+"""
+SQLite settings for local test runs and payroll benchmarks.
+
+Usage:
+    python manage.py test --settings=denr_ncr.settings_sqlite
+    python manage.py bench_payroll --settings=denr_ncr.settings_sqlite
+
+NAME is the local db.sqlite3 (runserver / migrate with these settings). Tests and benchmarks
+create their own throwaway test database (in memory), so they never write to db.sqlite3.
+"""
+
+from .settings import *  # noqa: F401,F403
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db.sqlite3',
+    }
+}
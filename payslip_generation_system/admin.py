@@ -1,6 +1,6 @@
 from django.contrib import admin
-from django.contrib.auth.models import User
 from .models import UserRole, Employee
+from .services import jobs, user_accounts
 
 # Simple registration for UserRole
 admin.site.register(UserRole)
@@ -12,46 +12,20 @@ class EmployeeAdmin(admin.ModelAdmin):
     actions = ['generate_user_accounts']
 
     def generate_user_accounts(self, request, queryset):
-        created_count = 0
-        skipped_count = 0
+        employee_ids = list(queryset.values_list('id', flat=True))
 
-        for emp in queryset:
-            # Skip if already linked to a user
-            if emp.user:
-                skipped_count += 1
-                continue
+        # Hashing the passwords of a large selection would time out the request
+        if len(employee_ids) > user_accounts.INLINE_LIMIT:
+            job = jobs.enqueue('generate_user_accounts', {'employee_ids': employee_ids}, request.user)
+            self.message_user(request, f"⏳ {len(employee_ids)} employees queued as job {job.id} (run_workers creates the accounts).")
+            return
 
-            # username: fullname with spaces removed (no lowercase)
-            username = emp.fullname.replace(" ", "")
-
-            # password: birthdate as string, or defaultpass
-            if emp.birthdate:
-                password = str(emp.birthdate).strip()   # e.g. "2002-02-22"
-            else:
-                password = "defaultpass"
-
-            # avoid duplicate usernames
-            if User.objects.filter(username=username).exists():
-                username = f"{username}{emp.id}"
-
-            # create user
-            user = User.objects.create(username=username)
-            user.set_password(password)  # hashes the password
-            user.save()
-
-            # link to employee
-            emp.user = user
-            emp.save()
-
-            # create UserRole (default to "employee")
-            UserRole.objects.create(user=user, role="employee")
-
-            created_count += 1
+        counts = user_accounts.generate_user_accounts(employee_ids)
 
         # summary message
-        msg = f"✅ {created_count} user(s) created."
-        if skipped_count:
-            msg += f" ⏭️ {skipped_count} employee(s) already had accounts."
+        msg = f"✅ {counts['created']} user(s) created."
+        if counts['skipped']:
+            msg += f" ⏭️ {counts['skipped']} employee(s) already had accounts."
         self.message_user(request, msg)
 
     generate_user_accounts.short_description = "Generate User accounts + roles for selected employees"
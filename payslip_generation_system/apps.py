@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class PayslipGenerationSystemConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'payslip_generation_system'
+
+    def ready(self):
+        # Connects the identity cache invalidation, employee search index and payslip cache signals
+        from payslip_generation_system.services import identity, employee_search, payslip_cache  # noqa: F401
@@ -1,123 +1,106 @@
-from .models import Employee
+from .services import identity
 from datetime import datetime
 
-# Global Variables
-def global_user_context(request):
-    username = request.user.username
-    user_role = request.session.get('role', '')
-    current_datetime = datetime.now()
-
-    preview_only_roles = [
-        'admin',
-        'accounting',
-        'checker',
-    ]
+# Role lists used by the templates to show / hide options (built once, not per render)
+PREVIEW_ONLY_ROLES = [
+    'admin',
+    'accounting',
+    'checker',
+]
 
-    restricted_roles = [
-        'accounting',
-        'employee',
-        'preparator_denr_nec',
-        'preparator_denr_prcmo',
-        'preparator_meo_s',
-        'preparator_meo_e',
-        'preparator_meo_w',
-        'preparator_meo_n',
-    ]
+RESTRICTED_ROLES = [
+    'accounting',
+    'employee',
+    'preparator_denr_nec',
+    'preparator_denr_prcmo',
+    'preparator_meo_s',
+    'preparator_meo_e',
+    'preparator_meo_w',
+    'preparator_meo_n',
+]
 
-    hide_card_roles = [
-        'employee',
-        'accounting',
-    ]
+HIDE_CARD_ROLES = [
+    'employee',
+    'accounting',
+]
 
-    hide_admin_options = [
-        'checker',
-        'accounting',
-        'preparator_denr_nec',
-        'preparator_denr_prcmo',
-        'preparator_meo_s',
-        'preparator_meo_e',
-        'preparator_meo_w',
-        'preparator_meo_n',
-        'employee',
-    ]
+HIDE_ADMIN_OPTIONS = [
+    'checker',
+    'accounting',
+    'preparator_denr_nec',
+    'preparator_denr_prcmo',
+    'preparator_meo_s',
+    'preparator_meo_e',
+    'preparator_meo_w',
+    'preparator_meo_n',
+    'employee',
+]
 
-    hide_make_adjustments = [
-        'checker',
-        'accounting',
-        'employee',
-    ]
+HIDE_MAKE_ADJUSTMENTS = [
+    'checker',
+    'accounting',
+    'employee',
+]
 
-    hide_check_adjustments = [
-        'accounting',
-        'preparator_denr_nec',
-        'preparator_denr_prcmo',
-        'preparator_meo_s',
-        'preparator_meo_e',
-        'preparator_meo_w',
-        'preparator_meo_n',
-        'employee',
-    ]
+HIDE_CHECK_ADJUSTMENTS = [
+    'accounting',
+    'preparator_denr_nec',
+    'preparator_denr_prcmo',
+    'preparator_meo_s',
+    'preparator_meo_e',
+    'preparator_meo_w',
+    'preparator_meo_n',
+    'employee',
+]
 
-    hide_release_payslips = [
-        'checker',
-        'preparator_denr_nec',
-        'preparator_denr_prcmo',
-        'preparator_meo_s',
-        'preparator_meo_e',
-        'preparator_meo_w',
-        'preparator_meo_n',
-        'employee',
-    ]
+HIDE_RELEASE_PAYSLIPS = [
+    'checker',
+    'preparator_denr_nec',
+    'preparator_denr_prcmo',
+    'preparator_meo_s',
+    'preparator_meo_e',
+    'preparator_meo_w',
+    'preparator_meo_n',
+    'employee',
+]
 
-    hide_generate_payslip = [
-        # 'preparator_denr_nec',
-        # 'preparator_denr_prcmo',
-        # 'preparator_meo_s',
-        # 'preparator_meo_e',
-        # 'preparator_meo_w',
-        # 'preparator_meo_n',
-        'accounting'
-    ]
+HIDE_GENERATE_PAYSLIP = [
+    # 'preparator_denr_nec',
+    # 'preparator_denr_prcmo',
+    # 'preparator_meo_s',
+    # 'preparator_meo_e',
+    # 'preparator_meo_w',
+    # 'preparator_meo_n',
+    'accounting'
+]
 
-    hide_payroll = [
-        'employee'
-    ]
-
-    ROLE_FORMAT = {
-        'admin': 'System Admin',
-        'checker': 'Checker',
-        'accounting': 'Accounting',
-        'preparator_denr_nec': 'Preparator: DENR NCR NEC',
-        'preparator_denr_prcmo': 'Preparator: DENR NCR PRCMO',
-        'preparator_meo_s': 'Preparator: MEO South',
-        'preparator_meo_e': 'Preparator: MEO East',
-        'preparator_meo_w': 'Preparator: MEO West',
-        'preparator_meo_n': 'Preparator: MEO North',
-        'employee': 'Employee'
-    }
+HIDE_PAYROLL = [
+    'employee'
+]
 
-    formatted_role = ROLE_FORMAT.get(user_role)
-
-    try:
-        if request.user.is_authenticated:
-            employee = Employee.objects.get(user_id=request.user.id)
-            username = employee.fullname
-    except Employee.DoesNotExist:
+# Global Variables
+def global_user_context(request):
+    # Identity resolved at login and cached, no database query per render
+    user_identity = identity.for_request(request)
+    if user_identity:
+        username = user_identity['display_name']
+        user_role = user_identity['role'] or ''
+    else:
         username = request.user.username
+        user_role = request.session.get('role', '')
 
     return {
         'username': username,
         'user_role': user_role,
-        'formatted_user_role': formatted_role,
-        'current_datetime': current_datetime,
-        'preview_only_roles': preview_only_roles,
-        'hide_card_roles': hide_card_roles,
-        'hide_admin_options': hide_admin_options,
-        'hide_generate_payslip': hide_generate_payslip,
-        'hide_make_adjustments': hide_make_adjustments,
-        'hide_check_adjustments': hide_check_adjustments,
-        'hide_release_payslips': hide_release_payslips,
-        'restricted_roles': restricted_roles,
-        'hide_payroll': hide_payroll,
+        'formatted_user_role': identity.ROLE_FORMAT.get(user_role),
+        'current_datetime': datetime.now(),
+        'preview_only_roles': PREVIEW_ONLY_ROLES,
+        'hide_card_roles': HIDE_CARD_ROLES,
+        'hide_admin_options': HIDE_ADMIN_OPTIONS,
+        'hide_generate_payslip': HIDE_GENERATE_PAYSLIP,
+        'hide_make_adjustments': HIDE_MAKE_ADJUSTMENTS,
+        'hide_check_adjustments': HIDE_CHECK_ADJUSTMENTS,
+        'hide_release_payslips': HIDE_RELEASE_PAYSLIPS,
+        'restricted_roles': RESTRICTED_ROLES,
+        'hide_payroll': HIDE_PAYROLL,
     }
-
@@ -1,19 +1,37 @@
 # Like Middleware in Laravel
 from django.shortcuts import redirect
+from django.http import JsonResponse
+from django.urls import reverse
 from functools import wraps
+from payslip_generation_system.services import identity, jobs
 
 def restrict_roles(disallowed_roles=None):
-    if disallowed_roles is None:
-        disallowed_roles = []
+    # Lowercased once when the view is decorated, not on every request
+    disallowed = frozenset(role.lower() for role in (disallowed_roles or []))
 
     def decorator(view_func):
         @wraps(view_func)
         def wrapper(request, *args, **kwargs):
-            user_role = str(request.session.get('role') or '').strip().lower()
-
-            if user_role in (role.lower() for role in disallowed_roles):
+            if identity.request_role(request) in disallowed:
                 return redirect('login')
 
             return view_func(request, *args, **kwargs)
         return wrapper
-    return decorator
\ No newline at end of file
+    return decorator
+
+def enqueueable(view_func):
+    # enqueue=1 runs the (JSON) view as a background job: answers 202 with the job id at once,
+    # run_workers replays the request as the same user. Goes under login_required / restrict_roles.
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        data = request.POST if request.method == 'POST' else request.GET
+        if data.get('enqueue') and not hasattr(request, '_job'):
+            job = jobs.enqueue('view', jobs.view_params(request, view_func), request.user)
+            return JsonResponse({
+                'job_id': job.id,
+                'status_url': reverse('job_status', args=[job.id]),
+                'result_url': reverse('job_result', args=[job.id]),
+            }, status=202)
+
+        return view_func(request, *args, **kwargs)
+    return wrapper
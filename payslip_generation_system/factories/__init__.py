@@ -1,4 +1,5 @@
 # Declare factories here
 # include this on the seeder => from payslip_generation_system.factories import EmployeeFactory
 from .employee import EmployeeFactory
-from .batch import BatchFactory
\ No newline at end of file
+from .batch import BatchFactory
+from .payroll_dataset import seed_payroll_dataset
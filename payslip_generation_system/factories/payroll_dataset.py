@@ -0,0 +1,361 @@
+import random
+from datetime import date
+from decimal import Decimal
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from faker import Faker
+from payslip_generation_system.models import (
+    Employee, Batch, BatchAssignment, Adjustment, ReturnRemark, ReturnedAdjustment, UserRole
+)
+from payslip_generation_system.services import payroll_snapshot, batch_status, employee_search
+from payslip_generation_system.pay_period import pay_period_key
+
+# Bulk payroll dataset (offices x batches x employees x adjustments x periods)
+# Used by the seed_employees / bench_payroll commands and the query budget tests.
+# Rows are bulk-inserted in chunks, each chunk in its own transaction, so the
+# memory use stays flat no matter how many periods are generated.
+
+OFFICES = ['denr_ncr_nec', 'denr_ncr_prcmo', 'meo_s', 'meo_e', 'meo_w', 'meo_n']
+
+MONTHS = [
+    'January', 'February', 'March', 'April', 'May', 'June',
+    'July', 'August', 'September', 'October', 'November', 'December',
+]
+
+# Custom adjustments on top of the fixed ones (Late, Absent, SSS, Philhealth, EWT)
+CUSTOM_INCOMES = ['Overtime', 'Salary Differential', 'Refund', 'Hazard Pay']
+CUSTOM_DEDUCTIONS = ['Pag-IBIG Loan', 'Salary Loan', 'Overpayment', 'Cash Advance']
+
+RETURN_REMARKS = [
+    'Incorrect late computation, please review.',
+    'Missing SSS deduction on some employees.',
+    'Absences do not match the DTR.',
+]
+
+def recent_periods(count, today=None):
+    """
+    The last `count` payroll periods (cutoff, month, year) ending with the current cutoff, oldest first
+    """
+    today = today or date.today()
+    month_index = today.month - 1
+    cutoff_index = 0 if today.day <= 15 else 1
+    year = today.year
+
+    periods = []
+    for _ in range(count):
+        periods.append(('1st' if cutoff_index == 0 else '2nd', MONTHS[month_index], str(year)))
+        cutoff_index -= 1
+        if cutoff_index < 0:
+            cutoff_index = 1
+            month_index -= 1
+            if month_index < 0:
+                month_index = 11
+                year -= 1
+
+    periods.reverse()
+    return periods
+
+def period_status(period_age, batch_index):
+    """
+    Workflow status of a batch: the current period is split between Pending, Waiting and Returned,
+    the previous period is Approved and older periods are Credited
+    """
+    if period_age == 0:
+        return ['Pending', 'Waiting', 'Returned'][batch_index % 3]
+    if period_age == 1:
+        return 'Approved'
+    return 'Credited'
+
+def build_adjustments(rng, employee, batch_number, period, status, count):
+    cutoff, month, year = period
+    daily_rate = float(employee.salary) / 22
+    per_minute_rate = daily_rate / (8 * 60)
+
+    base = {
+        'employee': employee,
+        'computation': '',
+        'month': month,
+        'cutoff': cutoff,
+        'cutoff_year': year,
+        'pay_period': pay_period_key(year, month, cutoff),
+        'status': status,
+        'batch_number': batch_number,
+        'assigned_office': employee.assigned_office,
+    }
+
+    minutes_late = rng.randint(1, 120)
+    days_absent = rng.randint(1, 3)
+    fixed = [
+        ('Late', 'Deduction', Decimal(str(round(per_minute_rate * minutes_late, 2))), str(minutes_late)),
+        ('Absent', 'Deduction', Decimal(str(round(per_minute_rate * days_absent * 480, 2))), str(days_absent)),
+        ('SSS', 'Deduction', Decimal('570.00'), ''),
+        ('Philhealth', 'Deduction', Decimal('250.00'), ''),
+        ('Expanded Withholding Tax', 'Deduction', Decimal('150.00'), ''),
+    ]
+
+    adjustments = []
+    for index in range(count):
+        if index < len(fixed):
+            name, adj_type, amount, details = fixed[index]
+        elif index % 2 == 0:
+            name, adj_type, amount, details = rng.choice(CUSTOM_INCOMES), 'Income', Decimal(rng.randint(100, 5000)), ''
+        else:
+            name, adj_type, amount, details = rng.choice(CUSTOM_DEDUCTIONS), 'Deduction', Decimal(rng.randint(100, 3000)), ''
+
+        adjustments.append(Adjustment(name=name, fixed_name=Adjustment.fixed_name_for(name), type=adj_type, amount=amount, details=details, **base))
+    return adjustments
+
+def returned_copies(adjustments):
+    # Copies kept by the reject view when a batch goes back to the preparator
+    return [
+        ReturnedAdjustment(
+            employee=adj.employee,
+            name=adj.name,
+            type=adj.type,
+            amount=adj.amount,
+            details=adj.details,
+            computation=adj.computation,
+            month=adj.month,
+            cutoff=adj.cutoff,
+            cutoff_year=adj.cutoff_year,
+            assigned_office=adj.assigned_office,
+            batch_number=adj.batch_number,
+            status='Returned',
+        )
+        for adj in adjustments
+    ]
+
+class ChunkWriter:
+    """
+    Buffers model instances and inserts them every `chunk_size` rows, one transaction per chunk.
+    Rows go through a single executemany instead of bulk_create: compiling the INSERT in the
+    ORM costs more than the insert itself at this volume. Only models with an auto primary key
+    whose ids are not needed afterwards (re-fetch them if they are) can be written this way.
+    """
+
+    def __init__(self, chunk_size=5000, log=None):
+        self.chunk_size = chunk_size
+        self.log = log
+        self.pending = {}
+        self.counts = {}
+        self.now = timezone.now()
+
+    def add(self, rows):
+        for row in rows:
+            model = type(row)
+            buffer = self.pending.setdefault(model, [])
+            buffer.append(row)
+            if len(buffer) >= self.chunk_size:
+                self.flush(model)
+
+    def insert(self, model, rows):
+        fields = [field for field in model._meta.concrete_fields if not field.primary_key]
+        quote = connection.ops.quote_name
+        sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+            quote(model._meta.db_table),
+            ', '.join(quote(field.column) for field in fields),
+            ', '.join(['%s'] * len(fields)),
+        )
+
+        # created_at / updated_at are the same for the whole seed, prepared once
+        constants = {
+            field.attname: field.get_db_prep_save(self.now, connection)
+            for field in fields
+            if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+        }
+        attnames = [field.attname for field in fields]
+        params = [
+            tuple(constants[name] if name in constants else getattr(row, name) for name in attnames)
+            for row in rows
+        ]
+
+        with connection.cursor() as cursor:
+            cursor.executemany(sql, params)
+
+    def flush(self, model=None):
+        models = [model] if model else list(self.pending)
+        for model in models:
+            rows = self.pending.get(model)
+            if not rows:
+                continue
+            with transaction.atomic():
+                self.insert(model, rows)
+            self.counts[model.__name__] = self.counts.get(model.__name__, 0) + len(rows)
+            self.pending[model] = []
+            if self.log:
+                self.log(f"  {model.__name__}: {self.counts[model.__name__]} rows")
+
+def create_user_accounts(employees, password, chunk_size=5000):
+    """
+    Employee login accounts (role 'employee') for freshly inserted employees.
+    The password is hashed once and shared, hashing one per employee is far too slow for bulk seeding.
+    """
+    hashed = make_password(password)
+    for start in range(0, len(employees), chunk_size):
+        chunk = employees[start:start + chunk_size]
+        with transaction.atomic():
+            User.objects.bulk_create([
+                User(username=f"emp_{employee.employee_number}", password=hashed) for employee in chunk
+            ])
+            # Primary keys are not returned by bulk_create on every backend
+            users = dict(
+                User.objects
+                .filter(username__in=[f"emp_{employee.employee_number}" for employee in chunk])
+                .values_list('username', 'id')
+            )
+            UserRole.objects.bulk_create([UserRole(user_id=user_id, role='employee') for user_id in users.values()])
+            for employee in chunk:
+                employee.user_id = users[f"emp_{employee.employee_number}"]
+            Employee.objects.bulk_update(chunk, ['user'])
+
+def seed_payroll_dataset(offices=2, batches=4, employees=60, adjustments=5, periods=3, seed=1,
+                         freeze=True, users=False, password='password', chunk_size=5000, log=None, today=None):
+    """
+    Bulk-insert a payroll dataset and return a summary of what was created.
+    `batches` are spread over the offices and `employees` over the batches, round-robin.
+    `today`: date the dataset is generated for (periods end with its cutoff, birth and hire dates
+    before it), the current date when None; with a fixed seed and date the dataset is the same.
+    Returns {'offices': [...], 'periods': [...], 'batches': [{'batch_number', 'assigned_office',
+    'cutoff', 'cutoff_month', 'cutoff_year', 'status'}], 'employee_ids': [...], 'counts': {model: rows}}
+    """
+    rng = random.Random(seed)
+    fake = Faker()
+    fake.seed_instance(seed)
+    log = log or (lambda message: None)
+
+    today = today or date.today()
+    office_codes = [OFFICES[index % len(OFFICES)] for index in range(max(1, min(offices, batches)))]
+    period_list = recent_periods(periods, today)
+    writer = ChunkWriter(chunk_size, log)
+
+    # Batches
+    next_batch_number = (Batch.objects.aggregate(last=Max('batch_number'))['last'] or 0) + 1
+    batch_rows = []
+    for index in range(batches):
+        office = office_codes[index % len(office_codes)]
+        batch_rows.append(Batch(
+            batch_number=next_batch_number,
+            batch_name=f"Batch {next_batch_number} {office}",
+            batch_assigned_office=office,
+        ))
+        next_batch_number += 1
+
+    with transaction.atomic():
+        Batch.objects.bulk_create(batch_rows)
+    log(f"Created {len(batch_rows)} batches")
+
+    # Employees
+    first_number = (Employee.objects.aggregate(last=Max('id'))['last'] or 0) + 1
+    employee_rows = []
+    for index in range(employees):
+        batch = batch_rows[index % len(batch_rows)]
+        employee_rows.append(Employee(
+            fullname=fake.name(),
+            birthdate=fake.date_between_dates(date(today.year - 60, 1, 1), date(today.year - 20, 1, 1)),
+            education=rng.choice(['High School', 'Vocational', 'College', 'Post Graduate']),
+            gender=rng.choice(['Male', 'Female']),
+            employee_number=f"{first_number + index:06d}",
+            position=fake.job()[:100],
+            # This decade, up to today
+            date_hired=fake.date_between_dates(date(today.year - today.year % 10, 1, 1), today),
+            fund_source=rng.choice(['regular', 'prcmo', 'manila_bay']),
+            salary=Decimal(rng.randint(15000, 60000)),
+            tax_declaration=rng.choice(['yes', 'no']),
+            eligibility=rng.choice(['yes', 'no']),
+            has_philhealth=rng.choice(['yes', 'no']),
+            employee_type=rng.choice(['COS', 'ER']),
+            assigned_office=batch.batch_assigned_office,
+            batch_number=batch.batch_number,
+        ))
+    writer.add(employee_rows)
+    writer.flush()
+
+    # Primary keys are not returned by bulk_create on every backend
+    employee_rows = list(
+        Employee.objects
+        .filter(batch_number__in=[batch.batch_number for batch in batch_rows])
+        .order_by('id')
+    )
+    # bulk_create skips the post_save signal that maintains the search index
+    employee_search.index_employees(employee_rows)
+
+    if users:
+        create_user_accounts(employee_rows, password, chunk_size)
+        log(f"Created {len(employee_rows)} user accounts")
+
+    employees_by_batch = {}
+    for employee in employee_rows:
+        employees_by_batch.setdefault(employee.batch_number, []).append(employee)
+
+    # Assignments and adjustments per period, newest first
+    batch_summaries = []
+    for period_age, period in enumerate(reversed(period_list)):
+        cutoff, month, year = period
+        # Rows are inserted without save(), the period key is set here
+        period_key = pay_period_key(year, month, cutoff)
+        for batch_index, batch in enumerate(batch_rows):
+            status = period_status(period_age, batch_index)
+            batch_summaries.append({
+                'batch_number': batch.batch_number,
+                'assigned_office': batch.batch_assigned_office,
+                'cutoff': cutoff,
+                'cutoff_month': month,
+                'cutoff_year': year,
+                'status': status,
+            })
+
+            for employee in employees_by_batch.get(batch.batch_number, []):
+                writer.add([BatchAssignment(
+                    employee=employee,
+                    batch_number=batch.batch_number,
+                    cutoff=cutoff,
+                    cutoff_month=month,
+                    cutoff_year=year,
+                    pay_period=period_key,
+                    assigned_office=employee.assigned_office,
+                )])
+                employee_adjustments = build_adjustments(rng, employee, batch.batch_number, period, status, adjustments)
+                writer.add(employee_adjustments)
+                if status == 'Returned':
+                    writer.add(returned_copies(employee_adjustments))
+
+            if status == 'Returned':
+                writer.add([ReturnRemark(
+                    batch_number=batch.batch_number,
+                    cutoff=cutoff,
+                    cutoff_month=month,
+                    cutoff_year=year,
+                    pay_period=period_key,
+                    assigned_office=batch.batch_assigned_office,
+                    remark=rng.choice(RETURN_REMARKS),
+                )])
+
+        log(f"Generated {month} {cutoff} {year}")
+    writer.flush()
+
+    # Submitted batches get their frozen payroll
+    if freeze:
+        for summary in batch_summaries:
+            if summary['status'] in ['Pending', 'Approved', 'Credited']:
+                payroll_snapshot.freeze_batch(
+                    summary['batch_number'],
+                    summary['cutoff'],
+                    summary['cutoff_month'],
+                    summary['cutoff_year'],
+                    summary['assigned_office'],
+                )
+        log("Froze submitted payrolls")
+
+    batch_status.rebuild(pay_periods=[pay_period_key(year, month, cutoff) for cutoff, month, year in period_list])
+    log("Rebuilt batch status counters")
+
+    return {
+        'offices': office_codes,
+        'periods': period_list,
+        'batches': batch_summaries,
+        'employee_ids': [employee.id for employee in employee_rows],
+        'counts': writer.counts,
+    }
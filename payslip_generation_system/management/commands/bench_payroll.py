@@ -0,0 +1,63 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from payslip_generation_system.factories import seed_payroll_dataset
+from payslip_generation_system.services import payroll_bench
+
+class Command(BaseCommand):
+    help = 'Benchmark the payroll endpoints (wall time, SQL count / time) on a seeded throwaway database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--offices', type=int, default=2)
+        parser.add_argument('--batches', type=int, default=4)
+        parser.add_argument('--employees', type=int, default=200)
+        parser.add_argument('--adjustments', type=int, default=8, help='Adjustments per employee per period')
+        parser.add_argument('--periods', type=int, default=3)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--endpoint', action='append', dest='endpoints', help='Only run this endpoint (repeatable)')
+        parser.add_argument('--no-budgets', action='store_true', help='Do not fail when a query budget is exceeded')
+
+    def handle(self, *args, **options):
+        # The benchmark never touches the configured database
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+
+        try:
+            self.stdout.write('Seeding payroll dataset...')
+            dataset = seed_payroll_dataset(
+                offices=options['offices'],
+                batches=options['batches'],
+                employees=options['employees'],
+                adjustments=options['adjustments'],
+                periods=options['periods'],
+                seed=options['seed'],
+            )
+            self.stdout.write(
+                f"{len(dataset['offices'])} offices, {len(dataset['batches'])} batch periods, "
+                f"{len(dataset['employee_ids'])} employees"
+            )
+
+            results = payroll_bench.run_benchmark(dataset, repeat=options['repeat'], names=options['endpoints'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        self.stdout.write('')
+        self.stdout.write(
+            f"{'endpoint':<20} {'status':>6} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} "
+            f"{'queries':>8} {'budget':>7} {'sql ms':>9}"
+        )
+        for result in results:
+            line = (
+                f"{result['name']:<20} {result['status']:>6} {result['wall_ms']:>9.1f} {result['p50_ms']:>9.1f} "
+                f"{result['p95_ms']:>9.1f} {result['queries']:>8} {str(result['budget'] or '-'):>7} {result['sql_ms']:>9.1f}"
+            )
+            self.stdout.write(self.style.ERROR(line) if result['over_budget'] else line)
+
+        over_budget = [result['name'] for result in results if result['over_budget']]
+        if over_budget and not options['no_budgets']:
+            raise CommandError(f"Query budget exceeded: {', '.join(over_budget)}")
+
+        self.stdout.write(self.style.SUCCESS('Payroll benchmark complete.'))
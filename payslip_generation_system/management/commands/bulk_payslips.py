@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+from payslip_generation_system.pay_period import pay_period_key
+from payslip_generation_system.services import payslip_bundle
+
+class Command(BaseCommand):
+    help = 'Write the payslips of a batch, an office or some employees for a payroll period to a ZIP file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cutoff', required=True, help='1st or 2nd')
+        parser.add_argument('--month', required=True, help='Month name (e.g. March)')
+        parser.add_argument('--year', required=True)
+        parser.add_argument('--batch', type=int, dest='batch_number')
+        parser.add_argument('--office', dest='assigned_office')
+        parser.add_argument('--employee', type=int, action='append', dest='employee_ids', help='Employee id (repeatable)')
+        parser.add_argument('--format', choices=payslip_bundle.FORMATS, default='html')
+        parser.add_argument('--workers', type=int, default=payslip_bundle.default_workers(), help='Render processes (0: render in this process)')
+        parser.add_argument('--output', help='ZIP file (default: the download file name)')
+
+    def handle(self, *args, **options):
+        period = (options['cutoff'], options['month'], options['year'])
+        if pay_period_key(options['year'], options['month'], options['cutoff']) is None:
+            raise CommandError('Invalid payroll period')
+        if options['format'] == 'pdf' and not payslip_bundle.pdf_available():
+            raise CommandError('PDF payslips need WeasyPrint (pip install weasyprint)')
+        if options['batch_number'] is None and not options['assigned_office'] and not options['employee_ids']:
+            raise CommandError('Give --batch, --office or --employee')
+
+        employees = payslip_bundle.bundle_employees(
+            *period, options['assigned_office'], options['batch_number'], options['employee_ids']
+        )
+        jobs = payslip_bundle.payslip_jobs(employees, *period, options['format'])
+        if not jobs:
+            raise CommandError('No payslips for this selection')
+
+        output = options['output'] or payslip_bundle.file_name(*period, options['assigned_office'], options['batch_number'])
+        with open(output, 'wb') as bundle:
+            for chunk in payslip_bundle.stream(jobs, workers=options['workers']):
+                bundle.write(chunk)
+
+        self.stdout.write(self.style.SUCCESS(f'{len(jobs)} payslips written to {output}'))
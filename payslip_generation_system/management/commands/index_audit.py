@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+from payslip_generation_system.services import index_audit
+
+class Command(BaseCommand):
+    help = 'EXPLAIN the queries behind the main payroll endpoints and flag full scans / filesorts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verbose-plan', action='store_true', help='Print the full plan of every query')
+        parser.add_argument('--report-only', action='store_true', help='Do not fail when a query is flagged')
+
+    def handle(self, *args, **options):
+        results = index_audit.run_audit()
+        if not results:
+            raise CommandError('No batch assignments to audit, seed the database first (seed_employees).')
+
+        flagged = []
+        for result in results:
+            if result['flags']:
+                flagged.append(result['name'])
+                self.stdout.write(self.style.ERROR(f"FLAG {result['name']}"))
+                for flag, detail in result['flags']:
+                    self.stdout.write(f"    {flag}: {detail}")
+            else:
+                self.stdout.write(self.style.SUCCESS(f"OK   {result['name']}"))
+
+            for flag, detail in result['allowed']:
+                self.stdout.write(f"    (expected {flag}: {detail})")
+
+            if options['verbose_plan']:
+                for row in result['plan']:
+                    self.stdout.write(f"    {row}")
+
+        if flagged and not options['report_only']:
+            raise CommandError(f"{len(flagged)} queries need an index: {', '.join(flagged)}")
+
+        self.stdout.write(self.style.SUCCESS(f"Audited {len(results)} queries."))
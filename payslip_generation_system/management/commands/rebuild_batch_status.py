@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+from payslip_generation_system.services import batch_status
+from payslip_generation_system.pay_period import pay_period_key
+
+class Command(BaseCommand):
+    help = 'Recompute the batch status counters from the adjustments and batch assignments'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--period', action='append', dest='periods',
+            help='Only this payroll period, e.g. "1st March 2025" (repeatable, every period when omitted)'
+        )
+
+    def handle(self, *args, **options):
+        pay_periods = None
+        if options['periods']:
+            pay_periods = []
+            for period in options['periods']:
+                parts = period.split()
+                key = pay_period_key(parts[2], parts[1], parts[0]) if len(parts) == 3 else None
+                if key is None:
+                    raise CommandError(f'Invalid period "{period}", expected e.g. "1st March 2025"')
+                pay_periods.append(key)
+
+        count = batch_status.rebuild(pay_periods=pay_periods)
+        self.stdout.write(self.style.SUCCESS(f'Batch status counters rebuilt: {count} batches.'))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from payslip_generation_system.services import employee_search
+
+class Command(BaseCommand):
+    help = 'Rebuild the employee directory search index (after bulk imports or direct SQL edits)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--employee', type=int, action='append', dest='employee_ids', help='Only this employee id (repeatable)')
+        parser.add_argument('--chunk-size', type=int, default=employee_search.CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        count = employee_search.reindex(options['employee_ids'], chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'Employee search index rebuilt: {count} employees.'))
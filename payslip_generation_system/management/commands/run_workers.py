@@ -0,0 +1,50 @@
+import multiprocessing
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+def work_process(once, poll):
+    # Entry point of a worker process. Imports after django.setup(): with the spawn start
+    # method (Windows) the process starts from a bare interpreter.
+    import django
+    django.setup()
+    from payslip_generation_system.services import jobs
+    jobs.work(once=once, poll=poll)
+
+class Command(BaseCommand):
+    help = 'Run the background job workers (queued payroll operations); one run_workers per host'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2, help='Worker processes (1: run in this process)')
+        parser.add_argument('--poll', type=float, default=2, help='Seconds between queue checks when idle')
+        parser.add_argument('--once', action='store_true', help='Stop when the queue is empty')
+
+    def handle(self, *args, **options):
+        from payslip_generation_system.services import jobs
+
+        # Jobs of a previous run_workers on this host that was stopped mid-job
+        requeued = jobs.requeue_orphans()
+        if requeued:
+            self.stdout.write(f'{requeued} interrupted jobs queued again.')
+
+        if options['workers'] <= 1:
+            count = jobs.work(once=options['once'], poll=options['poll'])
+            self.stdout.write(self.style.SUCCESS(f'{count} jobs run.'))
+            return
+
+        # Forked workers must not share this process's database connection
+        connections.close_all()
+        processes = [
+            multiprocessing.Process(target=work_process, args=(options['once'], options['poll']), daemon=True)
+            for _ in range(options['workers'])
+        ]
+        for process in processes:
+            process.start()
+        self.stdout.write(f"{options['workers']} workers started.")
+
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            for process in processes:
+                process.terminate()
+        self.stdout.write(self.style.SUCCESS('Workers stopped.'))
@@ -1,36 +1,51 @@
-from django.core.management.base import BaseCommand
-from payslip_generation_system.factories import EmployeeFactory, BatchFactory
+import time
+from django.core.management.base import BaseCommand, CommandError
+from payslip_generation_system.factories import seed_payroll_dataset
 
 class Command(BaseCommand):
-    help = 'Seed the database with dummy employee data -Shashimii'
+    help = 'Seed the database with dummy employee / payroll data (bulk, chunked) -Shashimii'
 
     def add_arguments(self, parser):
-        parser.add_argument('--total', type=int, default=100)
+        parser.add_argument('--total', type=int, default=100, help='Employees')
         parser.add_argument('--batches', type=int, default=10)
+        parser.add_argument('--offices', type=int, default=6)
+        parser.add_argument('--years', type=int, default=1, help='Years of cutoffs ending with the current cutoff')
+        parser.add_argument('--periods', type=int, default=None, help='Cutoffs to generate (overrides --years)')
+        parser.add_argument('--adjustments', type=int, default=8, help='Adjustments per employee per cutoff')
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Rows per bulk insert / transaction')
+        parser.add_argument('--seed', type=int, default=1, help='Random seed (same seed, same data)')
+        parser.add_argument('--users', action='store_true', help='Create an employee login account per employee')
+        parser.add_argument('--password', default='password', help='Password of the seeded employee accounts')
+        parser.add_argument('--no-freeze', action='store_true', help='Do not freeze the payroll of submitted batches')
+        parser.add_argument('--quiet', action='store_true')
 
     def handle(self, *args, **kwargs):
         total_employees = kwargs['total']
         total_batches = kwargs['batches']
-        
-        self.stdout.write(f'Creating {total_batches} batches...')
-        
-        # Create batches first
-        batches = []
-        for _ in range(total_batches):
-            batch = BatchFactory.create()
-            batches.append(batch)
-            self.stdout.write(f'Created batch: {batch}')
-        
-        self.stdout.write(f'Seeding {total_employees} employees...')
+        periods = kwargs['periods'] if kwargs['periods'] is not None else kwargs['years'] * 24
 
-        # Create employees with batch numbers and matching assigned offices
-        for i in range(total_employees):
-            # Assign employees to batches in a round-robin fashion
-            batch_index = i % len(batches)
-            selected_batch = batches[batch_index]
-            
-            # Use create_with_batch to ensure office alignment
-            employee = EmployeeFactory.create_with_batch(batch=selected_batch)
-            self.stdout.write(f'Created employee: {employee.fullname} (Batch #{employee.batch_number}, Office: {employee.assigned_office})')
+        if total_batches < 1 or total_employees < 1 or periods < 1:
+            raise CommandError('--total, --batches and --years/--periods must be at least 1.')
 
-        self.stdout.write(self.style.SUCCESS(f'Successfully seeded {total_employees} employees across {total_batches} batches.'))
+        log = None if kwargs['quiet'] else self.stdout.write
+        started = time.perf_counter()
+
+        dataset = seed_payroll_dataset(
+            offices=kwargs['offices'],
+            batches=total_batches,
+            employees=total_employees,
+            adjustments=kwargs['adjustments'],
+            periods=periods,
+            seed=kwargs['seed'],
+            freeze=not kwargs['no_freeze'],
+            users=kwargs['users'],
+            password=kwargs['password'],
+            chunk_size=kwargs['chunk_size'],
+            log=log,
+        )
+
+        counts = ', '.join(f"{count} {name}" for name, count in dataset['counts'].items())
+        self.stdout.write(self.style.SUCCESS(
+            f"Successfully seeded {total_employees} employees across {total_batches} batches "
+            f"and {periods} cutoffs in {time.perf_counter() - started:.1f}s ({counts})."
+        ))
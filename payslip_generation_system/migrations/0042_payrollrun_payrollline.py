@@ -0,0 +1,76 @@
+# Generated by Django 4.2 on 2026-10-17 20:53
+
+from django.conf import settings
+import django.core.serializers.json
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('payslip_generation_system', '0041_alter_batch_batch_name_alter_batch_unique_together'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PayrollRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('batch_number', models.IntegerField()),
+                ('cutoff_month', models.CharField(choices=[('January', 'January'), ('February', 'February'), ('March', 'March'), ('April', 'April'), ('May', 'May'), ('June', 'June'), ('July', 'July'), ('August', 'August'), ('September', 'September'), ('October', 'October'), ('November', 'November'), ('December', 'December')], max_length=20)),
+                ('cutoff', models.CharField(choices=[('1st', '1st'), ('2nd', '2nd')], max_length=10)),
+                ('cutoff_year', models.CharField(max_length=50)),
+                ('assigned_office', models.CharField(blank=True, max_length=100, null=True)),
+                ('batch_name', models.CharField(blank=True, max_length=100, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('submitted_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('batch_number', 'cutoff', 'cutoff_month', 'cutoff_year', 'assigned_office')},
+            },
+        ),
+        migrations.CreateModel(
+            name='PayrollLine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('line_number', models.IntegerField(default=0)),
+                ('employee_number', models.CharField(max_length=50)),
+                ('fullname', models.CharField(max_length=255)),
+                ('position', models.CharField(max_length=100)),
+                ('salary', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('tax_declaration', models.CharField(max_length=3)),
+                ('has_philhealth', models.CharField(max_length=100)),
+                ('late_assigned', models.CharField(blank=True, max_length=10, null=True)),
+                ('removed', models.CharField(blank=True, max_length=10, null=True)),
+                ('previous_batch', models.IntegerField(blank=True, null=True)),
+                ('previous_batch_submitted', models.BooleanField(default=False)),
+                ('has_adjustments', models.BooleanField(default=True)),
+                ('basic_salary_cutoff', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('late_amount', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('late_minutes', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('absent_amount', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('absent_minutes', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('other_deductions', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('income', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('total_gross_amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('tax_deduction', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('philhealth', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('philhealth_previous', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('ewt', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('sss', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('total_deductions', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('net_salary', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('incomes', models.JSONField(default=list, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('deductions', models.JSONField(default=list, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('adjustments', models.JSONField(default=list, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='payroll_lines', to='payslip_generation_system.employee')),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lines', to='payslip_generation_system.payrollrun')),
+            ],
+            options={
+                'ordering': ['run', 'line_number'],
+                'unique_together': {('run', 'employee')},
+            },
+        ),
+    ]
@@ -0,0 +1,98 @@
+# Generated by Django 4.2 on 2026-10-17 21:04
+
+from django.db import migrations, models
+from django.db.models import Case, When, Value, IntegerField, Max
+from django.db.models.functions import Cast
+
+MONTHS = [
+    'January', 'February', 'March', 'April', 'May', 'June',
+    'July', 'August', 'September', 'October', 'November', 'December',
+]
+
+CHUNK_SIZE = 10000
+
+
+def pay_period_expression(month_field):
+    # year * 100 + (month - 1) * 2 + cutoff, computed by the database
+    month_offset = Case(
+        *[When(**{month_field: month}, then=Value(index * 2)) for index, month in enumerate(MONTHS)],
+        output_field=IntegerField(),
+    )
+    cutoff_offset = Case(When(cutoff='2nd', then=Value(1)), default=Value(0), output_field=IntegerField())
+    return Cast('cutoff_year', IntegerField()) * 100 + month_offset + cutoff_offset
+
+
+def backfill_pay_period(apps, schema_editor):
+    # One UPDATE per id range so big tables are not locked in a single statement
+    for model_name, month_field in [
+        ('Adjustment', 'month'),
+        ('BatchAssignment', 'cutoff_month'),
+        ('ReturnRemark', 'cutoff_month'),
+    ]:
+        model = apps.get_model('payslip_generation_system', model_name)
+        last_id = model.objects.aggregate(last=Max('id'))['last'] or 0
+        expression = pay_period_expression(month_field)
+        for start in range(0, last_id + 1, CHUNK_SIZE):
+            (
+                model.objects
+                .filter(id__gte=start, id__lt=start + CHUNK_SIZE, pay_period__isnull=True)
+                .filter(**{f"{month_field}__in": MONTHS}, cutoff__in=['1st', '2nd'], cutoff_year__regex=r'^[0-9]{4}$')
+                .update(pay_period=expression)
+            )
+
+
+class Migration(migrations.Migration):
+    # Backfill chunks commit one by one
+    atomic = False
+
+    dependencies = [
+        ('payslip_generation_system', '0042_payrollrun_payrollline'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='batchassignment',
+            options={'ordering': ['pay_period', 'assigned_office', 'batch_number', 'late_assigned', 'previous_batch']},
+        ),
+        migrations.AlterModelOptions(
+            name='returnremark',
+            options={'ordering': ['remark', 'pay_period', 'batch_number']},
+        ),
+        migrations.AddField(
+            model_name='adjustment',
+            name='pay_period',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='batchassignment',
+            name='pay_period',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='returnremark',
+            name='pay_period',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_pay_period, migrations.RunPython.noop),
+        # Payroll indexes, built once on the backfilled key
+        migrations.AddIndex(
+            model_name='adjustment',
+            index=models.Index(fields=['employee', 'pay_period', 'status'], name='adj_employee_period_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='adjustment',
+            index=models.Index(fields=['batch_number', 'pay_period', 'assigned_office', 'status'], name='adj_batch_period_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='adjustment',
+            index=models.Index(fields=['status', 'pay_period', 'assigned_office'], name='adj_status_period_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='batchassignment',
+            index=models.Index(fields=['pay_period', 'assigned_office', 'batch_number', 'late_assigned', 'previous_batch'], name='ba_period_batch_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='returnremark',
+            index=models.Index(fields=['batch_number', 'pay_period', 'assigned_office'], name='remark_batch_period_idx'),
+        ),
+    ]
@@ -0,0 +1,93 @@
+# Generated by Django 4.2 on 2026-10-17 21:15
+
+from django.db import migrations, models
+from django.db.models import Count
+
+STATUS_FIELDS = {
+    'Waiting': 'waiting',
+    'Pending': 'pending',
+    'Approved': 'approved',
+    'Returned': 'returned',
+    'Credited': 'credited',
+}
+
+
+def backfill_batch_status(apps, schema_editor):
+    # Counters of every (office, period, batch) from two grouped queries
+    Adjustment = apps.get_model('payslip_generation_system', 'Adjustment')
+    BatchAssignment = apps.get_model('payslip_generation_system', 'BatchAssignment')
+    BatchStatus = apps.get_model('payslip_generation_system', 'BatchStatus')
+
+    statuses = {}
+
+    def status_for(row):
+        key = (row['assigned_office'], row['pay_period'], row['batch_number'])
+        if key not in statuses:
+            statuses[key] = BatchStatus(assigned_office=key[0], pay_period=key[1], batch_number=key[2])
+        return statuses[key]
+
+    adjustments = Adjustment.objects.filter(pay_period__isnull=False, batch_number__isnull=False).values(
+        'assigned_office', 'pay_period', 'batch_number', 'status'
+    ).annotate(count=Count('id')).order_by()
+    for row in adjustments:
+        status = status_for(row)
+        status.total_adjustments += row['count']
+        if row['status'] in STATUS_FIELDS:
+            field = STATUS_FIELDS[row['status']]
+            setattr(status, field, getattr(status, field) + row['count'])
+
+    assignments = BatchAssignment.objects.filter(pay_period__isnull=False).values(
+        'assigned_office', 'pay_period', 'batch_number'
+    ).annotate(count=Count('id')).order_by()
+    for row in assignments:
+        status_for(row).assignments = row['count']
+
+    last_batches = {}
+    for (office, pay_period, batch_number), status in statuses.items():
+        if status.assignments:
+            last_batches[(office, pay_period)] = max(batch_number, last_batches.get((office, pay_period), batch_number))
+    for (office, pay_period, batch_number), status in statuses.items():
+        status.is_last_batch = last_batches.get((office, pay_period)) == batch_number
+
+    BatchStatus.objects.bulk_create(statuses.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payslip_generation_system', '0044_pay_period'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BatchStatus',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('assigned_office', models.CharField(blank=True, max_length=100, null=True)),
+                ('pay_period', models.IntegerField()),
+                ('batch_number', models.BigIntegerField()),
+                ('assignments', models.IntegerField(default=0)),
+                ('total_adjustments', models.IntegerField(default=0)),
+                ('waiting', models.IntegerField(default=0)),
+                ('pending', models.IntegerField(default=0)),
+                ('approved', models.IntegerField(default=0)),
+                ('returned', models.IntegerField(default=0)),
+                ('credited', models.IntegerField(default=0)),
+                ('is_last_batch', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Batch Status',
+                'verbose_name_plural': 'Batch Statuses',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='batchstatus',
+            index=models.Index(fields=['pending', 'pay_period'], name='batch_status_pending_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='batchstatus',
+            unique_together={('pay_period', 'assigned_office', 'batch_number')},
+        ),
+        migrations.RunPython(backfill_batch_status, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2 on 2026-10-17 21:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payslip_generation_system', '0045_batch_status'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['employee_number', 'id'], name='emp_number_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['fullname', 'id'], name='emp_fullname_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['assigned_office', 'employee_number', 'id'], name='emp_office_number_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['assigned_office', 'fullname', 'id'], name='emp_office_fullname_idx'),
+        ),
+    ]
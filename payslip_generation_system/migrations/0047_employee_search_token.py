@@ -0,0 +1,50 @@
+# Generated by Django 4.2 on 2026-10-17 21:24
+
+from django.db import migrations, models
+import django.db.models.deletion
+from payslip_generation_system.services.employee_search import employee_tokens
+
+
+def backfill_search_tokens(apps, schema_editor):
+    # Tokens of every existing employee, in chunks
+    Employee = apps.get_model('payslip_generation_system', 'Employee')
+    EmployeeSearchToken = apps.get_model('payslip_generation_system', 'EmployeeSearchToken')
+
+    last_id = 0
+    while True:
+        employees = list(Employee.objects.filter(id__gt=last_id).order_by('id')[:1000])
+        if not employees:
+            break
+        EmployeeSearchToken.objects.bulk_create([
+            EmployeeSearchToken(employee_id=employee.id, token=token)
+            for employee in employees
+            for token in employee_tokens(employee)
+        ], batch_size=1000)
+        last_id = employees[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payslip_generation_system', '0046_employee_directory_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmployeeSearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=64)),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to='payslip_generation_system.employee')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='employeesearchtoken',
+            index=models.Index(fields=['token', 'employee'], name='emp_search_token_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='employeesearchtoken',
+            unique_together={('employee', 'token')},
+        ),
+        migrations.RunPython(backfill_search_tokens, migrations.RunPython.noop),
+    ]
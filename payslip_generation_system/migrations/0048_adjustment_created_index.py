@@ -0,0 +1,17 @@
+# Generated by Django 4.2 on 2026-10-17 21:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payslip_generation_system', '0047_employee_search_token'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='adjustment',
+            index=models.Index(fields=['employee', 'created_at'], name='adj_employee_created_idx'),
+        ),
+    ]
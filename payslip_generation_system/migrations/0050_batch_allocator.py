@@ -0,0 +1,22 @@
+# Generated by Django 4.2 on 2026-10-17 21:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payslip_generation_system', '0049_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BatchAllocator',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(max_length=150, unique=True)),
+                ('last_number', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
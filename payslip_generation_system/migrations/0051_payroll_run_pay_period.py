@@ -0,0 +1,43 @@
+# Generated by Django 4.2 on 2026-10-17 22:04
+
+from django.db import migrations, models
+
+MONTHS = [
+    'January', 'February', 'March', 'April', 'May', 'June',
+    'July', 'August', 'September', 'October', 'November', 'December',
+]
+
+CUTOFFS = ['1st', '2nd']
+
+
+def backfill_pay_period(apps, schema_editor):
+    # One UPDATE per period: runs are one per submitted batch
+    PayrollRun = apps.get_model('payslip_generation_system', 'PayrollRun')
+    periods = PayrollRun.objects.values_list('cutoff_year', 'cutoff_month', 'cutoff').distinct().order_by()
+    for cutoff_year, cutoff_month, cutoff in periods:
+        if cutoff_month not in MONTHS or cutoff not in CUTOFFS or not str(cutoff_year).isdigit():
+            continue
+        key = int(cutoff_year) * 100 + MONTHS.index(cutoff_month) * 2 + CUTOFFS.index(cutoff)
+        PayrollRun.objects.filter(
+            cutoff_year=cutoff_year, cutoff_month=cutoff_month, cutoff=cutoff,
+        ).update(pay_period=key)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payslip_generation_system', '0050_batch_allocator'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payrollrun',
+            name='pay_period',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_pay_period, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='payrollrun',
+            unique_together={('pay_period', 'assigned_office', 'batch_number')},
+        ),
+    ]
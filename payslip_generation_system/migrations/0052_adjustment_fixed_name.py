@@ -0,0 +1,105 @@
+# Generated by Django 4.2 on 2026-10-17 22:07
+
+from django.db import migrations, models
+from django.db.models import Count, F
+
+FIXED_NAMES = ['Late', 'Absent', 'Philhealth', 'SSS', 'TAX']
+
+STATUS_FIELDS = {
+    'Waiting': 'waiting',
+    'Pending': 'pending',
+    'Approved': 'approved',
+    'Returned': 'returned',
+    'Credited': 'credited',
+}
+
+
+# Duplicates the migration may delete: not yet submitted, nothing paid from them
+DRAFT_STATUSES = ['Waiting', 'Returned']
+
+
+def remove_duplicate_fixed_deductions(apps, schema_editor):
+    # Older saves could leave two rows of a fixed deduction for an employee and period. Drafts
+    # (Waiting / Returned) are deleted and taken off their batch status counters, keeping the
+    # submitted row, or the first row when every row is a draft. Two submitted rows are payroll
+    # history: the migration stops and lists them, to be resolved by hand.
+    Adjustment = apps.get_model('payslip_generation_system', 'Adjustment')
+    BatchStatus = apps.get_model('payslip_generation_system', 'BatchStatus')
+
+    groups = (
+        Adjustment.objects
+        .filter(name__in=FIXED_NAMES, pay_period__isnull=False)
+        .values('employee_id', 'pay_period', 'name')
+        .annotate(count=Count('id'))
+        .filter(count__gt=1)
+        .order_by()
+    )
+
+    deleted_ids = []
+    conflicts = []
+    for group in groups:
+        rows = list(
+            Adjustment.objects.filter(
+                employee_id=group['employee_id'], pay_period=group['pay_period'], name=group['name'],
+            ).order_by('id').values('id', 'status', 'assigned_office', 'batch_number')
+        )
+        submitted = [row for row in rows if row['status'] not in DRAFT_STATUSES]
+        if len(submitted) > 1:
+            conflicts.append((group, submitted))
+            continue
+        kept = submitted[0] if submitted else rows[0]
+        deleted_ids.extend(row['id'] for row in rows if row['id'] != kept['id'])
+
+    if conflicts:
+        lines = [
+            f"employee {group['employee_id']}, pay period {group['pay_period']}, {group['name']}: "
+            + ', '.join(f"#{row['id']} {row['status']} ({row['assigned_office']}, batch {row['batch_number']})" for row in rows)
+            for group, rows in conflicts
+        ]
+        raise RuntimeError(
+            'Fixed deductions submitted more than once for the same employee and pay period; '
+            'delete or rename the extra rows, then migrate again:\n' + '\n'.join(lines)
+        )
+
+    duplicates = Adjustment.objects.filter(id__in=deleted_ids)
+    removed = duplicates.values('assigned_office', 'pay_period', 'batch_number', 'status').annotate(count=Count('id')).order_by()
+    for row in removed:
+        status = BatchStatus.objects.filter(
+            assigned_office=row['assigned_office'],
+            pay_period=row['pay_period'],
+            batch_number=row['batch_number'],
+        ).first()
+        if status is None:
+            continue
+        status.total_adjustments = max(status.total_adjustments - row['count'], 0)
+        field = STATUS_FIELDS.get(row['status'])
+        if field:
+            setattr(status, field, max(getattr(status, field) - row['count'], 0))
+        status.save()
+    duplicates.delete()
+
+
+def fill_fixed_name(apps, schema_editor):
+    Adjustment = apps.get_model('payslip_generation_system', 'Adjustment')
+    Adjustment.objects.filter(name__in=FIXED_NAMES).update(fixed_name=F('name'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payslip_generation_system', '0051_payroll_run_pay_period'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_fixed_deductions, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='adjustment',
+            name='fixed_name',
+            field=models.CharField(blank=True, editable=False, max_length=20, null=True),
+        ),
+        migrations.RunPython(fill_fixed_name, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='adjustment',
+            constraint=models.UniqueConstraint(fields=('employee', 'pay_period', 'fixed_name'), name='adj_fixed_name_unique'),
+        ),
+    ]
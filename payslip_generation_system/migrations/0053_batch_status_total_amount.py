@@ -0,0 +1,41 @@
+# Generated by Django 4.2 on 2026-10-17 22:10
+
+from django.db import migrations, models
+from django.db.models import Sum
+
+CHUNK_SIZE = 1000
+
+
+def backfill_total_amount(apps, schema_editor):
+    # Amount totals of every (office, period, batch) from one grouped query
+    Adjustment = apps.get_model('payslip_generation_system', 'Adjustment')
+    BatchStatus = apps.get_model('payslip_generation_system', 'BatchStatus')
+
+    totals = {
+        (row['assigned_office'], row['pay_period'], row['batch_number']): row['amount']
+        for row in Adjustment.objects.filter(pay_period__isnull=False, batch_number__isnull=False).values(
+            'assigned_office', 'pay_period', 'batch_number'
+        ).annotate(amount=Sum('amount')).order_by()
+    }
+
+    statuses = []
+    for status in BatchStatus.objects.all().iterator(chunk_size=CHUNK_SIZE):
+        status.total_amount = totals.get((status.assigned_office, status.pay_period, status.batch_number)) or 0
+        statuses.append(status)
+    BatchStatus.objects.bulk_update(statuses, ['total_amount'], batch_size=CHUNK_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payslip_generation_system', '0052_adjustment_fixed_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='batchstatus',
+            name='total_amount',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=14),
+        ),
+        migrations.RunPython(backfill_total_amount, migrations.RunPython.noop),
+    ]
@@ -5,4 +5,10 @@ from .adjustment import Adjustment
 from .batch_assignment import BatchAssignment
 from .return_remark import ReturnRemark
 from .returned_adjustment import ReturnedAdjustment
-from .batch import Batch
\ No newline at end of file
+from .batch import Batch
+from .payroll_run import PayrollRun
+from .payroll_run import PayrollLine
+from .batch_status import BatchStatus
+from .employee_search_token import EmployeeSearchToken
+from .job import Job
+from .batch_allocator import BatchAllocator
\ No newline at end of file
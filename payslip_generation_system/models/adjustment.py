@@ -1,6 +1,7 @@
 from django.utils.timezone import now
 from django.db import models
 from payslip_generation_system.models import Employee
+from payslip_generation_system.pay_period import pay_period_key
 
 class Adjustment(models.Model):
     employee = models.ForeignKey(Employee, on_delete=models.CASCADE)
@@ -45,6 +46,17 @@ class Adjustment(models.Model):
     # Store Year
     cutoff_year = models.CharField(max_length=50)
 
+    # Integer key of (cutoff_year, month, cutoff), set on save (see pay_period.py)
+    pay_period = models.IntegerField(null=True, blank=True, editable=False)
+
+    # Fixed deductions: one row per employee and period
+    FIXED_NAMES = ['Late', 'Absent', 'Philhealth', 'SSS', 'TAX']
+
+    # name of a fixed deduction, NULL for any other line: the unique constraint below then only
+    # applies to fixed deductions (NULLs never collide), without the partial index MySQL lacks.
+    # Set on save; bulk writers set it themselves.
+    fixed_name = models.CharField(max_length=20, null=True, blank=True, editable=False)
+
     # Status Pending / Approved / Returned / Credited
     STATUS_CHOICES = [
         ('Pending', 'Pending'),
@@ -67,9 +79,34 @@ class Adjustment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    def save(self, *args, **kwargs):
+        self.pay_period = pay_period_key(self.cutoff_year, self.month, self.cutoff)
+        self.fixed_name = self.fixed_name_for(self.name)
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def fixed_name_for(cls, name):
+        """
+        fixed_name of a row named name
+        """
+        return name if name in cls.FIXED_NAMES else None
+
     def __str__(self):
         return self.name
 
     class Meta:
         verbose_name = 'Adjustment'
         verbose_name_plural = 'Adjustments'
+        indexes = [
+            # Employee payslip / payroll totals: employee + period (+ status)
+            models.Index(fields=['employee', 'pay_period', 'status'], name='adj_employee_period_idx'),
+            # Employee adjustment history: created date ranges / ordering (payslip.adjustment_data)
+            models.Index(fields=['employee', 'created_at'], name='adj_employee_created_idx'),
+            # Batch workflow (submit, approve, reject, release, batch flags): batch + period + office (+ status)
+            models.Index(fields=['batch_number', 'pay_period', 'assigned_office', 'status'], name='adj_batch_period_idx'),
+            # Pending / approved lists: status first, grouped by period and office
+            models.Index(fields=['status', 'pay_period', 'assigned_office'], name='adj_status_period_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['employee', 'pay_period', 'fixed_name'], name='adj_fixed_name_unique'),
+        ]
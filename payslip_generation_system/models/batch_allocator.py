@@ -0,0 +1,16 @@
+from django.db import models
+
+# Batch allocator
+# One row per allocation scope (the Batch.batch_number sequence, or an office's batch
+# assignments for one pay period), locked while a batch number or batch slot is handed out
+# (see services.batch_allocator).
+class BatchAllocator(models.Model):
+    scope = models.CharField(max_length=150, unique=True)
+
+    # Last Batch.batch_number handed out (batch scope; period rows are only locked)
+    last_number = models.BigIntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.scope} (#{self.last_number})"
@@ -1,5 +1,6 @@
 from django.db import models
 from .employee import Employee
+from payslip_generation_system.pay_period import pay_period_key
 
 class BatchAssignment(models.Model):
     employee = models.ForeignKey(
@@ -36,6 +37,9 @@ class BatchAssignment(models.Model):
 
     cutoff_year = models.CharField(max_length=50)  
 
+    # Integer key of (cutoff_year, cutoff_month, cutoff), set on save (see pay_period.py)
+    pay_period = models.IntegerField(null=True, blank=True, editable=False)
+
     ASSIGNED_OFFICE_CHOICES = [
         ('denr_ncr_nec', 'DENR NCR NEC'),
         ('denr_ncr_prcmo', 'DENR NCR PRCMO'),
@@ -58,7 +62,18 @@ class BatchAssignment(models.Model):
 
     class Meta:
         unique_together = ['employee', 'cutoff', 'cutoff_month', 'cutoff_year']
-        ordering = ['cutoff_year', 'cutoff_month', 'cutoff', 'assigned_office', 'batch_number', 'late_assigned', 'previous_batch']
+        ordering = ['pay_period', 'assigned_office', 'batch_number', 'late_assigned', 'previous_batch']
+        indexes = [
+            # Batch lookups by period + office + batch, in the default ordering so it needs no sort
+            models.Index(
+                fields=['pay_period', 'assigned_office', 'batch_number', 'late_assigned', 'previous_batch'],
+                name='ba_period_batch_idx'
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.pay_period = pay_period_key(self.cutoff_year, self.cutoff_month, self.cutoff)
+        super().save(*args, **kwargs)
     
     def __str__(self):
         return f"{self.employee.fullname} - Batch {self.batch_number} ({self.cutoff_month} {self.cutoff}, {self.cutoff_year}) - {self.assigned_office}"
\ No newline at end of file
@@ -0,0 +1,44 @@
+from django.db import models
+
+# Workflow counters of one batch in one payroll period and office
+# Denormalized from Adjustment / BatchAssignment and kept current by services.batch_status
+# in the same transaction as every status or membership change, so the batch flags
+# (pending / approved / credited, approval status, last batch) are one lookup.
+class BatchStatus(models.Model):
+    assigned_office = models.CharField(max_length=100, blank=True, null=True)
+
+    # Integer key of the payroll period (see pay_period.py)
+    pay_period = models.IntegerField()
+
+    batch_number = models.BigIntegerField()
+
+    # BatchAssignment rows of the batch
+    assignments = models.IntegerField(default=0)
+
+    # Adjustments of the batch, in total and per status
+    total_adjustments = models.IntegerField(default=0)
+    waiting = models.IntegerField(default=0)
+    pending = models.IntegerField(default=0)
+    approved = models.IntegerField(default=0)
+    returned = models.IntegerField(default=0)
+    credited = models.IntegerField(default=0)
+
+    # Sum of the adjustment amounts of the batch
+    total_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    # Highest batch number with assignments in the office for the period
+    is_last_batch = models.BooleanField(default=False)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.assigned_office} {self.pay_period} Batch {self.batch_number}"
+
+    class Meta:
+        verbose_name = 'Batch Status'
+        verbose_name_plural = 'Batch Statuses'
+        unique_together = ['pay_period', 'assigned_office', 'batch_number']
+        indexes = [
+            # Pending queue: batches with pending adjustments
+            models.Index(fields=['pending', 'pay_period'], name='batch_status_pending_idx'),
+        ]
@@ -73,6 +73,15 @@ class Employee(models.Model):
     
     def __str__(self):
         return f"{self.employee_number} - {self.fullname} - {self.position}"
+
+    class Meta:
+        indexes = [
+            # Employee directory keyset pages (see services.employee_directory), all offices / one office
+            models.Index(fields=['employee_number', 'id'], name='emp_number_idx'),
+            models.Index(fields=['fullname', 'id'], name='emp_fullname_idx'),
+            models.Index(fields=['assigned_office', 'employee_number', 'id'], name='emp_office_number_idx'),
+            models.Index(fields=['assigned_office', 'fullname', 'id'], name='emp_office_fullname_idx'),
+        ]
     
 # Attachments
 def generate_filename(instance, filename):
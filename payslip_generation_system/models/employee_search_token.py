@@ -0,0 +1,21 @@
+from django.db import models
+from .employee import Employee
+
+# Search index of the employee directory
+# One row per normalized word of an employee's searchable fields (see services.employee_search),
+# so a search is an index range scan on token instead of LIKE '%...%' over every column.
+class EmployeeSearchToken(models.Model):
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='search_tokens')
+
+    # Lowercase ASCII letters / digits only
+    token = models.CharField(max_length=64)
+
+    def __str__(self):
+        return f"{self.token} ({self.employee_id})"
+
+    class Meta:
+        unique_together = ['employee', 'token']
+        indexes = [
+            # Prefix / exact lookups: token range -> employee ids, without touching the table
+            models.Index(fields=['token', 'employee'], name='emp_search_token_idx'),
+        ]
@@ -0,0 +1,46 @@
+from django.db import models
+from django.contrib.auth.models import User
+from django.core.serializers.json import DjangoJSONEncoder
+
+# Background job
+# A long payroll operation queued by a request and run by the run_workers command
+# (see services.jobs); the UI polls its status, progress and result.
+class Job(models.Model):
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    ]
+
+    # Registered handler (services.jobs.HANDLERS) and its keyword arguments
+    kind = models.CharField(max_length=100)
+    params = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+
+    # Reported by the handler while it runs
+    progress = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(null=True, blank=True)
+    message = models.CharField(max_length=255, blank=True, default='')
+
+    result = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    error = models.TextField(blank=True, default='')
+
+    # Times the job was started, and the worker (host:pid) running it
+    attempts = models.PositiveIntegerField(default=0)
+    worker = models.CharField(max_length=100, blank=True, default='')
+
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Job {self.id} {self.kind} ({self.status})"
+
+    class Meta:
+        indexes = [
+            # Workers claim the oldest queued job
+            models.Index(fields=['status', 'id'], name='job_status_idx'),
+        ]
@@ -0,0 +1,113 @@
+from django.db import models
+from django.contrib.auth.models import User
+from django.core.serializers.json import DjangoJSONEncoder
+from payslip_generation_system.pay_period import pay_period_key
+from .employee import Employee
+
+# Frozen payroll of a submitted batch
+# Written once at submit, read by every payroll view after the batch leaves the Waiting state
+class PayrollRun(models.Model):
+    batch_number = models.IntegerField()
+
+    CUTOFF_MONTH_CHOICES = [
+        ('January', 'January'),
+        ('February', 'February'),
+        ('March', 'March'),
+        ('April', 'April'),
+        ('May', 'May'),
+        ('June', 'June'),
+        ('July', 'July'),
+        ('August', 'August'),
+        ('September', 'September'),
+        ('October', 'October'),
+        ('November', 'November'),
+        ('December', 'December'),
+    ]
+
+    cutoff_month = models.CharField(max_length=20, choices=CUTOFF_MONTH_CHOICES)
+
+    CUTOFF_PERIOD_CHOICES = [
+        ('1st', '1st'),
+        ('2nd', '2nd')
+    ]
+
+    cutoff = models.CharField(max_length=10, choices=CUTOFF_PERIOD_CHOICES)
+
+    cutoff_year = models.CharField(max_length=50)
+
+    # Integer key of (cutoff_year, cutoff_month, cutoff), set on save (see pay_period.py)
+    pay_period = models.IntegerField(null=True, blank=True, editable=False)
+
+    assigned_office = models.CharField(max_length=100, blank=True, null=True)
+
+    # Batch name at the time of submission
+    batch_name = models.CharField(max_length=100, blank=True, null=True)
+
+    # Preparator who submitted the batch
+    submitted_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ['pay_period', 'assigned_office', 'batch_number']
+
+    def save(self, *args, **kwargs):
+        self.pay_period = pay_period_key(self.cutoff_year, self.cutoff_month, self.cutoff)
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"Payroll Run Batch {self.batch_number} ({self.cutoff_month} {self.cutoff}, {self.cutoff_year}) - {self.assigned_office}"
+
+# One employee row of a frozen payroll run
+class PayrollLine(models.Model):
+    run = models.ForeignKey(PayrollRun, on_delete=models.CASCADE, related_name='lines')
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='payroll_lines')
+
+    # Row order on the payroll table (on time employees first, then late, by name)
+    line_number = models.IntegerField(default=0)
+
+    # Employee details at the time of submission
+    employee_number = models.CharField(max_length=50)
+    fullname = models.CharField(max_length=255)
+    position = models.CharField(max_length=100)
+    salary = models.DecimalField(max_digits=10, decimal_places=2)
+    tax_declaration = models.CharField(max_length=3)
+    has_philhealth = models.CharField(max_length=100)
+
+    # Batch assignment flags at the time of submission
+    late_assigned = models.CharField(max_length=10, null=True, blank=True)
+    removed = models.CharField(max_length=10, null=True, blank=True)
+    previous_batch = models.IntegerField(null=True, blank=True)
+    previous_batch_submitted = models.BooleanField(default=False)
+    has_adjustments = models.BooleanField(default=True)
+
+    # Computed payroll
+    basic_salary_cutoff = models.DecimalField(max_digits=12, decimal_places=2)
+    late_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    late_minutes = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    absent_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    absent_minutes = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    other_deductions = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    income = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    total_gross_amount = models.DecimalField(max_digits=12, decimal_places=2)
+    tax_deduction = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    philhealth = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    philhealth_previous = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    ewt = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    sss = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    total_deductions = models.DecimalField(max_digits=12, decimal_places=2)
+    net_salary = models.DecimalField(max_digits=12, decimal_places=2)
+
+    # Line items [{'name', 'amount', 'details'}] shown on the payroll breakdown / payslip
+    incomes = models.JSONField(default=list, encoder=DjangoJSONEncoder)
+    deductions = models.JSONField(default=list, encoder=DjangoJSONEncoder)
+
+    # Every adjustment of the employee on the batch [{'name', 'type', 'amount', 'details'}] (Excel file)
+    adjustments = models.JSONField(default=list, encoder=DjangoJSONEncoder)
+
+    class Meta:
+        unique_together = ['run', 'employee']
+        ordering = ['run', 'line_number']
+
+    def __str__(self):
+        return f"{self.fullname} - {self.run}"
@@ -1,4 +1,5 @@
 from django.db import models
+from payslip_generation_system.pay_period import pay_period_key
 
 class ReturnRemark(models.Model):
     remark = models.TextField(blank=True, null=True) 
@@ -31,10 +32,20 @@ class ReturnRemark(models.Model):
 
     cutoff_year = models.CharField(max_length=50)
 
+    # Integer key of (cutoff_year, cutoff_month, cutoff), set on save (see pay_period.py)
+    pay_period = models.IntegerField(null=True, blank=True, editable=False)
+
     assigned_office = models.CharField(max_length=100, blank=True, null=True)
     class Meta:
         unique_together = ['cutoff', 'cutoff_month', 'cutoff_year', 'batch_number', 'assigned_office']
-        ordering = ['remark', 'cutoff_year', 'cutoff_month', 'cutoff', 'batch_number',]
+        ordering = ['remark', 'pay_period', 'batch_number',]
+        indexes = [
+            models.Index(fields=['batch_number', 'pay_period', 'assigned_office'], name='remark_batch_period_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.pay_period = pay_period_key(self.cutoff_year, self.cutoff_month, self.cutoff)
+        super().save(*args, **kwargs)
     
     def __str__(self):
         return f"Batch {self.batch_number} ({self.cutoff_month} {self.cutoff}, {self.cutoff_year}) - {self.assigned_office or 'All Offices'}"
\ No newline at end of file
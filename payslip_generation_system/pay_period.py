@@ -0,0 +1,63 @@
+# Pay period key
+# One integer per payroll cutoff: year * 100 + (month - 1) * 2 + cutoff (0 = 1st, 1 = 2nd)
+# e.g. January 1st 2025 = 202500, January 2nd 2025 = 202501, December 2nd 2025 = 202523.
+# Keys sort chronologically, so "all of 2025" or "the last 6 cutoffs" are integer ranges.
+
+MONTHS = [
+    'January', 'February', 'March', 'April', 'May', 'June',
+    'July', 'August', 'September', 'October', 'November', 'December',
+]
+
+CUTOFFS = ['1st', '2nd']
+
+PERIODS_PER_YEAR = 24
+
+def pay_period_key(cutoff_year, month, cutoff):
+    """
+    Integer key of a (year, month name, cutoff) period, None when any part is missing or invalid
+    """
+    try:
+        year = int(cutoff_year)
+        month_index = MONTHS.index(month)
+        cutoff_index = CUTOFFS.index(cutoff)
+    except (TypeError, ValueError):
+        return None
+    return year * 100 + month_index * 2 + cutoff_index
+
+def pay_period_parts(key):
+    """
+    (cutoff, month name, year string) of a pay period key
+    """
+    year, index = divmod(key, 100)
+    return CUTOFFS[index % 2], MONTHS[index // 2], str(year)
+
+def shift_pay_period(key, count):
+    """
+    The pay period `count` cutoffs after (or before, when negative) key
+    """
+    year, index = divmod(key, 100)
+    year, index = divmod(year * PERIODS_PER_YEAR + index + count, PERIODS_PER_YEAR)
+    return year * 100 + index
+
+def year_range(year):
+    """
+    (first, last) pay period keys of a year, for pay_period__range
+    """
+    return int(year) * 100, int(year) * 100 + PERIODS_PER_YEAR - 1
+
+def last_periods_range(key, count):
+    """
+    (first, last) keys of the `count` cutoffs ending with key
+    """
+    return shift_pay_period(key, -(count - 1)), key
+
+def period_filter(cutoff_year, month, cutoff, month_field='month', prefix=''):
+    """
+    ORM filter kwargs for one period: the indexed integer key, or the original
+    (cutoff_year, month, cutoff) strings when they do not form a valid period.
+    month_field: 'month' on Adjustment, 'cutoff_month' on BatchAssignment / ReturnRemark
+    """
+    key = pay_period_key(cutoff_year, month, cutoff)
+    if key is not None:
+        return {f"{prefix}pay_period": key}
+    return {f"{prefix}cutoff_year": cutoff_year, f"{prefix}{month_field}": month, f"{prefix}cutoff": cutoff}
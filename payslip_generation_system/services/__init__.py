@@ -0,0 +1,21 @@
+# Declare services here
+# Business logic shared across views and management commands
+from . import payroll_engine
+from . import payroll_snapshot
+from . import batch_creation
+from . import batch_status
+from . import batch_queue
+from . import identity
+from . import employee_search
+from . import employee_directory
+from . import adjustment_search
+from . import xlsx_stream
+from . import payroll_export
+from . import disbursement
+from . import payslip_bundle
+from . import payslip_cache
+from . import jobs
+from . import user_accounts
+from . import workflow
+from . import adjustment_form
+from . import batch_allocator
@@ -0,0 +1,166 @@
+from decimal import Decimal, InvalidOperation
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from payslip_generation_system.models import Adjustment, Employee
+from payslip_generation_system.pay_period import pay_period_key, period_filter
+from payslip_generation_system.services import batch_status, payroll_snapshot
+
+# Adjustment form
+# An employee's adjustment form for one period is saved as a diff against the period's
+# adjustments, read once: new rows go in with one bulk_create, changed rows with one bulk_update
+# and removed rows with one DELETE, all in one transaction.
+# Fixed deductions are unique per (employee, period, name), enforced by the adj_fixed_name_unique
+# constraint: saving one updates the existing row. The employee row is locked while the form is
+# saved, so two saves of the same form do not race on the constraint.
+# Checker corrections (name / type / amount of many lines) are CASE-based bulk UPDATEs, once
+# every id has been checked against the caller's office in one locking query; the check, the
+# write and the re-freeze of submitted runs share one transaction.
+
+FIXED_NAMES = Adjustment.FIXED_NAMES
+
+# Columns an edit of the form may change
+UPDATE_FIELDS = ['name', 'fixed_name', 'type', 'amount', 'details', 'status', 'remarks', 'assigned_office', 'updated_at']
+
+# Columns of a checker correction
+CORRECTION_FIELDS = ['name', 'fixed_name', 'type', 'amount', 'updated_at']
+
+# Corrected lines per UPDATE
+CORRECTION_CHUNK_SIZE = 500
+
+def to_amount(value):
+    """
+    Decimal amount rounded to centavos (0.00 when not a number), as stored
+    """
+    try:
+        return Decimal(str(value)).quantize(Decimal('0.01'))
+    except (InvalidOperation, ValueError):
+        return Decimal('0.00')
+
+def save_form(employee, cutoff, cutoff_month, cutoff_year, batch_number, fixed, entries, deleted_ids=(), remarks=''):
+    """
+    Save an employee's adjustment form for a period; every saved row is back to Waiting.
+    fixed: {name: (amount, details)} of the fixed deductions filled in
+    entries: [(name, type, amount)] income / deduction rows. The form deletes and re-sends the
+    rows it edits: a row of deleted_ids with the same name and type is updated instead.
+    An entry named like a fixed deduction is refused (ValueError), nothing is written.
+    Returns {'created': n, 'updated': n, 'deleted': n}.
+    """
+    fixed_entries = sorted({name for name, _, _ in entries if name in FIXED_NAMES})
+    if fixed_entries:
+        raise ValueError(f"Enter {', '.join(fixed_entries)} in its own field")
+
+    now = timezone.now()
+    deleted_ids = {str(adj_id) for adj_id in deleted_ids}
+    created, updated = [], []
+
+    with transaction.atomic():
+        # One form save per employee at a time
+        list(Employee.objects.select_for_update().filter(id=employee.id).values_list('id', flat=True))
+
+        existing = list(Adjustment.objects.filter(
+            employee=employee,
+            **period_filter(cutoff_year, cutoff_month, cutoff)
+        ).order_by('id'))
+        deleted = {adj.id for adj in existing if str(adj.id) in deleted_ids}
+        reusable = [adj for adj in existing if adj.id in deleted and adj.name not in FIXED_NAMES]
+
+        def write(adjustment, name, adj_type, amount, details=''):
+            values = {
+                'name': name,
+                # bulk writes skip save(), so the fixed deduction key is set here
+                'fixed_name': Adjustment.fixed_name_for(name),
+                'type': adj_type,
+                'amount': to_amount(amount),
+                'details': details,
+                'status': 'Waiting',
+                'remarks': remarks,
+                'assigned_office': employee.assigned_office,
+            }
+            if adjustment is None:
+                created.append(Adjustment(
+                    employee=employee,
+                    cutoff=cutoff,
+                    month=cutoff_month,
+                    cutoff_year=cutoff_year,
+                    # bulk_create skips save(), so the pay period key is set here
+                    pay_period=pay_period_key(cutoff_year, cutoff_month, cutoff),
+                    batch_number=batch_number,
+                    **values
+                ))
+                return
+
+            deleted.discard(adjustment.id)
+            if any(getattr(adjustment, field) != value for field, value in values.items()):
+                for field, value in values.items():
+                    setattr(adjustment, field, value)
+                adjustment.updated_at = now
+                updated.append(adjustment)
+
+        for name, (amount, details) in fixed.items():
+            row = next((adj for adj in existing if adj.name == name), None)
+            write(row, name, 'Deduction', amount, details)
+
+        for name, adj_type, amount in entries:
+            match = next((adj for adj in reusable if adj.name == name and adj.type == adj_type), None)
+            if match is not None:
+                reusable.remove(match)
+            write(match, name, adj_type, amount)
+
+        Adjustment.objects.filter(id__in=deleted).delete()
+        Adjustment.objects.bulk_update(updated, UPDATE_FIELDS)
+        Adjustment.objects.bulk_create(created)
+
+    return {'created': len(created), 'updated': len(updated), 'deleted': len(deleted)}
+
+def correct_lines(lines, assigned_office):
+    """
+    Apply checker corrections [{'id', 'name', 'type', 'amount'}] of one office in one
+    transaction. Every id must exist in assigned_office or nothing is written (ValueError).
+    Returns the number of lines corrected.
+    """
+    if not assigned_office:
+        raise ValueError("An office is required to correct adjustments")
+
+    types = [choice for choice, _ in Adjustment.TYPE_CHOICES]
+    corrections = {}
+    for line in lines:
+        try:
+            adj_id = int(line['id'])
+            amount = Decimal(str(line['amount'])).quantize(Decimal('0.01'))
+        except (KeyError, TypeError, ValueError, InvalidOperation):
+            raise ValueError(f"Invalid adjustment line: {line}")
+        if not line.get('name') or line.get('type') not in types:
+            raise ValueError(f"Invalid adjustment line: {line}")
+        corrections[adj_id] = Adjustment(
+            id=adj_id, name=line['name'], fixed_name=Adjustment.fixed_name_for(line['name']), type=line['type'], amount=amount,
+        )
+
+    now = timezone.now()
+    for adjustment in corrections.values():
+        adjustment.updated_at = now
+
+    with transaction.atomic():
+        # Rows locked until the corrections are written (not moved to another office or batch in between)
+        keys = {
+            row[0]: row[1:]
+            for row in (
+                Adjustment.objects
+                .select_for_update()
+                .filter(id__in=corrections, assigned_office=assigned_office)
+                .values_list('id', 'assigned_office', 'pay_period', 'batch_number')
+            )
+        }
+        missing = sorted(set(corrections) - set(keys))
+        if missing:
+            raise ValueError(f"Adjustments not found in {assigned_office}: {', '.join(map(str, missing))}")
+
+        try:
+            with transaction.atomic():
+                Adjustment.objects.bulk_update(list(corrections.values()), CORRECTION_FIELDS, batch_size=CORRECTION_CHUNK_SIZE)
+        except IntegrityError:
+            raise ValueError("A fixed deduction can only be entered once per employee and period")
+        batch_status.refresh(keys.values())
+
+        # Corrections on a submitted batch re-freeze its payroll
+        payroll_snapshot.refresh_runs(keys.values())
+    return len(corrections)
@@ -0,0 +1,146 @@
+import re
+from datetime import datetime, timedelta
+from decimal import Decimal, InvalidOperation
+from django.db.models import Q
+from django.utils import timezone
+from payslip_generation_system.pay_period import MONTHS, CUTOFFS, pay_period_key
+
+# Adjustment search grammar
+# Parses the search box of an employee's adjustment history into typed conditions on the
+# indexed columns instead of casting amount / created_at to text for every row:
+#   pending, approved, credited ...         status
+#   income, deduction                       type
+#   march, mar, 1st, 2nd, 2025              payroll period (pay_period keys when a year is given)
+#   1500, 1,500.50, P1500, >1000, <=500     amount (a bare 4-digit year is a year, write 2000.00)
+#   1000-2000, 1000..2000                   amount range
+#   2025-03-14, 2025-03-01..2025-03-31      created on / between dates
+#   anything else                           name or remarks contains the word
+# Every word must match (AND).
+
+STATUSES = ['Waiting', 'Pending', 'Approved', 'Returned', 'Credited', 'Archived']
+
+TYPES = ['Income', 'Deduction']
+
+# Years read as a payroll year rather than an amount
+YEAR_RANGE = (1900, 2100)
+
+NUMBER = r'[₱p]?\s*(\d[\d,]*(?:\.\d+)?)'
+AMOUNT_RE = re.compile(rf'^(=|>=|<=|>|<)?\s*{NUMBER}$', re.IGNORECASE)
+AMOUNT_RANGE_RE = re.compile(rf'^{NUMBER}\s*(?:-|\.\.)\s*{NUMBER}$', re.IGNORECASE)
+DATE_RE = re.compile(r'^(\d{4}-\d{2}-\d{2})(?:\.\.(\d{4}-\d{2}-\d{2}))?$')
+YEAR_RE = re.compile(r'^\d{4}$')
+
+AMOUNT_LOOKUPS = {None: 'exact', '=': 'exact', '>': 'gt', '>=': 'gte', '<': 'lt', '<=': 'lte'}
+
+def parse_amount(text):
+    try:
+        return Decimal(text.replace(',', ''))
+    except InvalidOperation:
+        return None
+
+def parse_date(text):
+    try:
+        return datetime.strptime(text, '%Y-%m-%d')
+    except ValueError:
+        return None
+
+def day_range(first, last):
+    """
+    Q of created_at within the days first..last (local time)
+    """
+    start = timezone.make_aware(first) if timezone.is_naive(first) else first
+    end = last + timedelta(days=1)
+    end = timezone.make_aware(end) if timezone.is_naive(end) else end
+    return Q(created_at__gte=start, created_at__lt=end)
+
+def month_of(word):
+    """
+    Month name of a full or abbreviated (3+ letters) month word
+    """
+    if len(word) < 3:
+        return None
+    for month in MONTHS:
+        if month.lower().startswith(word):
+            return month
+    return None
+
+def period_filter(months, cutoffs, years):
+    """
+    Q of the payroll periods matching the month / cutoff / year words
+    """
+    if years:
+        keys = [
+            pay_period_key(year, month, cutoff)
+            for year in sorted(years)
+            for month in (months or MONTHS)
+            for cutoff in (cutoffs or CUTOFFS)
+        ]
+        return Q(pay_period__in=keys)
+
+    query = Q()
+    if months:
+        query &= Q(month__in=months)
+    if cutoffs:
+        query &= Q(cutoff__in=cutoffs)
+    return query
+
+def search_filter(text):
+    """
+    Q of the adjustments matching a search text (see the grammar above)
+    """
+    query = Q()
+    months, cutoffs, years = [], [], []
+
+    # Ranges and comparisons may be typed with spaces ("> 1000", "1000 - 2000")
+    text = re.sub(r'\s*(\.\.|-)\s*', r'\1', str(text or '').strip())
+    text = re.sub(r'(>=|<=|=|>|<)\s+', r'\1', text)
+
+    for word in text.lower().split():
+        status = next((status for status in STATUSES if status.lower() == word), None)
+        if status:
+            query &= Q(status=status)
+            continue
+
+        adjustment_type = next((adjustment_type for adjustment_type in TYPES if adjustment_type.lower() == word), None)
+        if adjustment_type:
+            query &= Q(type=adjustment_type)
+            continue
+
+        if word in CUTOFFS:
+            cutoffs.append(word)
+            continue
+
+        if YEAR_RE.match(word) and YEAR_RANGE[0] <= int(word) <= YEAR_RANGE[1]:
+            years.append(word)
+            continue
+
+        month = month_of(word)
+        if month:
+            months.append(month)
+            continue
+
+        date_match = DATE_RE.match(word)
+        if date_match:
+            first = parse_date(date_match.group(1))
+            last = parse_date(date_match.group(2)) if date_match.group(2) else first
+            if first and last:
+                query &= day_range(min(first, last), max(first, last))
+                continue
+
+        range_match = AMOUNT_RANGE_RE.match(word)
+        if range_match:
+            low, high = parse_amount(range_match.group(1)), parse_amount(range_match.group(2))
+            if low is not None and high is not None:
+                query &= Q(amount__gte=min(low, high), amount__lte=max(low, high))
+                continue
+
+        amount_match = AMOUNT_RE.match(word)
+        if amount_match:
+            amount = parse_amount(amount_match.group(2))
+            if amount is not None:
+                query &= Q(**{f"amount__{AMOUNT_LOOKUPS[amount_match.group(1)]}": amount})
+                continue
+
+        query &= Q(name__icontains=word) | Q(remarks__icontains=word)
+
+    return query & period_filter(months, cutoffs, years)
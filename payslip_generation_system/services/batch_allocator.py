@@ -0,0 +1,112 @@
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Max
+from payslip_generation_system.models import Batch, BatchAllocator, BatchAssignment
+from payslip_generation_system.pay_period import period_filter
+
+# Batch allocator
+# Batch numbers and batch slots are handed out under a row lock on a BatchAllocator row, so
+# parallel requests never pick the same new batch number or overfill a batch: one row for the
+# Batch.batch_number sequence, one per (office, pay period) for the period's batch assignments
+# (only locked: the period's batch numbers are read from its assignments under the lock).
+# The lock is held by the caller's transaction: allocate and write the assignment in the same
+# transaction.atomic() block.
+# Every move onto a batch (late, unlate, unremove, move to another batch) checks the batch has
+# room for one more employee under the same lock: see has_room.
+
+BATCH_SCOPE = 'batch'
+
+# Employees per batch when settings.PAYROLL_BATCH_CAPACITY is not set
+DEFAULT_BATCH_CAPACITY = 15
+
+# Batch of the employees removed from the payroll, never full
+REMOVED_BATCH = 0
+
+def lock(scope):
+    """
+    Allocator row of a scope, locked until the current transaction ends (created on first use)
+    """
+    allocator = BatchAllocator.objects.select_for_update().filter(scope=scope).first()
+    if allocator is None:
+        try:
+            with transaction.atomic():
+                BatchAllocator.objects.create(scope=scope)
+        except IntegrityError:
+            # Created by a parallel request
+            pass
+        allocator = BatchAllocator.objects.select_for_update().get(scope=scope)
+    return allocator
+
+def period_scope(assigned_office, cutoff, cutoff_month, cutoff_year):
+    return f"period:{assigned_office}:{cutoff_year}:{cutoff_month}:{cutoff}"
+
+def lock_period(assigned_office, cutoff, cutoff_month, cutoff_year):
+    """
+    Lock the batch assignments of an office for a period (slots counted and changed under it)
+    """
+    return lock(period_scope(assigned_office, cutoff, cutoff_month, cutoff_year))
+
+def batch_capacity():
+    """
+    Employees per batch (settings.PAYROLL_BATCH_CAPACITY)
+    """
+    return getattr(settings, 'PAYROLL_BATCH_CAPACITY', DEFAULT_BATCH_CAPACITY)
+
+def period_assignments(assigned_office, cutoff, cutoff_month, cutoff_year):
+    return BatchAssignment.objects.filter(
+        **period_filter(cutoff_year, cutoff_month, cutoff, month_field='cutoff_month'),
+        assigned_office=assigned_office
+    )
+
+def has_room(assigned_office, cutoff, cutoff_month, cutoff_year, batch_number, capacity=None):
+    """
+    Whether one more employee fits on a batch of the period. Call after lock_period, in the
+    transaction that moves the employee.
+    """
+    if batch_number is None or batch_number == REMOVED_BATCH:
+        return True
+    capacity = capacity or batch_capacity()
+    return period_assignments(assigned_office, cutoff, cutoff_month, cutoff_year).filter(batch_number=batch_number).count() < capacity
+
+def next_batch_number():
+    """
+    Next Batch.batch_number, unique across offices; call inside a transaction that creates the batch
+    """
+    allocator = lock(BATCH_SCOPE)
+    last = Batch.objects.aggregate(last=Max('batch_number'))['last'] or 0
+    allocator.last_number = max(allocator.last_number, last) + 1
+    allocator.save(update_fields=['last_number', 'updated_at'])
+    return allocator.last_number
+
+def create_batch(batch_name, assigned_office):
+    with transaction.atomic():
+        return Batch.objects.create(
+            batch_number=next_batch_number(),
+            batch_name=batch_name,
+            batch_assigned_office=assigned_office,
+        )
+
+def late_batch(assigned_office, cutoff, cutoff_month, cutoff_year, current_batch, capacity=None):
+    """
+    Batch number of an employee marked late: a new batch when they are on the last batch of the
+    period or the last batch is full, otherwise the last batch. Locks the period; call inside
+    the transaction that writes the assignment.
+    """
+    lock_period(assigned_office, cutoff, cutoff_month, cutoff_year)
+    last_batch_number = (
+        period_assignments(assigned_office, cutoff, cutoff_month, cutoff_year)
+        .exclude(batch_number=REMOVED_BATCH)
+        .aggregate(last=Max('batch_number'))['last']
+    )
+
+    if last_batch_number is None:
+        # No existing batches for this office, create first batch
+        batch_number = 1
+    elif current_batch == last_batch_number:
+        batch_number = last_batch_number + 1
+    elif has_room(assigned_office, cutoff, cutoff_month, cutoff_year, last_batch_number, capacity):
+        batch_number = last_batch_number
+    else:
+        batch_number = last_batch_number + 1
+
+    return batch_number
@@ -0,0 +1,127 @@
+from django.db import transaction
+from payslip_generation_system.models import Employee, BatchAssignment, Batch
+from payslip_generation_system.pay_period import pay_period_key, pay_period_parts, shift_pay_period
+from payslip_generation_system.services import batch_status
+
+# Batch creation
+# Builds the BatchAssignment rows of one or more payroll periods (one row per employee whose
+# batch exists) and inserts them in chunks inside a single transaction, so a failure never
+# leaves a half-built period behind.
+
+# Rows per INSERT
+CHUNK_SIZE = 1000
+
+# Upper bound of a multi-period request (two years of cutoffs)
+MAX_PERIODS = 48
+
+def eligible_employees(assigned_office=None):
+    """
+    {office: [(employee_id, batch_number, assigned_office)]} of employees whose batch exists,
+    by fullname. Employees without an office are grouped under 'unassigned'.
+    """
+    batches = Batch.objects.all()
+    employees = Employee.objects.filter(batch_number__isnull=False)
+    if assigned_office:
+        batches = batches.filter(batch_assigned_office=assigned_office)
+        employees = employees.filter(assigned_office=assigned_office)
+
+    employees = employees.filter(
+        batch_number__in=batches.values('batch_number')
+    ).order_by('fullname').values_list('id', 'batch_number', 'assigned_office')
+
+    employees_by_office = {}
+    for employee in employees:
+        employees_by_office.setdefault(employee[2] or 'unassigned', []).append(employee)
+    return employees_by_office
+
+def period_range(start_key, end_key):
+    """
+    Every pay period key from start_key to end_key (inclusive)
+    """
+    keys = []
+    key = start_key
+    while key <= end_key:
+        keys.append(key)
+        key = shift_pay_period(key, 1)
+    return keys
+
+def existing_periods(keys, assigned_office=None):
+    """
+    {(pay_period, office)} that already have batch assignments
+    """
+    assignments = BatchAssignment.objects.filter(pay_period__in=keys)
+    if assigned_office:
+        assignments = assignments.filter(assigned_office=assigned_office)
+    return {
+        (pay_period, office or 'unassigned')
+        for pay_period, office in assignments.values_list('pay_period', 'assigned_office').distinct()
+    }
+
+def create_assignments(employees_by_office, periods, chunk_size=CHUNK_SIZE):
+    """
+    Insert the assignments of every (cutoff, cutoff_month, cutoff_year) period in periods,
+    for each office in employees_by_office, in one transaction.
+    Returns {office: {'periods', 'batches', 'assignments'}}
+    """
+    counts = {}
+    rows = []
+    with transaction.atomic():
+        for cutoff, cutoff_month, cutoff_year in periods:
+            # bulk_create skips save(), so the pay period key is set here
+            pay_period = pay_period_key(cutoff_year, cutoff_month, cutoff)
+            for office, employees in employees_by_office.items():
+                if not employees:
+                    continue
+                office_counts = counts.setdefault(office, {'periods': 0, 'batches': 0, 'assignments': 0})
+                office_counts['periods'] += 1
+                office_counts['batches'] += len({batch_number for _, batch_number, _ in employees})
+                office_counts['assignments'] += len(employees)
+
+                for employee_id, batch_number, employee_office in employees:
+                    rows.append(BatchAssignment(
+                        employee_id=employee_id,
+                        batch_number=batch_number,
+                        cutoff=cutoff,
+                        cutoff_month=cutoff_month,
+                        cutoff_year=cutoff_year,
+                        pay_period=pay_period,
+                        assigned_office=employee_office,
+                    ))
+                if len(rows) >= chunk_size:
+                    BatchAssignment.objects.bulk_create(rows, batch_size=chunk_size)
+                    rows = []
+        if rows:
+            BatchAssignment.objects.bulk_create(rows, batch_size=chunk_size)
+
+        if counts:
+            batch_status.rebuild(pay_periods=[pay_period_key(year, month, cutoff) for cutoff, month, year in periods])
+    return counts
+
+def create_period_range(start_key, end_key, assigned_office=None, chunk_size=CHUNK_SIZE):
+    """
+    Create the batches of every period from start_key to end_key, skipping the
+    (period, office) pairs that already have assignments.
+    Returns {'offices': {office: counts}, 'skipped': [(pay_period, office)]}
+    """
+    employees_by_office = eligible_employees(assigned_office)
+    keys = period_range(start_key, end_key)
+    existing = existing_periods(keys, assigned_office)
+
+    counts = {}
+    skipped = []
+    with transaction.atomic():
+        for key in keys:
+            pending = {}
+            for office, employees in employees_by_office.items():
+                if (key, office) in existing:
+                    skipped.append((key, office))
+                else:
+                    pending[office] = employees
+
+            period_counts = create_assignments(pending, [pay_period_parts(key)], chunk_size)
+            for office, office_counts in period_counts.items():
+                total = counts.setdefault(office, {'periods': 0, 'batches': 0, 'assignments': 0})
+                for field, value in office_counts.items():
+                    total[field] += value
+
+    return {'offices': counts, 'skipped': skipped}
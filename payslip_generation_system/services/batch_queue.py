@@ -0,0 +1,109 @@
+from django.db.models import Q, F, Count, Sum, OuterRef, Subquery
+from payslip_generation_system.models import Adjustment, Batch, BatchStatus
+
+# Batch queues
+# The checker's pending list (from the batch status counters) and accounting's approved list
+# (one grouped query): one row per (office, period, batch) with its adjustment counts and batch
+# name, searched, sorted and paginated in the database.
+
+# Sort keys accepted by the pending queue (prefix with '-' for descending)
+PENDING_SORTS = {
+    'period': ['pay_period', 'assigned_office', 'batch_number'],
+    'office': ['assigned_office', 'pay_period', 'batch_number'],
+    'batch': ['batch_name', 'pay_period', 'assigned_office'],
+}
+
+# Sort keys accepted by the approved queue
+APPROVED_SORTS = {
+    'batch': ['batch_number', 'pay_period', 'assigned_office'],
+    'period': ['pay_period', 'assigned_office', 'batch_number'],
+    'office': ['assigned_office', 'batch_number', 'pay_period'],
+    'name': ['batch_name', 'pay_period', 'assigned_office'],
+}
+
+class GroupSubquery(Subquery):
+    """
+    Subquery correlated only on the grouped columns of the outer query. Kept out of the
+    GROUP BY, so the database runs it once per group instead of once per adjustment row.
+    """
+
+    def get_group_by_cols(self):
+        return []
+
+def batch_name_subquery(batch_field='batch_number'):
+    """
+    Batch.batch_name of the row's batch (None when the batch no longer exists)
+    """
+    return GroupSubquery(Batch.objects.filter(batch_number=OuterRef(batch_field)).values('batch_name')[:1])
+
+def sort_fields(sorts, sort, default):
+    """
+    ORDER BY fields of a sort key, e.g. '-period'
+    """
+    descending = sort.startswith('-')
+    fields = sorts.get(sort.lstrip('-'), sorts[default])
+    return [f"-{field}" for field in fields] if descending else fields
+
+def office_matches(search, office_names):
+    """
+    Office codes whose formatted name contains the search text
+    """
+    return [code for code, name in office_names.items() if search in name.lower()]
+
+def pending_batches(assigned_office=None, search='', sort='period', office_names=None):
+    """
+    [{assigned_office, pay_period, batch_number, batch_name, pending_adjustments,
+    total_adjustments, approved_adjustments}] of every batch with a Pending adjustment,
+    read from the batch status counters.
+    search matches the batch name or the formatted office name (office_names: code -> name).
+    batch_name is None when the batch was deleted.
+    """
+    statuses = BatchStatus.objects.filter(pending__gt=0, assigned_office__isnull=False).exclude(assigned_office='')
+    if assigned_office:
+        statuses = statuses.filter(assigned_office=assigned_office)
+
+    search = (search or '').strip().lower()
+    if search:
+        statuses = statuses.filter(
+            Q(batch_number__in=Batch.objects.filter(batch_name__icontains=search).values('batch_number'))
+            | Q(assigned_office__in=office_matches(search, office_names or {}))
+        )
+
+    batches = statuses.values('assigned_office', 'pay_period', 'batch_number', 'total_adjustments').annotate(
+        pending_adjustments=F('pending'),
+        approved_adjustments=F('approved'),
+        batch_name=batch_name_subquery(),
+    )
+
+    return batches.order_by(*sort_fields(PENDING_SORTS, sort, 'period'))
+
+def approved_batches(search='', sort='batch', office_names=None):
+    """
+    [{batch_number, batch_name, assigned_office, pay_period, month, cutoff, cutoff_year,
+    employees, adjustments, total_income, total_deductions}] of every approved
+    (batch, period, office), for batches that still exist.
+    search matches the batch name or the formatted office name (office_names: code -> name).
+    """
+    approved = Adjustment.objects.filter(
+        status='Approved',
+        batch_number__in=Batch.objects.values('batch_number'),
+    )
+
+    search = (search or '').strip().lower()
+    if search:
+        approved = approved.filter(
+            Q(batch_number__in=Batch.objects.filter(batch_name__icontains=search).values('batch_number'))
+            | Q(assigned_office__in=office_matches(search, office_names or {}))
+        )
+
+    batches = approved.values(
+        'batch_number', 'assigned_office', 'pay_period', 'month', 'cutoff', 'cutoff_year'
+    ).annotate(
+        employees=Count('employee_id', distinct=True),
+        adjustments=Count('id'),
+        total_income=Sum('amount', filter=Q(type='Income')),
+        total_deductions=Sum('amount', filter=Q(type='Deduction')),
+        batch_name=batch_name_subquery(),
+    )
+
+    return batches.order_by(*sort_fields(APPROVED_SORTS, sort, 'batch'))
@@ -0,0 +1,225 @@
+from django.db import transaction
+from django.dispatch import Signal
+from decimal import Decimal
+from django.db.models import Q, Count, Sum, Max, Case, When, Value, BooleanField
+from payslip_generation_system.models import Adjustment, BatchAssignment, BatchStatus
+
+# Batch status counters
+# BatchStatus holds, per (office, pay period, batch), the adjustment counts per status, the
+# adjustment amount total and the last-batch marker. Every view that changes an adjustment status, an adjustment batch or
+# a batch membership calls refresh() with the affected keys inside its transaction; the
+# counters are recomputed from the source rows (never incremented), so a refresh is always
+# safe to repeat. rebuild() recomputes whole periods (migration, seeder, repairs).
+# Every refresh sends batches_refreshed(keys), for caches built on the same rows.
+
+# Adjustment.status -> BatchStatus counter
+STATUS_FIELDS = {
+    'Waiting': 'waiting',
+    'Pending': 'pending',
+    'Approved': 'approved',
+    'Returned': 'returned',
+    'Credited': 'credited',
+}
+
+COUNT_FIELDS = ['assignments', 'total_adjustments'] + list(STATUS_FIELDS.values())
+
+# Counters recomputed by refresh()
+REFRESH_FIELDS = COUNT_FIELDS + ['total_amount']
+
+# Keys per refresh query
+CHUNK_SIZE = 200
+
+# Sent by refresh() with the refreshed keys, inside the caller's transaction
+batches_refreshed = Signal()
+
+def adjustment_key(adjustment):
+    """
+    (assigned_office, pay_period, batch_number) of one adjustment
+    """
+    return (adjustment.assigned_office, adjustment.pay_period, adjustment.batch_number)
+
+def adjustment_keys(adjustments):
+    """
+    Distinct (assigned_office, pay_period, batch_number) of an Adjustment queryset
+    """
+    return set(
+        adjustments.order_by().values_list('assigned_office', 'pay_period', 'batch_number').distinct()
+    )
+
+def assignment_keys(assignments):
+    """
+    Distinct (assigned_office, pay_period, batch_number) of a BatchAssignment queryset
+    """
+    return set(
+        assignments.order_by().values_list('assigned_office', 'pay_period', 'batch_number').distinct()
+    )
+
+def employee_keys(employee_id, pay_period=None):
+    """
+    Keys of an employee's assignments and adjustments (of one pay period when given)
+    """
+    adjustments = Adjustment.objects.filter(employee_id=employee_id)
+    assignments = BatchAssignment.objects.filter(employee_id=employee_id)
+    if pay_period is not None:
+        adjustments = adjustments.filter(pay_period=pay_period)
+        assignments = assignments.filter(pay_period=pay_period)
+    return adjustment_keys(adjustments) | assignment_keys(assignments)
+
+def keys_filter(keys):
+    """
+    Q matching the rows of any of the keys
+    """
+    query = Q()
+    for office, pay_period, batch_number in keys:
+        office_filter = Q(assigned_office=office) if office is not None else Q(assigned_office__isnull=True)
+        query |= office_filter & Q(pay_period=pay_period, batch_number=batch_number)
+    return query
+
+def refresh(keys):
+    """
+    Recompute the counters of every (assigned_office, pay_period, batch_number) in keys
+    """
+    keys = set(keys)
+    batches_refreshed.send(sender=None, keys=keys)
+
+    # Rows without a valid period or batch are not tracked
+    keys = sorted(
+        (key for key in keys if key[1] is not None and key[2] is not None),
+        key=lambda key: (key[0] or '', key[1], key[2]),
+    )
+    if not keys:
+        return
+
+    with transaction.atomic():
+        for start in range(0, len(keys), CHUNK_SIZE):
+            chunk = keys[start:start + CHUNK_SIZE]
+            query = keys_filter(chunk)
+            counts = {key: {**dict.fromkeys(COUNT_FIELDS, 0), 'total_amount': Decimal('0.00')} for key in chunk}
+
+            adjustments = Adjustment.objects.filter(query).values(
+                'assigned_office', 'pay_period', 'batch_number', 'status'
+            ).annotate(count=Count('id'), amount=Sum('amount')).order_by()
+            for row in adjustments:
+                key_counts = counts[(row['assigned_office'], row['pay_period'], row['batch_number'])]
+                key_counts['total_adjustments'] += row['count']
+                key_counts['total_amount'] += row['amount'] or 0
+                if row['status'] in STATUS_FIELDS:
+                    key_counts[STATUS_FIELDS[row['status']]] += row['count']
+
+            assignments = BatchAssignment.objects.filter(query).values(
+                'assigned_office', 'pay_period', 'batch_number'
+            ).annotate(count=Count('id')).order_by()
+            for row in assignments:
+                counts[(row['assigned_office'], row['pay_period'], row['batch_number'])]['assignments'] = row['count']
+
+            existing = {
+                (status.assigned_office, status.pay_period, status.batch_number): status
+                for status in BatchStatus.objects.select_for_update().filter(query)
+            }
+
+            created = []
+            updated = []
+            deleted = []
+            for key, key_counts in counts.items():
+                status = existing.get(key)
+                if not any(key_counts.values()):
+                    if status:
+                        deleted.append(status.id)
+                elif status:
+                    for field, value in key_counts.items():
+                        setattr(status, field, value)
+                    updated.append(status)
+                else:
+                    office, pay_period, batch_number = key
+                    created.append(BatchStatus(
+                        assigned_office=office, pay_period=pay_period, batch_number=batch_number, **key_counts
+                    ))
+
+            BatchStatus.objects.filter(id__in=deleted).delete()
+            BatchStatus.objects.bulk_update(updated, REFRESH_FIELDS)
+            BatchStatus.objects.bulk_create(created)
+
+        mark_last_batches({(office, pay_period) for office, pay_period, _ in keys})
+
+def mark_last_batches(periods):
+    """
+    Set is_last_batch on the highest batch with assignments of each (assigned_office, pay_period)
+    """
+    for office, pay_period in periods:
+        statuses = BatchStatus.objects.filter(pay_period=pay_period)
+        statuses = statuses.filter(assigned_office=office) if office is not None else statuses.filter(assigned_office__isnull=True)
+
+        last_batch = statuses.filter(assignments__gt=0).aggregate(last=Max('batch_number'))['last']
+        statuses.update(is_last_batch=Case(
+            When(batch_number=last_batch, then=Value(True)),
+            default=Value(False),
+            output_field=BooleanField(),
+        ))
+
+def refresh_adjustments(adjustments):
+    """
+    Refresh the counters of every batch an Adjustment queryset touches
+    """
+    refresh(adjustment_keys(adjustments))
+
+def rebuild(pay_periods=None):
+    """
+    Recompute the counters of the given pay periods (every period when None)
+    """
+    adjustments = Adjustment.objects.all()
+    assignments = BatchAssignment.objects.all()
+    statuses = BatchStatus.objects.all()
+    if pay_periods is not None:
+        adjustments = adjustments.filter(pay_period__in=pay_periods)
+        assignments = assignments.filter(pay_period__in=pay_periods)
+        statuses = statuses.filter(pay_period__in=pay_periods)
+
+    with transaction.atomic():
+        keys = adjustment_keys(adjustments) | assignment_keys(assignments)
+        # Batches that no longer have any row are refreshed (and removed) too
+        keys |= set(statuses.values_list('assigned_office', 'pay_period', 'batch_number'))
+        refresh(keys)
+    return len(keys)
+
+def batch_flags(batch_number, pay_period, assigned_office=None, last_batch_office=None):
+    """
+    Workflow flags of a batch from its counters, in one query.
+    assigned_office: counts of that office only (every office when None).
+    last_batch_office: is_last_batch within that office (across offices when None);
+    None when the period has no assignments.
+    """
+    flags = {
+        'has_pending_adjustments': False,
+        'has_approved_adjustments': False,
+        'has_credited_adjustments': False,
+        'total_adjustments': 0,
+        'approved_adjustments': 0,
+        'total_amount': Decimal('0.00'),
+        'is_last_batch': None,
+    }
+    if pay_period is None:
+        return flags
+
+    statuses = BatchStatus.objects.filter(pay_period=pay_period).filter(
+        Q(batch_number=batch_number) | Q(is_last_batch=True)
+    ).values('assigned_office', 'batch_number', 'pending', 'approved', 'credited', 'total_adjustments', 'total_amount', 'is_last_batch')
+
+    last_batches = []
+    for status in statuses:
+        if status['is_last_batch'] and (last_batch_office is None or status['assigned_office'] == last_batch_office):
+            last_batches.append(status['batch_number'])
+
+        if status['batch_number'] != batch_number:
+            continue
+        if assigned_office and status['assigned_office'] != assigned_office:
+            continue
+        flags['has_pending_adjustments'] |= status['pending'] > 0
+        flags['has_approved_adjustments'] |= status['approved'] > 0
+        flags['has_credited_adjustments'] |= status['credited'] > 0
+        flags['total_adjustments'] += status['total_adjustments']
+        flags['approved_adjustments'] += status['approved'] + status['credited']
+        flags['total_amount'] += status['total_amount']
+
+    if last_batches:
+        flags['is_last_batch'] = max(last_batches) == batch_number
+    return flags
@@ -0,0 +1,193 @@
+import csv
+import hashlib
+import unicodedata
+from decimal import Decimal
+from django.db.models import Q, Exists, OuterRef
+from django.utils import timezone
+from payslip_generation_system.models import BatchStatus, PayrollRun, PayrollLine
+from payslip_generation_system.pay_period import pay_period_key, period_filter
+
+# Disbursement file
+# Net pay of every employee on credited batches, for the bank and accounting, as CSV or as
+# fixed-width records: one detail record per employee, then a trailer with the record count,
+# the total and a SHA-256 checksum of the detail records as written. Frozen payroll lines are
+# read in keyset chunks so memory stays flat whatever the number of rows (Django only streams
+# from a server-side cursor on PostgreSQL / Oracle; MySQL and SQLite fetch a whole result set).
+
+# Roles that may download disbursement files
+DISBURSEMENT_ROLES = ['admin', 'accounting']
+
+FORMATS = ['csv', 'fixed']
+
+CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'fixed': 'text/plain',
+}
+
+EXTENSIONS = {
+    'csv': 'csv',
+    'fixed': 'txt',
+}
+
+# Payroll lines per query
+CHUNK_SIZE = 2000
+
+CSV_COLUMNS = ['employee_number', 'fullname', 'assigned_office', 'batch_number', 'batch_name', 'pay_period', 'net_pay']
+
+# Fixed-width detail record: (field, width); text left aligned, numbers zero padded
+FIXED_WIDTH_FIELDS = [
+    ('record_type', 1),
+    ('employee_number', 20),
+    ('fullname', 40),
+    ('assigned_office', 20),
+    ('batch_number', 10),
+    ('pay_period', 6),
+    ('amount', 15),
+]
+
+RECORD_LENGTH = sum(width for _, width in FIXED_WIDTH_FIELDS)
+
+LINE_END = '\r\n'
+
+# Batches whose adjustments are all credited
+CREDITED = Q(credited__gt=0, pending=0, approved=0)
+
+def credited_runs(cutoff, cutoff_month, cutoff_year, assigned_office=None, batch_numbers=None):
+    """
+    Frozen runs of the credited batches of a period (optionally one office / some batches)
+    """
+    statuses = BatchStatus.objects.filter(
+        CREDITED,
+        pay_period=pay_period_key(cutoff_year, cutoff_month, cutoff),
+        assigned_office=OuterRef('assigned_office'),
+        batch_number=OuterRef('batch_number'),
+    )
+    runs = PayrollRun.objects.filter(
+        Exists(statuses),
+        **period_filter(cutoff_year, cutoff_month, cutoff, month_field='cutoff_month'),
+    )
+    if assigned_office:
+        runs = runs.filter(assigned_office=assigned_office)
+    if batch_numbers:
+        runs = runs.filter(batch_number__in=batch_numbers)
+    return runs
+
+def disbursement_lines(runs, chunk_size=CHUNK_SIZE):
+    """
+    Paid lines of the runs, by run then line, in keyset chunks of chunk_size
+    """
+    lines = (
+        PayrollLine.objects
+        .filter(run__in=runs.values('id'))
+        .exclude(removed='YES')
+        .order_by('run_id', 'id')
+        .values(
+            'id', 'run_id', 'employee_number', 'fullname', 'net_salary',
+            'run__assigned_office', 'run__batch_number', 'run__batch_name',
+        )
+    )
+    last = None
+    while True:
+        chunk = lines
+        if last:
+            chunk = chunk.filter(Q(run_id__gt=last['run_id']) | Q(run_id=last['run_id'], id__gt=last['id']))
+        chunk = list(chunk[:chunk_size])
+        if not chunk:
+            return
+        yield from chunk
+        last = chunk[-1]
+
+def ascii_text(value):
+    """
+    Uppercase ASCII of a text (accents removed), for the fixed-width records
+    """
+    value = unicodedata.normalize('NFKD', str(value or '')).encode('ascii', 'ignore').decode()
+    return ' '.join(value.upper().split())
+
+def centavos(amount):
+    return int((amount or Decimal('0')).quantize(Decimal('0.01')) * 100)
+
+def fixed_width(values):
+    """
+    Fixed-width detail record of {field: value}
+    """
+    record = ''
+    for field, width in FIXED_WIDTH_FIELDS:
+        value = values[field]
+        if isinstance(value, int):
+            record += str(value).rjust(width, '0')[-width:]
+        else:
+            record += ascii_text(value)[:width].ljust(width)
+    return record
+
+class Echo:
+    """
+    File-like object handing back what csv.writer writes
+    """
+
+    def write(self, value):
+        return value
+
+def csv_records(lines, pay_period):
+    writer = csv.writer(Echo())
+    for line in lines:
+        yield line, writer.writerow([
+            line['employee_number'],
+            line['fullname'],
+            line['run__assigned_office'] or '',
+            line['run__batch_number'],
+            line['run__batch_name'] or '',
+            pay_period,
+            f"{line['net_salary']:.2f}",
+        ])
+
+def fixed_width_records(lines, pay_period):
+    for line in lines:
+        yield line, fixed_width({
+            'record_type': 'D',
+            'employee_number': line['employee_number'],
+            'fullname': line['fullname'],
+            'assigned_office': line['run__assigned_office'],
+            'batch_number': line['run__batch_number'],
+            'pay_period': pay_period,
+            'amount': centavos(line['net_salary']),
+        }) + LINE_END
+
+def stream(runs, file_format, cutoff, cutoff_month, cutoff_year, chunk_size=CHUNK_SIZE, generated_at=None):
+    """
+    Text of the disbursement file, record by record: header, details, trailer.
+    The checksum is the SHA-256 of the detail records exactly as written (UTF-8).
+    """
+    pay_period = pay_period_key(cutoff_year, cutoff_month, cutoff)
+    generated_at = generated_at or timezone.localtime()
+    lines = disbursement_lines(runs, chunk_size)
+    checksum = hashlib.sha256()
+    count = 0
+    total = Decimal('0.00')
+
+    if file_format == 'csv':
+        writer = csv.writer(Echo())
+        yield writer.writerow(CSV_COLUMNS)
+        records = csv_records(lines, f"{cutoff} {cutoff_month} {cutoff_year}")
+    else:
+        yield (
+            'H' + str(pay_period) + generated_at.strftime('%Y%m%d%H%M%S')
+        ).ljust(RECORD_LENGTH) + LINE_END
+        records = fixed_width_records(lines, pay_period)
+
+    for line, record in records:
+        checksum.update(record.encode())
+        count += 1
+        total += line['net_salary'] or 0
+        yield record
+
+    if file_format == 'csv':
+        yield writer.writerow(['TRAILER', count, f"{total:.2f}", checksum.hexdigest()])
+    else:
+        yield (
+            'T' + str(count).rjust(10, '0') + str(centavos(total)).rjust(18, '0') + checksum.hexdigest()
+        ).ljust(RECORD_LENGTH) + LINE_END
+
+def file_name(file_format, cutoff, cutoff_month, cutoff_year, assigned_office=None):
+    office = (assigned_office or 'ALL_OFFICES').upper()
+    return f"PAYGES_Disbursement_{office}_{cutoff_month}_{cutoff}_{cutoff_year}.{EXTENSIONS[file_format]}"
@@ -0,0 +1,132 @@
+from django.core import signing
+from django.db.models import Q
+from payslip_generation_system.models import Employee, Batch
+from payslip_generation_system.services import identity, employee_search
+
+# Employee directory
+# Server-side DataTables paging of the employee lists (employee.data, payslip.employee_data):
+# role scoping, indexed search (services.employee_search), separate total / filtered counts,
+# and keyset (seek) pagination on the non-null sort columns. Moving to the next page seeks
+# from the signed cursor of the previous page's last row; any other page (or a nullable sort
+# column) pages the primary keys with OFFSET and then loads just the rows of the page.
+
+# Roles that see every office
+ALL_OFFICE_ROLES = ['admin', 'checker', 'accounting']
+
+# Sort columns that can be seeked (never NULL)
+KEYSET_COLUMNS = ['employee_number', 'fullname', 'position', 'fund_source', 'tax_declaration', 'has_philhealth', 'eligibility']
+
+# Sort column of an out of range DataTables column (e.g. the actions column)
+DEFAULT_ORDER_COLUMN = 'date_hired'
+
+MAX_PAGE_LENGTH = 100
+
+CURSOR_SALT = 'employee-directory'
+
+def int_param(params, name, default):
+    try:
+        return int(params.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+def scoped_employees(role):
+    """
+    Employees visible to a role, None when the role sees none
+    """
+    if role in ALL_OFFICE_ROLES:
+        return Employee.objects.all()
+    office = identity.ROLE_OFFICES.get(role)
+    if office:
+        return Employee.objects.filter(assigned_office=office)
+    return None
+
+def datatable_params(params, columns):
+    """
+    {draw, start, length, search, order_column, descending, cursor} of a DataTables request.
+    columns: model field of each table column, in display order.
+    """
+    order_index = int_param(params, 'order[0][column]', 0)
+    return {
+        'draw': int_param(params, 'draw', 1),
+        'start': max(int_param(params, 'start', 0), 0),
+        'length': min(max(int_param(params, 'length', 10), 1), MAX_PAGE_LENGTH),
+        'search': params.get('search[value]', '').strip(),
+        'order_column': columns[order_index] if 0 <= order_index < len(columns) else DEFAULT_ORDER_COLUMN,
+        'descending': params.get('order[0][dir]', 'asc') == 'desc',
+        'cursor': params.get('cursor'),
+    }
+
+def read_cursor(cursor, context, start):
+    """
+    (value, id) of the last row before start, when the cursor belongs to this listing
+    """
+    if not cursor:
+        return None
+    try:
+        payload = signing.loads(cursor, salt=CURSOR_SALT)
+    except signing.BadSignature:
+        return None
+    if payload.get('context') != context or payload.get('start') != start:
+        return None
+    return payload['value'], payload['id']
+
+def make_cursor(context, start, row, order_column):
+    return signing.dumps(
+        {'context': context, 'start': start, 'value': row[order_column], 'id': row['id']},
+        salt=CURSOR_SALT,
+    )
+
+def datatable_page(queryset, fields, params, scope=''):
+    """
+    One DataTables page of an Employee queryset.
+    Returns {'rows': [values dicts], 'records_total', 'records_filtered', 'next_cursor'}.
+    scope: anything that changes the visible rows besides the search (e.g. the role).
+    """
+    records_total = queryset.count()
+    if params['search']:
+        queryset = queryset.filter(employee_search.search_filter(params['search']))
+        records_filtered = queryset.count()
+    else:
+        records_filtered = records_total
+
+    order_column = params['order_column']
+    descending = params['descending']
+    ordering = [f"-{order_column}", '-id'] if descending else [order_column, 'id']
+    start = params['start']
+    length = params['length']
+    keyset = order_column in KEYSET_COLUMNS
+    context = [scope, params['search'], order_column, descending]
+
+    seek = read_cursor(params['cursor'], context, start) if keyset else None
+    if seek:
+        value, last_id = seek
+        if descending:
+            after = Q(**{f"{order_column}__lt": value}) | Q(**{order_column: value, 'id__lt': last_id})
+        else:
+            after = Q(**{f"{order_column}__gt": value}) | Q(**{order_column: value, 'id__gt': last_id})
+        rows = list(queryset.filter(after).order_by(*ordering).values(*fields)[:length])
+    else:
+        # Only the primary keys go through OFFSET, the page rows are loaded by id
+        ids = list(queryset.order_by(*ordering).values_list('id', flat=True)[start:start + length])
+        rows_by_id = {row['id']: row for row in Employee.objects.filter(id__in=ids).values(*fields)}
+        rows = [rows_by_id[employee_id] for employee_id in ids if employee_id in rows_by_id]
+
+    next_cursor = None
+    if keyset and len(rows) == length and start + length < records_filtered:
+        next_cursor = make_cursor(context, start + length, rows[-1], order_column)
+
+    return {
+        'rows': rows,
+        'records_total': records_total,
+        'records_filtered': records_filtered,
+        'next_cursor': next_cursor,
+    }
+
+def batch_names(batch_numbers):
+    """
+    {batch_number: batch_name} of the given batch numbers, in one query
+    """
+    batch_numbers = {batch_number for batch_number in batch_numbers if batch_number}
+    if not batch_numbers:
+        return {}
+    return dict(Batch.objects.filter(batch_number__in=batch_numbers).values_list('batch_number', 'batch_name'))
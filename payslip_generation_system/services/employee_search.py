@@ -0,0 +1,144 @@
+import re
+import unicodedata
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from payslip_generation_system.models import Employee, EmployeeSearchToken
+
+# Employee search index
+# Each employee's searchable fields (name, position, employee number, fund source, office) are
+# split into lowercase ASCII words and stored in EmployeeSearchToken, refreshed whenever an
+# Employee is saved. A search matches employees having, for every word typed, a token starting
+# with it: an index range scan per word, the same on MySQL and SQLite.
+
+TOKEN_LENGTH = 64
+
+# Employees per indexing transaction
+CHUNK_SIZE = 1000
+
+# Prefix ranges are bounded within this alphabet, which sorts the same in binary and
+# case-insensitive collations (digits before letters)
+ALPHABET = '0123456789abcdefghijklmnopqrstuvwxyz'
+
+# Words of the formatted office names (e.g. "MEO South")
+OFFICE_NAMES = {
+    'denr_ncr_nec': 'DENR NCR NEC',
+    'denr_ncr_prcmo': 'DENR NCR PRCMO',
+    'meo_s': 'MEO South',
+    'meo_e': 'MEO East',
+    'meo_w': 'MEO West',
+    'meo_n': 'MEO North',
+}
+
+FUND_NAMES = dict(Employee.FUND_CHOICES)
+
+# Employee fields the tokens are built from
+INDEXED_FIELDS = ['fullname', 'position', 'employee_number', 'fund_source', 'assigned_office']
+
+def words(text):
+    """
+    Lowercase ASCII words of a text, accents removed ("Peñaflor-Cruz" -> ["penaflor", "cruz"])
+    """
+    text = unicodedata.normalize('NFKD', str(text or '')).encode('ascii', 'ignore').decode()
+    return [word[:TOKEN_LENGTH] for word in re.findall(r'[a-z0-9]+', text.lower())]
+
+def employee_tokens(employee):
+    """
+    Search tokens of an employee
+    """
+    tokens = set()
+    for text in [
+        employee.fullname,
+        employee.position,
+        employee.fund_source,
+        FUND_NAMES.get(employee.fund_source),
+        employee.assigned_office,
+        OFFICE_NAMES.get(employee.assigned_office),
+    ]:
+        tokens.update(words(text))
+
+    # Employee number as typed ("2023-0001") and as a whole ("20230001")
+    number_words = words(employee.employee_number)
+    tokens.update(number_words)
+    if number_words:
+        tokens.add(''.join(number_words)[:TOKEN_LENGTH])
+    return tokens
+
+def index_employees(employees):
+    """
+    Replace the search tokens of the given Employee instances
+    """
+    employees = list(employees)
+    if not employees:
+        return
+    with transaction.atomic():
+        EmployeeSearchToken.objects.filter(employee_id__in=[employee.id for employee in employees]).delete()
+        EmployeeSearchToken.objects.bulk_create([
+            EmployeeSearchToken(employee_id=employee.id, token=token)
+            for employee in employees
+            for token in employee_tokens(employee)
+        ], batch_size=CHUNK_SIZE)
+
+def reindex(employee_ids=None, chunk_size=CHUNK_SIZE):
+    """
+    Rebuild the search tokens of the given employees (every employee when None).
+    Returns the number of employees indexed.
+    """
+    employees = Employee.objects.only('id', *INDEXED_FIELDS).order_by('id')
+    if employee_ids is not None:
+        employees = employees.filter(id__in=employee_ids)
+
+    count = 0
+    last_id = 0
+    while True:
+        chunk = list(employees.filter(id__gt=last_id)[:chunk_size])
+        if not chunk:
+            return count
+        index_employees(chunk)
+        count += len(chunk)
+        last_id = chunk[-1].id
+
+def prefix_upper_bound(prefix):
+    """
+    Smallest string after every string starting with prefix (None when there is none)
+    """
+    prefix = list(prefix)
+    while prefix:
+        position = ALPHABET.find(prefix[-1])
+        if 0 <= position < len(ALPHABET) - 1:
+            prefix[-1] = ALPHABET[position + 1]
+            return ''.join(prefix)
+        prefix.pop()
+    return None
+
+def token_matches(word):
+    """
+    Employee ids with a token starting with word
+    """
+    tokens = EmployeeSearchToken.objects.filter(token__gte=word)
+    upper_bound = prefix_upper_bound(word)
+    if upper_bound:
+        tokens = tokens.filter(token__lt=upper_bound)
+    return tokens.values('employee_id')
+
+def search_filter(text):
+    """
+    Q of the employees matching a search text: every word is a prefix of one of their
+    tokens, or the text is exactly their employee number
+    """
+    text = (text or '').strip()
+    search_words = words(text)
+    if not search_words:
+        return Q(employee_number=text) if text else Q()
+
+    query = Q()
+    for word in dict.fromkeys(search_words):
+        query &= Q(id__in=token_matches(word))
+    return query | Q(employee_number=text)
+
+@receiver(post_save, sender=Employee)
+def employee_saved(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields and not set(update_fields) & set(INDEXED_FIELDS)):
+        return
+    index_employees([instance])
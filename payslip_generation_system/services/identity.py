@@ -0,0 +1,101 @@
+from django.core.cache import cache
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from payslip_generation_system.models import Employee, UserRole
+
+# User identity
+# The display name, role and office of a user, resolved once at login and kept in the cache
+# (per user) and on the request, so the context processor and restrict_roles never query
+# the database. Saving or deleting the user's Employee or UserRole drops the cached entry.
+
+# Seconds a cached identity is kept; bounds staleness when the cache is per process
+IDENTITY_TIMEOUT = 300
+
+ROLE_FORMAT = {
+    'admin': 'System Admin',
+    'checker': 'Checker',
+    'accounting': 'Accounting',
+    'preparator_denr_nec': 'Preparator: DENR NCR NEC',
+    'preparator_denr_prcmo': 'Preparator: DENR NCR PRCMO',
+    'preparator_meo_s': 'Preparator: MEO South',
+    'preparator_meo_e': 'Preparator: MEO East',
+    'preparator_meo_w': 'Preparator: MEO West',
+    'preparator_meo_n': 'Preparator: MEO North',
+    'employee': 'Employee'
+}
+
+# Office of each preparator role
+ROLE_OFFICES = {
+    'preparator_denr_nec': 'denr_ncr_nec',
+    'preparator_denr_prcmo': 'denr_ncr_prcmo',
+    'preparator_meo_s': 'meo_s',
+    'preparator_meo_e': 'meo_e',
+    'preparator_meo_w': 'meo_w',
+    'preparator_meo_n': 'meo_n',
+}
+
+def cache_key(user_id):
+    return f"identity:{user_id}"
+
+def resolve(user):
+    """
+    {display_name, role, formatted_role, assigned_office} of a user, from the database
+    """
+    role = UserRole.objects.filter(user_id=user.id).values_list('role', flat=True).first()
+    fullname = Employee.objects.filter(user_id=user.id).values_list('fullname', flat=True).first()
+    return {
+        'display_name': fullname or user.username,
+        'role': role,
+        'formatted_role': ROLE_FORMAT.get(role),
+        'assigned_office': ROLE_OFFICES.get(role),
+    }
+
+def remember(user):
+    """
+    Resolve a user's identity and cache it (called at login)
+    """
+    identity = resolve(user)
+    cache.set(cache_key(user.id), identity, IDENTITY_TIMEOUT)
+    return identity
+
+def forget(user_id):
+    cache.delete(cache_key(user_id))
+
+def for_request(request):
+    """
+    Identity of the request's user: from the request, then the cache, then the database.
+    None for anonymous requests.
+    """
+    if hasattr(request, '_identity'):
+        return request._identity
+
+    identity = None
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        identity = cache.get(cache_key(user.id))
+        if identity is None:
+            identity = remember(user)
+
+        # A role changed since login applies to the session too
+        if request.session.get('role') != identity['role']:
+            request.session['role'] = identity['role']
+
+    request._identity = identity
+    return identity
+
+def request_role(request):
+    """
+    Lowercased role of the request's user ('' when anonymous or without a role)
+    """
+    identity = for_request(request)
+    role = identity['role'] if identity else request.session.get('role')
+    return str(role or '').strip().lower()
+
+@receiver([post_save, post_delete], sender=Employee)
+def employee_changed(sender, instance, **kwargs):
+    if instance.user_id:
+        forget(instance.user_id)
+
+@receiver([post_save, post_delete], sender=UserRole)
+def user_role_changed(sender, instance, **kwargs):
+    forget(instance.user_id)
@@ -0,0 +1,150 @@
+from django.db import connection
+from django.db.models import Q
+from payslip_generation_system.models import Adjustment, BatchAssignment, BatchStatus, Employee, PayrollLine, PayrollRun
+from payslip_generation_system.services import payroll_engine, batch_queue, employee_search, disbursement
+from payslip_generation_system.pay_period import period_filter, pay_period_key
+
+# Index audit
+# Runs EXPLAIN on the ORM queries behind the main payroll endpoints and flags
+# full table scans and sorts that are not served by an index (filesort / temp b-tree).
+
+# Tables small enough that a full scan is fine
+SMALL_TABLES = [
+    'payslip_generation_system_batch',
+    'payslip_generation_system_userrole',
+]
+
+def sample_period():
+    """
+    Parameters of the most recent batch assignment, used to build realistic queries
+    """
+    assignment = BatchAssignment.objects.order_by('-id').first()
+    if not assignment:
+        return None
+    return {
+        'batch_number': assignment.batch_number,
+        'cutoff': assignment.cutoff,
+        'cutoff_month': assignment.cutoff_month,
+        'cutoff_year': assignment.cutoff_year,
+        'assigned_office': assignment.assigned_office,
+        'employee_id': assignment.employee_id,
+        'employee_name': assignment.employee.fullname,
+    }
+
+def build_queries(sample):
+    """
+    [(name, queryset, allowed_flags)] for the main endpoints.
+    allowed_flags: sorts / groupings of an already index-searched, bounded row set
+    (one batch or one employee), or on computed values no index can serve.
+    """
+    batch_number = sample['batch_number']
+    cutoff = sample['cutoff']
+    cutoff_month = sample['cutoff_month']
+    cutoff_year = sample['cutoff_year']
+    assigned_office = sample['assigned_office']
+
+    assignments = payroll_engine.batch_assignments(batch_number, cutoff, cutoff_month, cutoff_year, assigned_office)
+    employee_ids = assignments.values('employee_id')
+    adjustment_period = period_filter(cutoff_year, cutoff_month, cutoff)
+
+    return [
+        # payroll.batch_data / submit
+        ('batch_data: assignments', assignments, ['filesort']),
+        ('batch_data: adjustment totals', payroll_engine.adjustment_totals(
+            employee_ids, cutoff, cutoff_month, cutoff_year, assigned_office
+        ), ['filesort']),
+        ('batch_data: adjustment details', payroll_engine.adjustment_details(
+            employee_ids, cutoff, cutoff_month, cutoff_year, assigned_office
+        ), ['filesort']),
+        ('batch_data: status flags', BatchStatus.objects.filter(
+            Q(batch_number=batch_number) | Q(is_last_batch=True),
+            pay_period=pay_period_key(cutoff_year, cutoff_month, cutoff),
+        ), []),
+        # payroll.data
+        # (ordering of the batch status rows with pending adjustments, found through batch_status_pending_idx)
+        ('payroll_data: pending batches', batch_queue.pending_batches(), ['filesort']),
+        # payroll.approve_data
+        ('approve_data: approved batches', batch_queue.approved_batches(), ['filesort']),
+        # employee.data / payslip.employee_data search (one token range per word)
+        ('employee_data: search tokens', Employee.objects.filter(
+            employee_search.search_filter(sample['employee_name'])
+        ), []),
+        # payslip.generate
+        ('payslip: employee adjustments', Adjustment.objects.filter(
+            employee_id=sample['employee_id'],
+            status__in=payroll_engine.PAYROLL_STATUSES,
+            **adjustment_period,
+        ), []),
+        ('payslip: frozen line', PayrollLine.objects.filter(
+            employee_id=sample['employee_id'],
+            **period_filter(cutoff_year, cutoff_month, cutoff, month_field='cutoff_month', prefix='run__'),
+        ).order_by('-run__created_at')[:1], ['filesort']),
+        # payroll.batch_data on a submitted batch
+        ('batch_data: frozen run', PayrollRun.objects.filter(
+            batch_number=batch_number,
+            **period_filter(cutoff_year, cutoff_month, cutoff, month_field='cutoff_month'),
+            assigned_office=assigned_office,
+        ), []),
+        # excel.disbursement_file
+        ('disbursement: credited runs', disbursement.credited_runs(cutoff, cutoff_month, cutoff_year, assigned_office), []),
+    ]
+
+def explain(queryset):
+    """
+    Query plan as a list of dicts (column name -> value)
+    """
+    sql, params = queryset.query.sql_with_params()
+    prefix = 'EXPLAIN QUERY PLAN ' if connection.vendor == 'sqlite' else 'EXPLAIN '
+    with connection.cursor() as cursor:
+        cursor.execute(prefix + sql, params)
+        columns = [column[0] for column in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+def plan_flags(plan):
+    """
+    Problems found in a query plan: [(flag, detail)] with flag 'full scan' or 'filesort'
+    """
+    flags = []
+    for row in plan:
+        if connection.vendor == 'mysql':
+            table = row.get('table') or ''
+            extra = row.get('Extra') or ''
+            if row.get('type') == 'ALL' and table not in SMALL_TABLES:
+                flags.append(('full scan', table))
+            if 'Using filesort' in extra or 'Using temporary' in extra:
+                flags.append(('filesort', f"{table}: {extra}"))
+        elif connection.vendor == 'sqlite':
+            detail = row.get('detail') or ''
+            if detail.startswith('SCAN ') and 'INDEX' not in detail:
+                table = detail.split()[1]
+                if table not in SMALL_TABLES:
+                    flags.append(('full scan', detail))
+            if 'TEMP B-TREE' in detail:
+                flags.append(('filesort', detail))
+        else:
+            detail = ' '.join(str(value) for value in row.values())
+            if 'Seq Scan' in detail and not any(table in detail for table in SMALL_TABLES):
+                flags.append(('full scan', detail.strip()))
+            if 'Sort' in detail and 'Sort Key' not in detail:
+                flags.append(('filesort', detail.strip()))
+    return flags
+
+def run_audit(sample=None):
+    """
+    [{'name', 'plan', 'flags', 'allowed'}] for every audited query
+    """
+    sample = sample or sample_period()
+    if not sample:
+        return []
+
+    results = []
+    for name, queryset, allowed in build_queries(sample):
+        plan = explain(queryset)
+        flags = plan_flags(plan)
+        results.append({
+            'name': name,
+            'plan': plan,
+            'flags': [flag for flag in flags if flag[0] not in allowed],
+            'allowed': [flag for flag in flags if flag[0] in allowed],
+        })
+    return results
@@ -0,0 +1,213 @@
+import os
+import json
+import time
+import socket
+import tempfile
+import traceback
+from importlib import import_module
+from django.contrib.auth.models import User
+from django.contrib.sessions.backends.base import SessionBase
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import close_old_connections
+from django.db.models import F
+from django.http import HttpRequest, QueryDict
+from django.utils import timezone
+from payslip_generation_system.models import Job
+
+# Background jobs
+# Long payroll operations run outside the request, with no broker: a request enqueues a Job row
+# and answers with its id, the run_workers command claims queued jobs (one conditional UPDATE,
+# so two workers never run the same job) and runs their handler, and the UI polls the job.
+# Handlers are registered by kind; 'view' replays an enqueueable JSON view (decorators.enqueueable)
+# in the worker with the requesting user, so the endpoint keeps a single implementation.
+# A view that builds a file (the payroll .xlsx) saves it with save_file and answers with the
+# file's name; views.job.file serves it to the user who queued the job.
+
+HANDLERS = {}
+
+# Seconds an idle worker waits before looking for jobs again
+POLL_SECONDS = 2
+
+# Storage directory of the files written by jobs, one sub-directory per job
+FILES_DIR = 'jobs'
+
+# Job being run by this process (report() writes its progress)
+current = None
+
+class JobFailed(Exception):
+    """
+    Raised by a handler whose operation failed with a result worth showing (e.g. a 400 body)
+    """
+
+    def __init__(self, message, result=None):
+        super().__init__(message)
+        self.result = result
+
+def handler(kind):
+    """
+    Register a job handler: fn(job, **params) -> JSON-serializable result
+    """
+    def decorator(fn):
+        HANDLERS[kind] = fn
+        return fn
+    return decorator
+
+def enqueue(kind, params=None, user=None):
+    if kind not in HANDLERS:
+        raise ValueError(f"Unknown job kind: {kind}")
+    return Job.objects.create(kind=kind, params=params or {}, created_by=user if user and user.is_authenticated else None)
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"[:100]
+
+def claim(worker):
+    """
+    Oldest queued job, marked running for this worker; None when the queue is empty
+    """
+    while True:
+        job_id = Job.objects.filter(status='queued').order_by('id').values_list('id', flat=True).first()
+        if job_id is None:
+            return None
+
+        # Another worker may claim it first: only one conditional UPDATE succeeds
+        claimed = Job.objects.filter(id=job_id, status='queued').update(
+            status='running', worker=worker, started_at=timezone.now(), attempts=F('attempts') + 1,
+        )
+        if claimed:
+            return Job.objects.get(id=job_id)
+
+def report(done, total=None, message=None):
+    """
+    Progress of the job run by this process (no-op outside a job). Written at once, so
+    call it outside transactions for the UI to see it.
+    """
+    if current is None:
+        return
+    fields = {'progress': done}
+    if total is not None:
+        fields['total'] = total
+    if message is not None:
+        fields['message'] = message[:255]
+    Job.objects.filter(id=current.id).update(**fields)
+
+def run(job):
+    """
+    Run a claimed job and record its result or error
+    """
+    global current
+    current = job
+    try:
+        result = HANDLERS[job.kind](job, **job.params)
+    except JobFailed as e:
+        Job.objects.filter(id=job.id).update(
+            status='failed', result=e.result, error=str(e), finished_at=timezone.now(),
+        )
+    except Exception:
+        Job.objects.filter(id=job.id).update(
+            status='failed', error=traceback.format_exc(), finished_at=timezone.now(),
+        )
+    else:
+        Job.objects.filter(id=job.id).update(
+            status='succeeded', result=result, finished_at=timezone.now(),
+        )
+    finally:
+        current = None
+
+def save_file(job, file_name, chunks):
+    """
+    Store the bytes of chunks as a file of the job; returns its storage name
+    """
+    with tempfile.TemporaryFile() as data:
+        for chunk in chunks:
+            data.write(chunk)
+        data.seek(0)
+        return default_storage.save(f"{FILES_DIR}/{job.id}/{file_name}", File(data, name=file_name))
+
+def requeue_orphans(host=None):
+    """
+    Put back in the queue the jobs left running by workers of this host (run_workers
+    calls it at start up: one run_workers per host)
+    """
+    host = host or socket.gethostname()
+    return Job.objects.filter(status='running', worker__startswith=f"{host}:").update(status='queued', worker='')
+
+def work(once=False, poll=POLL_SECONDS):
+    """
+    Worker loop: run queued jobs one at a time. once: stop when the queue is empty.
+    Returns the number of jobs run.
+    """
+    name = worker_name()
+    count = 0
+    while True:
+        close_old_connections()
+        job = claim(name)
+        if job is None:
+            if once:
+                return count
+            time.sleep(poll)
+            continue
+        run(job)
+        count += 1
+
+def job_values(job):
+    """
+    JSON status of a job for the polling endpoint (error: last line of the traceback)
+    """
+    return {
+        'id': job.id,
+        'kind': job.kind,
+        'status': job.status,
+        'progress': job.progress,
+        'total': job.total,
+        'percent': round(job.progress * 100 / job.total) if job.total else None,
+        'message': job.message,
+        'error': job.error.strip().splitlines()[-1] if job.error else '',
+        'created_at': job.created_at,
+        'started_at': job.started_at,
+        'finished_at': job.finished_at,
+    }
+
+# Enqueued views
+
+def view_params(request, view):
+    """
+    Job params replaying a request to an enqueueable view
+    """
+    return {
+        'view': f"{view.__module__}.{view.__name__}",
+        'method': request.method,
+        'path': request.path,
+        'data': {key: values for key, values in (request.POST if request.method == 'POST' else request.GET).lists()},
+        'role': request.session.get('role'),
+        'user_id': request.user.id,
+    }
+
+@handler('view')
+def replay_view(job, view, method, path, data, role, user_id):
+    """
+    Run an enqueueable JSON view as the requesting user; the result is its status and JSON body
+    """
+    query = QueryDict(mutable=True)
+    for key, values in data.items():
+        query.setlist(key, values)
+
+    request = HttpRequest()
+    request.method = method
+    request.path = request.path_info = path
+    if method == 'POST':
+        request.POST = query
+    else:
+        request.GET = query
+    request.user = User.objects.get(id=user_id)
+    request.session = SessionBase()
+    request.session['role'] = role
+    request._job = job
+
+    module_name, view_name = view.rsplit('.', 1)
+    response = getattr(import_module(module_name), view_name)(request)
+    result = {'status': response.status_code, 'body': json.loads(response.content or b'null')}
+    if response.status_code >= 400:
+        body = result['body'] if isinstance(result['body'], dict) else {}
+        raise JobFailed(body.get('error') or body.get('message') or f"HTTP {response.status_code}", result)
+    return result
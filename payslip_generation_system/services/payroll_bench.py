@@ -0,0 +1,211 @@
+import time
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from payslip_generation_system.models import UserRole, Employee
+from payslip_generation_system.services import identity
+
+# Payroll benchmark / query budget harness
+# Drives the heavy payroll endpoints through the Django test client on a seeded dataset
+# (see factories.payroll_dataset) and measures wall time and SQL per request.
+
+# Role that logs in for every benchmarked endpoint
+OFFICE_ROLES = {
+    'denr_ncr_nec': 'preparator_denr_nec',
+    'denr_ncr_prcmo': 'preparator_denr_prcmo',
+    'meo_s': 'preparator_meo_s',
+    'meo_e': 'preparator_meo_e',
+    'meo_w': 'preparator_meo_w',
+    'meo_n': 'preparator_meo_n',
+}
+
+# Maximum SQL queries per request. Budgets must not depend on the dataset size,
+# a budget failure means an N+1 came back.
+QUERY_BUDGETS = {
+    'batch_data': 16,
+    'batch_data_frozen': 16,
+    'excel_export': 8,
+    'excel_export_frozen': 8,
+    'payroll_data': 6,
+    'approve_data': 8,
+    'employee_data': 8,
+    'payslip_generate': 10,
+}
+
+def find_batch(dataset, status):
+    for batch in dataset['batches']:
+        if batch['status'] == status:
+            return batch
+    return None
+
+def batch_params(batch):
+    return {
+        'batch_number': batch['batch_number'],
+        'cutoff': batch['cutoff'],
+        'cutoff_month': batch['cutoff_month'],
+        'cutoff_year': batch['cutoff_year'],
+    }
+
+def build_endpoints(dataset):
+    """
+    Requests to benchmark: [{'name', 'role', 'method', 'path', 'data'}]
+    """
+    waiting = find_batch(dataset, 'Waiting')
+    pending = find_batch(dataset, 'Pending')
+    endpoints = []
+
+    if waiting:
+        endpoints.append({
+            'name': 'batch_data',
+            'role': OFFICE_ROLES[waiting['assigned_office']],
+            'method': 'get',
+            'path': '/payroll/batch/data',
+            'data': batch_params(waiting),
+        })
+
+        # Live batch: computed from the adjustments, not a frozen run
+        endpoints.append({
+            'name': 'excel_export',
+            'role': OFFICE_ROLES[waiting['assigned_office']],
+            'method': 'get',
+            'path': '/payroll/excel/export',
+            'data': batch_params(waiting),
+        })
+
+    if pending:
+        endpoints.append({
+            'name': 'batch_data_frozen',
+            'role': 'checker',
+            'method': 'get',
+            'path': '/payroll/batch/data',
+            'data': {**batch_params(pending), 'assigned_office': pending['assigned_office']},
+        })
+
+        endpoints.append({
+            'name': 'excel_export_frozen',
+            'role': OFFICE_ROLES[pending['assigned_office']],
+            'method': 'get',
+            'path': '/payroll/excel/export',
+            'data': batch_params(pending),
+        })
+
+        # An employee of the pending batch (current year period)
+        employee = Employee.objects.filter(
+            batch_number=pending['batch_number'],
+            assigned_office=pending['assigned_office'],
+        ).order_by('id').first()
+
+        endpoints.append({
+            'name': 'payslip_generate',
+            'role': 'admin',
+            'method': 'post',
+            'path': '/payslip/generate',
+            'data': {
+                'employee': employee.id,
+                'month': pending['cutoff_month'],
+                'cutoff': pending['cutoff'],
+            },
+        })
+
+    endpoints.append({
+        'name': 'payroll_data',
+        'role': 'checker',
+        'method': 'get',
+        'path': '/payroll/data',
+        'data': {},
+    })
+
+    endpoints.append({
+        'name': 'approve_data',
+        'role': 'accounting',
+        'method': 'get',
+        'path': '/payroll/approve_data',
+        'data': {},
+    })
+
+    endpoints.append({
+        'name': 'employee_data',
+        'role': 'admin',
+        'method': 'get',
+        'path': '/employee/data',
+        'data': {'draw': 1, 'start': 0, 'length': 10, 'order[0][column]': 1, 'order[0][dir]': 'asc'},
+    })
+
+    return endpoints
+
+def login_client(role):
+    """
+    Test client logged in as a (bench) user of the given role
+    """
+    user, created = User.objects.get_or_create(username=f"bench_{role}")
+    if created:
+        UserRole.objects.create(user=user, role=role)
+
+    client = Client()
+    client.force_login(user)
+    session = client.session
+    # Same as views.auth.login: the identity is cached at login
+    session['role'] = identity.remember(user)['role']
+    session.save()
+    return client
+
+def percentile(values, pct):
+    # Nearest-rank percentile
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(ordered) + 0.5)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+def run_endpoint(endpoint, repeat=5, clients=None):
+    """
+    Request an endpoint `repeat` times and return its timing / SQL statistics
+    """
+    clients = clients if clients is not None else {}
+    client = clients.get(endpoint['role'])
+    if client is None:
+        client = clients[endpoint['role']] = login_client(endpoint['role'])
+
+    request = getattr(client, endpoint['method'])
+    wall_times = []
+    query_counts = []
+    sql_times = []
+    status_code = None
+
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = request(endpoint['path'], endpoint['data'])
+            if response.streaming:
+                # Streamed files run their queries while the body is written
+                b''.join(response.streaming_content)
+            wall_times.append((time.perf_counter() - started) * 1000)
+
+        status_code = response.status_code
+        query_counts.append(len(queries.captured_queries))
+        sql_times.append(sum(float(query['time']) for query in queries.captured_queries) * 1000)
+
+    budget = QUERY_BUDGETS.get(endpoint['name'])
+    queries = max(query_counts)
+
+    return {
+        'name': endpoint['name'],
+        'status': status_code,
+        'wall_ms': sum(wall_times) / len(wall_times),
+        'p50_ms': percentile(wall_times, 50),
+        'p95_ms': percentile(wall_times, 95),
+        'queries': queries,
+        'sql_ms': sum(sql_times) / len(sql_times),
+        'budget': budget,
+        'over_budget': budget is not None and queries > budget,
+    }
+
+def run_benchmark(dataset, repeat=5, names=None):
+    clients = {}
+    results = []
+    for endpoint in build_endpoints(dataset):
+        if names and endpoint['name'] not in names:
+            continue
+        results.append(run_endpoint(endpoint, repeat, clients))
+    return results
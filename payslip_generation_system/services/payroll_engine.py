@@ -0,0 +1,369 @@
+from decimal import Decimal, ROUND_HALF_UP
+from django.db.models import Q, Sum, FloatField, Case, When, Value, IntegerField, Exists, OuterRef
+from django.forms.models import model_to_dict
+from payslip_generation_system.models import Adjustment, BatchAssignment
+from payslip_generation_system.pay_period import period_filter
+
+# Set-based payroll computation
+# Adjustment totals for a whole batch come from ONE grouped query (conditional sums
+# per category, keyed by employee) instead of one aggregate per employee per category.
+
+# Adjustment statuses that count on a computed payroll
+PAYROLL_STATUSES = ["Pending", "Approved", "Credited"]
+
+# Deductions with their own payroll column (excluded from "other deductions")
+FIXED_DEDUCTION_NAMES = ["Late", "Absent", "TAX", "SSS"]
+
+ZERO = Decimal('0.00')
+
+# Withholding tax and PhilHealth contribution, on the gross pay of a cutoff
+TAX_RATE = Decimal("0.03")
+PHILHEALTH_RATE = Decimal("0.05")
+
+# Adjustment categories
+PHILHEALTH = Q(name__icontains="Philhealth")
+EWT = Q(name__icontains="Expanded Withholding Tax")
+OTHER_DEDUCTION = Q(type="Deduction") & ~(Q(name__in=FIXED_DEDUCTION_NAMES) | PHILHEALTH | EWT)
+INCOME = Q(type="Income")
+
+# One conditional sum per category
+TOTAL_ANNOTATIONS = {
+    'other_deductions': Sum('amount', filter=OTHER_DEDUCTION),
+    'income': Sum('amount', filter=INCOME),
+    'late_amount': Sum('amount', filter=Q(name="Late")),
+    'late_minutes': Sum('details', filter=Q(name="Late"), output_field=FloatField()),
+    'absent_amount': Sum('amount', filter=Q(name="Absent")),
+    'absent_minutes': Sum('details', filter=Q(name="Absent"), output_field=FloatField()),
+    'philhealth_previous': Sum('amount', filter=PHILHEALTH),
+    'ewt': Sum('amount', filter=EWT),
+    'sss': Sum('amount', filter=Q(name="SSS")),
+}
+
+EMPTY_TOTALS = {
+    'other_deductions': ZERO,
+    'income': ZERO,
+    'late_amount': ZERO,
+    'late_minutes': ZERO,
+    'absent_amount': ZERO,
+    'absent_minutes': ZERO,
+    'philhealth_previous': ZERO,
+    'ewt': ZERO,
+    'sss': ZERO,
+}
+
+def period_adjustments(cutoff, cutoff_month, cutoff_year, assigned_office=None, statuses=PAYROLL_STATUSES):
+    """
+    Adjustments of one payroll period, optionally limited to an office and statuses
+    """
+    queryset = Adjustment.objects.filter(**period_filter(cutoff_year, cutoff_month, cutoff))
+    if statuses:
+        queryset = queryset.filter(status__in=statuses)
+    if assigned_office:
+        queryset = queryset.filter(assigned_office=assigned_office)
+    return queryset
+
+def adjustment_totals(employee_ids, cutoff, cutoff_month, cutoff_year, assigned_office=None, statuses=PAYROLL_STATUSES):
+    """
+    Grouped query behind fetch_adjustment_totals (one row per employee)
+    """
+    return (
+        period_adjustments(cutoff, cutoff_month, cutoff_year, assigned_office, statuses)
+        .filter(employee_id__in=employee_ids)
+        .values('employee_id')
+        .annotate(**TOTAL_ANNOTATIONS)
+        .order_by()
+    )
+
+def fetch_adjustment_totals(employee_ids, cutoff, cutoff_month, cutoff_year, assigned_office=None, statuses=PAYROLL_STATUSES):
+    """
+    Per-employee adjustment totals for a period in a single grouped query.
+    employee_ids can be a list or a values('employee_id') queryset (used as a subquery).
+    Returns {employee_id: totals}; employees without adjustments are left out.
+    """
+    rows = adjustment_totals(employee_ids, cutoff, cutoff_month, cutoff_year, assigned_office, statuses)
+
+    totals = {}
+    for row in rows:
+        employee_id = row.pop('employee_id')
+        totals[employee_id] = {key: (value if value is not None else ZERO) for key, value in row.items()}
+    return totals
+
+def adjustment_details(employee_ids, cutoff, cutoff_month, cutoff_year, assigned_office=None, statuses=PAYROLL_STATUSES):
+    """
+    Query behind fetch_adjustment_details (income and other-deduction line items)
+    """
+    return (
+        period_adjustments(cutoff, cutoff_month, cutoff_year, assigned_office, statuses)
+        .filter(employee_id__in=employee_ids)
+        .filter(INCOME | OTHER_DEDUCTION)
+        .values('employee_id', 'type', 'name', 'amount', 'details')
+        .order_by('id')
+    )
+
+def fetch_adjustment_details(employee_ids, cutoff, cutoff_month, cutoff_year, assigned_office=None, statuses=PAYROLL_STATUSES):
+    """
+    Income and other-deduction line items for a period in one query.
+    Returns {employee_id: {'incomes': [...], 'deductions': [...]}}
+    """
+    rows = adjustment_details(employee_ids, cutoff, cutoff_month, cutoff_year, assigned_office, statuses)
+
+    details = {}
+    for row in rows:
+        lines = details.setdefault(row['employee_id'], {'incomes': [], 'deductions': []})
+        key = 'incomes' if row['type'] == "Income" else 'deductions'
+        lines[key].append({'name': row['name'], 'amount': row['amount'], 'details': row['details']})
+    return details
+
+def fetch_submitted_batches(batch_numbers, cutoff, cutoff_month, cutoff_year, assigned_office=None):
+    """
+    Batch numbers (out of batch_numbers) that already have submitted adjustments for the period
+    """
+    batch_numbers = {b for b in batch_numbers if b is not None}
+    if not batch_numbers:
+        return set()
+
+    return set(
+        period_adjustments(cutoff, cutoff_month, cutoff_year, assigned_office)
+        .filter(batch_number__in=batch_numbers)
+        .values_list('batch_number', flat=True)
+        .distinct()
+        .order_by()
+    )
+
+def batch_assignments(batch_number, cutoff, cutoff_month, cutoff_year, assigned_office=None):
+    """
+    Assignments of a batch in payroll table order (on time first, then late, by name)
+    annotated with has_adjustments, as expected by build_batch_rows
+    """
+    assignments = BatchAssignment.objects.filter(
+        batch_number=batch_number,
+        **period_filter(cutoff_year, cutoff_month, cutoff, month_field='cutoff_month'),
+    )
+    adjustments = Adjustment.objects.filter(
+        employee=OuterRef('employee'),
+        batch_number=batch_number,
+        **period_filter(cutoff_year, cutoff_month, cutoff),
+    )
+    if assigned_office:
+        assignments = assignments.filter(assigned_office=assigned_office)
+        adjustments = adjustments.filter(assigned_office=assigned_office)
+
+    return assignments.select_related('employee').annotate(
+        late_order=Case(
+            When(late_assigned='NO', then=Value(0)),
+            When(late_assigned='YES', then=Value(1)),
+            default=Value(2),
+            output_field=IntegerField()
+        ),
+        has_adjustments=Exists(adjustments)
+    ).order_by('late_order', 'employee__fullname')
+
+def statutory_deductions(employee, total_gross_amount):
+    """
+    (tax, PhilHealth) deducted from a cutoff's gross pay: 3% tax unless the employee declared
+    their tax, 5% PhilHealth when they are a member, both rounded half up to centavos
+    """
+    # TAX DEDUCTION
+    if employee.tax_declaration == "yes":
+        tax_deduction = ZERO
+    else:
+        tax_deduction = (total_gross_amount * TAX_RATE).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+
+    # PHILHEALTH DEDUCTION
+    if employee.has_philhealth == "yes":
+        philhealth = (total_gross_amount * PHILHEALTH_RATE).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+    else:
+        philhealth = ZERO
+
+    return tax_deduction, philhealth
+
+def compute_pay(employee, totals):
+    """
+    Gross, tax, PhilHealth and net pay of one employee for a cutoff
+    """
+    basic_salary_cutoff = employee.salary / 2
+
+    total_gross_amount = abs(
+        basic_salary_cutoff
+        - totals['late_amount']
+        - totals['absent_amount']
+        - totals['other_deductions']
+        + totals['income']
+    )
+
+    tax_deduction, philhealth = statutory_deductions(employee, total_gross_amount)
+
+    total_deductions = (
+        totals['sss'] + philhealth + tax_deduction + totals['ewt'] + totals['philhealth_previous']
+    ).quantize(Decimal("0.01"))
+
+    return {
+        'basic_salary_cutoff': basic_salary_cutoff,
+        'total_gross_amount': total_gross_amount,
+        'tax_deduction': tax_deduction,
+        'philhealth': philhealth,
+        'total_deductions': total_deductions,
+        'net_salary': abs(total_gross_amount - total_deductions),
+    }
+
+def details_number(value):
+    # Late minutes / absent days are typed as text; SUM() reads anything else as 0
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+def payslip_values(employee, adjustments):
+    """
+    Payslip figures of an employee computed from the period's adjustments
+    (dicts with type, name, amount and details, already limited to PAYROLL_STATUSES)
+    """
+    deductions = [adj for adj in adjustments if adj['type'] == "Deduction"]
+    incomes = [adj for adj in adjustments if adj['type'] == "Income"]
+    other_deductions = [
+        adj for adj in deductions
+        if adj['name'] not in FIXED_DEDUCTION_NAMES
+        and "philhealth" not in adj['name'].lower()
+        and "expanded withholding tax" not in adj['name'].lower()
+    ]
+    late = [adj for adj in deductions if adj['name'] == "Late"]
+    absent = [adj for adj in deductions if adj['name'] == "Absent"]
+
+    def total(items):
+        return sum((adj['amount'] for adj in items), ZERO)
+
+    def total_details(items):
+        return sum(details_number(adj['details']) for adj in items) if items else ZERO
+
+    basic_salary_cutoff = employee.salary / 2
+    total_adjustment_amount_minus = total(other_deductions)
+    total_adjustment_amount_plus = total(incomes)
+    late_amt_total = total(late)
+    absent_amt_total = total(absent)
+
+    total_gross_amount = abs(
+        basic_salary_cutoff - late_amt_total - absent_amt_total
+        - total_adjustment_amount_minus + total_adjustment_amount_plus
+    )
+
+    tax_deduction, philhealth = statutory_deductions(employee, total_gross_amount)
+
+    philhealth_previous = total(adj for adj in deductions if "philhealth" in adj['name'].lower())
+    ewt = total(adj for adj in deductions if "expanded withholding tax" in adj['name'].lower())
+    sss = total(adj for adj in deductions if adj['name'] == "SSS")
+
+    total_deductions = tax_deduction + ewt + philhealth + philhealth_previous + sss + absent_amt_total + late_amt_total
+    total_adjustment_summary = (
+        - Decimal(total_adjustment_amount_minus)
+        + Decimal(total_adjustment_amount_plus)
+    ).quantize(Decimal("0.01"))
+
+    return {
+        'employee_no': employee.employee_number,
+        'employee_name': employee.fullname,
+        'position': employee.position,
+        'monthly_rate': employee.salary,
+        'basic_salary_cutoff': basic_salary_cutoff,
+        'absent_amt_total': absent_amt_total,
+        'absent_day_total': total_details(absent),
+        'late_amt_total': late_amt_total,
+        'late_min_total': total_details(late),
+        'all_adjustment_minus': other_deductions,
+        'total_adjustment_amount_minus': total_adjustment_amount_minus,
+        'all_adjustment_plus': incomes,
+        'total_adjustment_amount_plus': total_adjustment_amount_plus,
+        'total_gross': total_gross_amount,
+        'sss': sss,
+        'philhealth': philhealth,
+        'tax_deduction': tax_deduction,
+        'ewt': ewt,
+        'philhealth_previous': philhealth_previous,
+        'total_deductions': total_deductions,
+        'total_adjustment_summary': total_adjustment_summary,
+        'net_pay': basic_salary_cutoff - total_deductions + total_adjustment_summary,
+    }
+
+def compute_batch(assignments, cutoff, cutoff_month, cutoff_year, adjustment_office=None, previous_batch_office=None):
+    """
+    Computed payroll values (unformatted) of every employee on a batch.
+    assignments: BatchAssignment queryset (select_related employee, annotated with has_adjustments)
+    adjustment_office: limits adjustment totals to one office (pending page)
+    previous_batch_office: office used when checking if a removed/late employee's previous batch was submitted
+    Query count is constant no matter how many employees are on the batch.
+    """
+    assignments = list(assignments)
+    employee_ids = [assignment.employee_id for assignment in assignments]
+
+    totals_by_employee = fetch_adjustment_totals(employee_ids, cutoff, cutoff_month, cutoff_year, adjustment_office)
+    details_by_employee = fetch_adjustment_details(employee_ids, cutoff, cutoff_month, cutoff_year, adjustment_office)
+    submitted_batches = fetch_submitted_batches(
+        [assignment.previous_batch for assignment in assignments],
+        cutoff, cutoff_month, cutoff_year, previous_batch_office
+    )
+
+    rows = []
+    for assignment in assignments:
+        employee = assignment.employee
+        totals = totals_by_employee.get(employee.id, EMPTY_TOTALS)
+        details = details_by_employee.get(employee.id, {'incomes': [], 'deductions': []})
+        previous_batch = assignment.previous_batch
+
+        row = model_to_dict(employee, fields=[
+            'id', 'employee_number', 'fullname', 'position', 'salary', 'tax_declaration', 'has_philhealth'
+        ])
+        row['late_assigned'] = assignment.late_assigned
+        row['removed'] = assignment.removed
+        row['has_adjustments'] = assignment.has_adjustments
+        row['previous_batch'] = previous_batch
+        row['previous_batch_submitted'] = previous_batch is not None and previous_batch in submitted_batches
+        row.update(totals)
+        row.update(compute_pay(employee, totals))
+        row['incomes'] = details['incomes']
+        row['deductions'] = details['deductions']
+
+        rows.append(row)
+
+    return rows
+
+def format_row(row):
+    """
+    JSON row of the payroll batch table from computed (or frozen) payroll values
+    """
+    return {
+        'id': row['id'],
+        'employee_number': row['employee_number'],
+        'fullname': row['fullname'],
+        'position': row['position'],
+        'salary': row['salary'],
+        'tax_declaration': row['tax_declaration'],
+        'has_philhealth': row['has_philhealth'],
+        'late_assigned': row['late_assigned'],
+        'removed': row['removed'],
+        'has_adjustments': row['has_adjustments'],
+        'previous_batch': row['previous_batch'],
+        'previous_batch_submitted': row['previous_batch_submitted'],
+        'basic_salary_cutoff': f"{row['basic_salary_cutoff']:.2f}",
+        'tax_deduction': f"{row['tax_deduction']:.2f}",
+        'ewt': f"{row['ewt']:.2f}",
+        'philhealth': f"{row['philhealth']:.2f}",
+        'previous_philhealth': f"{row['philhealth_previous']}",
+        'sss': f"{row['sss']:.2f}",
+        'late_amount': f"{row['late_amount']:.2f}",
+        'late_minutes': f"{row['late_minutes']:.2f}",
+        'absent_amount': f"{row['absent_amount']:.2f}",
+        'absent_minutes': f"{row['absent_minutes']:.2f}",
+        'other_deductions': f"{row['other_deductions']:.2f}",
+        'total_deductions': f"{row['total_deductions']:.2f}",
+        'income': f"{row['income']:.2f}",
+        'total_gross_amount': f"{row['total_gross_amount']:.2f}",
+        'net_salary': f"{row['net_salary']:.2f}",
+        'incomes': row['incomes'],
+        'deductions': row['deductions'],
+    }
+
+def build_batch_rows(assignments, cutoff, cutoff_month, cutoff_year, adjustment_office=None, previous_batch_office=None):
+    """
+    JSON rows of the payroll batch table computed live from the adjustments
+    """
+    rows = compute_batch(assignments, cutoff, cutoff_month, cutoff_year, adjustment_office, previous_batch_office)
+    return [format_row(row) for row in rows]
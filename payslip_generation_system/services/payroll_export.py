@@ -0,0 +1,579 @@
+import calendar
+import re
+from datetime import datetime
+from payslip_generation_system.models import BatchAssignment, PayrollRun
+from payslip_generation_system.pay_period import MONTHS, period_filter
+from payslip_generation_system.services import payroll_engine, payroll_snapshot, employee_directory, xlsx_stream
+
+# Payroll Excel export
+# The general payroll .xlsx built on the server with services.xlsx_stream, in the layout the
+# payroll page used to build in the browser with ExcelJS: one sheet per batch, for one batch,
+# every batch of an office, or every office of a pay period. Live batches are computed in one
+# pass (one grouped adjustment query for every employee of the export); submitted batches are
+# read from their frozen PayrollRun. The workbook is assembled in a temporary file before it is
+# sent (see xlsx_stream); large exports can run as a background job instead.
+
+# Entity names on the sheet header
+ENTITY_NAMES = {
+    'denr_ncr_nec': 'DENR NCR National Ecology Center (NEC)',
+    'denr_ncr_prcmo': 'DENR NCR PRCMO',
+    'meo_s': 'Metropolitan Environmental Office South (MEO South)',
+    'meo_e': 'Metropolitan Environmental Office East (MEO East)',
+    'meo_w': 'Metropolitan Environmental Office West (MEO West)',
+    'meo_n': 'Metropolitan Environmental Office North (MEO North)',
+}
+
+NAME_SUFFIXES = ['JR', 'SR', 'III', 'IV', 'JR.', 'SR.']
+
+# Column widths A..Y
+COLUMN_WIDTHS = [5, 9, 16, 24, 16, 13, 10, 12, 11, 9, 11, 13, 12, 12, 12, 12, 12, 12, 14, 4, 6, 4, 13, 13, 12]
+
+COLUMNS = [xlsx_stream.column_letter(index) for index in range(1, len(COLUMN_WIDTHS) + 1)]
+
+FIRST_EMPLOYEE_ROW = 11
+
+# Employee rows printed even when the batch is smaller
+MIN_EMPLOYEE_ROWS = 15
+
+# Columns of the total row (H..S)
+TOTAL_COLUMNS = ['H', 'I', 'J', 'K', 'L', 'M', 'N', 'O', 'P', 'Q', 'R', 'S']
+
+# Columns of the box below the employee rows (V is merged with U, Y is drawn apart)
+TOTAL_AREA_COLUMNS = ['A', 'B', 'C', 'D', 'E', 'F', 'G', 'H', 'I', 'J', 'K', 'L', 'M', 'N', 'O', 'P', 'Q', 'R', 'S', 'T', 'U', 'W', 'X']
+
+FONT_NAME = 'Aptos Narrow'
+NUMBER_FORMAT = '#,##0.00'
+PESO_FORMAT = '"₱"#,##0.00'
+
+YELLOW = 'FFFFFF00'
+BROWN = 'FFFFEB9C'
+GREEN = 'FFD0FFA6'
+RED_TEXT = 'FFFF0000'
+BROWN_TEXT = 'FF9C5700'
+
+CENTER = {'horizontal': 'center', 'vertical': 'center'}
+CENTER_WRAP = {'horizontal': 'center', 'vertical': 'center', 'wrap': True}
+LEFT = {'horizontal': 'left', 'vertical': 'center'}
+RIGHT = {'horizontal': 'right', 'vertical': 'center'}
+MIDDLE = {'vertical': 'center'}
+
+BOX = {'left': 'medium', 'right': 'medium', 'top': 'medium', 'bottom': 'medium'}
+
+HEADERS = {
+    'A8': "Seq\nNo.",
+    'B8': "Last Name",
+    'D8': "First Name",
+    'E8': "Position",
+    'F8': "Monthly Rate",
+    'G8': "With Sworn Declaration? (Y/N)",
+    'H8': "Salaries/\nWages Earned",
+    'I8': "Absence",
+    'J8': "Late/\nUndertime",
+    'K8': "Adjustments from Previous Payroll if any (Over)/\nUnder Payments",
+    'L8': "Total Gross\nAmount Earned",
+    'M8': "Deductions",
+    'M9': "SSS PREMIUM",
+    'N9': "PHILHEALTH\n(CURRENT\nPAYROLL)",
+    'O9': "PERCENTAGE\nTAX",
+    'P9': "EWT",
+    'Q9': "PHILHEALTH\n(PREVIOUS\nPAYROLL/S)",
+    'R8': "Total\nDeductions",
+    'S8': "Net Amount Due",
+    'T8': "Seq\nNo.",
+    'U8': "Signature",
+    'W8': "Please DO NOT INCLUDE these\ncolumns in printing",
+    'W9': "Absence\n(Encode no, of\nday/s absent)",
+    'X9': "LATE/\nUNDERTIME (Encode no. of\nminutes of\nlate/UT)",
+    'Y8': "SUBJECT\nTO\nPHILHEALTH\nDEDUCTION\n(Y/N)",
+}
+
+HEADER_MERGES = [
+    'A8:A10', 'B8:C10', 'D8:D10', 'E8:E10', 'F8:F10', 'G8:G10', 'H8:H10', 'I8:I10', 'J8:J10',
+    'K8:K10', 'L8:L10', 'M8:Q8', 'M9:M10', 'N9:N10', 'O9:O10', 'P9:P10', 'Q9:Q10', 'R8:R10',
+    'S8:S10', 'T8:T10', 'U8:V10', 'W8:X8', 'W9:W10', 'X9:X10', 'Y8:Y10',
+]
+
+ROW_HEIGHTS = {7: 3, 8: 21, 9: 36, 10: 36}
+
+def font(size=10, **kwargs):
+    return {'name': FONT_NAME, 'size': size, **kwargs}
+
+def cutoff_range(cutoff, cutoff_month, cutoff_year):
+    """
+    Period shown on the sheet ("March-1-15,2025" / "March-16-31,2025")
+    """
+    try:
+        last_day = calendar.monthrange(int(cutoff_year), MONTHS.index(cutoff_month) + 1)[1]
+    except (TypeError, ValueError):
+        return 'Cutoff Range'
+    if cutoff == '1st':
+        return f"{cutoff_month}-1-15,{cutoff_year}"
+    if cutoff == '2nd':
+        return f"{cutoff_month}-16-{last_day},{cutoff_year}"
+    return 'Cutoff Range'
+
+def generated_on(moment=None):
+    """
+    Generation date printed on the sheet ("3-14-2025 09:05 AM")
+    """
+    moment = moment or datetime.now()
+    return f"{moment.month}-{moment.day}-{moment.year} {moment.strftime('%I:%M %p')}"
+
+def split_name(fullname):
+    """
+    (column B, column D) names of a fullname: "Last, First Middle" -> ("Last", "First Middle"),
+    "First Middle Last" -> ("First Middle", "Last"); a trailing suffix (JR, III...) is dropped
+    """
+    if not fullname or not fullname.strip():
+        return '', ''
+
+    if ',' in fullname:
+        head, rest = [part.strip() for part in (fullname.split(',') + [''])[:2]]
+        parts = rest.split(' ')
+        if parts[-1].upper() in NAME_SUFFIXES:
+            parts.pop()
+        return head, ' '.join(parts)
+
+    parts = fullname.split()
+    if parts[-1].upper() in NAME_SUFFIXES:
+        parts.pop()
+    last = parts.pop() if parts else ''
+    return ' '.join(parts), last
+
+def yes_no(value):
+    return 'Y' if str(value or '').lower() == 'yes' else 'N'
+
+def or_dash(value):
+    return value if value else '-'
+
+def live_row(employee, totals):
+    """
+    Excel row values of an employee computed from the adjustment totals
+    """
+    pay = payroll_engine.compute_pay(employee, totals)
+    return {
+        'fullname': employee.fullname,
+        'position': employee.position,
+        'salary': employee.salary,
+        'tax_declaration': employee.tax_declaration,
+        'has_philhealth': employee.has_philhealth,
+        'absent': totals['absent_amount'],
+        'late': totals['late_amount'],
+        'deductions': totals['other_deductions'],
+        'income': totals['income'],
+        'gross': pay['total_gross_amount'],
+        'sss': totals['sss'],
+        'philhealth_current': pay['philhealth'],
+        'tax': pay['tax_deduction'],
+        'ewt': totals['ewt'],
+        'philhealth_previous': totals['philhealth_previous'],
+        'absent_days': int(totals['absent_minutes']),
+        'late_minutes': int(totals['late_minutes']),
+    }
+
+def frozen_row(line):
+    """
+    Excel row values of an employee read from a frozen payroll line
+    """
+    return {
+        'fullname': line.fullname,
+        'position': line.position,
+        'salary': line.salary,
+        'tax_declaration': line.tax_declaration,
+        'has_philhealth': line.has_philhealth,
+        'absent': line.absent_amount,
+        'late': line.late_amount,
+        'deductions': line.other_deductions,
+        'income': line.income,
+        'gross': line.total_gross_amount,
+        'sss': line.sss,
+        'philhealth_current': line.philhealth,
+        'tax': line.tax_deduction,
+        'ewt': line.ewt,
+        'philhealth_previous': line.philhealth_previous,
+        'absent_days': payroll_snapshot.sum_whole_details(line.adjustments, 'Absent'),
+        'late_minutes': payroll_snapshot.sum_whole_details(line.adjustments, 'Late'),
+    }
+
+class Layout:
+    """
+    Cells of one sheet, as (value, style) per column, with the styles of the workbook
+    """
+
+    def __init__(self, styles, sheet):
+        self.styles = styles
+        self.sheet = sheet
+        self.rows = {}
+
+    def put(self, row, column, value=None, **style):
+        """
+        Set a cell; border sides are added to the cell's border, other style parts replace it
+        """
+        cell = self.rows.setdefault(row, {}).setdefault(column, {'value': None, 'style': {}})
+        if value is not None:
+            cell['value'] = value
+        border = style.pop('border', None)
+        if border:
+            cell['style']['border'] = {**cell['style'].get('border', {}), **border}
+        cell['style'].update(style)
+
+    def span(self, first_row, first_column, last_row, last_column, value=None, **style):
+        """
+        Merge a range; like ExcelJS, every cell of the range carries the style of the first
+        """
+        self.sheet.merge(f"{first_column}{first_row}:{last_column}{last_row}")
+        columns = COLUMNS[COLUMNS.index(first_column):COLUMNS.index(last_column) + 1]
+        for row in range(first_row, last_row + 1):
+            for column in columns:
+                self.put(row, column, value if (row, column) == (first_row, first_column) else None, **style)
+
+    def take(self, row, height=None):
+        """
+        (row, height, cells) of a finished row, ready for the writer
+        """
+        cells = {}
+        for column, cell in self.rows.pop(row, {}).items():
+            style = cell['style']
+            cells[column] = (cell['value'], self.styles.add(
+                font=style.get('font', font()) if cell['value'] is not None else style.get('font'),
+                fill=style.get('fill'),
+                border=style.get('border'),
+                alignment=style.get('alignment'),
+                num_fmt=style.get('num_fmt'),
+            ))
+        return row, height, cells
+
+def title_rows(layout, entity_name, period_text):
+    """
+    Rows 1..10: payroll title, entity, acknowledgement and the column headers
+    """
+    layout.span(1, 'A', 1, 'Q', "                                                                 GENERAL PAYROLL",
+                font=font(11, bold=True), alignment=CENTER)
+    layout.span(2, 'A', 2, 'Q', "                                                              DENR-NCR",
+                font=font(11), alignment=CENTER)
+    layout.span(3, 'H', 3, 'K', period_text, font=font(11, bold=True, underline=True), alignment=CENTER)
+    layout.span(5, 'A', 5, 'B', "Entity Name: ", font=font(10, bold=True), alignment=LEFT)
+    layout.span(5, 'C', 5, 'G', entity_name, font=font(11, bold=True), alignment=LEFT)
+    layout.span(6, 'A', 6, 'I', "We acknowledge receipt of cash shown opposite our name as full compensation for services rendered for the period covered.",
+                font=font(10), alignment=LEFT)
+    layout.span(6, 'S', 6, 'T', "Sheet 1 of 1", font=font(10, bold=True), alignment=RIGHT)
+
+    for ref in HEADER_MERGES:
+        first, last = ref.split(':')
+        first_column, first_row = re.match(r'([A-Z]+)(\d+)', first).groups()
+        last_column, last_row = re.match(r'([A-Z]+)(\d+)', last).groups()
+        style = {'font': font(9, bold=True), 'border': BOX, 'alignment': CENTER_WRAP}
+        if first_column in ['W', 'X']:
+            style.update(fill=YELLOW, font=font(9, bold=True, italic=True, color=RED_TEXT))
+        elif first_column == 'Y':
+            style.update(fill=BROWN, font=font(9, bold=True, color=BROWN_TEXT))
+        layout.span(int(first_row), first_column, int(last_row), last_column, HEADERS.get(first), **style)
+
+    for row in range(1, FIRST_EMPLOYEE_ROW):
+        yield layout.take(row, ROW_HEIGHTS.get(row))
+
+def employee_rows(layout, rows, totals):
+    """
+    One row per employee from FIRST_EMPLOYEE_ROW (at least MIN_EMPLOYEE_ROWS), adding up totals.
+    Returns the row after the last employee row.
+    """
+    row_number = FIRST_EMPLOYEE_ROW
+    for sequence, values in enumerate(rows, start=1):
+        yield from employee_row(layout, row_number, sequence, values, totals)
+        row_number += 1
+
+    while row_number < FIRST_EMPLOYEE_ROW + MIN_EMPLOYEE_ROWS:
+        yield from employee_row(layout, row_number, None, None, totals)
+        row_number += 1
+
+    return row_number
+
+def employee_row(layout, row, sequence, values, totals):
+    for column in COLUMNS:
+        layout.put(row, column, border={
+            'top': 'medium' if row == FIRST_EMPLOYEE_ROW else 'thin',
+            'bottom': 'thin',
+            'left': 'medium',
+            'right': 'medium',
+        })
+    layout.span(row, 'B', row, 'C', alignment=MIDDLE)
+    layout.span(row, 'U', row, 'V')
+
+    if values is not None:
+        first, last = split_name(values['fullname'])
+        wages = values['salary'] / 2
+        deductions = (
+            values['sss'] + values['philhealth_current'] + values['tax'] + values['ewt'] + values['philhealth_previous']
+        )
+        net = values['gross'] - deductions
+        if values['income'] > 0:
+            adjustment = values['income']
+        elif values['deductions'] > 0:
+            adjustment = f"({values['deductions']:.2f})"
+        else:
+            adjustment = '-'
+
+        layout.put(row, 'A', sequence, alignment=CENTER_WRAP)
+        layout.put(row, 'B', first)
+        layout.put(row, 'D', last, alignment=MIDDLE)
+        layout.put(row, 'E', values['position'] or '', alignment=CENTER_WRAP)
+        layout.put(row, 'F', values['salary'], num_fmt=NUMBER_FORMAT, alignment=MIDDLE)
+        layout.put(row, 'G', yes_no(values['tax_declaration']), alignment=CENTER_WRAP)
+        layout.put(row, 'H', wages, num_fmt=NUMBER_FORMAT, alignment=MIDDLE)
+        for column, value in [
+            ('I', values['absent'] if values['absent'] > 0 else '-'),
+            ('J', values['late'] if values['late'] > 0 else '-'),
+            ('K', adjustment),
+            ('L', values['gross']),
+            ('M', or_dash(values['sss'])),
+            ('N', or_dash(values['philhealth_current'])),
+            ('O', or_dash(values['tax'])),
+            ('P', or_dash(values['ewt'])),
+            ('Q', or_dash(values['philhealth_previous'])),
+            ('R', or_dash(deductions)),
+            ('S', net),
+        ]:
+            layout.put(row, column, value, num_fmt=NUMBER_FORMAT, font=font(bold=True), alignment=RIGHT)
+        layout.put(row, 'T', sequence, alignment=CENTER_WRAP)
+        for column, value in [('W', values['absent_days']), ('X', values['late_minutes'])]:
+            layout.put(row, column, value or None, font=font(9, bold=True, color=RED_TEXT), fill=YELLOW, alignment=CENTER_WRAP)
+        layout.put(row, 'Y', yes_no(values['has_philhealth']), font=font(9, bold=True, color=BROWN_TEXT), fill=BROWN, alignment=CENTER_WRAP)
+
+        for key, value in [
+            ('H', wages),
+            ('I', max(values['absent'], 0)),
+            ('J', max(values['late'], 0)),
+            ('K', values['income'] - values['deductions']),
+            ('L', values['gross']),
+            ('M', values['sss']),
+            ('N', values['philhealth_current']),
+            ('O', values['tax']),
+            ('P', values['ewt']),
+            ('Q', values['philhealth_previous']),
+            ('R', deductions),
+            ('S', net),
+        ]:
+            totals[key] = totals.get(key, 0) + value
+
+    yield layout.take(row, 25)
+
+def total_rows(layout, first_row, totals):
+    """
+    Spacer row and the two-row box holding the totals (first_row: row after the employee rows)
+    """
+    spacer, total_row, last_row = first_row, first_row + 1, first_row + 2
+
+    for column in TOTAL_AREA_COLUMNS:
+        if column in ['B', 'C']:
+            layout.put(spacer, column, border={'top': 'thin', 'bottom': 'medium'})
+        elif column == 'U':
+            layout.put(spacer, column, border={'top': 'thin', 'bottom': 'medium', 'left': 'medium'})
+        elif column == 'X':
+            layout.put(spacer, column, border={'right': 'medium'})
+        else:
+            layout.put(spacer, column, border={'left': 'medium', 'right': 'medium'})
+    layout.put(spacer, 'Y', border={'right': 'medium'})
+
+    for column in TOTAL_AREA_COLUMNS:
+        border = {'top': 'medium', 'bottom': 'medium'} if column in ['B', 'C'] else BOX
+        style = {'border': border}
+        value = None
+        if column in TOTAL_COLUMNS:
+            value = totals.get(column) or '-'
+            style.update(num_fmt=NUMBER_FORMAT, font=font(bold=True), alignment=RIGHT)
+        elif column == 'B':
+            value = 'Total'
+            style.update(font=font(bold=True), alignment=CENTER)
+        layout.span(total_row, column, last_row, 'V' if column == 'U' else column, value, **style)
+    layout.put(total_row, 'Y', border={'top': 'medium', 'right': 'medium'})
+    layout.put(last_row, 'Y', border={'bottom': 'medium', 'right': 'medium'})
+
+    yield layout.take(spacer, 8)
+    yield layout.take(total_row, 11)
+    yield layout.take(last_row, 11)
+
+def certification_rows(layout, first_row, net_total, generated_text):
+    """
+    Certifications and signatories below the totals, and the generation stamp
+    """
+    row = first_row
+    bottom = {'bottom': 'medium'}
+
+    layout.span(row, 'A', row, 'F', [
+        ('A. CERTIFIED', font(9, bold=True)),
+        (': Services duly rendered as stated', font(9)),
+    ], font=font(9))
+    layout.put(row, 'J', 'C. APPROVED FOR PAYMENT:', font=font(9, bold=True))
+
+    layout.span(row + 1, 'J', row + 1, 'R', '#NAME', font=font(11, bold=True), alignment=CENTER, border={'bottom': 'thin'})
+    layout.span(row + 1, 'S', row + 1, 'V', net_total, font=font(bold=True), alignment=CENTER,
+                num_fmt=PESO_FORMAT, border={'bottom': 'double', 'right': 'medium'})
+
+    for offset, left_text, right_text in [
+        (4, 'JAN S. BAUTISTA', 'ERLINDA O. DAQUIGAN'),
+        (5, 'Chief, Administrative Division', 'OIC, Assistant Regional Director for'),
+        (6, None, 'Management Services'),
+        (7, 'Date: _____________________', 'Date: _____________________'),
+    ]:
+        signatory = offset == 4
+        text_font = font(bold=True, underline=True) if signatory else font()
+        layout.span(row + offset, 'A', row + offset, 'F', left_text, font=text_font, alignment=CENTER)
+        layout.span(row + offset, 'M', row + offset, 'P', right_text, font=text_font, alignment=CENTER)
+
+    for column in ['A', 'B', 'C', 'D', 'E', 'F', 'G', 'H', 'I', 'J', 'K', 'L', 'M', 'N', 'O', 'P', 'Q', 'R', 'S', 'T', 'U', 'V']:
+        layout.put(row + 7, column, border=bottom)
+
+    layout.put(row + 8, 'A', [
+        ('B. CERTIFIED', font(9, bold=True)),
+        (': Supporting documents complete and proper, and cash available in', font(9)),
+    ], font=font(9))
+    layout.put(row + 8, 'J', 'D. CERTIFIED: Each employee whose', font=font(9))
+    layout.put(row + 8, 'S', 'E.', font=font(9, bold=True))
+    layout.put(row + 9, 'A', '                          in the amount of P ____________________')
+    layout.put(row + 9, 'J', 'name appears above has been paid the amount indicated opposite', font=font(9))
+    layout.put(row + 9, 'S', '       ORS No.:', font=font(9, bold=True))
+    layout.put(row + 10, 'J', 'the amount indicate opposite on', font=font(9))
+    layout.put(row + 11, 'J', 'his/her name', font=font(9))
+    layout.put(row + 11, 'S', '     Date:', font=font(10, bold=True))
+    layout.put(row + 13, 'S', '       JEV No.:', font=font(11, bold=True))
+    for offset in [9, 11, 13]:
+        layout.span(row + offset, 'T', row + offset, 'U', border={'bottom': 'thin'})
+
+    layout.span(row + 14, 'A', row + 14, 'F', 'JAHYA M. CABAEL', font=font(bold=True, underline=True), alignment=CENTER)
+    layout.put(row + 14, 'N', '   MYRA H. RAMOS   ', font=font(bold=True, underline=True), alignment=CENTER)
+    layout.span(row + 15, 'A', row + 15, 'F', 'OIC,  Accounting Section', alignment=CENTER)
+    layout.span(row + 15, 'M', row + 15, 'O', 'Disbursing Officer', alignment=CENTER)
+    layout.put(row + 15, 'S', '       Date:', font=font(11, bold=True))
+    layout.put(row + 15, 'T', border={'bottom': 'thin'})
+    layout.put(row + 15, 'U', border={'bottom': 'thin'})
+    layout.span(row + 16, 'A', row + 16, 'F', 'Date: _________________', alignment=CENTER)
+    layout.span(row + 16, 'M', row + 16, 'O', 'Date: _________________', alignment=CENTER)
+    for column in ['A', 'B', 'C', 'D', 'E', 'F', 'G', 'H', 'I', 'J', 'K', 'L', 'M', 'N', 'O', 'P', 'Q', 'R', 'S', 'T', 'U', 'V']:
+        layout.put(row + 16, column, border=bottom)
+
+    # Box lines: A | I | V around the approval part, A | I | R | V around the certification part
+    for offset in range(17):
+        layout.put(row + offset, 'A', border={'left': 'medium'})
+        for column in (['I', 'V'] if offset < 8 else ['I', 'R', 'V']):
+            layout.put(row + offset, column, border={'right': 'medium'})
+
+    layout.span(row + 20, 'R', row + 21, 'V',
+                f"Generated on PayGes @ {generated_text}\n Check the data Carefully.",
+                font=font(10, bold=True, italic=True), alignment=CENTER_WRAP, fill=GREEN)
+
+    for offset in range(22):
+        yield layout.take(row + offset)
+
+def sheet_rows(layout, entity_name, period_text, rows, generated_text):
+    """
+    Every row of one batch sheet, employee rows streamed from rows
+    """
+    totals = {}
+    yield from title_rows(layout, entity_name, period_text)
+    next_row = yield from employee_rows(layout, rows, totals)
+    yield from total_rows(layout, next_row, totals)
+    yield from certification_rows(layout, next_row + 3, totals.get('S', 0), generated_text)
+
+def export_assignments(cutoff, cutoff_month, cutoff_year, assigned_office=None, batch_number=None):
+    """
+    Batch assignments of the period covered by an export
+    """
+    assignments = BatchAssignment.objects.filter(
+        **period_filter(cutoff_year, cutoff_month, cutoff, month_field='cutoff_month')
+    )
+    if assigned_office:
+        assignments = assignments.filter(assigned_office=assigned_office)
+    if batch_number is not None:
+        assignments = assignments.filter(batch_number=batch_number)
+    return assignments
+
+def export_batches(cutoff, cutoff_month, cutoff_year, assigned_office=None, batch_number=None):
+    """
+    (assigned_office, batch_number) of every batch in an export, in sheet order
+    """
+    return list(
+        export_assignments(cutoff, cutoff_month, cutoff_year, assigned_office, batch_number)
+        .order_by('assigned_office', 'batch_number')
+        .values_list('assigned_office', 'batch_number')
+        .distinct()
+    )
+
+def live_rows(assignments, totals_by_employee):
+    for assignment in assignments.select_related('employee').order_by('employee__fullname', 'employee_id'):
+        totals = totals_by_employee.get(assignment.employee_id, payroll_engine.EMPTY_TOTALS)
+        yield live_row(assignment.employee, totals)
+
+def frozen_rows(run):
+    for line in run.lines.order_by('fullname', 'line_number'):
+        yield frozen_row(line)
+
+def file_name(cutoff, cutoff_month, cutoff_year, assigned_office=None, batch_name=None):
+    """
+    PAYGES_Payroll_<OFFICE>_<month>_<cutoff>_<year>[_<batch name>].xlsx
+    """
+    office = re.sub(r'\W+', '_', assigned_office or 'ALL_OFFICES').upper()
+    parts = ['PAYGES_Payroll', office, cutoff_month, cutoff, cutoff_year]
+    if batch_name:
+        parts.append(re.sub(r'[^\w\- ]+', '_', batch_name))
+    return '_'.join(str(part) for part in parts) + '.xlsx'
+
+def stream_workbook(batches, cutoff, cutoff_month, cutoff_year, moment=None):
+    """
+    Bytes of the payroll .xlsx, chunk by chunk, one sheet per (assigned_office, batch_number)
+    of batches (see export_batches)
+    """
+    batch_numbers = [batch_number for _, batch_number in batches]
+    runs = {
+        (run.assigned_office, run.batch_number): run
+        for run in PayrollRun.objects.filter(
+            batch_number__in=batch_numbers,
+            **period_filter(cutoff_year, cutoff_month, cutoff, month_field='cutoff_month'),
+        )
+    }
+
+    # Adjustment totals of every employee on a live batch, one grouped query. Like the payroll
+    # page, a batch being prepared counts its adjustments whatever their status.
+    live_batches = [batch for batch in batches if batch not in runs]
+    totals_by_employee = {}
+    if live_batches:
+        live_employees = export_assignments(cutoff, cutoff_month, cutoff_year).filter(
+            batch_number__in=[batch_number for _, batch_number in live_batches]
+        ).values('employee_id')
+        totals_by_employee = payroll_engine.fetch_adjustment_totals(
+            live_employees, cutoff, cutoff_month, cutoff_year, statuses=None
+        )
+
+    names = employee_directory.batch_names(batch_numbers)
+    period_text = cutoff_range(cutoff, cutoff_month, cutoff_year)
+    generated_text = generated_on(moment)
+
+    styles = xlsx_stream.Styles()
+    titles = set()
+    sheets = []
+    for assigned_office, batch_number in batches:
+        batch_name = names.get(batch_number) or f"Batch {batch_number}"
+        run = runs.get((assigned_office, batch_number))
+        if run:
+            rows = frozen_rows(run)
+        else:
+            assignments = export_assignments(cutoff, cutoff_month, cutoff_year, assigned_office, batch_number)
+            if assigned_office is None:
+                assignments = assignments.filter(assigned_office__isnull=True)
+            rows = live_rows(assignments, totals_by_employee)
+
+        sheet = xlsx_stream.Sheet(
+            xlsx_stream.sheet_title(batch_name, titles),
+            rows=None,
+            widths=COLUMN_WIDTHS,
+            freeze='F11',
+            print_area='A:V',
+            landscape=True,
+            paper_size=9,
+            fit_to_width=1,
+            margins={'left': 0.2, 'right': 0.2, 'top': 0.5, 'bottom': 0.5, 'header': 0.3, 'footer': 0.3},
+        )
+        entity_name = f"{ENTITY_NAMES.get(assigned_office, assigned_office or '')} {batch_name}"
+        sheet.rows = sheet_rows(Layout(styles, sheet), entity_name, period_text, rows, generated_text)
+        sheets.append(sheet)
+
+    return xlsx_stream.stream(sheets, styles)
@@ -0,0 +1,268 @@
+from decimal import Decimal
+from django.db import transaction
+from payslip_generation_system.models import Adjustment, Batch, PayrollRun, PayrollLine
+from payslip_generation_system.services import payroll_engine
+from payslip_generation_system.pay_period import pay_period_key, pay_period_parts, period_filter
+
+# Frozen payroll snapshot
+# submit computes the batch once and stores one PayrollLine per employee. Submitted, approved
+# and credited batches are then read from the snapshot, so they no longer change when a
+# salary or an employee flag is edited later. Runs are keyed on (office, pay_period, batch),
+# the same keys as BatchStatus.
+
+# Computed values copied from payroll_engine.compute_batch into a PayrollLine
+LINE_VALUE_FIELDS = [
+    'late_assigned', 'removed', 'previous_batch', 'previous_batch_submitted', 'has_adjustments',
+    'basic_salary_cutoff', 'late_amount', 'absent_amount', 'other_deductions', 'income',
+    'total_gross_amount', 'tax_deduction', 'philhealth', 'philhealth_previous', 'ewt', 'sss',
+    'total_deductions', 'net_salary', 'incomes', 'deductions',
+]
+
+def get_batch_name(batch_number, assigned_office=None):
+    batch_qs = Batch.objects.filter(batch_number=batch_number)
+    batch_obj = None
+    if assigned_office:
+        batch_obj = batch_qs.filter(batch_assigned_office=assigned_office).first()
+    if not batch_obj:
+        batch_obj = batch_qs.first()
+    return batch_obj.batch_name if batch_obj else None
+
+def freeze_batch(batch_number, cutoff, cutoff_month, cutoff_year, assigned_office, submitted_by=None):
+    """
+    Compute the payroll of a batch and store it as the batch's PayrollRun (replacing any previous one)
+    """
+    assignments = payroll_engine.batch_assignments(batch_number, cutoff, cutoff_month, cutoff_year, assigned_office)
+    rows = payroll_engine.compute_batch(
+        assignments,
+        cutoff,
+        cutoff_month,
+        cutoff_year,
+        adjustment_office=assigned_office,
+        previous_batch_office=assigned_office,
+    )
+
+    # Every adjustment of the batch (Excel file breakdown), one query
+    adjustments_by_employee = {}
+    adjustments = Adjustment.objects.filter(
+        employee_id__in=[row['id'] for row in rows],
+        batch_number=batch_number,
+        **period_filter(cutoff_year, cutoff_month, cutoff),
+        assigned_office=assigned_office,
+    ).values('employee_id', 'name', 'type', 'amount', 'details').order_by('id')
+    for adj in adjustments:
+        adjustments_by_employee.setdefault(adj['employee_id'], []).append({
+            'name': adj['name'],
+            'type': adj['type'],
+            'amount': float(adj['amount']),
+            'details': adj['details'],
+        })
+
+    with transaction.atomic():
+        run, _ = PayrollRun.objects.update_or_create(
+            batch_number=batch_number,
+            pay_period=pay_period_key(cutoff_year, cutoff_month, cutoff),
+            assigned_office=assigned_office,
+            defaults={
+                'cutoff': cutoff,
+                'cutoff_month': cutoff_month,
+                'cutoff_year': cutoff_year,
+                'batch_name': get_batch_name(batch_number, assigned_office),
+                'submitted_by': submitted_by,
+            }
+        )
+        run.lines.all().delete()
+
+        lines = []
+        for line_number, row in enumerate(rows):
+            line = PayrollLine(
+                run=run,
+                employee_id=row['id'],
+                line_number=line_number,
+                employee_number=row['employee_number'],
+                fullname=row['fullname'],
+                position=row['position'],
+                salary=row['salary'],
+                tax_declaration=row['tax_declaration'],
+                has_philhealth=row['has_philhealth'],
+                late_minutes=Decimal(str(row['late_minutes'])).quantize(Decimal('0.01')),
+                absent_minutes=Decimal(str(row['absent_minutes'])).quantize(Decimal('0.01')),
+                adjustments=adjustments_by_employee.get(row['id'], []),
+            )
+            for field in LINE_VALUE_FIELDS:
+                setattr(line, field, row[field])
+            lines.append(line)
+
+        PayrollLine.objects.bulk_create(lines)
+
+    return run
+
+def find_run(batch_number, cutoff, cutoff_month, cutoff_year, assigned_office=None):
+    """
+    Frozen run of a batch. Without an office, only returns a run when the batch number is unambiguous.
+    """
+    runs = PayrollRun.objects.filter(
+        batch_number=batch_number,
+        **period_filter(cutoff_year, cutoff_month, cutoff, month_field='cutoff_month'),
+    )
+    if assigned_office:
+        runs = runs.filter(assigned_office=assigned_office)
+
+    runs = list(runs[:2])
+    return runs[0] if len(runs) == 1 else None
+
+def find_line(employee, cutoff, cutoff_month, cutoff_year):
+    """
+    Latest frozen payroll line of an employee for a period
+    """
+    return (
+        PayrollLine.objects
+        .filter(
+            employee=employee,
+            **period_filter(cutoff_year, cutoff_month, cutoff, month_field='cutoff_month', prefix='run__'),
+        )
+        .order_by('-run__created_at')
+        .first()
+    )
+
+def discard_runs(cutoff, cutoff_month, cutoff_year, batch_number=None, assigned_office=None):
+    """
+    Drop frozen runs when their batch goes back to the preparator (rejected, edited or deleted)
+    """
+    runs = PayrollRun.objects.filter(
+        **period_filter(cutoff_year, cutoff_month, cutoff, month_field='cutoff_month'),
+    )
+    if batch_number is not None:
+        runs = runs.filter(batch_number=batch_number)
+    if assigned_office:
+        runs = runs.filter(assigned_office=assigned_office)
+    runs.delete()
+
+def refresh_runs(keys):
+    """
+    Re-freeze the existing runs of (assigned_office, pay_period, batch_number) keys, e.g. after
+    an employee moved between batches; call inside the transaction that made the change
+    """
+    for assigned_office, pay_period, batch_number in sorted(keys, key=str):
+        if pay_period is None:
+            continue
+        run = PayrollRun.objects.filter(
+            batch_number=batch_number,
+            pay_period=pay_period,
+            assigned_office=assigned_office,
+        ).first()
+        if run:
+            cutoff, cutoff_month, cutoff_year = pay_period_parts(pay_period)
+            freeze_batch(batch_number, cutoff, cutoff_month, cutoff_year, assigned_office, run.submitted_by)
+
+def refresh_runs_for_adjustments(adjustment_ids):
+    """
+    Re-freeze the runs touched by corrections made on submitted adjustments (checker edits)
+    """
+    keys = (
+        Adjustment.objects
+        .filter(id__in=adjustment_ids)
+        .values_list('assigned_office', 'pay_period', 'batch_number')
+        .distinct()
+        .order_by()
+    )
+    refresh_runs(keys)
+
+def line_values(line):
+    """
+    Frozen line as the computed-values dict used by payroll_engine.format_row
+    """
+    values = {
+        'id': line.employee_id,
+        'employee_number': line.employee_number,
+        'fullname': line.fullname,
+        'position': line.position,
+        'salary': line.salary,
+        'tax_declaration': line.tax_declaration,
+        'has_philhealth': line.has_philhealth,
+        'late_minutes': line.late_minutes,
+        'absent_minutes': line.absent_minutes,
+    }
+    for field in LINE_VALUE_FIELDS:
+        values[field] = getattr(line, field)
+    return values
+
+def batch_rows(run):
+    """
+    JSON rows of the payroll batch table read from a frozen run
+    """
+    return [payroll_engine.format_row(line_values(line)) for line in run.lines.all()]
+
+def sum_whole_details(adjustments, name):
+    # Late minutes / absent days on the Excel file are whole numbers
+    total = 0
+    for adj in adjustments:
+        if adj['name'] != name:
+            continue
+        try:
+            total += int(float(adj['details']))
+        except (TypeError, ValueError):
+            continue
+    return total
+
+def excel_rows(run):
+    """
+    Employee rows of the payroll Excel file read from a frozen run
+    """
+    rows = []
+    for line in run.lines.order_by('fullname'):
+        rows.append({
+            'employee_id': line.employee_id,
+            'fullname': line.fullname,
+            'position': line.position,
+            'salary': float(line.salary),
+            'tax_declaration': line.tax_declaration,
+            'absent': float(line.absent_amount),
+            'late': float(line.late_amount),
+            'adjustment_deductions': line.other_deductions,
+            'adjustment_income': line.income,
+            'total_gross': float(line.total_gross_amount),
+            'has_philhealth': line.has_philhealth,
+            'late_minutes': sum_whole_details(line.adjustments, 'Late'),
+            'absent_days': sum_whole_details(line.adjustments, 'Absent'),
+            'tax_amount': float(line.tax_deduction),
+            'philhealth_current': float(line.philhealth),
+            'philhealth_previous': float(line.philhealth_previous),
+            'ewt': float(line.ewt),
+            'adjustments': line.adjustments,
+        })
+    return rows
+
+def payslip_values(line):
+    """
+    Payslip figures of an employee read from a frozen payroll line
+    """
+    total_deductions = (
+        line.tax_deduction + line.ewt + line.philhealth + line.philhealth_previous
+        + line.sss + line.absent_amount + line.late_amount
+    )
+    total_adjustment_summary = (-line.other_deductions + line.income).quantize(Decimal("0.01"))
+
+    return {
+        'employee_no': line.employee_number,
+        'employee_name': line.fullname,
+        'position': line.position,
+        'monthly_rate': line.salary,
+        'basic_salary_cutoff': line.basic_salary_cutoff,
+        'absent_amt_total': line.absent_amount,
+        'absent_day_total': float(line.absent_minutes),
+        'late_amt_total': line.late_amount,
+        'late_min_total': float(line.late_minutes),
+        'all_adjustment_minus': line.deductions,
+        'total_adjustment_amount_minus': line.other_deductions,
+        'all_adjustment_plus': line.incomes,
+        'total_adjustment_amount_plus': line.income,
+        'total_gross': line.total_gross_amount,
+        'sss': line.sss,
+        'philhealth': line.philhealth,
+        'tax_deduction': line.tax_deduction,
+        'ewt': line.ewt,
+        'philhealth_previous': line.philhealth_previous,
+        'total_deductions': total_deductions,
+        'total_adjustment_summary': total_adjustment_summary,
+        'net_pay': line.basic_salary_cutoff - total_deductions + total_adjustment_summary,
+    }
@@ -0,0 +1,210 @@
+import os
+import zipfile
+import django
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime
+from django.contrib.staticfiles import finders
+from django.template.loader import render_to_string
+from django.utils.text import get_valid_filename
+from payslip_generation_system.models import BatchAssignment, Employee, PayrollLine
+from payslip_generation_system.pay_period import period_filter
+from payslip_generation_system.services import payroll_engine, payroll_snapshot
+
+try:
+    from weasyprint import HTML
+except ImportError:
+    # PDF payslips need WeasyPrint (pip install weasyprint); HTML payslips always work
+    HTML = None
+
+# Bulk payslips
+# Payslips of every employee on a batch, an office's payroll or a selection, rendered across a
+# process pool and streamed into a ZIP as they finish. The figures come from the frozen lines of
+# submitted batches (one query) and, for the others, from one query for all the adjustments of
+# the period, so the workers never touch the database.
+
+FORMATS = ['html', 'pdf']
+
+CONTENT_TYPE = 'application/zip'
+
+# Payslips queued per worker ahead of the ZIP writer
+QUEUE_PER_WORKER = 4
+
+# Logos, shipped once in the ZIP next to the HTML payslips
+LOGOS = {
+    'denr_logo': 'assets/denr-logo.png',
+    'bagong_pilipinas_logo': 'assets/bagong-pilipinas.png',
+}
+
+class ChunkSink:
+    """
+    Write-only, non-seekable file the zip is written to; take() hands back what was written
+    """
+
+    def __init__(self):
+        self.chunks = []
+        self.offset = 0
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.offset += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.offset
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+def pdf_available():
+    return HTML is not None
+
+def default_workers():
+    return min(4, os.cpu_count() or 1)
+
+def bundle_employees(cutoff, cutoff_month, cutoff_year, assigned_office=None, batch_number=None, employee_ids=None):
+    """
+    Employees on a period's payroll (one batch and / or office) or a selection of employees, by name
+    """
+    employees = Employee.objects.all()
+    if batch_number is not None or assigned_office:
+        assignments = BatchAssignment.objects.filter(
+            **period_filter(cutoff_year, cutoff_month, cutoff, month_field='cutoff_month')
+        ).exclude(removed='YES')
+        if batch_number is not None:
+            assignments = assignments.filter(batch_number=batch_number)
+        if assigned_office:
+            assignments = assignments.filter(assigned_office=assigned_office)
+        employees = employees.filter(id__in=assignments.values('employee_id'))
+    if employee_ids:
+        employees = employees.filter(id__in=employee_ids)
+    return employees.order_by('fullname', 'id')
+
+def payslip_jobs(employees, cutoff, cutoff_month, cutoff_year, file_format='html'):
+    """
+    (file name, context, format) of the payslip of each employee, in three queries: employees,
+    frozen lines of the period, adjustments of the period. Employees without a frozen line or any
+    adjustment have no payslip yet (same as payslip.generate) and are left out.
+    """
+    employees = list(employees)
+    employee_ids = [employee.id for employee in employees]
+
+    # Latest frozen line of each employee (as payroll_snapshot.find_line)
+    lines = {}
+    for line in (
+        PayrollLine.objects
+        .filter(
+            employee_id__in=employee_ids,
+            **period_filter(cutoff_year, cutoff_month, cutoff, month_field='cutoff_month', prefix='run__'),
+        )
+        .order_by('run__created_at', 'id')
+    ):
+        lines[line.employee_id] = line
+
+    adjustments = {}
+    rows = (
+        payroll_engine.period_adjustments(cutoff, cutoff_month, cutoff_year)
+        .filter(employee_id__in=[employee_id for employee_id in employee_ids if employee_id not in lines])
+        .values('employee_id', 'type', 'name', 'amount', 'details')
+        .order_by('id')
+    )
+    for row in rows:
+        adjustments.setdefault(row['employee_id'], []).append(row)
+
+    now = datetime.now()
+    common = {
+        'salary_period': f"{cutoff_month} {cutoff_year} - {cutoff} Cutoff",
+        'selected_cutoff': cutoff,
+        'current_month': now.strftime('%B'),
+        'current_year': now.strftime('%Y'),
+        **LOGOS,
+    }
+
+    jobs = []
+    for employee in employees:
+        if employee.id in lines:
+            context = payroll_snapshot.payslip_values(lines[employee.id])
+        elif employee.id in adjustments:
+            context = payroll_engine.payslip_values(employee, adjustments[employee.id])
+        else:
+            continue
+        context.update(common)
+        name = get_valid_filename(f"{employee.employee_number}_{employee.fullname}")
+        jobs.append((f"{name}.{file_format}", context, file_format))
+    return jobs
+
+def static_root():
+    """
+    Directory the LOGOS paths are relative to (base URL of the PDF payslips)
+    """
+    path = finders.find(LOGOS['denr_logo'])
+    return path[:-len(LOGOS['denr_logo'])] if path else None
+
+def render_payslip(job):
+    """
+    (file name, bytes) of one payslip; runs in the worker processes
+    """
+    name, context, file_format = job
+    html = render_to_string('payslip/document.html', context)
+    if file_format == 'pdf':
+        return name, HTML(string=html, base_url=static_root()).write_pdf()
+    return name, html.encode()
+
+def render_all(jobs, workers):
+    """
+    Rendered payslips in the order they finish. At most QUEUE_PER_WORKER payslips per worker
+    wait to be written, so memory stays flat however large the bundle.
+    workers=0 renders in this process (tests, single CPU).
+    """
+    if not workers:
+        for job in jobs:
+            yield render_payslip(job)
+        return
+
+    jobs = iter(jobs)
+    with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as pool:
+        pending = set()
+        try:
+            while True:
+                for job in jobs:
+                    pending.add(pool.submit(render_payslip, job))
+                    if len(pending) >= workers * QUEUE_PER_WORKER:
+                        break
+                if not pending:
+                    return
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+def stream(jobs, workers=0):
+    """
+    Bytes of the ZIP of payslips, written as each payslip is rendered
+    """
+    sink = ChunkSink()
+
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as bundle:
+        # HTML payslips link the logos next to them; PDF payslips embed them
+        if jobs and jobs[0][2] == 'html':
+            root = static_root()
+            for path in LOGOS.values():
+                if root:
+                    bundle.write(os.path.join(root, path), path, compress_type=zipfile.ZIP_STORED)
+            yield sink.take()
+
+        for name, data in render_all(jobs, workers):
+            with bundle.open(name, 'w') as member:
+                member.write(data)
+            yield sink.take()
+
+    yield sink.take()
+
+def file_name(cutoff, cutoff_month, cutoff_year, assigned_office=None, batch_number=None):
+    scope = f"Batch_{batch_number}" if batch_number is not None else (assigned_office or 'Selection').upper()
+    return f"PAYGES_Payslips_{scope}_{cutoff_month}_{cutoff}_{cutoff_year}.zip"
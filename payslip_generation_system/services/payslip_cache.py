@@ -0,0 +1,59 @@
+import time
+from django.core.cache import cache
+from django.db import transaction
+from django.dispatch import receiver
+from payslip_generation_system.services import batch_status
+
+# Payslip cache
+# A payslip whose adjustments are all Credited no longer changes, so its figures are cached by
+# (employee, pay period) and employees opening their payslips on payday read the cache only.
+# Every adjustment write refreshes the batch status counters of its period (batch_status.refresh);
+# the batches_refreshed signal moves the period to a new version, which drops every cached
+# payslip of the period.
+
+# Seconds a cached payslip is kept; bounds staleness when the cache is per process
+PAYSLIP_TIMEOUT = 900
+
+def version_key(pay_period):
+    return f"payslip_version:{pay_period}"
+
+def period_version(pay_period):
+    return cache.get_or_set(version_key(pay_period), time.time_ns(), None)
+
+def cache_key(employee_id, pay_period):
+    return f"payslip:{pay_period}:{period_version(pay_period)}:{employee_id}"
+
+def get(employee_id, pay_period):
+    """
+    Cached payslip figures of an employee for a period, or None
+    """
+    if pay_period is None:
+        return None
+    return cache.get(cache_key(employee_id, pay_period))
+
+def remember(employee_id, pay_period, values):
+    if pay_period is not None:
+        cache.set(cache_key(employee_id, pay_period), values, PAYSLIP_TIMEOUT)
+
+def forget_periods(pay_periods):
+    """
+    Drop the cached payslips of the periods (a new version each; old entries expire)
+    """
+    cache.set_many(
+        {version_key(pay_period): time.time_ns() for pay_period in set(pay_periods) if pay_period is not None},
+        None,
+    )
+
+def is_final(adjustments):
+    """
+    True when the payslip adjustments (dicts with status) are all Credited
+    """
+    return bool(adjustments) and all(adj['status'] == "Credited" for adj in adjustments)
+
+@receiver(batch_status.batches_refreshed)
+def batches_refreshed(sender, keys, **kwargs):
+    # Adjustments of these periods changed: drop their cached payslips now and again once the
+    # change is committed (a payslip read in between may have cached the old figures)
+    periods = {key[1] for key in keys}
+    forget_periods(periods)
+    transaction.on_commit(lambda: forget_periods(periods))
@@ -0,0 +1,62 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from payslip_generation_system.models import Employee, UserRole
+from payslip_generation_system.services import jobs
+
+# Employee user accounts
+# Creates the login (and "employee" role) of employees without one: username is the fullname
+# without spaces (the employee id is appended when taken), password the birthdate or
+# "defaultpass". Hashing every password is slow, so large selections run as a background job.
+
+# Selections larger than this are queued from the admin action
+INLINE_LIMIT = 50
+
+# Employees per transaction / progress report
+CHUNK_SIZE = 100
+
+def account_username(employee, taken):
+    username = employee.fullname.replace(" ", "")
+    if username in taken:
+        username = f"{username}{employee.id}"
+    return username
+
+def generate_user_accounts(employee_ids, chunk_size=CHUNK_SIZE):
+    """
+    Accounts + roles for the employees (ids) without a user. Returns {created, skipped}.
+    """
+    employee_ids = list(employee_ids)
+    created = 0
+    skipped = 0
+    for start in range(0, len(employee_ids), chunk_size):
+        employees = list(Employee.objects.filter(id__in=employee_ids[start:start + chunk_size]).order_by('id'))
+        names = [employee.fullname.replace(" ", "") for employee in employees]
+        taken = set(User.objects.filter(username__in=names).values_list('username', flat=True))
+
+        with transaction.atomic():
+            for employee in employees:
+                # Skip if already linked to a user
+                if employee.user_id:
+                    skipped += 1
+                    continue
+
+                username = account_username(employee, taken)
+                taken.add(username)
+                password = str(employee.birthdate).strip() if employee.birthdate else "defaultpass"
+
+                user = User(username=username)
+                user.set_password(password)  # hashes the password
+                user.save()
+
+                employee.user = user
+                employee.save(update_fields=['user'])
+
+                UserRole.objects.create(user=user, role="employee")
+                created += 1
+
+        jobs.report(min(start + chunk_size, len(employee_ids)), len(employee_ids), f'{created} user(s) created')
+
+    return {'created': created, 'skipped': skipped}
+
+@jobs.handler('generate_user_accounts')
+def generate_user_accounts_job(job, employee_ids):
+    return generate_user_accounts(employee_ids)
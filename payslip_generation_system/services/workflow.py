@@ -0,0 +1,189 @@
+from django.db import connection, transaction
+from django.db.models import Q, Count, Exists, OuterRef, Value, DateTimeField
+from django.utils import timezone
+from payslip_generation_system.models import Adjustment, BatchAssignment, ReturnedAdjustment, ReturnRemark
+from payslip_generation_system.pay_period import pay_period_parts
+from payslip_generation_system.services import batch_status, jobs
+
+# Batch workflow
+# Status changes of whole batches and offices as set-based UPDATEs: the adjustments to change are
+# selected through the status / period indexes (never by walking an office's batch history),
+# updated in bounded chunks, and each chunk refreshes the batch status counters it touched in the
+# same transaction.
+# Batches move Waiting -> Pending -> Approved -> Credited; a transition of any number of batch
+# units (assigned_office, pay_period, batch_number) is one guarded UPDATE in one transaction.
+
+# Adjustments per UPDATE / transaction
+CHUNK_SIZE = 1000
+
+# Transition: (source statuses, target status). Returned batches are submitted again.
+TRANSITIONS = {
+    'submit': (["Waiting", "Returned"], "Pending"),
+    'approve': (["Pending"], "Approved"),
+    'release': (["Approved"], "Credited"),
+    'reject': (["Pending", "Approved"], "Returned"),
+}
+
+# Adjustment columns kept in ReturnedAdjustment when a batch is returned
+RETURNED_FIELDS = [
+    'employee_id', 'name', 'type', 'amount', 'details', 'computation',
+    'month', 'cutoff', 'cutoff_year', 'assigned_office', 'batch_number',
+]
+
+def units_filter(units):
+    """
+    Q matching the adjustments of any of the batch units: the adjustments of the unit's period
+    whose employee is on the unit's batch (like office_adjustments, whatever the adjustment's own
+    batch_number, which is NULL for adjustments added from the payslip page). A unit without
+    office matches the batch of every office.
+    """
+    query = Q()
+    for assigned_office, pay_period, batch_number in units:
+        on_batch = BatchAssignment.objects.filter(
+            employee_id=OuterRef('employee_id'),
+            pay_period=pay_period,
+            batch_number=batch_number,
+        )
+        unit = Q(pay_period=pay_period)
+        if assigned_office is not None:
+            on_batch = on_batch.filter(assigned_office=assigned_office)
+            unit &= Q(assigned_office=assigned_office)
+        query |= unit & Exists(on_batch)
+    return query
+
+def transition(units, action):
+    """
+    Move the adjustments of the batch units from the action's source statuses to its target:
+    one UPDATE and the batch status counters in one transaction. Returns {(assigned_office,
+    pay_period, batch_number): adjustments changed}.
+    """
+    sources, target = TRANSITIONS[action]
+    units = [unit for unit in units if unit[1] is not None]
+    if not units:
+        return {}
+
+    adjustments = Adjustment.objects.filter(units_filter(units), status__in=sources)
+    with transaction.atomic():
+        counts = {
+            (row['assigned_office'], row['pay_period'], row['batch_number']): row['count']
+            for row in adjustments.values('assigned_office', 'pay_period', 'batch_number').annotate(count=Count('id')).order_by()
+        }
+        if counts:
+            adjustments.update(status=target)
+            batch_status.refresh(counts.keys())
+    return counts
+
+def office_adjustments(assigned_office, status, pay_period=None):
+    """
+    Adjustments of an office with a status whose employee is on one of the office's batches
+    (batch 0 excepted) for the adjustment's period; one period or every period
+    """
+    on_batch = BatchAssignment.objects.filter(
+        employee_id=OuterRef('employee_id'),
+        pay_period=OuterRef('pay_period'),
+        assigned_office=assigned_office,
+    ).exclude(batch_number=0)
+
+    adjustments = Adjustment.objects.filter(Exists(on_batch), status=status, assigned_office=assigned_office)
+    if pay_period is not None:
+        adjustments = adjustments.filter(pay_period=pay_period)
+    return adjustments
+
+def change_status(adjustments, status, chunk_size=CHUNK_SIZE):
+    """
+    Set the status of the adjustments in chunks of chunk_size (one transaction each; the chunk's
+    rows are locked, counted and updated together). Returns {(assigned_office, pay_period,
+    batch_number): adjustments changed}.
+    """
+    counts = {}
+    last_id = 0
+    total = adjustments.count()
+    while True:
+        with transaction.atomic():
+            rows = list(
+                adjustments.filter(id__gt=last_id)
+                .select_for_update()
+                .order_by('id')
+                .values_list('id', 'assigned_office', 'pay_period', 'batch_number')[:chunk_size]
+            )
+            if not rows:
+                return counts
+
+            Adjustment.objects.filter(id__in=[row[0] for row in rows]).update(status=status)
+            keys = {row[1:] for row in rows}
+            batch_status.refresh(keys)
+
+        for row in rows:
+            counts[row[1:]] = counts.get(row[1:], 0) + 1
+        last_id = rows[-1][0]
+        done = sum(counts.values())
+        jobs.report(done, max(total, done), f'{done} adjustments {status.lower()}')
+
+def batch_counts(counts):
+    """
+    JSON rows of per-batch counts from change_status, by period then batch
+    """
+    rows = []
+    for (assigned_office, pay_period, batch_number), count in sorted(counts.items(), key=lambda item: (item[0][1], item[0][2] or 0)):
+        cutoff, cutoff_month, cutoff_year = pay_period_parts(pay_period)
+        rows.append({
+            'assigned_office': assigned_office,
+            'cutoff': cutoff,
+            'cutoff_month': cutoff_month,
+            'cutoff_year': cutoff_year,
+            'batch_number': batch_number,
+            'count': count,
+        })
+    return rows
+
+def credit_office(assigned_office, pay_period=None, chunk_size=CHUNK_SIZE):
+    """
+    Approved -> Credited for the adjustments of an office's batches (one period or every period)
+    """
+    return change_status(office_adjustments(assigned_office, "Approved", pay_period), "Credited", chunk_size)
+
+def copy_returned(adjustments):
+    """
+    Copy the adjustments to ReturnedAdjustment (status Returned) with one INSERT ... SELECT;
+    returns the number of rows copied
+    """
+    now = timezone.now()
+    rows = adjustments.order_by().annotate(
+        returned_status=Value("Returned"),
+        returned_created_at=Value(now, output_field=DateTimeField()),
+        returned_updated_at=Value(now, output_field=DateTimeField()),
+    ).values_list(*RETURNED_FIELDS, 'returned_status', 'returned_created_at', 'returned_updated_at')
+
+    fields = [ReturnedAdjustment._meta.get_field(name) for name in RETURNED_FIELDS + ['status', 'created_at', 'updated_at']]
+    quote = connection.ops.quote_name
+    select, params = rows.query.sql_with_params()
+    sql = 'INSERT INTO {} ({}) {}'.format(
+        quote(ReturnedAdjustment._meta.db_table),
+        ', '.join(quote(field.column) for field in fields),
+        select,
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.rowcount
+
+def reject(unit, remark):
+    """
+    Return a batch unit to its preparator: the Pending / Approved adjustments are copied to
+    ReturnedAdjustment and set Returned, and the batch remark is written, in one transaction.
+    Returns {(assigned_office, pay_period, batch_number): adjustments returned}.
+    """
+    assigned_office, pay_period, batch_number = unit
+    cutoff, cutoff_month, cutoff_year = pay_period_parts(pay_period)
+    sources, _ = TRANSITIONS['reject']
+
+    with transaction.atomic():
+        copy_returned(Adjustment.objects.filter(units_filter([unit]), status__in=sources))
+        ReturnRemark.objects.update_or_create(
+            batch_number=batch_number,
+            cutoff=cutoff,
+            cutoff_month=cutoff_month,
+            cutoff_year=cutoff_year,
+            assigned_office=assigned_office,
+            defaults={'remark': remark},
+        )
+        return transition([unit], 'reject')
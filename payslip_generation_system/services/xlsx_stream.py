@@ -0,0 +1,237 @@
+import re
+import tempfile
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+from openpyxl.cell.rich_text import CellRichText, TextBlock
+from openpyxl.cell.text import InlineFont
+from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
+from openpyxl.utils import column_index_from_string, get_column_letter
+from openpyxl.worksheet.page import PageMargins
+
+# XLSX export
+# Rows of a workbook written with openpyxl's write-only mode: each row is handed to openpyxl as it
+# is produced and spooled to a temporary file, so a sheet is never held in memory. The .xlsx zip
+# is only complete once every sheet is written, so the workbook is saved to a temporary file and
+# read back chunk by chunk: the download starts after assembly and the temporary file grows with
+# the export. This is deliberate, in place of a hand-written zip streamed while the rows are
+# produced; large exports are enqueued instead (views.excel.export with enqueue=1). Covers what
+# the payroll export needs: numbers, text and rich text, cell styles, merged cells, column
+# widths, row heights, frozen panes and page setup.
+
+CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# Bytes read from the finished workbook per chunk handed back to the caller
+CHUNK_SIZE = 64 * 1024
+
+# Characters not allowed in a sheet title
+INVALID_TITLE_CHARS = re.compile(r'[\[\]:*?/\\]')
+
+MAX_TITLE_LENGTH = 31
+
+def column_letter(index):
+    """
+    Column letter of a 1-based column index (1 -> A, 27 -> AA)
+    """
+    return get_column_letter(index)
+
+def sheet_title(title, used):
+    """
+    Valid, unique sheet title (used: lowercased titles already taken, updated)
+    """
+    title = INVALID_TITLE_CHARS.sub(' ', str(title or '')).strip().strip("'") or 'Sheet'
+    title = title[:MAX_TITLE_LENGTH]
+    candidate = title
+    number = 2
+    while candidate.lower() in used:
+        suffix = f" ({number})"
+        candidate = title[:MAX_TITLE_LENGTH - len(suffix)] + suffix
+        number += 1
+    used.add(candidate.lower())
+    return candidate
+
+def text(value):
+    # Control characters are not allowed in XML 1.0 (openpyxl refuses them)
+    return ILLEGAL_CHARACTERS_RE.sub('', str(value))
+
+def font_of(font):
+    """
+    openpyxl Font of a font dict {name, size, bold, italic, underline, color}
+    """
+    return Font(
+        name=font.get('name'),
+        size=font.get('size'),
+        bold=bool(font.get('bold')),
+        italic=bool(font.get('italic')),
+        underline='single' if font.get('underline') else None,
+        color=font.get('color'),
+    )
+
+def inline_font_of(font):
+    """
+    Font of a rich text run
+    """
+    return InlineFont(
+        rFont=font.get('name'),
+        sz=font.get('size'),
+        b=bool(font.get('bold')),
+        i=bool(font.get('italic')),
+        u='single' if font.get('underline') else None,
+        color=font.get('color'),
+    )
+
+def border_of(border):
+    """
+    openpyxl Border of a border dict {left, right, top, bottom: line style ('thin', 'medium', 'double')}
+    """
+    return Border(**{side: Side(style=style) for side, style in border.items() if style})
+
+def alignment_of(alignment):
+    return Alignment(
+        horizontal=alignment.get('horizontal'),
+        vertical=alignment.get('vertical'),
+        wrap_text=bool(alignment.get('wrap')),
+    )
+
+def frozen(value):
+    """
+    Hashable form of a style part
+    """
+    if isinstance(value, dict):
+        return tuple(sorted((key, frozen(item)) for key, item in value.items() if item))
+    return value
+
+class Styles:
+    """
+    Cell formats of a workbook, each distinct combination registered once
+    """
+
+    def __init__(self):
+        self.formats = [{}]
+        self.indexes = {}
+
+    def add(self, font=None, fill=None, border=None, alignment=None, num_fmt=None):
+        """
+        Index of the cell format (the style of a cell in a Sheet row)
+        """
+        key = (frozen(font), fill, frozen(border), frozen(alignment), num_fmt)
+        if key in self.indexes:
+            return self.indexes[key]
+
+        style = {}
+        if font:
+            style['font'] = font_of(font)
+        if fill:
+            style['fill'] = PatternFill(fill_type='solid', fgColor=fill)
+        if border:
+            style['border'] = border_of(border)
+        if alignment:
+            style['alignment'] = alignment_of(alignment)
+        if num_fmt:
+            style['number_format'] = num_fmt
+
+        self.formats.append(style)
+        self.indexes[key] = len(self.formats) - 1
+        return self.indexes[key]
+
+    def apply(self, cell, index):
+        for name, value in self.formats[index].items():
+            setattr(cell, name, value)
+
+class Sheet:
+    """
+    One worksheet. rows: iterable of (row number, height or None, {column letter: (value, style)})
+    in increasing row order, consumed while the sheet is written; merge() may be called while
+    the rows are produced. value: number, text, None (style only) or a list of (text, font) runs.
+    """
+
+    def __init__(self, title, rows, widths=(), freeze=None, print_area=None, landscape=False,
+                 paper_size=None, fit_to_width=None, margins=None):
+        self.title = title
+        self.rows = rows
+        self.widths = widths
+        self.freeze = freeze
+        self.print_area = print_area
+        self.landscape = landscape
+        self.paper_size = paper_size
+        self.fit_to_width = fit_to_width
+        self.margins = margins
+        self.merges = []
+
+    def merge(self, ref):
+        self.merges.append(ref)
+
+    def setup(self, worksheet):
+        """
+        Column widths, frozen panes and page setup, set before the first row
+        """
+        for position, width in enumerate(self.widths, start=1):
+            worksheet.column_dimensions[column_letter(position)].width = width
+        if self.freeze:
+            worksheet.freeze_panes = self.freeze
+        if self.landscape:
+            worksheet.page_setup.orientation = 'landscape'
+        if self.paper_size:
+            worksheet.page_setup.paperSize = self.paper_size
+        if self.fit_to_width:
+            worksheet.sheet_properties.pageSetUpPr.fitToPage = True
+            worksheet.page_setup.fitToWidth = self.fit_to_width
+            worksheet.page_setup.fitToHeight = 0
+        if self.margins:
+            worksheet.page_margins = PageMargins(**self.margins)
+
+    def write(self, worksheet, styles):
+        self.setup(worksheet)
+
+        written = 0
+        for row_number, height, cells in self.rows:
+            # Rows are appended one after the other: fill the gap up to row_number
+            while written < row_number - 1:
+                worksheet.append([])
+                written += 1
+            if height is not None:
+                worksheet.row_dimensions[row_number].height = height
+            worksheet.append(self.row_cells(worksheet, styles, cells))
+            written += 1
+
+        if self.print_area and written:
+            # Columns "A:V" down to the last row (openpyxl takes cell ranges only)
+            first, last = self.print_area.split(':')
+            worksheet.print_area = f"{first}1:{last}{written}"
+        for ref in self.merges:
+            worksheet.merged_cells.add(ref)
+
+    def row_cells(self, worksheet, styles, cells):
+        row = []
+        for letter, (value, style) in cells.items():
+            position = column_index_from_string(letter)
+            row.extend([None] * (position - len(row)))
+            cell = WriteOnlyCell(worksheet, value=cell_value(value))
+            styles.apply(cell, style)
+            row[position - 1] = cell
+        return row
+
+def cell_value(value):
+    if isinstance(value, list):
+        return CellRichText(*(TextBlock(inline_font_of(font), text(run)) for run, font in value))
+    if isinstance(value, str):
+        return text(value) or None
+    return value
+
+def stream(sheets, styles):
+    """
+    Bytes of the .xlsx, chunk by chunk. sheets: list of Sheet; styles: the Styles the
+    rows refer to (formats may still be added while the rows are produced).
+    """
+    workbook = Workbook(write_only=True)
+    for sheet in sheets:
+        sheet.write(workbook.create_sheet(sheet.title), styles)
+
+    with tempfile.TemporaryFile() as package:
+        workbook.save(package)
+        package.seek(0)
+        while True:
+            chunk = package.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
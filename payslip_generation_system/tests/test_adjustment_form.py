@@ -0,0 +1,124 @@
+import json
+from decimal import Decimal
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from payslip_generation_system.factories import seed_payroll_dataset
+from payslip_generation_system.models import Adjustment, BatchAssignment
+from payslip_generation_system.pay_period import pay_period_key
+from payslip_generation_system.services import payroll_bench, batch_status
+
+class AdjustmentFormTest(TestCase):
+    """
+    payroll.adjustment_create: the form saved as a diff (one insert, one update, one delete),
+    fixed deductions unique per employee and period; adjustment_update corrections in bulk
+    """
+
+    def setUp(self):
+        self.dataset = seed_payroll_dataset(offices=1, batches=1, employees=4, adjustments=0, periods=1)
+        self.batch = self.dataset['batches'][0]
+        self.period = {key: self.batch[key] for key in ['cutoff', 'cutoff_month', 'cutoff_year']}
+        self.pay_period = pay_period_key(self.batch['cutoff_year'], self.batch['cutoff_month'], self.batch['cutoff'])
+        self.employee_id = BatchAssignment.objects.filter(pay_period=self.pay_period).first().employee_id
+        self.client = payroll_bench.login_client('admin')
+
+    def adjustments(self):
+        return Adjustment.objects.filter(employee_id=self.employee_id, pay_period=self.pay_period)
+
+    def save(self, deleted_ids=(), **fields):
+        data = {
+            **self.period,
+            'batch_number': self.batch['batch_number'],
+            'incomes': json.dumps(fields.pop('incomes', [])),
+            'deductions': json.dumps(fields.pop('deductions', [])),
+            'deleted_ids[]': [str(adj_id) for adj_id in deleted_ids],
+            **fields,
+        }
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse('payroll_adjustment_create', args=[self.employee_id]), data)
+        self.assertEqual(response.status_code, 200)
+        return [query['sql'] for query in queries.captured_queries]
+
+    def writes(self, queries, verb):
+        return [sql for sql in queries if sql.startswith(verb) and '"payslip_generation_system_adjustment"' in sql[:60]]
+
+    def test_fixed_deductions_upsert(self):
+        self.adjustments().delete()
+        queries = self.save(sss='500', tax='1200', incomes=[{'name': 'Overtime', 'amount': '800'}])
+        self.assertEqual(len(self.writes(queries, 'INSERT')), 1)
+        self.assertEqual(self.adjustments().count(), 3)
+        self.assertTrue(all(adj.pay_period == self.pay_period for adj in self.adjustments()))
+
+        # The database refuses a second row of a fixed deduction
+        sss = self.adjustments().get(name='SSS')
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Adjustment.objects.create(**{
+                field: getattr(sss, field)
+                for field in ['employee_id', 'name', 'type', 'amount', 'details', 'computation', 'month', 'cutoff', 'cutoff_year', 'status', 'batch_number', 'assigned_office']
+            })
+
+        # The fixed row is updated in place, the re-sent income row kept and updated, a removed one deleted
+        overtime = self.adjustments().get(name='Overtime')
+        queries = self.save(deleted_ids=[overtime.id, self.adjustments().get(name='TAX').id], sss='650', incomes=[{'name': 'Overtime', 'amount': '900'}])
+
+        self.assertEqual(self.adjustments().get(name='SSS').id, sss.id)
+        self.assertEqual(self.adjustments().get(name='SSS').amount, Decimal('650.00'))
+        self.assertFalse(self.adjustments().filter(name='TAX').exists())
+        self.assertEqual(self.adjustments().get(name='Overtime').id, overtime.id)
+        self.assertEqual(self.adjustments().get(name='Overtime').amount, Decimal('900.00'))
+        self.assertEqual(self.writes(queries, 'INSERT'), [])
+        self.assertEqual(len(self.writes(queries, 'DELETE')), 1)
+        self.assertEqual(len(self.writes(queries, 'UPDATE')), 1)
+
+        # A fixed deduction typed as an income row: refused, nothing written
+        response = self.client.post(reverse('payroll_adjustment_create', args=[self.employee_id]), {
+            **self.period, 'batch_number': self.batch['batch_number'], 'sss': '700',
+            'incomes': json.dumps([{'name': 'SSS', 'amount': '100'}]), 'deductions': '[]',
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.adjustments().get(name='SSS').amount, Decimal('650.00'))
+
+    def test_unchanged_form_writes_nothing(self):
+        self.adjustments().delete()
+        self.save(philhealth='300')
+        queries = self.save(philhealth='300')
+        self.assertEqual(self.writes(queries, 'INSERT') + self.writes(queries, 'UPDATE'), [])
+        self.assertEqual(self.adjustments().count(), 1)
+
+        # Counters follow the saved rows
+        status = batch_status.batch_flags(self.batch['batch_number'], self.pay_period, assigned_office=self.batch['assigned_office'])
+        self.assertEqual(status['total_adjustments'], Adjustment.objects.filter(
+            pay_period=self.pay_period, batch_number=self.batch['batch_number'], assigned_office=self.batch['assigned_office'],
+        ).count())
+
+    def test_corrections_in_bulk(self):
+        self.save(sss='500', incomes=[{'name': 'Overtime', 'amount': '800'}])
+        lines = [
+            {'id': adj.id, 'name': adj.name, 'type': adj.type, 'amount': str(adj.amount + 1)}
+            for adj in self.adjustments()
+        ]
+        office = self.adjustments().first().assigned_office
+        checker = payroll_bench.login_client('checker')
+
+        with CaptureQueriesContext(connection) as queries:
+            response = checker.post(reverse('adjustments_update'), {'adjustments': json.dumps(lines), 'assigned_office': office})
+        self.assertEqual(response.json(), {'status': 'OK', 'updated': len(lines)})
+        updates = self.writes([query['sql'] for query in queries.captured_queries], 'UPDATE')
+        self.assertEqual(len(updates), 1)
+        self.assertIn('CASE WHEN', updates[0])
+        self.assertEqual(sorted(adj.amount for adj in self.adjustments()), [Decimal('501.00'), Decimal('801.00')])
+
+        # An id outside the office: nothing written
+        other = Adjustment.objects.exclude(assigned_office=office).first() or Adjustment(id=0)
+        response = checker.post(reverse('adjustments_update'), {
+            'adjustments': json.dumps([{**lines[0], 'amount': '1'}, {**lines[0], 'id': other.id}]), 'assigned_office': office,
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertIn(str(other.id), response.json()['error'])
+        self.assertEqual(self.adjustments().get(id=lines[0]['id']).amount, Decimal(lines[0]['amount']))
+
+        # No office: refused, whatever the role
+        response = checker.post(reverse('adjustments_update'), {'adjustments': json.dumps([{**lines[0], 'amount': '1'}])})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.adjustments().get(id=lines[0]['id']).amount, Decimal(lines[0]['amount']))
@@ -0,0 +1,65 @@
+from datetime import date, datetime
+from decimal import Decimal
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from payslip_generation_system.models import Employee, Adjustment
+from payslip_generation_system.services import adjustment_search, payroll_bench
+
+class AdjustmentSearchTest(TestCase):
+    """
+    payslip.adjustment_data: typed search on status / type / period / amount / dates, one count query
+    """
+
+    def setUp(self):
+        self.employee = Employee.objects.create(
+            fullname='Ana Cruz', birthdate=date(1990, 1, 1), education='College', gender='Female',
+            employee_number='000001', position='Clerk', fund_source='regular', salary=Decimal('20000'),
+            tax_declaration='no', eligibility='yes', has_philhealth='yes', assigned_office='meo_s',
+        )
+        for name, adjustment_type, amount, month, cutoff, year, status, created in [
+            ('Late', 'Deduction', '120.50', 'March', '1st', '2024', 'Credited', (2024, 3, 5)),
+            ('Overtime', 'Income', '1500.00', 'March', '2nd', '2025', 'Pending', (2025, 3, 20)),
+            ('Loan', 'Deduction', '2000.00', 'April', '1st', '2025', 'Approved', (2025, 4, 2)),
+            ('Bonus', 'Income', '5000.00', 'December', '2nd', '2025', 'Returned', (2025, 12, 22)),
+        ]:
+            adjustment = Adjustment.objects.create(
+                employee=self.employee, name=name, type=adjustment_type, amount=Decimal(amount), details='',
+                computation='', month=month, cutoff=cutoff, cutoff_year=year, status=status,
+                remarks='Check the loan schedule' if name == 'Bonus' else '', assigned_office='meo_s',
+            )
+            Adjustment.objects.filter(id=adjustment.id).update(created_at=timezone.make_aware(datetime(*created, 9)))
+
+    def search(self, text):
+        return set(
+            Adjustment.objects.filter(employee=self.employee).filter(adjustment_search.search_filter(text))
+            .values_list('name', flat=True)
+        )
+
+    def test_grammar(self):
+        self.assertEqual(self.search('pending'), {'Overtime'})
+        self.assertEqual(self.search('income'), {'Overtime', 'Bonus'})
+        self.assertEqual(self.search('march'), {'Late', 'Overtime'})
+        self.assertEqual(self.search('Mar 2025'), {'Overtime'})
+        self.assertEqual(self.search('2nd 2025'), {'Overtime', 'Bonus'})
+        self.assertEqual(self.search('2024'), {'Late'})
+        self.assertEqual(self.search('1,500'), {'Overtime'})
+        self.assertEqual(self.search('₱2000.00'), {'Loan'})
+        self.assertEqual(self.search('> 1500'), {'Loan', 'Bonus'})
+        self.assertEqual(self.search('<=1500 deduction'), {'Late'})
+        self.assertEqual(self.search('1000 - 2000'), {'Overtime', 'Loan'})
+        self.assertEqual(self.search('2025-03-20'), {'Overtime'})
+        self.assertEqual(self.search('2025-12-31..2025-03-01'), {'Overtime', 'Loan', 'Bonus'})
+        self.assertEqual(self.search('loan'), {'Loan', 'Bonus'})
+        self.assertEqual(self.search('loan approved'), {'Loan'})
+
+    def test_view_counts(self):
+        client = payroll_bench.login_client('admin')
+        response = client.get(reverse('adjustment_data', args=[self.employee.id]), {
+            'draw': 1, 'start': 0, 'length': 10, 'search[value]': 'income 2025', 'order[0][column]': 2,
+        })
+        body = response.json()
+
+        self.assertEqual(body['recordsTotal'], 4)
+        self.assertEqual(body['recordsFiltered'], 2)
+        self.assertEqual([row['name'] for row in body['data']], ['Overtime', 'Bonus'])
@@ -0,0 +1,167 @@
+import threading
+from unittest import skipUnless
+from django.db import connection, connections, transaction
+from django.db.models import Count
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from payslip_generation_system.factories import seed_payroll_dataset
+from payslip_generation_system.models import Batch, BatchAllocator, BatchAssignment, Employee, PayrollLine
+from payslip_generation_system.pay_period import pay_period_key
+from payslip_generation_system.services import batch_allocator, payroll_bench
+
+class BatchAllocatorTest(TestCase):
+    """
+    batch.create, batch_late, batch_remove and move_employee allocate batches under the allocator lock
+    """
+
+    def setUp(self):
+        self.dataset = seed_payroll_dataset(offices=1, batches=2, employees=10, adjustments=1, periods=1)
+        self.batch = self.dataset['batches'][0]
+        self.period = {key: self.batch[key] for key in ['cutoff', 'cutoff_month', 'cutoff_year']}
+        self.office = self.batch['assigned_office']
+
+    def assignments(self):
+        return BatchAssignment.objects.filter(assigned_office=self.office, cutoff=self.period['cutoff'],
+                                              cutoff_month=self.period['cutoff_month'], cutoff_year=self.period['cutoff_year'])
+
+    def test_batch_numbers_are_unique(self):
+        last = max(Batch.objects.values_list('batch_number', flat=True))
+        first = batch_allocator.create_batch('Late A', self.office)
+        second = batch_allocator.create_batch('Late B', self.office)
+        self.assertEqual((first.batch_number, second.batch_number), (last + 1, last + 2))
+
+        # A batch removed from the top: its number is not handed out again
+        second.delete()
+        self.assertEqual(batch_allocator.create_batch('Late C', self.office).batch_number, last + 3)
+        self.assertEqual(BatchAllocator.objects.get(scope=batch_allocator.BATCH_SCOPE).last_number, last + 3)
+
+    def test_late_batch_capacity(self):
+        last = max(self.assignments().values_list('batch_number', flat=True))
+        members = self.assignments().filter(batch_number=last).count()
+        outside = self.assignments().exclude(batch_number=last).first()
+
+        with transaction.atomic():
+            self.assertEqual(batch_allocator.late_batch(self.office, **self.period, current_batch=outside.batch_number, capacity=members + 1), last)
+            self.assertEqual(batch_allocator.late_batch(self.office, **self.period, current_batch=outside.batch_number, capacity=members), last + 1)
+            self.assertEqual(batch_allocator.late_batch(self.office, **self.period, current_batch=last, capacity=members + 1), last + 1)
+            self.assertEqual(batch_allocator.late_batch('no_office', **self.period, current_batch=None), 1)
+
+    def test_late_view_fills_the_late_batch(self):
+        client = payroll_bench.login_client('admin')
+        last = max(self.assignments().values_list('batch_number', flat=True))
+        employees = list(self.assignments().exclude(batch_number=last).values_list('employee_id', flat=True))
+
+        # The first late employee opens the late batch; the others join it until it is full
+        for employee_id in employees:
+            response = client.post(reverse('payroll_batch_late'), {**self.period, 'employee_id': employee_id, 'batch_number': ''})
+            self.assertEqual(response.status_code, 200)
+        late = self.assignments().filter(late_assigned='YES')
+        self.assertEqual(late.count(), len(employees))
+        self.assertEqual(set(late.values_list('batch_number', flat=True)), {last})
+
+        response = client.post(reverse('payroll_batch_remove'), {**self.period, 'employee_id': employees[0], 'batch_number': last})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.assignments().get(employee_id=employees[0]).batch_number, 0)
+
+        # Listed as removed from the late batch, flags read from the batch counters
+        response = client.get(reverse('payroll_removed_employee_data'), {**self.period, 'batch_number': last})
+        self.assertEqual([employee['id'] for employee in response.json()['employees']], [employees[0]])
+        self.assertEqual(response.json()['assigned_office'], self.office)
+
+    def test_moves_refreeze_submitted_runs(self):
+        client = payroll_bench.login_client('admin')
+        run_lines = PayrollLine.objects.filter(run__batch_number=self.batch['batch_number'], run__assigned_office=self.office)
+        employee_id = run_lines.first().employee_id
+
+        # Removed from a submitted batch: its frozen run no longer pays the employee
+        response = client.post(reverse('payroll_batch_remove'), {**self.period, 'employee_id': employee_id, 'batch_number': self.batch['batch_number']})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(run_lines.filter(employee_id=employee_id).exists())
+
+        response = client.post(reverse('payroll_batch_unremove'), {**self.period, 'employee_id': employee_id})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(run_lines.filter(employee_id=employee_id).exists())
+
+    def test_moves_respect_capacity(self):
+        client = payroll_bench.login_client(payroll_bench.OFFICE_ROLES[self.office])
+        first, second = sorted(set(self.assignments().values_list('batch_number', flat=True)))
+        removed, moved, other = [
+            self.assignments().filter(batch_number=batch_number).values_list('employee_id', flat=True)[index]
+            for batch_number, index in [(first, 0), (second, 0), (second, 1)]
+        ]
+        size = self.assignments().filter(batch_number=first).count()
+
+        def move(employee_id):
+            return client.post(reverse('payroll_move_employee', args=[employee_id]), {
+                **self.period, 'batch_number': second, 'assigned_office': self.office,
+                'batch_id': Batch.objects.get(batch_number=first, batch_assigned_office=self.office).id,
+            }).json()
+
+        with override_settings(PAYROLL_BATCH_CAPACITY=size):
+            self.assertEqual(batch_allocator.batch_capacity(), size)
+            response = client.post(reverse('payroll_batch_remove'), {**self.period, 'employee_id': removed, 'batch_number': first})
+            self.assertEqual(response.status_code, 200)
+
+            # The freed slot is taken by a moved employee: the batch is full again
+            self.assertTrue(move(moved)['success'])
+            self.assertFalse(move(other)['success'])
+
+            response = client.post(reverse('payroll_batch_unremove'), {**self.period, 'employee_id': removed})
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(self.assignments().get(employee_id=removed).batch_number, 0)
+            self.assertEqual(self.assignments().filter(batch_number=first).count(), size)
+
+    def test_create_view(self):
+        client = payroll_bench.login_client('admin')
+        last = max(Batch.objects.values_list('batch_number', flat=True))
+        response = client.post(reverse('batch_create'), {'batch_name': 'Batch Late'})
+        self.assertTrue(response.json()['success'])
+        self.assertEqual(response.json()['batch_number'], last + 1)
+
+@skipUnless(connection.features.has_select_for_update and connection.vendor != 'sqlite', 'Needs row locks')
+class ParallelBatchAllocatorTest(TransactionTestCase):
+    """
+    Parallel allocations never hand out the same batch number or overfill a late batch.
+    SQLite has no row locks: run against MySQL (python manage.py test --settings=denr_ncr.settings)
+    """
+
+    def run_parallel(self, target, count):
+        def run(index):
+            try:
+                target(index)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=run, args=(index,)) for index in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def test_parallel_batch_numbers(self):
+        numbers = []
+        self.run_parallel(lambda index: numbers.append(batch_allocator.create_batch(f'Parallel {index}', 'meo_s').batch_number), 8)
+        self.assertEqual(len(set(numbers)), 8)
+
+    def test_parallel_late_batches(self):
+        dataset = seed_payroll_dataset(offices=1, batches=2, employees=16, adjustments=0, periods=1)
+        batch = dataset['batches'][0]
+        period = {key: batch[key] for key in ['cutoff', 'cutoff_month', 'cutoff_year']}
+        assignments = BatchAssignment.objects.filter(
+            assigned_office=batch['assigned_office'], pay_period=pay_period_key(batch['cutoff_year'], batch['cutoff_month'], batch['cutoff']),
+        )
+        last = max(assignments.values_list('batch_number', flat=True))
+        employees = list(assignments.filter(batch_number=batch['batch_number']).values_list('employee_id', flat=True))
+
+        def mark_late(index):
+            # As payroll.batch_late: allocate and write the assignment in one transaction
+            with transaction.atomic():
+                batch_number = batch_allocator.late_batch(batch['assigned_office'], **period, current_batch=None, capacity=3)
+                assignments.filter(employee_id=employees[index]).update(batch_number=batch_number, late_assigned='YES')
+
+        self.run_parallel(mark_late, len(employees))
+
+        # The late employees fill new batches of 3 one after the other
+        sizes = dict(assignments.filter(late_assigned='YES').values_list('batch_number').annotate(count=Count('id')).order_by())
+        full, rest = divmod(len(employees), 3)
+        self.assertEqual(sizes, {last + 1 + index: 3 for index in range(full)} | ({last + 1 + full: rest} if rest else {}))
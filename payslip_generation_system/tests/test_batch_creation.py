@@ -0,0 +1,74 @@
+from datetime import date
+from decimal import Decimal
+from django.test import TestCase
+from django.urls import reverse
+from payslip_generation_system.models import Employee, Batch, BatchAssignment
+from payslip_generation_system.services import payroll_bench
+
+class BatchCreateTest(TestCase):
+    """
+    payroll.batch_create: one period or a range of periods, in one transaction
+    """
+
+    def setUp(self):
+        for batch_number, office in [(1, 'meo_s'), (2, 'meo_s'), (3, 'meo_e')]:
+            Batch.objects.create(batch_number=batch_number, batch_name=f'Batch {batch_number}', batch_assigned_office=office)
+        for index, (office, batch_number) in enumerate([('meo_s', 1), ('meo_s', 1), ('meo_s', 2), ('meo_e', 3), ('meo_e', None)]):
+            Employee.objects.create(
+                fullname=f'Employee {index}', birthdate=date(1990, 1, 1), education='College', gender='Male',
+                employee_number=f'{index:06d}', position='Clerk', fund_source='regular', salary=Decimal('20000'),
+                tax_declaration='no', eligibility='yes', has_philhealth='yes', assigned_office=office, batch_number=batch_number,
+            )
+
+    def post(self, role, data):
+        client = payroll_bench.login_client(role)
+        return client.post(reverse('payroll_batch_create'), data)
+
+    def test_single_period_for_office(self):
+        data = {'cutoff': '1st', 'cutoff_month': 'March', 'cutoff_year': '2025'}
+        response = self.post('preparator_meo_s', data)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Total batches created: 2.', response.json()['message'])
+        self.assertEqual(response.json()['offices'][0]['assignments'], 3)
+        assignments = BatchAssignment.objects.filter(pay_period=202504)
+        self.assertEqual(assignments.count(), 3)
+        self.assertEqual(set(assignments.values_list('assigned_office', flat=True)), {'meo_s'})
+
+        response = self.post('preparator_meo_s', data)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(BatchAssignment.objects.count(), 3)
+
+    def test_year_for_every_office_skips_existing_periods(self):
+        self.post('preparator_meo_s', {'cutoff': '1st', 'cutoff_month': 'March', 'cutoff_year': '2025'})
+
+        response = self.post('admin', {'period_scope': 'year', 'cutoff_year': '2025'})
+
+        self.assertEqual(response.status_code, 200)
+        offices = {row['assigned_office']: row for row in response.json()['offices']}
+        self.assertEqual(offices['meo_s']['periods'], 23)
+        self.assertEqual(offices['meo_s']['assignments'], 23 * 3)
+        self.assertEqual(offices['meo_e']['periods'], 24)
+        self.assertEqual(offices['meo_e']['batches'], 24)
+        self.assertEqual(response.json()['skipped'], [
+            {'cutoff': '1st', 'cutoff_month': 'March', 'cutoff_year': '2025', 'assigned_office': 'meo_s'}
+        ])
+        self.assertEqual(BatchAssignment.objects.count(), 24 * 4)
+        self.assertEqual(BatchAssignment.objects.filter(pay_period__isnull=True).count(), 0)
+
+    def test_range_validation(self):
+        response = self.post('preparator_meo_e', {
+            'period_scope': 'range', 'cutoff': '2nd', 'cutoff_month': 'May', 'cutoff_year': '2025',
+            'end_cutoff': '1st', 'end_cutoff_month': 'May', 'end_cutoff_year': '2025',
+        })
+        self.assertEqual(response.status_code, 400)
+
+        response = self.post('preparator_meo_e', {
+            'period_scope': 'range', 'cutoff': '2nd', 'cutoff_month': 'May', 'cutoff_year': '2025',
+            'end_cutoff': '1st', 'end_cutoff_month': 'July', 'end_cutoff_year': '2025',
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            list(BatchAssignment.objects.values_list('pay_period', flat=True).order_by('pay_period')),
+            [202509, 202510, 202511, 202512]
+        )
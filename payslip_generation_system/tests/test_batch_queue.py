@@ -0,0 +1,92 @@
+from django.test import TestCase
+from django.urls import reverse
+from payslip_generation_system.factories import seed_payroll_dataset
+from payslip_generation_system.models import Adjustment
+from payslip_generation_system.services import payroll_bench
+
+class PendingBatchQueueTest(TestCase):
+    """
+    payroll.data: pending batches from one grouped query, searched / sorted / paginated server-side
+    """
+
+    def setUp(self):
+        seed_payroll_dataset(offices=2, batches=6, employees=24, adjustments=3, periods=1)
+        self.client = payroll_bench.login_client('checker')
+
+    def get(self, **params):
+        response = self.client.get(reverse('payroll_data'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_one_row_per_pending_batch(self):
+        body = self.get()
+
+        expected = set(
+            Adjustment.objects.filter(status='Pending')
+            .values_list('assigned_office', 'batch_number').distinct()
+        )
+        self.assertEqual({(batch['assigned_office'], batch['batch_number']) for batch in body['batches']}, expected)
+        self.assertEqual(body['total'], len(expected))
+        for batch in body['batches']:
+            self.assertEqual(batch['pending_adjustments'], batch['total_adjustments'])
+            self.assertEqual(batch['approval_status'], '')
+
+    def test_search_sort_and_pages(self):
+        everything = self.get()['batches']
+        name = everything[0]['batch_name']
+
+        found = self.get(search=name.upper())['batches']
+        self.assertTrue(found)
+        self.assertTrue(all(batch['batch_name'] == name for batch in found))
+
+        by_name = self.get(sort='-batch')['batches']
+        self.assertEqual([batch['batch_name'] for batch in by_name], sorted([batch['batch_name'] for batch in everything], reverse=True))
+
+        first = self.get(page=1, page_size=1)
+        second = self.get(page=2, page_size=1)
+        self.assertEqual(first['num_pages'], len(everything))
+        self.assertEqual(len(first['batches']), 1)
+        self.assertNotEqual(first['batches'][0], second['batches'][0])
+
+class ApprovedBatchQueueTest(TestCase):
+    """
+    payroll.approve_data: one row per approved (batch, period, office), joined to Batch
+    """
+
+    def setUp(self):
+        seed_payroll_dataset(offices=2, batches=4, employees=16, adjustments=3, periods=3)
+        self.client = payroll_bench.login_client('accounting')
+
+    def get(self, **params):
+        response = self.client.get(reverse('payroll_approve_data'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_every_approved_period_of_a_batch(self):
+        # A second approved period for one batch (previously only the first one was kept)
+        credited = Adjustment.objects.filter(status='Credited').order_by('pay_period', 'batch_number').first()
+        Adjustment.objects.filter(
+            batch_number=credited.batch_number, pay_period=credited.pay_period, status='Credited'
+        ).update(status='Approved')
+
+        body = self.get()
+        rows = [batch for batch in body['approved_batches'] if batch['batch_number'] == credited.batch_number]
+        self.assertEqual(len(rows), 2)
+        self.assertIn(credited.month, {row['month'] for row in rows})
+
+        adjustments = Adjustment.objects.filter(status='Approved')
+        self.assertEqual(sum(batch['adjustments'] for batch in body['approved_batches']), adjustments.count())
+        self.assertEqual(body['total'], len(body['approved_batches']))
+
+    def test_search_and_pages(self):
+        everything = self.get()['approved_batches']
+        office_name = everything[0]['formatted_office_name']
+
+        found = self.get(search=office_name.lower())['approved_batches']
+        self.assertEqual(
+            found,
+            [batch for batch in everything if batch['formatted_office_name'] == office_name]
+        )
+
+        page = self.get(page=2, page_size=1)
+        self.assertEqual(page['approved_batches'], everything[1:2])
@@ -0,0 +1,102 @@
+from decimal import Decimal
+from django.db.models import Count, Sum
+from django.test import TestCase
+from django.urls import reverse
+from payslip_generation_system.factories import seed_payroll_dataset
+from payslip_generation_system.models import Adjustment, BatchAssignment, BatchStatus
+from payslip_generation_system.services import batch_status, payroll_bench
+
+class BatchStatusTest(TestCase):
+    """
+    BatchStatus counters stay equal to the adjustments / assignments they summarize
+    """
+
+    def setUp(self):
+        self.dataset = seed_payroll_dataset(offices=2, batches=4, employees=16, adjustments=2, periods=2)
+
+    def live_counts(self):
+        """
+        {(office, pay_period, batch_number): counters} computed from the source rows
+        """
+        counts = {}
+
+        def key_counts(row):
+            key = (row['assigned_office'], row['pay_period'], row['batch_number'])
+            return counts.setdefault(key, {**dict.fromkeys(batch_status.COUNT_FIELDS, 0), 'total_amount': Decimal('0.00')})
+
+        for row in Adjustment.objects.values('assigned_office', 'pay_period', 'batch_number', 'status').annotate(count=Count('id'), amount=Sum('amount')):
+            key_counts(row)['total_adjustments'] += row['count']
+            key_counts(row)['total_amount'] += row['amount']
+            key_counts(row)[batch_status.STATUS_FIELDS[row['status']]] += row['count']
+        for row in BatchAssignment.objects.values('assigned_office', 'pay_period', 'batch_number').annotate(count=Count('id')):
+            key_counts(row)['assignments'] = row['count']
+        return counts
+
+    def stored_counts(self):
+        return {
+            (status['assigned_office'], status['pay_period'], status['batch_number']): {field: status[field] for field in batch_status.REFRESH_FIELDS}
+            for status in BatchStatus.objects.values('assigned_office', 'pay_period', 'batch_number', *batch_status.REFRESH_FIELDS)
+        }
+
+    def pending_batch(self):
+        return next(batch for batch in self.dataset['batches'] if batch['status'] == 'Pending')
+
+    def test_seeded_counters_and_rebuild(self):
+        self.assertEqual(self.stored_counts(), self.live_counts())
+
+        BatchStatus.objects.update(pending=0, is_last_batch=False)
+        batch_status.rebuild()
+        self.assertEqual(self.stored_counts(), self.live_counts())
+
+        for office in self.dataset['offices']:
+            for pay_period in BatchAssignment.objects.values_list('pay_period', flat=True).distinct():
+                last = BatchAssignment.objects.filter(assigned_office=office, pay_period=pay_period).order_by('-batch_number').first()
+                self.assertEqual(
+                    list(BatchStatus.objects.filter(assigned_office=office, pay_period=pay_period, is_last_batch=True).values_list('batch_number', flat=True)),
+                    [last.batch_number] if last else []
+                )
+
+    def test_workflow_views_keep_counters(self):
+        batch = self.pending_batch()
+        period = {'cutoff': batch['cutoff'], 'cutoff_month': batch['cutoff_month'], 'cutoff_year': batch['cutoff_year']}
+        client = payroll_bench.login_client('admin')
+
+        response = client.post(reverse('payroll_reject'), {
+            **period, 'batch_number': batch['batch_number'], 'assigned_office': batch['assigned_office'], 'remarks': 'Check amounts',
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.stored_counts(), self.live_counts())
+
+        Adjustment.objects.filter(batch_number=batch['batch_number'], status='Returned').update(status='Waiting')
+        batch_status.refresh_adjustments(Adjustment.objects.filter(batch_number=batch['batch_number']))
+        client.post(reverse('payroll_submit'), {**period, 'batch_number': batch['batch_number']})
+        client.post(reverse('payroll_approve'), {**period, 'batch_number': batch['batch_number'], 'assigned_office': batch['assigned_office']})
+        self.assertEqual(self.stored_counts(), self.live_counts())
+
+        employee_id = BatchAssignment.objects.filter(batch_number=batch['batch_number'], cutoff=batch['cutoff'],
+                                                     cutoff_month=batch['cutoff_month'], cutoff_year=batch['cutoff_year']).first().employee_id
+        response = client.post(reverse('payroll_batch_late'), {**period, 'employee_id': employee_id, 'batch_number': batch['batch_number']})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.stored_counts(), self.live_counts())
+
+        # Deleting the employee takes their rows off the counters
+        response = client.post(reverse('employee_destroy', args=[employee_id]))
+        self.assertTrue(response.json()['success'])
+        self.assertEqual(self.stored_counts(), self.live_counts())
+
+    def test_batch_flags_match_live_rows(self):
+        for status in BatchStatus.objects.all():
+            flags = batch_status.batch_flags(status.batch_number, status.pay_period, assigned_office=status.assigned_office,
+                                             last_batch_office=status.assigned_office)
+            adjustments = Adjustment.objects.filter(batch_number=status.batch_number, pay_period=status.pay_period,
+                                                    assigned_office=status.assigned_office)
+            last = BatchAssignment.objects.filter(pay_period=status.pay_period, assigned_office=status.assigned_office).order_by('-batch_number').first()
+
+            self.assertEqual(flags['has_pending_adjustments'], adjustments.filter(status='Pending').exists())
+            self.assertEqual(flags['has_credited_adjustments'], adjustments.filter(status='Credited').exists())
+            self.assertEqual(flags['total_adjustments'], adjustments.count())
+            self.assertEqual(flags['approved_adjustments'], adjustments.filter(status__in=['Approved', 'Credited']).count())
+            self.assertEqual(flags['total_amount'], adjustments.aggregate(total=Sum('amount'))['total'] or 0)
+            self.assertEqual(flags['is_last_batch'], last.batch_number == status.batch_number if last else None)
+
+        self.assertEqual(batch_status.batch_flags(1, None)['total_adjustments'], 0)
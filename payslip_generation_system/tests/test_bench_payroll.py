@@ -0,0 +1,31 @@
+from django.test import TestCase
+from payslip_generation_system.factories import seed_payroll_dataset
+from payslip_generation_system.services import payroll_bench
+
+class PayrollQueryBudgetTest(TestCase):
+    """
+    Payroll endpoints stay within their query budget and their query count
+    does not grow with the number of employees on a batch
+    """
+
+    def query_counts(self, employees):
+        dataset = seed_payroll_dataset(offices=1, batches=2, employees=employees * 2, adjustments=6, periods=2)
+        results = payroll_bench.run_benchmark(dataset, repeat=1)
+        return {result['name']: result for result in results}
+
+    def test_endpoints_within_budget(self):
+        results = self.query_counts(employees=5)
+
+        self.assertEqual(set(results), set(payroll_bench.QUERY_BUDGETS))
+        for name, result in results.items():
+            with self.subTest(endpoint=name):
+                self.assertEqual(result['status'], 200)
+                self.assertLessEqual(result['queries'], result['budget'])
+
+    def test_queries_independent_of_batch_size(self):
+        small = self.query_counts(employees=3)
+        large = self.query_counts(employees=20)
+
+        for name in ['batch_data', 'batch_data_frozen', 'excel_export', 'excel_export_frozen', 'payroll_data', 'payslip_generate', 'employee_data']:
+            with self.subTest(endpoint=name):
+                self.assertEqual(small[name]['queries'], large[name]['queries'])
@@ -0,0 +1,107 @@
+import csv
+import hashlib
+import io
+from decimal import Decimal
+from django.test import TestCase
+from django.urls import reverse
+from payslip_generation_system.factories import seed_payroll_dataset
+from payslip_generation_system.models import Adjustment, PayrollLine
+from payslip_generation_system.pay_period import pay_period_key
+from payslip_generation_system.services import payroll_bench, disbursement, batch_status
+
+class DisbursementTest(TestCase):
+    """
+    payroll.disbursement: net pay of credited batches, streamed with a count / total / checksum trailer
+    """
+
+    def setUp(self):
+        self.dataset = seed_payroll_dataset(offices=2, batches=2, employees=12, adjustments=2, periods=3)
+        credited = [batch for batch in self.dataset['batches'] if batch['status'] == 'Credited']
+        self.batch = credited[0]
+        self.period = {key: self.batch[key] for key in ['cutoff', 'cutoff_month', 'cutoff_year']}
+        self.client = payroll_bench.login_client('accounting')
+
+    def download(self, **params):
+        response = self.client.get(reverse('payroll_disbursement'), {**self.period, **params})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def expected_lines(self, **filters):
+        return PayrollLine.objects.filter(
+            run__cutoff=self.period['cutoff'],
+            run__cutoff_month=self.period['cutoff_month'],
+            run__cutoff_year=self.period['cutoff_year'],
+            **filters,
+        ).exclude(removed='YES')
+
+    def test_csv_trailer(self):
+        rows = list(csv.reader(io.StringIO(self.download())))
+        header, details, trailer = rows[0], rows[1:-1], rows[-1]
+        lines = self.expected_lines()
+
+        self.assertEqual(header, disbursement.CSV_COLUMNS)
+        self.assertEqual(len(details), lines.count())
+        self.assertEqual(
+            sorted(row[0] for row in details),
+            sorted(lines.values_list('employee_number', flat=True)),
+        )
+        total = sum(Decimal(row[-1]) for row in details)
+        self.assertEqual(trailer[:3], ['TRAILER', str(len(details)), f"{total:.2f}"])
+        self.assertEqual(total, sum(line.net_salary for line in lines))
+
+        checksum = hashlib.sha256()
+        for row in details:
+            buffer = io.StringIO()
+            csv.writer(buffer).writerow(row)
+            checksum.update(buffer.getvalue().encode())
+        self.assertEqual(trailer[3], checksum.hexdigest())
+
+    def test_fixed_width_records(self):
+        records = self.download(format='fixed', assigned_office=self.batch['assigned_office']).split('\r\n')[:-1]
+        header, details, trailer = records[0], records[1:-1], records[-1]
+        lines = self.expected_lines(run__assigned_office=self.batch['assigned_office'])
+
+        self.assertTrue(all(len(record) == disbursement.RECORD_LENGTH for record in records))
+        self.assertTrue(header.startswith('H'))
+        self.assertTrue(all(record.startswith('D') for record in details))
+        self.assertEqual(len(details), lines.count())
+
+        total = sum(int(record[-15:]) for record in details)
+        self.assertEqual(total, disbursement.centavos(sum(line.net_salary for line in lines)))
+        self.assertEqual(int(trailer[1:11]), len(details))
+        self.assertEqual(int(trailer[11:29]), total)
+        checksum = hashlib.sha256(''.join(record + '\r\n' for record in details).encode())
+        self.assertEqual(trailer[29:93], checksum.hexdigest())
+
+    def test_batch_scope_and_uncredited_batches(self):
+        batch_number = self.batch['batch_number']
+        rows = list(csv.reader(io.StringIO(self.download(batch_number=batch_number))))[1:-1]
+        self.assertEqual(len(rows), self.expected_lines(run__batch_number=batch_number).count())
+        self.assertTrue(all(row[3] == str(batch_number) for row in rows))
+
+        # A batch with an adjustment back to Approved is no longer credited
+        pay_period = pay_period_key(self.period['cutoff_year'], self.period['cutoff_month'], self.period['cutoff'])
+        Adjustment.objects.filter(batch_number=batch_number, pay_period=pay_period).update(status='Approved')
+        batch_status.rebuild()
+        response = self.client.get(reverse('payroll_disbursement'), {**self.period, 'batch_number': batch_number})
+        self.assertEqual(response.status_code, 404)
+
+    def test_chunks_are_seeked(self):
+        runs = disbursement.credited_runs(**self.period)
+        lines = list(disbursement.disbursement_lines(runs, chunk_size=5))
+        self.assertEqual([line['id'] for line in lines], [line['id'] for line in disbursement.disbursement_lines(runs)])
+        self.assertEqual(len({line['id'] for line in lines}), self.expected_lines().count())
+
+    def test_roles_and_validation(self):
+        self.assertEqual(payroll_bench.login_client('admin').get(reverse('payroll_disbursement'), self.period).status_code, 200)
+        self.assertEqual(payroll_bench.login_client('checker').get(reverse('payroll_disbursement'), self.period).status_code, 403)
+        self.assertEqual(self.client.get(reverse('payroll_disbursement'), {**self.period, 'format': 'xml'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('payroll_disbursement'), {**self.period, 'cutoff': '3rd'}).status_code, 400)
+
+    def test_ascii_text(self):
+        self.assertEqual(disbursement.ascii_text('Peña,  José  '), 'PENA, JOSE')
+        self.assertEqual(disbursement.fixed_width({
+            'record_type': 'D', 'employee_number': '1', 'fullname': 'a', 'assigned_office': None,
+            'batch_number': 7, 'pay_period': 202503, 'amount': 150050,
+        })[-15:], '000000000150050')
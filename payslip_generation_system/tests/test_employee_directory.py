@@ -0,0 +1,68 @@
+from django.test import TestCase
+from django.urls import reverse
+from payslip_generation_system.factories import seed_payroll_dataset
+from payslip_generation_system.models import Employee, Batch
+from payslip_generation_system.services import payroll_bench
+
+class EmployeeDirectoryTest(TestCase):
+    """
+    employee.data / payslip.employee_data: keyset pages, filtered count, batch names in one query
+    """
+
+    def setUp(self):
+        seed_payroll_dataset(offices=2, batches=4, employees=23, adjustments=1, periods=1, freeze=False)
+        self.client = payroll_bench.login_client('admin')
+
+    def get(self, url_name, **params):
+        response = self.client.get(reverse(url_name), {'draw': 1, 'length': 5, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def walk(self, url_name, column, direction, use_cursor):
+        """
+        Employee numbers of every page, following the next page cursor or not
+        """
+        numbers = []
+        cursor = None
+        start = 0
+        while True:
+            params = {'start': start, 'order[0][column]': column, 'order[0][dir]': direction}
+            if use_cursor and cursor:
+                params['cursor'] = cursor
+            body = self.get(url_name, **params)
+            if not body['data']:
+                return numbers
+            numbers += [row[0] for row in body['data']]
+            cursor = body['next_cursor']
+            start += 5
+
+    def test_cursor_pages_match_offset_pages(self):
+        for url_name in ['employee_data', 'payslip_employee_data']:
+            for column, direction in [(0, 'asc'), (1, 'desc'), (4, 'asc')]:
+                with self.subTest(url_name=url_name, column=column, direction=direction):
+                    seeked = self.walk(url_name, column, direction, use_cursor=True)
+                    self.assertEqual(seeked, self.walk(url_name, column, direction, use_cursor=False))
+                    self.assertEqual(sorted(seeked), sorted(Employee.objects.values_list('employee_number', flat=True)))
+
+        by_name = self.walk('employee_data', 1, 'asc', use_cursor=True)
+        self.assertEqual(by_name, list(Employee.objects.order_by('fullname', 'id').values_list('employee_number', flat=True)))
+
+    def test_cursor_of_another_listing_is_ignored(self):
+        cursor = self.get('employee_data', **{'order[0][column]': 1})['next_cursor']
+        self.assertTrue(cursor)
+
+        body = self.get('employee_data', start=5, cursor=cursor, **{'order[0][column]': 0})
+        expected = list(Employee.objects.order_by('employee_number', 'id').values_list('employee_number', flat=True)[5:10])
+        self.assertEqual([row[0] for row in body['data']], expected)
+
+    def test_filtered_count_and_batch_names(self):
+        employee = Employee.objects.exclude(batch_number=None).first()
+        body = self.get('employee_data', **{'search[value]': employee.fullname})
+
+        self.assertEqual(body['recordsTotal'], Employee.objects.count())
+        self.assertEqual(body['recordsFiltered'], Employee.objects.filter(fullname__icontains=employee.fullname).count())
+        self.assertLess(body['recordsFiltered'], body['recordsTotal'])
+
+        row = next(row for row in body['data'] if row[0] == employee.employee_number)
+        batch = Batch.objects.get(batch_number=employee.batch_number)
+        self.assertEqual(row[9], f"{batch.batch_name} (#{batch.batch_number})")
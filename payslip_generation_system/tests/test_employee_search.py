@@ -0,0 +1,56 @@
+from datetime import date
+from decimal import Decimal
+from django.test import TestCase
+from payslip_generation_system.models import Employee, EmployeeSearchToken
+from payslip_generation_system.services import employee_search
+
+class EmployeeSearchTest(TestCase):
+    """
+    Token index of the employee directory: kept current on save, prefix / word / number lookups
+    """
+
+    def setUp(self):
+        self.employees = {}
+        for number, fullname, position, office in [
+            ('2023-0001', 'Maria Peñaflor Santos', 'Administrative Aide', 'meo_s'),
+            ('2023-0002', 'Jose Santiago', 'Engineer II', 'meo_e'),
+            ('2023-0013', 'Ana Cruz', 'Forester', 'meo_s'),
+        ]:
+            self.employees[fullname] = Employee.objects.create(
+                fullname=fullname, birthdate=date(1990, 1, 1), education='College', gender='Female',
+                employee_number=number, position=position, fund_source='manila_bay', salary=Decimal('20000'),
+                tax_declaration='no', eligibility='yes', has_philhealth='yes', assigned_office=office,
+            )
+
+    def search(self, text):
+        return set(Employee.objects.filter(employee_search.search_filter(text)).values_list('fullname', flat=True))
+
+    def test_prefix_word_and_number_lookups(self):
+        self.assertEqual(self.search('sant'), {'Maria Peñaflor Santos', 'Jose Santiago'})
+        self.assertEqual(self.search('SANTOS maria'), {'Maria Peñaflor Santos'})
+        self.assertEqual(self.search('penaflor'), {'Maria Peñaflor Santos'})
+        self.assertEqual(self.search('engineer ii'), {'Jose Santiago'})
+        self.assertEqual(self.search('MEO South'), {'Maria Peñaflor Santos', 'Ana Cruz'})
+        self.assertEqual(self.search('manila bay'), set(self.employees))
+        self.assertEqual(self.search('2023-0001'), {'Maria Peñaflor Santos'})
+        self.assertEqual(self.search('20230013'), {'Ana Cruz'})
+        self.assertEqual(self.search('2023-001'), {'Ana Cruz'})
+        self.assertEqual(self.search('santa'), set())
+
+    def test_index_follows_saves(self):
+        employee = self.employees['Ana Cruz']
+        employee.fullname = 'Ana Reyes'
+        employee.save()
+
+        self.assertEqual(self.search('cruz'), set())
+        self.assertEqual(self.search('reyes'), {'Ana Reyes'})
+
+        EmployeeSearchToken.objects.all().delete()
+        self.assertEqual(employee_search.reindex(), 3)
+        self.assertEqual(self.search('reyes'), {'Ana Reyes'})
+
+    def test_prefix_upper_bound(self):
+        self.assertEqual(employee_search.prefix_upper_bound('ab'), 'ac')
+        self.assertEqual(employee_search.prefix_upper_bound('a9'), 'aa')
+        self.assertEqual(employee_search.prefix_upper_bound('az'), 'b')
+        self.assertIsNone(employee_search.prefix_upper_bound('zz'))
@@ -0,0 +1,67 @@
+from datetime import date
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import TestCase, RequestFactory
+from payslip_generation_system.context_processors import global_user_context
+from payslip_generation_system.decorators import restrict_roles
+from payslip_generation_system.models import Employee, UserRole
+from payslip_generation_system.services import identity
+
+class IdentityCacheTest(TestCase):
+    """
+    Display name / role resolved at login and cached, dropped when Employee or UserRole change
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='JuanDelaCruz', password='1990-01-01')
+        UserRole.objects.create(user=self.user, role='preparator_meo_s')
+        self.employee = Employee.objects.create(
+            fullname='Juan Dela Cruz', birthdate=date(1990, 1, 1), education='College', gender='Male',
+            employee_number='000001', position='Clerk', fund_source='regular', salary=Decimal('20000'),
+            tax_declaration='no', eligibility='yes', has_philhealth='yes', assigned_office='meo_s', user=self.user,
+        )
+
+    def request(self):
+        request = RequestFactory().get('/')
+        request.user = self.user
+        request.session = SessionStore()
+        request.session['role'] = 'preparator_meo_s'
+        return request
+
+    def test_context_without_queries_once_remembered(self):
+        identity.remember(self.user)
+
+        with self.assertNumQueries(0):
+            context = global_user_context(self.request())
+
+        self.assertEqual(context['username'], 'Juan Dela Cruz')
+        self.assertEqual(context['formatted_user_role'], 'Preparator: MEO South')
+        self.assertIn(context['user_role'], context['restricted_roles'])
+
+    def test_changes_invalidate_the_cached_identity(self):
+        identity.remember(self.user)
+
+        self.employee.fullname = 'Juan P. Dela Cruz'
+        self.employee.save()
+        self.assertEqual(global_user_context(self.request())['username'], 'Juan P. Dela Cruz')
+
+        UserRole.objects.filter(user=self.user).get().delete()
+        UserRole.objects.create(user=self.user, role='checker')
+        request = self.request()
+        self.assertEqual(identity.for_request(request)['assigned_office'], None)
+        self.assertEqual(request.session['role'], 'checker')
+
+    def test_restrict_roles_reads_the_request_identity(self):
+        view = restrict_roles(disallowed_roles=['Preparator_MEO_S'])(lambda request: HttpResponse('ok'))
+        identity.remember(self.user)
+
+        with self.assertNumQueries(0):
+            response = view(self.request())
+        self.assertEqual(response.status_code, 302)
+
+        allowed = restrict_roles(disallowed_roles=['employee'])(lambda request: HttpResponse('ok'))
+        self.assertEqual(allowed(self.request()).status_code, 200)
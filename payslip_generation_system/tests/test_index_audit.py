@@ -0,0 +1,17 @@
+from django.test import TestCase
+from payslip_generation_system.factories import seed_payroll_dataset
+from payslip_generation_system.services import index_audit
+
+class IndexAuditTest(TestCase):
+    """
+    The queries behind the main payroll endpoints are served by an index
+    """
+
+    def test_no_full_scans(self):
+        seed_payroll_dataset(offices=2, batches=3, employees=12, adjustments=6, periods=2)
+        results = index_audit.run_audit()
+
+        self.assertTrue(results)
+        for result in results:
+            with self.subTest(query=result['name']):
+                self.assertEqual(result['flags'], [])
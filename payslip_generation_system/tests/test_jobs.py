@@ -0,0 +1,89 @@
+import io
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from payslip_generation_system.factories import seed_payroll_dataset
+from payslip_generation_system.models import Adjustment, BatchAssignment, Employee, Job, UserRole
+from payslip_generation_system.services import payroll_bench, jobs, user_accounts
+
+@jobs.handler('test_failing')
+def failing_job(job):
+    raise RuntimeError('Boom')
+
+class JobsTest(TestCase):
+    """
+    Background jobs: enqueue mode of the long payroll endpoints, run_workers, status / result polling
+    """
+
+    def setUp(self):
+        self.dataset = seed_payroll_dataset(offices=2, batches=2, employees=12, adjustments=2, periods=2)
+        self.batch = self.dataset['batches'][0]
+        self.period = {key: self.batch[key] for key in ['cutoff', 'cutoff_month', 'cutoff_year']}
+        self.client = payroll_bench.login_client('admin')
+
+    def run_workers(self):
+        call_command('run_workers', workers=1, once=True, stdout=io.StringIO())
+
+    def test_enqueued_view_runs_in_worker(self):
+        response = self.client.post(reverse('payroll_batch_delete'), {**self.period, 'enqueue': '1'})
+        self.assertEqual(response.status_code, 202)
+        job_id = response.json()['job_id']
+
+        # Nothing deleted until a worker runs the job
+        self.assertTrue(BatchAssignment.objects.filter(cutoff=self.period['cutoff'], cutoff_month=self.period['cutoff_month']).exists())
+        status = self.client.get(reverse('job_status', args=[job_id])).json()
+        self.assertEqual(status['status'], 'queued')
+        self.assertEqual(self.client.get(reverse('job_result', args=[job_id])).status_code, 409)
+
+        self.run_workers()
+
+        status = self.client.get(reverse('job_status', args=[job_id])).json()
+        self.assertEqual(status['status'], 'succeeded')
+        result = self.client.get(reverse('job_result', args=[job_id])).json()
+        self.assertEqual(result['result']['status'], 200)
+        self.assertIn('removed successfully', result['result']['body']['message'])
+        self.assertFalse(BatchAssignment.objects.filter(cutoff=self.period['cutoff'], cutoff_month=self.period['cutoff_month'], cutoff_year=self.period['cutoff_year']).exists())
+
+    def test_progress_and_failed_view(self):
+        response = payroll_bench.login_client('accounting').post(reverse('payroll_approve_office_to_credited'), {
+            'assigned_office': self.batch['assigned_office'], 'enqueue': '1',
+        })
+        job_id = response.json()['job_id']
+        missing = self.client.post(reverse('payroll_batch_create'), {'enqueue': '1'}).json()['job_id']
+        self.run_workers()
+
+        job = Job.objects.get(id=job_id)
+        self.assertEqual(job.status, 'succeeded')
+        self.assertEqual(job.progress, job.total)
+        self.assertFalse(Adjustment.objects.filter(assigned_office=self.batch['assigned_office'], status='Approved').exists())
+
+        # A 400 from the view fails the job with the view's error
+        job = Job.objects.get(id=missing)
+        self.assertEqual(job.status, 'failed')
+        self.assertEqual(job.result['status'], 400)
+        self.assertIn('Missing cutoff', job.error)
+
+    def test_failing_handler_and_claim(self):
+        job = jobs.enqueue('test_failing')
+        self.assertEqual(jobs.claim('host:1').id, job.id)
+        self.assertIsNone(jobs.claim('host:2'))
+
+        # A worker of this host stopped mid-job: queued again at start up
+        self.assertEqual(jobs.requeue_orphans(host='host'), 1)
+        self.run_workers()
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+        self.assertEqual(job.attempts, 2)
+        self.assertEqual(jobs.job_values(job)['error'], 'RuntimeError: Boom')
+
+    def test_only_owner_or_admin(self):
+        job = jobs.enqueue('test_failing')
+        checker = payroll_bench.login_client('checker')
+        self.assertEqual(checker.get(reverse('job_status', args=[job.id])).status_code, 403)
+        self.assertEqual(self.client.get(reverse('job_status', args=[job.id])).status_code, 200)
+
+    def test_generate_user_accounts(self):
+        employee_ids = list(Employee.objects.filter(user__isnull=True).values_list('id', flat=True)[:3])
+        counts = user_accounts.generate_user_accounts(employee_ids + employee_ids[:1], chunk_size=2)
+        self.assertEqual(counts, {'created': 3, 'skipped': 1})
+        self.assertEqual(UserRole.objects.filter(user__employee__id__in=employee_ids, role='employee').count(), 3)
@@ -0,0 +1,49 @@
+from datetime import date
+from decimal import Decimal
+from django.test import TestCase
+from payslip_generation_system.models import Employee, Adjustment, BatchAssignment
+from payslip_generation_system.pay_period import (
+    pay_period_key, pay_period_parts, shift_pay_period, year_range, last_periods_range, period_filter
+)
+
+class PayPeriodKeyTest(TestCase):
+
+    def test_key_round_trip_and_order(self):
+        self.assertEqual(pay_period_key('2025', 'January', '1st'), 202500)
+        self.assertEqual(pay_period_key(2025, 'December', '2nd'), 202523)
+        self.assertEqual(pay_period_parts(202523), ('2nd', 'December', '2025'))
+        self.assertLess(pay_period_key('2024', 'December', '2nd'), pay_period_key('2025', 'January', '1st'))
+        self.assertIsNone(pay_period_key('2025', 'Janvier', '1st'))
+
+    def test_ranges(self):
+        self.assertEqual(shift_pay_period(202500, -1), 202423)
+        self.assertEqual(shift_pay_period(202423, 1), 202500)
+        self.assertEqual(year_range('2025'), (202500, 202523))
+        self.assertEqual(last_periods_range(202502, 6), (202421, 202502))
+
+    def test_period_filter_falls_back_to_strings(self):
+        self.assertEqual(period_filter('2025', 'March', '2nd'), {'pay_period': 202505})
+        self.assertEqual(
+            period_filter('', 'March', '2nd', month_field='cutoff_month'),
+            {'cutoff_year': '', 'cutoff_month': 'March', 'cutoff': '2nd'}
+        )
+
+    def test_key_set_on_save(self):
+        employee = Employee.objects.create(
+            fullname='Juan Dela Cruz', birthdate=date(1990, 1, 1), education='College', gender='Male',
+            employee_number='000001', position='Clerk', fund_source='regular', salary=Decimal('20000'),
+            tax_declaration='no', eligibility='yes', has_philhealth='yes', assigned_office='meo_s', batch_number=1,
+        )
+        assignment = BatchAssignment.objects.create(
+            employee=employee, batch_number=1, cutoff='2nd', cutoff_month='March', cutoff_year='2025', assigned_office='meo_s',
+        )
+        adjustment = Adjustment.objects.create(
+            employee=employee, name='Late', type='Deduction', amount=Decimal('10'), details='5', computation='',
+            month='March', cutoff='2nd', cutoff_year='2025', status='Waiting', batch_number=1, assigned_office='meo_s',
+        )
+        self.assertEqual(assignment.pay_period, 202505)
+        self.assertEqual(adjustment.pay_period, 202505)
+
+        adjustment.month = 'April'
+        adjustment.save()
+        self.assertEqual(Adjustment.objects.get(id=adjustment.id).pay_period, 202507)
@@ -0,0 +1,143 @@
+from decimal import Decimal, ROUND_HALF_UP
+from django.db.models import Q, Sum
+from django.forms.models import model_to_dict
+from django.test import TestCase
+from django.urls import reverse
+from payslip_generation_system.factories import seed_payroll_dataset
+from payslip_generation_system.models import Adjustment, BatchAssignment
+from payslip_generation_system.pay_period import pay_period_key
+from payslip_generation_system.services import payroll_bench, payroll_engine
+
+def legacy_row(assignment, cutoff, cutoff_month, cutoff_year, adjustment_office=None, previous_batch_office=None):
+    """
+    Payroll row of one employee as batch_data computed it before payroll_engine: one aggregate
+    per adjustment category, one query for the previous batch
+    """
+    employee = assignment.employee
+    adjustments = Adjustment.objects.filter(
+        employee=employee, month=cutoff_month, cutoff=cutoff, cutoff_year=cutoff_year,
+        status__in=["Pending", "Approved", "Credited"],
+    )
+    if adjustment_office:
+        adjustments = adjustments.filter(assigned_office=adjustment_office)
+
+    def total(query, field='amount'):
+        return adjustments.filter(query).aggregate(total=Sum(field))['total'] or Decimal('0.00')
+
+    other_deductions = adjustments.filter(type="Deduction").exclude(
+        Q(name__in=["Late", "Absent", "TAX", "SSS"]) | Q(name__icontains="Philhealth") | Q(name__icontains="Expanded Withholding Tax")
+    )
+    incomes = adjustments.filter(type="Income")
+    total_other_deductions = other_deductions.aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
+    total_income = incomes.aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
+    late_amount, late_minutes = total(Q(name="Late")), total(Q(name="Late"), 'details')
+    absent_amount, absent_minutes = total(Q(name="Absent")), total(Q(name="Absent"), 'details')
+
+    basic_salary_cutoff = employee.salary / 2
+    total_gross_amount = abs(basic_salary_cutoff - late_amount - absent_amount - total_other_deductions + total_income)
+    if employee.tax_declaration == "yes":
+        tax_deduction = Decimal('0.00')
+    else:
+        tax_deduction = (total_gross_amount * Decimal("0.03")).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+    if employee.has_philhealth == "yes":
+        philhealth = (total_gross_amount * Decimal("0.05")).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+    else:
+        philhealth = Decimal("0.00")
+    philhealth_previous = total(Q(name__icontains="Philhealth"))
+    ewt = total(Q(name__icontains="expanded withholding tax"))
+    sss = total(Q(name="SSS"))
+    total_deductions = (sss + philhealth + tax_deduction + ewt + philhealth_previous).quantize(Decimal("0.01"))
+
+    previous_batch_submitted = False
+    if assignment.previous_batch is not None:
+        previous = Adjustment.objects.filter(
+            batch_number=assignment.previous_batch, cutoff=cutoff, month=cutoff_month, cutoff_year=cutoff_year,
+            status__in=["Pending", "Approved", "Credited"],
+        )
+        if previous_batch_office:
+            previous = previous.filter(assigned_office=previous_batch_office)
+        previous_batch_submitted = previous.exists()
+
+    row = model_to_dict(employee, fields=['id', 'employee_number', 'fullname', 'position', 'salary', 'tax_declaration', 'has_philhealth'])
+    row.update({
+        'late_assigned': assignment.late_assigned,
+        'removed': assignment.removed,
+        'has_adjustments': assignment.has_adjustments,
+        'previous_batch': assignment.previous_batch,
+        'previous_batch_submitted': previous_batch_submitted,
+        'basic_salary_cutoff': f"{basic_salary_cutoff:.2f}",
+        'tax_deduction': f"{tax_deduction:.2f}",
+        'ewt': f"{ewt:.2f}",
+        'philhealth': f"{philhealth:.2f}",
+        'previous_philhealth': f"{philhealth_previous}",
+        'sss': f"{sss:.2f}",
+        'late_amount': f"{late_amount:.2f}",
+        'late_minutes': f"{late_minutes:.2f}",
+        'absent_amount': f"{absent_amount:.2f}",
+        'absent_minutes': f"{absent_minutes:.2f}",
+        'other_deductions': f"{total_other_deductions:.2f}",
+        'total_deductions': f"{total_deductions:.2f}",
+        'income': f"{total_income:.2f}",
+        'total_gross_amount': f"{total_gross_amount:.2f}",
+        'net_salary': f"{abs(total_gross_amount - total_deductions):.2f}",
+        'incomes': list(incomes.values('name', 'amount', 'details')),
+        'deductions': list(other_deductions.values('name', 'amount', 'details')),
+    })
+    return row
+
+class PayrollEngineTest(TestCase):
+    """
+    build_batch_rows gives the rows batch_data computed employee by employee, for on-time,
+    late, removed and moved employees
+    """
+
+    def setUp(self):
+        self.dataset = seed_payroll_dataset(offices=1, batches=3, employees=18, adjustments=3, periods=1)
+        self.waiting = next(batch for batch in self.dataset['batches'] if batch['status'] == 'Waiting')
+        self.submitted = next(batch for batch in self.dataset['batches'] if batch['status'] != 'Waiting')
+        self.period = {key: self.waiting[key] for key in ['cutoff', 'cutoff_month', 'cutoff_year']}
+        self.office = self.waiting['assigned_office']
+        self.pay_period = pay_period_key(self.waiting['cutoff_year'], self.waiting['cutoff_month'], self.waiting['cutoff'])
+
+    def members(self, batch_number):
+        return list(BatchAssignment.objects.filter(
+            assigned_office=self.office, pay_period=self.pay_period, batch_number=batch_number,
+        ).values_list('employee_id', flat=True))
+
+    def move_employees(self):
+        # Late and removed employees of a waiting batch, and one removed from a submitted batch
+        client = payroll_bench.login_client('admin')
+        waiting = self.members(self.waiting['batch_number'])
+        submitted = self.members(self.submitted['batch_number'])
+        for url, employee_id, batch in [
+            ('payroll_batch_late', waiting[0], self.waiting),
+            ('payroll_batch_late', waiting[1], self.waiting),
+            ('payroll_batch_remove', waiting[2], self.waiting),
+            ('payroll_batch_remove', submitted[0], self.submitted),
+        ]:
+            response = client.post(reverse(url), {**self.period, 'employee_id': employee_id, 'batch_number': batch['batch_number']})
+            self.assertEqual(response.status_code, 200)
+
+    def assert_rows_match(self, batch_number, adjustment_office=None, previous_batch_office=None):
+        assignments = payroll_engine.batch_assignments(batch_number, **self.period, assigned_office=self.office)
+        expected = [legacy_row(assignment, **self.period, adjustment_office=adjustment_office, previous_batch_office=previous_batch_office)
+                    for assignment in assignments]
+        rows = payroll_engine.build_batch_rows(assignments, **self.period, adjustment_office=adjustment_office, previous_batch_office=previous_batch_office)
+        self.assertTrue(expected)
+        self.assertEqual(rows, expected)
+        return rows
+
+    def test_rows_match_per_employee_computation(self):
+        self.move_employees()
+        batch_numbers = set(BatchAssignment.objects.filter(pay_period=self.pay_period).values_list('batch_number', flat=True))
+
+        rows = []
+        for batch_number in sorted(batch_numbers):
+            with self.subTest(batch_number=batch_number):
+                rows += self.assert_rows_match(batch_number, previous_batch_office=self.office)
+                rows += self.assert_rows_match(batch_number, adjustment_office=self.office, previous_batch_office=self.office)
+
+        # The comparison covers late, removed and moved employees, with and without a submitted previous batch
+        self.assertTrue(any(row['late_assigned'] == 'YES' for row in rows))
+        self.assertTrue(any(row['removed'] == 'YES' for row in rows))
+        self.assertEqual({row['previous_batch_submitted'] for row in rows if row['previous_batch'] is not None}, {True, False})
@@ -0,0 +1,133 @@
+import io
+import tempfile
+from unittest import mock
+from openpyxl import load_workbook
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from payslip_generation_system.factories import seed_payroll_dataset
+from payslip_generation_system.models import BatchAssignment, Employee, PayrollRun
+from payslip_generation_system.services import payroll_bench, payroll_export, identity
+
+def read_workbook(data):
+    """
+    [(sheet title, {cell ref: value})] of an .xlsx
+    """
+    workbook = load_workbook(io.BytesIO(data))
+    return [
+        (sheet.title, {cell.coordinate: cell.value for row in sheet.iter_rows() for cell in row if cell.value is not None})
+        for sheet in workbook.worksheets
+    ]
+
+class PayrollExportTest(TestCase):
+    """
+    payroll.excel.export: streamed .xlsx, one sheet per batch, rows from one computation pass
+    """
+
+    def setUp(self):
+        self.dataset = seed_payroll_dataset(offices=2, batches=4, employees=24, adjustments=2, periods=1)
+        self.batch = self.dataset['batches'][0]
+        self.period = {key: self.batch[key] for key in ['cutoff', 'cutoff_month', 'cutoff_year']}
+        self.client = payroll_bench.login_client('admin')
+
+    def export(self, client=None, **params):
+        response = (client or self.client).get(reverse('payroll_excel_export'), {**self.period, **params})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, read_workbook(b''.join(response.streaming_content))
+
+    def test_one_batch_layout(self):
+        response, sheets = self.export(batch_number=self.batch['batch_number'])
+        self.assertEqual(len(sheets), 1)
+        title, cells = sheets[0]
+        self.assertEqual(title, f"Batch {self.batch['batch_number']} {self.batch['assigned_office']}")
+        self.assertIn(f"_{title}.xlsx", response['Content-Disposition'])
+        self.assertEqual(cells['A1'].strip(), 'GENERAL PAYROLL')
+        self.assertEqual(cells['H3'], payroll_export.cutoff_range(**self.period))
+        self.assertTrue(cells['C5'].endswith(title))
+        self.assertEqual(cells['S8'], 'Net Amount Due')
+
+        employees = Employee.objects.filter(
+            batchassignment__batch_number=self.batch['batch_number']
+        ).order_by('fullname', 'id')
+        self.assertEqual(len(employees), 6)
+        for row, employee in enumerate(employees, start=11):
+            self.assertEqual(cells[f'A{row}'], row - 10)
+            self.assertEqual(cells[f'F{row}'], float(employee.salary))
+            self.assertAlmostEqual(cells[f'S{row}'], cells[f'L{row}'] - (cells[f'R{row}'] if cells[f'R{row}'] != '-' else 0), places=2)
+
+        # At least 15 employee rows, then the totals box
+        self.assertEqual(cells['B27'], 'Total')
+        self.assertAlmostEqual(cells['S27'], sum(cells[f'S{row}'] for row in range(11, 17)), places=2)
+        self.assertAlmostEqual(cells['S30'], cells['S27'], places=2)
+
+    def test_office_and_all_offices(self):
+        office = self.batch['assigned_office']
+        office_batches = [batch for batch in self.dataset['batches'] if batch['assigned_office'] == office]
+
+        _, sheets = self.export(assigned_office=office)
+        self.assertEqual(len(sheets), len(office_batches))
+        self.assertTrue(all(office in title for title, _ in sheets))
+
+        _, sheets = self.export()
+        self.assertEqual(len(sheets), len(self.dataset['batches']))
+
+    def test_frozen_batch_and_preparator_scope(self):
+        run = PayrollRun.objects.first()
+        self.assertIsNotNone(run)
+        Employee.objects.filter(id__in=run.lines.values('employee_id')).update(salary=1)
+
+        _, sheets = self.export(batch_number=run.batch_number)
+        cells = sheets[0][1]
+        self.assertEqual(cells['F11'], float(run.lines.order_by('fullname', 'line_number').first().salary))
+
+        role = next(role for role, office in identity.ROLE_OFFICES.items() if office == run.assigned_office)
+        preparator = payroll_bench.login_client(role)
+        _, sheets = self.export(client=preparator)
+        self.assertTrue(all(run.assigned_office in title for title, _ in sheets))
+
+        other_office = BatchAssignment.objects.exclude(assigned_office=run.assigned_office).values_list('assigned_office', flat=True).first()
+        response = preparator.get(reverse('payroll_excel_export'), {**self.period, 'assigned_office': other_office})
+        self.assertEqual(response.status_code, 403)
+
+    def test_query_count_independent_of_batch_size(self):
+        batches = payroll_export.export_batches(**self.period)
+
+        # Frozen runs, adjustment totals, batch names, then one query per sheet
+        with self.assertNumQueries(3 + len(batches)):
+            b''.join(payroll_export.stream_workbook(batches, **self.period))
+
+    @mock.patch.object(payroll_export, 'generated_on', return_value='6-20-2025 09:00 AM')
+    def test_enqueued_export(self, generated_on):
+        params = {'batch_number': self.batch['batch_number']}
+        _, expected = self.export(**params)
+
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            response = self.client.get(reverse('payroll_excel_export'), {**self.period, **params, 'enqueue': '1'})
+            self.assertEqual(response.status_code, 202)
+            job_id = response.json()['job_id']
+            self.assertEqual(self.client.get(reverse('job_file', args=[job_id])).status_code, 409)
+
+            call_command('run_workers', workers=1, once=True, stdout=io.StringIO())
+
+            body = self.client.get(reverse('job_result', args=[job_id])).json()['result']['body']
+            self.assertEqual(body['file_url'], reverse('job_file', args=[job_id]))
+            download = self.client.get(body['file_url'])
+            self.assertEqual(download.status_code, 200)
+            self.assertIn(body['file_name'], download['Content-Disposition'])
+            self.assertEqual(read_workbook(b''.join(download.streaming_content)), expected)
+
+            # Only the user who queued it (or an admin) downloads it
+            checker = payroll_bench.login_client('checker')
+            self.assertEqual(checker.get(body['file_url']).status_code, 403)
+
+    def test_split_name(self):
+        self.assertEqual(payroll_export.split_name('Dela Cruz, Juan Jr.'), ('Dela Cruz', 'Juan'))
+        self.assertEqual(payroll_export.split_name('Juan Santos Dela Cruz'), ('Juan Santos Dela', 'Cruz'))
+        self.assertEqual(payroll_export.split_name('Maria Reyes III'), ('Maria', 'Reyes'))
+        self.assertEqual(payroll_export.split_name(''), ('', ''))
+
+    def test_invalid_period(self):
+        response = self.client.get(reverse('payroll_excel_export'), {**self.period, 'cutoff': '3rd'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('period', response.json()['error'])
@@ -0,0 +1,106 @@
+from datetime import date, datetime
+from unittest import mock
+from django.core.cache import cache
+from django.db.models import F
+from django.test import TestCase
+from django.urls import reverse
+from payslip_generation_system.factories import seed_payroll_dataset
+from payslip_generation_system.models import Adjustment, Employee, PayrollRun
+from payslip_generation_system.pay_period import pay_period_key
+from payslip_generation_system.services import payroll_bench, payroll_export, payroll_snapshot
+from payslip_generation_system.tests.test_payroll_export import read_workbook
+
+# Date the tests run on: payslip.generate reads the current year, the dataset is generated for it
+TODAY = date(2025, 6, 20)
+
+class PinnedDatetime(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return cls(TODAY.year, TODAY.month, TODAY.day, 9, 0, tzinfo=tz)
+
+class PayrollSnapshotTest(TestCase):
+    """
+    Submitted batches are read from the PayrollRun frozen at submit until they go back to the preparator
+    """
+
+    def setUp(self):
+        cache.clear()
+        clock = mock.patch('payslip_generation_system.views.payslip.datetime', PinnedDatetime)
+        clock.start()
+        self.addCleanup(clock.stop)
+
+        self.dataset = seed_payroll_dataset(offices=2, batches=4, employees=16, adjustments=2, periods=2, today=TODAY)
+        self.batch = next(batch for batch in self.dataset['batches'] if batch['status'] == 'Pending')
+        self.period = {key: self.batch[key] for key in ['cutoff', 'cutoff_month', 'cutoff_year']}
+        self.office = self.batch['assigned_office']
+        self.pay_period = pay_period_key(self.batch['cutoff_year'], self.batch['cutoff_month'], self.batch['cutoff'])
+        self.run = PayrollRun.objects.get(assigned_office=self.office, pay_period=self.pay_period, batch_number=self.batch['batch_number'])
+        self.employee_ids = list(self.run.lines.values_list('employee_id', flat=True))
+        self.checker = payroll_bench.login_client('checker')
+
+    def batch_data(self, client=None):
+        # The checker's view of the batch (pending page), or a preparator's without an office
+        params = {**self.period, 'batch_number': self.batch['batch_number']}
+        if client is None:
+            client, params = self.checker, {**params, 'assigned_office': self.office}
+        response = client.get(reverse('payroll_batch_data'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()['employees']
+
+    def payslip(self):
+        response = payroll_bench.login_client('admin').post(reverse('payslip_generate'), {
+            'employee': self.employee_ids[0], 'month': self.batch['cutoff_month'], 'cutoff': self.batch['cutoff'],
+        })
+        self.assertEqual(response.status_code, 200)
+        return {key: response.context[key] for key in ['monthly_rate', 'total_gross', 'total_deductions', 'net_pay']}
+
+    def export(self):
+        batches = payroll_export.export_batches(**self.period, assigned_office=self.office, batch_number=self.batch['batch_number'])
+        return read_workbook(b''.join(payroll_export.stream_workbook(batches, **self.period, moment=PinnedDatetime.now())))
+
+    def edit_after_submit(self):
+        # Salary and adjustment edits that bypass the checker's corrections
+        Employee.objects.filter(id__in=self.employee_ids).update(salary=F('salary') * 2)
+        Adjustment.objects.filter(employee_id__in=self.employee_ids, pay_period=self.pay_period).update(amount=F('amount') + 100)
+
+    def test_edits_after_submit_do_not_change_the_payroll(self):
+        before = (self.batch_data(), self.payslip(), self.export())
+        self.assertEqual(len(before[0]), len(self.employee_ids))
+        self.edit_after_submit()
+        self.assertEqual((self.batch_data(), self.payslip(), self.export()), before)
+
+    def test_refresh_runs_refreezes(self):
+        salaries = dict(self.run.lines.values_list('employee_id', 'salary'))
+        self.edit_after_submit()
+
+        payroll_snapshot.refresh_runs({(self.office, self.pay_period, self.batch['batch_number'])})
+        run = PayrollRun.objects.get(id=self.run.id)
+        self.assertEqual(dict(run.lines.values_list('employee_id', 'salary')), {
+            employee_id: salary * 2 for employee_id, salary in salaries.items()
+        })
+
+    def test_reject_discards_the_run(self):
+        self.edit_after_submit()
+        response = self.checker.post(reverse('payroll_reject'), {
+            **self.period, 'batch_number': self.batch['batch_number'], 'assigned_office': self.office, 'remarks': 'Check salaries',
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(PayrollRun.objects.filter(id=self.run.id).exists())
+
+        # Computed live again for the preparator: the edited salaries show
+        preparator = payroll_bench.login_client(payroll_bench.OFFICE_ROLES[self.office])
+        salaries = dict(Employee.objects.filter(id__in=self.employee_ids).values_list('id', 'salary'))
+        self.assertEqual(
+            {row['id']: float(row['salary']) for row in self.batch_data(preparator)},
+            {employee_id: float(salary) for employee_id, salary in salaries.items()},
+        )
+
+    def test_find_run_needs_office_when_batch_spans_offices(self):
+        self.assertEqual(payroll_snapshot.find_run(self.batch['batch_number'], **self.period), self.run)
+
+        other_office = next(batch['assigned_office'] for batch in self.dataset['batches'] if batch['assigned_office'] != self.office)
+        other = payroll_snapshot.freeze_batch(self.batch['batch_number'], **self.period, assigned_office=other_office)
+
+        self.assertIsNone(payroll_snapshot.find_run(self.batch['batch_number'], **self.period))
+        self.assertEqual(payroll_snapshot.find_run(self.batch['batch_number'], **self.period, assigned_office=self.office), self.run)
+        self.assertEqual(payroll_snapshot.find_run(self.batch['batch_number'], **self.period, assigned_office=other_office), other)
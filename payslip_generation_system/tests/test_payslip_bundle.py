@@ -0,0 +1,112 @@
+import io
+import os
+import tempfile
+import zipfile
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from payslip_generation_system.factories import seed_payroll_dataset
+from payslip_generation_system.models import BatchAssignment, Employee, PayrollLine
+from payslip_generation_system.services import payroll_bench, payroll_engine, payroll_snapshot, payslip_bundle, identity
+
+class PayslipBundleTest(TestCase):
+    """
+    payslip.bulk: every payslip of a batch / office / selection in one streamed ZIP
+    """
+
+    def setUp(self):
+        self.dataset = seed_payroll_dataset(offices=2, batches=2, employees=12, adjustments=3, periods=1)
+        self.batch = next(batch for batch in self.dataset['batches'] if batch['status'] == 'Pending')
+        self.period = {key: self.batch[key] for key in ['cutoff', 'cutoff_month', 'cutoff_year']}
+        self.client = payroll_bench.login_client('admin')
+
+    def download(self, client=None, **params):
+        response = (client or self.client).get(reverse('payslip_bulk'), {**self.period, **params})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+
+    def batch_employees(self):
+        return Employee.objects.filter(
+            batchassignment__batch_number=self.batch['batch_number']
+        ).exclude(batchassignment__removed='YES').distinct()
+
+    def test_batch_zip(self):
+        bundle = self.download(batch_number=self.batch['batch_number'])
+        payslips = [name for name in bundle.namelist() if name.endswith('.html')]
+        self.assertEqual(len(payslips), self.batch_employees().count())
+        self.assertIn(payslip_bundle.LOGOS['denr_logo'], bundle.namelist())
+
+        line = PayrollLine.objects.filter(run__batch_number=self.batch['batch_number']).first()
+        html = next(bundle.read(name).decode() for name in payslips if name.startswith(line.employee_number))
+        self.assertIn(line.fullname, html)
+        self.assertIn(f"{payroll_snapshot.payslip_values(line)['net_pay']:,.2f}", html)
+        self.assertIn('src="assets/denr-logo.png"', html)
+
+    def test_live_values_match_generate(self):
+        # Without a frozen run the payslip is computed from the adjustments
+        payroll_snapshot.discard_runs(**self.period, batch_number=self.batch['batch_number'])
+        employee = self.batch_employees().first()
+        adjustments = list(
+            payroll_engine.period_adjustments(**self.period).filter(employee=employee)
+            .values('type', 'name', 'amount', 'details').order_by('id')
+        )
+        self.assertTrue(adjustments)
+
+        response = self.client.post(reverse('payslip_generate'), {
+            'employee': employee.id,
+            'month': self.period['cutoff_month'],
+            'cutoff': self.period['cutoff'],
+        })
+        self.assertEqual(response.status_code, 200)
+        values = payroll_engine.payslip_values(employee, adjustments)
+        for key in ['basic_salary_cutoff', 'total_gross', 'tax_deduction', 'philhealth', 'ewt', 'sss',
+                    'late_amt_total', 'absent_amt_total', 'total_deductions', 'total_adjustment_summary', 'net_pay']:
+            self.assertEqual(values[key], response.context[key], key)
+
+    def test_query_count_and_process_pool(self):
+        payroll_snapshot.discard_runs(**self.period, batch_number=self.batch['batch_number'])
+        employees = payslip_bundle.bundle_employees(**self.period, assigned_office=self.batch['assigned_office'])
+
+        # Employees, frozen lines, adjustments of the employees without one
+        with self.assertNumQueries(3):
+            jobs = payslip_bundle.payslip_jobs(employees, **self.period)
+        self.assertTrue(jobs)
+
+        inline = dict(payslip_bundle.render_all(jobs, workers=0))
+        pooled = dict(payslip_bundle.render_all(jobs, workers=2))
+        self.assertEqual(inline, pooled)
+
+    def test_selection_and_scope(self):
+        employee_ids = list(self.batch_employees().values_list('id', flat=True)[:2])
+        bundle = self.download(**{'employee': employee_ids})
+        self.assertEqual(len([name for name in bundle.namelist() if name.endswith('.html')]), 2)
+
+        office = self.batch['assigned_office']
+        role = next(role for role, role_office in identity.ROLE_OFFICES.items() if role_office == office)
+        preparator = payroll_bench.login_client(role)
+        bundle = self.download(client=preparator)
+        self.assertEqual(
+            len([name for name in bundle.namelist() if name.endswith('.html')]),
+            len(payslip_bundle.payslip_jobs(payslip_bundle.bundle_employees(**self.period, assigned_office=office), **self.period)),
+        )
+
+        other_office = BatchAssignment.objects.exclude(assigned_office=office).values_list('assigned_office', flat=True).first()
+        response = preparator.get(reverse('payslip_bulk'), {**self.period, 'assigned_office': other_office})
+        self.assertEqual(response.status_code, 403)
+
+        response = self.client.get(reverse('payslip_bulk'), self.period)
+        self.assertEqual(response.status_code, 400)
+
+    def test_command(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'payslips.zip')
+            call_command(
+                'bulk_payslips', cutoff=self.period['cutoff'], month=self.period['cutoff_month'], year=self.period['cutoff_year'],
+                batch_number=self.batch['batch_number'], workers=0, output=output, stdout=io.StringIO(),
+            )
+            with zipfile.ZipFile(output) as bundle:
+                self.assertEqual(
+                    len([name for name in bundle.namelist() if name.endswith('.html')]),
+                    self.batch_employees().count(),
+                )
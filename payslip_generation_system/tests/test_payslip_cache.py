@@ -0,0 +1,88 @@
+from datetime import date, datetime
+from unittest import mock
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from payslip_generation_system.factories import seed_payroll_dataset
+from payslip_generation_system.models import Adjustment, Employee
+from payslip_generation_system.pay_period import pay_period_key
+from payslip_generation_system.services import payroll_bench, payroll_engine, payroll_snapshot, payslip_cache, batch_status
+
+# Date the tests run on: payslip.generate reads the current year, the dataset is generated for it
+TODAY = date(2025, 6, 20)
+
+class PinnedDatetime(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return cls(TODAY.year, TODAY.month, TODAY.day, 9, 0, tzinfo=tz)
+
+class PayslipCacheTest(TestCase):
+    """
+    payslip.generate: one adjustment query per payslip, credited payslips cached per (employee, period)
+    """
+
+    def setUp(self):
+        cache.clear()
+        clock = mock.patch('payslip_generation_system.views.payslip.datetime', PinnedDatetime)
+        clock.start()
+        self.addCleanup(clock.stop)
+
+        # June 2nd (current), June 1st (Approved), May 2nd (Credited)
+        self.dataset = seed_payroll_dataset(offices=1, batches=2, employees=8, adjustments=3, periods=3, today=TODAY)
+        self.batch = next(batch for batch in self.dataset['batches'] if batch['status'] == 'Credited')
+        self.pay_period = pay_period_key(self.batch['cutoff_year'], self.batch['cutoff_month'], self.batch['cutoff'])
+        self.employee = Employee.objects.filter(
+            batchassignment__batch_number=self.batch['batch_number'],
+            adjustment__pay_period=self.pay_period,
+        ).distinct().first()
+
+    def generate(self, role='employee'):
+        return payroll_bench.login_client(role).post(reverse('payslip_generate'), {
+            'employee': self.employee.id,
+            'month': self.batch['cutoff_month'],
+            'cutoff': self.batch['cutoff'],
+        })
+
+    def adjustment_queries(self, queries):
+        return [query['sql'] for query in queries if 'FROM "payslip_generation_system_adjustment"' in query['sql']]
+
+    def test_credited_payslip_is_cached(self):
+        with CaptureQueriesContext(connection) as first:
+            response = self.generate()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self.adjustment_queries(first.captured_queries)), 1)
+        self.assertIsNotNone(payslip_cache.get(self.employee.id, self.pay_period))
+
+        with CaptureQueriesContext(connection) as second:
+            cached = self.generate()
+        self.assertEqual(self.adjustment_queries(second.captured_queries), [])
+        self.assertEqual(cached.context['net_pay'], response.context['net_pay'])
+        self.assertLess(len(second.captured_queries), len(first.captured_queries))
+
+    def test_adjustment_write_drops_the_period(self):
+        self.generate()
+        self.assertIsNotNone(payslip_cache.get(self.employee.id, self.pay_period))
+
+        adjustments = Adjustment.objects.filter(employee=self.employee, pay_period=self.pay_period)
+        adjustments.update(status='Approved')
+        batch_status.refresh_adjustments(adjustments)
+        self.assertIsNone(payslip_cache.get(self.employee.id, self.pay_period))
+
+        # Not every adjustment is credited any more: computed, not cached
+        self.generate(role='admin')
+        self.assertIsNone(payslip_cache.get(self.employee.id, self.pay_period))
+
+    def test_live_payslip_matches_grouped_totals(self):
+        payroll_snapshot.discard_runs(self.batch['cutoff'], self.batch['cutoff_month'], self.batch['cutoff_year'])
+        response = self.generate()
+        self.assertEqual(response.status_code, 200)
+
+        totals = payroll_engine.fetch_adjustment_totals(
+            [self.employee.id], self.batch['cutoff'], self.batch['cutoff_month'], self.batch['cutoff_year']
+        ).get(self.employee.id, payroll_engine.EMPTY_TOTALS)
+        pay = payroll_engine.compute_pay(self.employee, totals)
+        self.assertEqual(response.context['total_gross'], pay['total_gross_amount'])
+        self.assertEqual(response.context['tax_deduction'], pay['tax_deduction'])
+        self.assertEqual(response.context['net_pay'], pay['net_salary'])
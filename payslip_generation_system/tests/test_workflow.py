@@ -0,0 +1,174 @@
+import json
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from payslip_generation_system.factories import seed_payroll_dataset
+from payslip_generation_system.models import Adjustment, BatchAssignment, BatchStatus, ReturnedAdjustment, ReturnRemark
+from payslip_generation_system.pay_period import pay_period_key
+from payslip_generation_system.services import payroll_bench, workflow, batch_status
+
+class WorkflowTest(TestCase):
+    """
+    Set-based batch status changes: period-scoped, chunked crediting of an office and the
+    submit / approve / release / reject transitions of batch units
+    """
+
+    def setUp(self):
+        self.dataset = seed_payroll_dataset(offices=2, batches=2, employees=12, adjustments=2, periods=5)
+        self.batch = next(batch for batch in self.dataset['batches'] if batch['status'] == 'Approved')
+        self.office = self.batch['assigned_office']
+        self.pay_period = pay_period_key(self.batch['cutoff_year'], self.batch['cutoff_month'], self.batch['cutoff'])
+        self.client = payroll_bench.login_client('accounting')
+
+    def reopen_history(self):
+        """
+        Credited periods of the office back to Approved (history the release must leave alone)
+        """
+        Adjustment.objects.filter(assigned_office=self.office, status='Credited').update(status='Approved')
+        batch_status.refresh_adjustments(Adjustment.objects.filter(assigned_office=self.office))
+        return Adjustment.objects.filter(assigned_office=self.office, status='Approved').exclude(pay_period=self.pay_period).count()
+
+    def test_period_scope_and_batch_counts(self):
+        history = self.reopen_history()
+        self.assertGreater(history, 0)
+        expected = Adjustment.objects.filter(assigned_office=self.office, pay_period=self.pay_period, status='Approved').count()
+
+        response = self.client.post(reverse('payroll_approve_office_to_credited'), {
+            'assigned_office': self.office,
+            'cutoff': self.batch['cutoff'],
+            'cutoff_month': self.batch['cutoff_month'],
+            'cutoff_year': self.batch['cutoff_year'],
+        })
+        self.assertEqual(response.status_code, 200)
+        batches = response.json()['batches']
+        self.assertEqual(sum(batch['count'] for batch in batches), expected)
+        self.assertEqual({batch['cutoff_month'] for batch in batches}, {self.batch['cutoff_month']})
+
+        # Other periods untouched; counters of the credited batches follow
+        self.assertEqual(Adjustment.objects.filter(assigned_office=self.office, status='Approved').count(), history)
+        for batch in batches:
+            row = BatchStatus.objects.get(assigned_office=self.office, pay_period=self.pay_period, batch_number=batch['batch_number'])
+            self.assertEqual((row.approved, row.credited), (0, batch['count']))
+
+    def test_chunks_and_history_independent_queries(self):
+        expected = Adjustment.objects.filter(assigned_office=self.office, pay_period=self.pay_period, status='Approved').count()
+        self.reopen_history()
+
+        with CaptureQueriesContext(connection) as queries:
+            counts = workflow.credit_office(self.office, self.pay_period, chunk_size=expected)
+        self.assertEqual(sum(counts.values()), expected)
+        # Count, one chunk (select, update, counters) and the empty last select: nothing per past batch
+        self.assertEqual(len([query for query in queries.captured_queries if 'UPDATE "payslip_generation_system_adjustment"' in query['sql']]), 1)
+        statements = [query for query in queries.captured_queries if 'SAVEPOINT' not in query['sql']]
+        self.assertLessEqual(len(statements), 10)
+
+        # Every period, in chunks of 3
+        counts = workflow.credit_office(self.office, chunk_size=3)
+        self.assertGreater(sum(counts.values()), 0)
+        self.assertFalse(Adjustment.objects.filter(assigned_office=self.office, status='Approved').exists())
+
+    def test_invalid_period(self):
+        response = self.client.post(reverse('payroll_approve_office_to_credited'), {
+            'assigned_office': self.office, 'cutoff': '3rd', 'cutoff_month': 'May', 'cutoff_year': '2025',
+        })
+        self.assertEqual(response.status_code, 400)
+
+    def unit(self, status):
+        batch = next(batch for batch in self.dataset['batches'] if batch['status'] == status)
+        pay_period = pay_period_key(batch['cutoff_year'], batch['cutoff_month'], batch['cutoff'])
+        return batch, (batch['assigned_office'], pay_period, batch['batch_number'])
+
+    def test_transitions_are_guarded(self):
+        _, waiting = self.unit('Waiting')
+        count = Adjustment.objects.filter(assigned_office=waiting[0], pay_period=waiting[1], batch_number=waiting[2]).count()
+
+        # Waiting batches are submitted before they are approved or released
+        self.assertEqual(workflow.transition([waiting], 'approve'), {})
+        self.assertEqual(workflow.transition([waiting], 'release'), {})
+        self.assertEqual(workflow.transition([waiting], 'submit'), {waiting: count})
+        self.assertEqual(workflow.transition([waiting], 'submit'), {})
+        self.assertEqual(workflow.transition([waiting], 'approve'), {waiting: count})
+
+        row = BatchStatus.objects.get(assigned_office=waiting[0], pay_period=waiting[1], batch_number=waiting[2])
+        self.assertEqual((row.waiting, row.pending, row.approved), (0, 0, count))
+
+    def test_submit_and_approve_views(self):
+        batch, waiting = self.unit('Waiting')
+        period = {key: batch[key] for key in ['cutoff', 'cutoff_month', 'cutoff_year']}
+        preparator = payroll_bench.login_client('admin')
+
+        response = preparator.post(reverse('payroll_submit'), {**period, 'batch_number': batch['batch_number']})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['batches'][0]['batch_number'], batch['batch_number'])
+        self.assertFalse(Adjustment.objects.filter(pay_period=waiting[1], batch_number=waiting[2], assigned_office=waiting[0], status='Waiting').exists())
+
+        response = preparator.post(reverse('payroll_approve'), {**period, 'batch_number': batch['batch_number'], 'assigned_office': batch['assigned_office']})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(Adjustment.objects.filter(pay_period=waiting[1], batch_number=waiting[2], assigned_office=waiting[0], status='Approved').exists())
+
+    def test_adjustment_without_batch_moves_with_its_batch(self):
+        batch, waiting = self.unit('Waiting')
+        period = {key: batch[key] for key in ['cutoff', 'cutoff_month', 'cutoff_year']}
+        employee_id = BatchAssignment.objects.filter(
+            assigned_office=waiting[0], pay_period=waiting[1], batch_number=waiting[2]
+        ).values_list('employee_id', flat=True).first()
+
+        # As payslip.adjustment_add: no batch number on the adjustment
+        adjustment = Adjustment.objects.create(
+            employee_id=employee_id, name='Refund', type='Income', amount=100, details='',
+            month=batch['cutoff_month'], cutoff=batch['cutoff'], cutoff_year=batch['cutoff_year'],
+            status='Waiting', assigned_office=waiting[0],
+        )
+        self.assertIsNone(adjustment.batch_number)
+
+        preparator = payroll_bench.login_client('admin')
+        response = preparator.post(reverse('payroll_submit'), {**period, 'batch_number': batch['batch_number']})
+        self.assertEqual(response.status_code, 200)
+        adjustment.refresh_from_db()
+        self.assertEqual(adjustment.status, 'Pending')
+
+        response = preparator.post(reverse('payroll_approve'), {**period, 'batch_number': batch['batch_number'], 'assigned_office': batch['assigned_office']})
+        self.assertEqual(response.status_code, 200)
+        adjustment.refresh_from_db()
+        self.assertEqual(adjustment.status, 'Approved')
+
+    def test_release_multiple_batch(self):
+        approved = [batch for batch in self.dataset['batches'] if batch['status'] == 'Approved']
+        expected = Adjustment.objects.filter(status='Approved').count()
+
+        response = self.client.post(reverse('payroll_release_multiple_batch'), json.dumps({'batches': [
+            {'batch_number': batch['batch_number'], 'month': batch['cutoff_month'], 'cutoff': batch['cutoff'], 'cutoff_year': batch['cutoff_year']}
+            for batch in approved
+        ]}), content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['updated'], expected)
+        self.assertEqual(sum(batch['count'] for batch in response.json()['batches']), expected)
+        self.assertFalse(Adjustment.objects.filter(status='Approved').exists())
+
+    def test_reject_copies_in_one_statement(self):
+        batch, pending = self.unit('Pending')
+        period = {key: batch[key] for key in ['cutoff', 'cutoff_month', 'cutoff_year']}
+        adjustments = Adjustment.objects.filter(assigned_office=pending[0], pay_period=pending[1], batch_number=pending[2])
+        expected = adjustments.filter(status='Pending').count()
+        copies = ReturnedAdjustment.objects.count()
+        data = {**period, 'batch_number': batch['batch_number'], 'assigned_office': batch['assigned_office'], 'remarks': 'Wrong amounts'}
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse('payroll_reject'), data)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['batches'][0]['count'], expected)
+        inserts = [query for query in queries.captured_queries if query['sql'].startswith('INSERT INTO "payslip_generation_system_returnedadjustment"')]
+        self.assertEqual(len(inserts), 1)
+
+        self.assertEqual(ReturnedAdjustment.objects.count(), copies + expected)
+        self.assertFalse(adjustments.exclude(status='Returned').exists())
+        copy = ReturnedAdjustment.objects.order_by('-id').first()
+        self.assertEqual((copy.status, copy.assigned_office, copy.batch_number), ('Returned', pending[0], pending[2]))
+
+        # Rejecting again updates the remark; nothing left to copy
+        response = self.client.post(reverse('payroll_reject'), {**data, 'remarks': 'Still wrong'})
+        self.assertEqual(response.json()['batches'], [])
+        self.assertEqual(ReturnedAdjustment.objects.count(), copies + expected)
+        remark = ReturnRemark.objects.get(assigned_office=pending[0], pay_period=pending[1], batch_number=pending[2])
+        self.assertEqual(remark.remark, 'Still wrong')
@@ -65,6 +65,7 @@ urlpatterns = [
     path('payslip/', views.payslip.index, name='payslip'),
     path('payslip/create', views.payslip.create, name='payslip_create'),
     path('payslip/generate', views.payslip.generate, name='payslip_generate'),
+    path('payslip/bulk', views.payslip.bulk, name='payslip_bulk'),
     path('payslip/employee-data', views.payslip.employee_data, name='payslip_employee_data'),
     path('payslip/adjustment/<int:emp_id>/', views.payslip.adjustment, name='payslip_adjustment'),
     path('payslip/adjustment/add/<int:emp_id>/', views.payslip.adjustment_add, name='adjustment_add'),
@@ -78,7 +79,12 @@ urlpatterns = [
 
     # Single Function Paths
     path('payroll/release-multiple', views.payroll.release_multiple_batch, name='payroll_release_multiple_batch'),
-    path('payroll/excel', views.excel.data, name='payroll_excel_data'),
+    path('payroll/excel/export', views.excel.export, name='payroll_excel_export'),
+    path('payroll/disbursement', views.excel.disbursement_file, name='payroll_disbursement'),
+    # Background jobs
+    path('jobs/<int:job_id>', views.job.status, name='job_status'),
+    path('jobs/<int:job_id>/result', views.job.result, name='job_result'),
+    path('jobs/<int:job_id>/file', views.job.file, name='job_file'),
 ]
 
 if settings.DEBUG:
@@ -7,4 +7,5 @@ from .employee import index
 from .payslip import index
 from .payroll import index
 from .batch import index
-from .excel import data
\ No newline at end of file
+from .excel import export
+from .job import status
\ No newline at end of file
@@ -6,6 +6,7 @@ from payslip_generation_system.models import UserRole
 
 from django.contrib.auth.decorators import login_required
 from payslip_generation_system.decorators import restrict_roles
+from payslip_generation_system.services import identity
 from django.contrib.auth.models import User
 # Auth
 def login(request):
@@ -43,11 +44,8 @@ def login(request):
         if user is not None:
             auth_login(request, user)
             
-            try:
-                role_obj = UserRole.objects.get(user=user)
-                request.session['role'] = role_obj.role
-            except UserRole.DoesNotExist:
-                request.session['role'] = None
+            # Display name, role and office resolved once and cached for the session's requests
+            request.session['role'] = identity.remember(user)['role']
 
             return JsonResponse({
                 'success': True, 
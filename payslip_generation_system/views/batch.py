@@ -5,6 +5,7 @@ from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 import json
 from ..models.batch import Batch
+from ..services import batch_allocator
 
 def get_user_assigned_office(user_role):
     """
@@ -65,16 +66,8 @@ def create(request):
                     'error': f'A batch with the name "{batch_name}" already exists in your office ({assigned_office}). Please choose a different name.'
                 })
             
-            # Get the next available batch number (globally unique across all offices)
-            last_batch = Batch.objects.order_by('-batch_number').first()
-            next_batch_number = 1 if not last_batch else last_batch.batch_number + 1
-            
-            # Create the new batch
-            new_batch = Batch.objects.create(
-                batch_number=next_batch_number,
-                batch_name=batch_name,
-                batch_assigned_office=assigned_office
-            )
+            # Create the new batch with the next available batch number (globally unique across all offices)
+            new_batch = batch_allocator.create_batch(batch_name, assigned_office)
             
             return JsonResponse({
                 'success': True,
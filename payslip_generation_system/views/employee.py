@@ -8,6 +8,7 @@ from django.core.paginator import Paginator
 from django.db.models import Q, Sum
 from payslip_generation_system.models import Employee, EmployeeAttachment, UserRole
 from payslip_generation_system.decorators import restrict_roles
+from payslip_generation_system.services import batch_status, employee_directory
 from django.contrib.auth.models import User
 from payslip_generation_system.models.batch import Batch
 from django.contrib.auth.decorators import login_required
@@ -230,8 +231,14 @@ def destroy(request, emp_id):
             except User.DoesNotExist:
                 pass
 
-        # Now delete the employee
-        employee.delete()
+        # Now delete the employee (adjustments and assignments cascade), and refresh the counters
+        # of the batches it was in. The employee row is locked first, so no adjustment form save
+        # adds a row between reading the keys and the delete.
+        with transaction.atomic():
+            list(Employee.objects.select_for_update().filter(id=employee.id).values_list('id', flat=True))
+            status_keys = batch_status.employee_keys(employee.id)
+            employee.delete()
+            batch_status.refresh(status_keys)
         return JsonResponse({"success": True, "message": "Employee deleted successfully!"})
 
     return JsonResponse({"success": False, "message": "Invalid request method!"})
@@ -248,101 +255,31 @@ def attachment_delete(request, attachment_id):
 @login_required
 @restrict_roles(disallowed_roles=['employee', 'accounting'])
 def data(request):
-    user_role = request.session.get('role')
-
-    # DataTable parameters
-    draw = int(request.GET.get('draw', 1))
-    start = int(request.GET.get('start', 0))
-    length = int(request.GET.get('length', 10))
-    search_value = request.GET.get('search[value]', '')
-    order_col_index = int(request.GET.get('order[0][column]', 0))
-    order_dir = request.GET.get('order[0][dir]', 'asc')
+    role = request.session.get('role')
 
     # Fields to retrieve
     fields = ['id', 'employee_number', 'fullname', 'position', 'fund_source', 'salary', 'tax_declaration', 'has_philhealth', 'eligibility', 'section', 'division', 'assigned_office', 'batch_number']
 
-    # Roles
-    role = request.session.get('role')
-
-    # Offices
-    denrncrnec = 'denr_ncr_nec'
-    denrncrprcmo = 'denr_ncr_prcmo'
-    meos = 'meo_s'
-    meoe = 'meo_e'
-    meow = 'meo_w'
-    meon = 'meo_n'
-    
-    # Data
-    match role:
-        case "admin":
-            queryset = Employee.objects.values(*fields)
-        case "checker":
-            queryset = Employee.objects.values(*fields)
-        case "accounting":
-            queryset = Employee.objects.values(*fields)
-        case "preparator_denr_nec":
-            queryset = Employee.objects.filter(assigned_office=denrncrnec).values(*fields)
-        case "preparator_denr_prcmo":
-            queryset = Employee.objects.filter(assigned_office=denrncrprcmo).values(*fields)
-        case "preparator_meo_s":
-            queryset = Employee.objects.filter(assigned_office=meos).values(*fields)
-        case "preparator_meo_e":
-            queryset = Employee.objects.filter(assigned_office=meoe).values(*fields)
-        case "preparator_meo_w":
-            queryset = Employee.objects.filter(assigned_office=meow).values(*fields)
-        case "preparator_meo_n":
-            queryset = Employee.objects.filter(assigned_office=meon).values(*fields)
-        case _:
-            return JsonResponse({
-                'draw': draw,
-                'recordsTotal': 0,
-                'recordsFiltered': 0,
-                'data': []
-            })
-
-    SEARCH_OFFICE_NAME_MAP = {
-        'DENR NCR NEC': 'denr_ncr_nec',
-        'DENR NCR PRCMO': 'denr_ncr_prcmo',
-        'MEO East': 'meo_e',
-        'MEO South': 'meo_s',
-        'MEO West': 'meo_w',
-        'MEO North': 'meo_n',
-    }
+    # Table columns, in display order (sorting)
+    columns = ['employee_number', 'fullname', 'position', 'fund_source', 'salary', 'assigned_office', 'tax_declaration', 'has_philhealth', 'eligibility', 'batch_number']
 
-    # Search filter
-    if search_value:
-        search_value = search_value.strip()
-
-        # Check if the search value matches a formatted office name
-        mapped_office = SEARCH_OFFICE_NAME_MAP.get(search_value)
-
-        queryset = queryset.filter(
-            Q(employee_number__icontains=search_value) |
-            Q(fullname__icontains=search_value) |
-            Q(position__icontains=search_value) |
-            Q(fund_source__icontains=search_value) |
-            Q(tax_declaration__icontains=search_value) |
-            Q(eligibility__icontains=search_value) |
-            (
-                Q(assigned_office__iexact=mapped_office)
-                if mapped_office
-                else Q(assigned_office__icontains=search_value.lower())
-            )
-        )
+    # DataTable parameters
+    params = employee_directory.datatable_params(request.GET, columns)
 
-    total_records = queryset.count()
+    # Data
+    queryset = employee_directory.scoped_employees(role)
+    if queryset is None:
+        return JsonResponse({
+            'draw': params['draw'],
+            'recordsTotal': 0,
+            'recordsFiltered': 0,
+            'data': []
+        })
 
-    # Ordering logic
-    order_columns = fields
-    order_column = order_columns[order_col_index] if order_col_index < len(order_columns) else 'date_hired'
-    if order_dir == 'desc':
-        order_column = f'-{order_column}'
-    queryset = queryset.order_by(order_column)
+    page = employee_directory.datatable_page(queryset, fields, params, scope=role)
 
-    # Pagination
-    paginator = Paginator(queryset, length)
-    page_number = (start // length) + 1
-    page = paginator.get_page(page_number)
+    # Batch names of the page, in one query
+    batch_names = employee_directory.batch_names(emp['batch_number'] for emp in page['rows'])
 
     OFFICE_NAME_MAP = {
         'denr_ncr_nec': 'DENR NCR NEC',
@@ -354,19 +291,13 @@ def data(request):
     }
 
     data = []
-    for emp in page:
+    for emp in page['rows']:
         salary = f"₱{emp['salary']:,.2f}" if emp.get('salary') else ""
         
         # Get batch name if batch_number exists
         batch_display = 'Not Assigned'
-        if emp.get('batch_number'):
-            try:
-                from payslip_generation_system.models.batch import Batch
-                batch = Batch.objects.filter(batch_number=emp['batch_number']).first()
-                if batch:
-                    batch_display = f"{batch.batch_name} (#{batch.batch_number})"
-            except:
-                batch_display = f"Batch #{emp['batch_number']}"
+        if emp.get('batch_number') in batch_names:
+            batch_display = f"{batch_names[emp['batch_number']]} (#{emp['batch_number']})"
 
         data.append([
             emp.get('employee_number', ''),
@@ -396,9 +327,10 @@ def data(request):
         ])
 
     return JsonResponse({
-        'draw': draw,
-        'recordsTotal': total_records,
-        'recordsFiltered': total_records,
+        'draw': params['draw'],
+        'recordsTotal': page['records_total'],
+        'recordsFiltered': page['records_filtered'],
+        'next_cursor': page['next_cursor'],
         'data': data
     })
 
@@ -1,215 +1,105 @@
-from django.shortcuts import render, redirect
-from django.contrib.auth import authenticate, login as auth_login, logout as auth_logout
-from django.db import connection
-from django.http import JsonResponse
-from django.db.models import Q, Sum
-from datetime import datetime
-from payslip_generation_system.models import BatchAssignment, Adjustment  
-from decimal import Decimal, ROUND_HALF_UP
-from datetime import datetime
-import calendar
+from django.http import JsonResponse, StreamingHttpResponse
+from django.urls import reverse
+from payslip_generation_system.services import payroll_export, xlsx_stream, identity, employee_directory, disbursement, jobs
+from payslip_generation_system.pay_period import pay_period_key
+from payslip_generation_system.decorators import restrict_roles, enqueueable
 
 from django.contrib.auth.decorators import login_required
 
 @login_required
-def data(request):
-    if request.method == 'POST':
-        cutoff = request.POST.get('cutoff')
-        cutoff_month = request.POST.get('cutoff_month')
-        cutoff_year = request.POST.get('cutoff_year')
-        assigned_office = request.POST.get('assigned_office')
-        batch_number = request.POST.get('batch_number')
-        philhealth_current = Decimal('0.00')
-        tax_amount = Decimal('0.00')
-
-        # Excel File Date
-        number_cutoff_month = datetime.strptime(cutoff_month, "%B").month
-        number_cutoff_year = int(cutoff_year)
-        last_day = calendar.monthrange(number_cutoff_year, number_cutoff_month)[1]
-
-        # ranges
-        excel_cutoff_ranges = {
-            "first": f"{cutoff_month}-1-15,{cutoff_year}",
-            "second": f"{cutoff_month}-16-{last_day},{cutoff_year}"
-        }
-
-        if cutoff == '1st':
-            excel_cutoff_range = excel_cutoff_ranges['first']
-        elif cutoff == '2nd':
-            excel_cutoff_range = excel_cutoff_ranges["second"]
-        else:
-            excel_cutoff_range = 'Cutoff Range'
-
-        # Find the Employees on the Current Payroll
-        batch_assignments = BatchAssignment.objects.filter(
-            cutoff=cutoff,
-            cutoff_month=cutoff_month,
-            cutoff_year=cutoff_year,
-            assigned_office=assigned_office,
-            batch_number=batch_number
-        ).select_related("employee").order_by("employee__fullname")
-        
-        # Fetch Employee Info
-        employees_data = []
-        for assignment in batch_assignments:
-            emp = assignment.employee
-            basic_salary = emp.salary
-            basic_salary_cutoff = basic_salary / 2
-
-            # Reset per-employee computed values
-            tax_amount = Decimal('0.00')
-            philhealth_current = Decimal('0.00')
-
-            # Fetch Employee Adjustment
-            adjustments = Adjustment.objects.filter(
-                employee=emp,
-                cutoff=cutoff,
-                month=cutoff_month,
-                cutoff_year=cutoff_year,
-                assigned_office=assigned_office,
-                batch_number=batch_number,
-            )
-
-            adjustments_data = [
-                {
-                    'name': adj.name,
-                    'type': adj.type,
-                    'amount': float(adj.amount),
-                    'details': adj.details,
-                }
-                for adj in adjustments
-            ]
-
-            # Adjustment Deductions 
-            adjustment_deductions = Adjustment.objects.filter(
-                employee=assignment.employee,
-                type="Deduction",
-                month=cutoff_month,
-                cutoff=cutoff,
-                cutoff_year=cutoff_year,
-            ).exclude(
-                Q(name__in=["Late", "Absent", "TAX", "SSS"]) | Q(name__icontains="Philhealth") | Q(name__icontains="Expanded Withholding Tax")
-            )
-
-            adjustment_income = Adjustment.objects.filter(
-                employee=assignment.employee,
-                type="Income",
-                month=cutoff_month,
-                cutoff=cutoff,
-                cutoff_year=cutoff_year,
-            )
-
-            # Late Adjustments
-            late_adjustments = Adjustment.objects.filter(
-                employee=assignment.employee,
-                name="Late",
-                month=cutoff_month,
-                cutoff=cutoff,
-                cutoff_year=cutoff_year
-            )
-
-            # Absent Adjustments
-            absent_adjustments = Adjustment.objects.filter(
-                employee=assignment.employee,
-                name="Absent",
-                month=cutoff_month,
-                cutoff=cutoff,
-                cutoff_year=cutoff_year
-            )
-
-            total_adjustment_deduction = (
-                adjustment_deductions.aggregate(total=Sum("amount"))["total"] or Decimal("0.00")
-            )
-            total_adjustment_income = (
-                adjustment_income.aggregate(total=Sum("amount"))["total"] or Decimal("0.00")
-            )
-            total_adjustment_late = (
-                late_adjustments.aggregate(total=Sum("amount"))["total"] or Decimal("0.00")
-            )
-            total_adjustment_absent = (
-                absent_adjustments.aggregate(total=Sum("amount"))["total"] or Decimal("0.00")
-            )
-
-
-            # Clean the Late/Absent minutes/days then sum it
-            lateAdjMinutes = late_adjustments.values_list("details", flat=True)
-            absentAdjDays = absent_adjustments.values_list("details", flat=True)
-
-            # late minutes
-            total_adjustment_late_minutes = 0
-            for a in lateAdjMinutes:
-                try:
-                    total_adjustment_late_minutes += int(float(a))
-                except (TypeError, ValueError):
-                    continue
-                
-            # Absent days
-            total_adjustment_absent_days = 0
-            for a in absentAdjDays:
-                try:
-                    total_adjustment_absent_days += int(float(a))
-                except (TypeError, ValueError):
-                    continue
-
-            total_gross_amount = abs(basic_salary_cutoff - total_adjustment_late - total_adjustment_absent - total_adjustment_deduction + total_adjustment_income)
-
-            # Tax
-            if emp.tax_declaration == "no":
-                tax_amount = (total_gross_amount * Decimal("0.03")).quantize(
-                    Decimal("0.01"), rounding=ROUND_HALF_UP
-                )
-
-            # Philhealth Current
-            if emp.has_philhealth == "yes":
-                philhealth_current = (total_gross_amount * Decimal("0.05")).quantize(
-                    Decimal("0.01"), rounding=ROUND_HALF_UP
-                )
-
-            # Philhealth Previous
-            philhealth_previous = sum(
-                (adj.amount for adj in adjustments if "philhealth" in (adj.name or "").lower()),
-                Decimal('0.00')
-            ).quantize(Decimal('0.01'))
-
-            # Expanded Withholding Tax
-            ewt = sum(
-                (adj.amount for adj in adjustments if "expanded withholding tax" in (adj.name or "").lower()),
-                Decimal('0.00')
-            ).quantize(Decimal('0.01'))
-
-            employees_data.append({
-                'employee_id': emp.id,
-                'fullname': emp.fullname,
-                'position': getattr(emp, 'position', ''),
-                'salary': float(getattr(emp, 'salary', 0)),
-                'tax_declaration': getattr(emp, 'tax_declaration', ''),
-                'absent': float(total_adjustment_absent or 0),
-                'late': float(total_adjustment_late or 0),
-                'adjustment_deductions': total_adjustment_deduction,
-                'adjustment_income': total_adjustment_income,
-                'total_gross': float(total_gross_amount or 0),
-                'has_philhealth': getattr(emp, 'has_philhealth', ''),
-                'late_minutes': total_adjustment_late_minutes,
-                'absent_days': total_adjustment_absent_days,
-                'tax_amount': float(tax_amount.quantize(Decimal('0.01'))),
-                'philhealth_current': float(philhealth_current.quantize(Decimal('0.01'))),
-                'philhealth_previous': float(philhealth_previous.quantize(Decimal('0.01'))),
-                'ewt': float(ewt.quantize(Decimal('0.01'))),
-                'adjustments': adjustments_data
-            })
-
-            # System Date of Generation
-            systemNow = datetime.now()
-
-            try:
-                formatted = systemNow.strftime("%-m-%-d-%Y %I:%M %p")  # Linux/Unix
-            except ValueError:
-                formatted = systemNow.strftime("%#m-%#d-%Y %I:%M %p")  # Windows
-
+@restrict_roles(disallowed_roles=['employee'])
+@enqueueable
+def export(request):
+    """
+    Payroll .xlsx of one batch (batch_number), every batch of an office (assigned_office)
+    or every office of the period, one sheet per batch. The workbook is assembled before the
+    download starts; with enqueue=1 a worker builds it and job_file serves it.
+    """
+    cutoff = request.GET.get('cutoff')
+    cutoff_month = request.GET.get('cutoff_month')
+    cutoff_year = request.GET.get('cutoff_year')
+    assigned_office = request.GET.get('assigned_office') or None
+
+    if pay_period_key(cutoff_year, cutoff_month, cutoff) is None:
+        return JsonResponse({'error': 'Invalid payroll period'}, status=400)
+
+    batch_number = None
+    if request.GET.get('batch_number'):
+        try:
+            batch_number = int(request.GET.get('batch_number'))
+        except (TypeError, ValueError):
+            return JsonResponse({'error': 'Invalid batch number'}, status=400)
+
+    # Preparators only export their own office
+    role = identity.request_role(request)
+    role_office = identity.ROLE_OFFICES.get(role)
+    if role_office:
+        if assigned_office and assigned_office != role_office:
+            return JsonResponse({'error': 'Forbidden'}, status=403)
+        assigned_office = role_office
+    elif role not in employee_directory.ALL_OFFICE_ROLES:
+        return JsonResponse({'error': 'Forbidden'}, status=403)
+
+    batches = payroll_export.export_batches(cutoff, cutoff_month, cutoff_year, assigned_office, batch_number)
+    if not batches:
+        return JsonResponse({'error': 'No employees on this payroll'}, status=404)
+
+    batch_name = None
+    if batch_number is not None:
+        batch_name = employee_directory.batch_names([batch_number]).get(batch_number)
+        assigned_office = assigned_office or batches[0][0]
+
+    chunks = payroll_export.stream_workbook(batches, cutoff, cutoff_month, cutoff_year)
+    file_name = payroll_export.file_name(cutoff, cutoff_month, cutoff_year, assigned_office, batch_name)
+
+    job = getattr(request, '_job', None)
+    if job is not None:
+        # Run by a worker: the workbook is kept with the job until downloaded
         return JsonResponse({
-            'excel_cutoff_range': excel_cutoff_range, 
-            'employees': employees_data,
-            'systemNow' : formatted,
+            'file': jobs.save_file(job, file_name, chunks),
+            'file_name': file_name,
+            'file_url': reverse('job_file', args=[job.id]),
         })
 
-    return JsonResponse({'error': 'Invalid request method'}, status=400)
\ No newline at end of file
+    response = StreamingHttpResponse(chunks, content_type=xlsx_stream.CONTENT_TYPE)
+    response['Content-Disposition'] = f'attachment; filename="{file_name}"'
+    return response
+
+@login_required
+@restrict_roles(disallowed_roles=['employee'])
+def disbursement_file(request):
+    """
+    Net pay per employee of the credited batches of a period (optionally one office or some
+    batch_number), as CSV or fixed-width records (format), streamed with a trailer record
+    """
+    cutoff = request.GET.get('cutoff')
+    cutoff_month = request.GET.get('cutoff_month')
+    cutoff_year = request.GET.get('cutoff_year')
+    assigned_office = request.GET.get('assigned_office') or None
+    file_format = request.GET.get('format') or 'csv'
+
+    if pay_period_key(cutoff_year, cutoff_month, cutoff) is None:
+        return JsonResponse({'error': 'Invalid payroll period'}, status=400)
+
+    if file_format not in disbursement.FORMATS:
+        return JsonResponse({'error': 'Invalid format'}, status=400)
+
+    try:
+        batch_numbers = [int(batch_number) for batch_number in request.GET.getlist('batch_number') if batch_number]
+    except ValueError:
+        return JsonResponse({'error': 'Invalid batch number'}, status=400)
+
+    if identity.request_role(request) not in disbursement.DISBURSEMENT_ROLES:
+        return JsonResponse({'error': 'Forbidden'}, status=403)
+
+    runs = disbursement.credited_runs(cutoff, cutoff_month, cutoff_year, assigned_office, batch_numbers)
+    if not runs.exists():
+        return JsonResponse({'error': 'No credited batches on this payroll'}, status=404)
+
+    response = StreamingHttpResponse(
+        disbursement.stream(runs, file_format, cutoff, cutoff_month, cutoff_year),
+        content_type=disbursement.CONTENT_TYPES[file_format],
+    )
+    file_name = disbursement.file_name(file_format, cutoff, cutoff_month, cutoff_year, assigned_office)
+    response['Content-Disposition'] = f'attachment; filename="{file_name}"'
+    return response
@@ -0,0 +1,62 @@
+from django.shortcuts import get_object_or_404
+from django.core.files.storage import default_storage
+from django.http import FileResponse, JsonResponse
+from payslip_generation_system.models import Job
+from payslip_generation_system.decorators import restrict_roles
+from payslip_generation_system.services import jobs, identity
+
+from django.contrib.auth.decorators import login_required
+
+def can_view(request, job):
+    # The user who queued the job, or an admin
+    return job.created_by_id == request.user.id or identity.request_role(request) == 'admin'
+
+@login_required
+@restrict_roles(disallowed_roles=['employee'])
+def status(request, job_id):
+    """
+    Status and progress of a background job (polled by the UI)
+    """
+    job = get_object_or_404(Job, id=job_id)
+    if not can_view(request, job):
+        return JsonResponse({'error': 'Forbidden'}, status=403)
+
+    return JsonResponse(jobs.job_values(job))
+
+@login_required
+@restrict_roles(disallowed_roles=['employee'])
+def result(request, job_id):
+    """
+    Result of a finished job; for enqueued views {status, body} of the view's response
+    """
+    job = get_object_or_404(Job, id=job_id)
+    if not can_view(request, job):
+        return JsonResponse({'error': 'Forbidden'}, status=403)
+
+    if job.status not in ['succeeded', 'failed']:
+        return JsonResponse({'error': 'Job not finished', 'status': job.status}, status=409)
+
+    return JsonResponse({
+        'status': job.status,
+        'result': job.result,
+        'error': jobs.job_values(job)['error'],
+    })
+
+@login_required
+@restrict_roles(disallowed_roles=['employee'])
+def file(request, job_id):
+    """
+    Download of the file written by a succeeded job (e.g. an enqueued payroll export)
+    """
+    job = get_object_or_404(Job, id=job_id)
+    if not can_view(request, job):
+        return JsonResponse({'error': 'Forbidden'}, status=403)
+
+    if job.status != 'succeeded':
+        return JsonResponse({'error': 'Job not finished', 'status': job.status}, status=409)
+
+    body = (job.result or {}).get('body') or {}
+    if not body.get('file') or not default_storage.exists(body['file']):
+        return JsonResponse({'error': 'No file for this job'}, status=404)
+
+    return FileResponse(default_storage.open(body['file'], 'rb'), as_attachment=True, filename=body.get('file_name'))
@@ -10,8 +10,10 @@ from django.core.paginator import Paginator
 from django.db.models import Q, Count, F, Sum, Case, When, Value, IntegerField, Exists, OuterRef
 from decimal import Decimal, ROUND_HALF_UP
 from datetime import datetime
-from payslip_generation_system.models import Employee, BatchAssignment, Adjustment, ReturnedAdjustment, ReturnRemark, Batch
-from payslip_generation_system.decorators import restrict_roles
+from payslip_generation_system.models import Employee, BatchAssignment, Adjustment, ReturnRemark, Batch
+from payslip_generation_system.decorators import restrict_roles, enqueueable
+from payslip_generation_system.services import payroll_engine, payroll_snapshot, batch_creation, batch_queue, batch_status, workflow, adjustment_form, batch_allocator
+from payslip_generation_system.pay_period import period_filter, pay_period_key, pay_period_parts
 from django.forms.models import model_to_dict
 
 from django.contrib.auth.decorators import login_required
@@ -30,19 +32,31 @@ def get_user_assigned_office(user_role):
     }
     return role_to_office.get(user_role)
 
+# Formatted office names by office code
+OFFICE_NAMES = {
+    'denr_ncr_nec': 'DENR NCR NEC',
+    'denr_ncr_prcmo': 'DENR NCR PRCMO',
+    'meo_s': 'MEO South',
+    'meo_e': 'MEO East',
+    'meo_w': 'MEO West',
+    'meo_n': 'MEO North',
+}
+
+# Rows per page of the batch queues
+PENDING_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+def safe_int(value, default=0):
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        return default
+
 def get_formatted_office_name(office_code):
     """
     Helper function to get formatted office name from office code
     """
-    office_name_map = {
-        'denr_ncr_nec': 'DENR NCR NEC',
-        'denr_ncr_prcmo': 'DENR NCR PRCMO',
-        'meo_s': 'MEO South',
-        'meo_e': 'MEO East',
-        'meo_w': 'MEO West',
-        'meo_n': 'MEO North',
-    }
-    return office_name_map.get(office_code, office_code)
+    return OFFICE_NAMES.get(office_code, office_code)
 
 def get_payroll_title(office_code):
     """
@@ -110,52 +124,40 @@ def submit(request):
         # Get assigned office for the current user
         assigned_office = get_user_assigned_office(user_role)
         
+        pay_period = pay_period_key(cutoff_year, cutoff_month, cutoff)
+        if pay_period is None:
+            return JsonResponse({'error': 'Invalid payroll period'}, status=400)
+
         # Filter batch assignments based on user role
-        batch_assignments = BatchAssignment.objects.filter(
-            batch_number=batch_number,
-            cutoff=cutoff,
-            cutoff_month=cutoff_month,
-            cutoff_year=cutoff_year
-        )
+        batch_assignments = BatchAssignment.objects.filter(batch_number=batch_number, pay_period=pay_period)
         
         if assigned_office and user_role != 'admin' and user_role != 'checker':
             # For office-specific preparators, filter by their assigned office
             batch_assignments = batch_assignments.filter(assigned_office=assigned_office)
-        
-        # Employees on the current payroll
-        employee_ids = list(batch_assignments.values_list('employee_id', flat=True))
 
         # Get the assigned_office for this batch
-        batch_assigned_office = None
-        if batch_assignments.exists():
-            batch_assigned_office = batch_assignments.first().assigned_office
+        batch_assigned_office = batch_assignments.values_list('assigned_office', flat=True).first()
 
-        # Employees who have submitted adjustments (filter by assigned_office)
-        adjustment_filter = {
-            'employee_id__in': employee_ids,
-            'cutoff': cutoff,
-            'month': cutoff_month,
-            'cutoff_year': cutoff_year
-        }
+        # Employees on the current payroll who have not submitted adjustments (filter by assigned_office)
+        adjustments = Adjustment.objects.filter(employee_id=OuterRef('employee_id'), pay_period=pay_period)
         if batch_assigned_office:
-            adjustment_filter['assigned_office'] = batch_assigned_office
+            adjustments = adjustments.filter(assigned_office=batch_assigned_office)
 
-        adjusted_ids = list(Adjustment.objects.filter(**adjustment_filter).values_list('employee_id', flat=True).distinct())
+        missing_employees = list(Employee.objects.filter(
+            id__in=batch_assignments.exclude(Exists(adjustments)).values('employee_id')
+        ).values('id', 'fullname'))
 
-        # Find employees without adjustments
-        missing_ids = list(set(employee_ids) - set(adjusted_ids))
-
-        if missing_ids:
-            # Optionally get full names
-            missing_employees = Employee.objects.filter(id__in=missing_ids).values('id', 'fullname')
+        if missing_employees:
             return JsonResponse({
                 'status': 'incomplete',
-                'message': f'{len(missing_ids)} employee(s) have not submitted adjustments.',
-                'missing_employees': list(missing_employees)
+                'message': f'{len(missing_employees)} employee(s) have not submitted adjustments.',
+                'missing_employees': missing_employees
             }, status=400)
 
-        # Update their adjustment statuses (filter by assigned_office)
-        Adjustment.objects.filter(**adjustment_filter).update(status="Pending")
+        # Waiting / Returned adjustments of the batch to Pending (one guarded UPDATE)
+        counts = {}
+        if batch_assigned_office:
+            counts = workflow.transition([(batch_assigned_office, pay_period, batch_number)], 'submit')
 
         # Get user role and assigned office for remark removal
         user_role = request.session.get('role', '')
@@ -163,9 +165,7 @@ def submit(request):
         
         # Remove the ReturnRemark if it exists (filter by assigned_office for preparators)
         remark_filter = {
-            'cutoff': cutoff,
-            'cutoff_month': cutoff_month,
-            'cutoff_year': cutoff_year,
+            **period_filter(cutoff_year, cutoff_month, cutoff, month_field='cutoff_month'),
             'batch_number': batch_number
         }
         
@@ -175,7 +175,18 @@ def submit(request):
         
         ReturnRemark.objects.filter(**remark_filter).delete()
 
-        return JsonResponse({'status': 'OK'}, status=200)
+        # Freeze the computed payroll of the submitted batch
+        if batch_assigned_office:
+            payroll_snapshot.freeze_batch(
+                batch_number,
+                cutoff,
+                cutoff_month,
+                cutoff_year,
+                batch_assigned_office,
+                submitted_by=request.user,
+            )
+
+        return JsonResponse({'status': 'OK', 'batches': workflow.batch_counts(counts)}, status=200)
 
     return JsonResponse({'error': 'Invalid request method'}, status=405)
 
@@ -190,29 +201,17 @@ def approve(request):
         batch_number = request.POST.get('batch_number')
         assigned_office = request.POST.get('assigned_office')
 
-        # Employees on the current payroll
-        employee_ids = list(BatchAssignment.objects.filter(
-            batch_number=batch_number,
-            cutoff=cutoff,
-            cutoff_month=cutoff_month,
-            cutoff_year=cutoff_year,
-            assigned_office=assigned_office
-        ).values_list('employee_id', flat=True))
-
-        # Update their adjustment statuses
-        Adjustment.objects.filter(
-            employee_id__in=employee_ids,
-            cutoff=cutoff,
-            month=cutoff_month,
-            cutoff_year=cutoff_year,
-            assigned_office=assigned_office
-        ).update(status="Approved")
+        pay_period = pay_period_key(cutoff_year, cutoff_month, cutoff)
+        if pay_period is None or not assigned_office:
+            return JsonResponse({'error': 'Invalid payroll period or office'}, status=400)
 
-        return JsonResponse({'status': 'OK'}, status=200)
+        # Pending adjustments of the batch to Approved (one guarded UPDATE)
+        counts = workflow.transition([(assigned_office, pay_period, batch_number)], 'approve')
+
+        return JsonResponse({'status': 'OK', 'batches': workflow.batch_counts(counts)}, status=200)
 
     return JsonResponse({'error': 'Invalid request method'}, status=405)
 
-# Will Be Refactored Soon - Shashimii@08172025
 @login_required
 @restrict_roles(disallowed_roles=['employee'])
 def reject(request):
@@ -224,63 +223,19 @@ def reject(request):
         remarks = request.POST.get('remarks')
         assigned_office = request.POST.get('assigned_office')
 
-        assignments = BatchAssignment.objects.filter(
-            batch_number=batch_number,
-            cutoff=cutoff,
-            cutoff_month=cutoff_month,
-            cutoff_year=cutoff_year,
-            assigned_office=assigned_office
-        )
+        pay_period = pay_period_key(cutoff_year, cutoff_month, cutoff)
+        if pay_period is None or not assigned_office or not (batch_number or '').isdigit():
+            return JsonResponse({'error': 'Invalid payroll period, batch or office'}, status=400)
 
-        employee_ids = assignments.values_list('employee_id', flat=True)
+        # Copy to ReturnedAdjustments, save the remark and return the Adjustments (one transaction)
+        counts = workflow.reject((assigned_office, pay_period, int(batch_number)), remarks)
 
-        adjustments = Adjustment.objects.filter(
-            employee_id__in=employee_ids,
-            cutoff=cutoff,
-            month=cutoff_month,
-            cutoff_year=cutoff_year,
-            assigned_office=assigned_office
-        )
-
-        # Save to ReturnedAdjustments
-        for adj in adjustments:
-            ReturnedAdjustment.objects.create(
-                employee=adj.employee,
-                name=adj.name,
-                type=adj.type,
-                amount=adj.amount,
-                details=adj.details,
-                month=adj.month,
-                cutoff=adj.cutoff,
-                cutoff_year=adj.cutoff_year,
-                assigned_office=assigned_office,
-                status="Returned",
-            )
-        
-        # Save one remark for the batch
-        ReturnRemark.objects.create(
-            batch_number=batch_number,
-            cutoff=cutoff,
-            cutoff_month=cutoff_month,
-            cutoff_year=cutoff_year,
-            assigned_office=assigned_office,
-            remark=remarks
-        )
-
-        # Update the Adjustments
-        Adjustment.objects.filter(
-            employee_id__in=employee_ids,
-            cutoff=cutoff,
-            month=cutoff_month,
-            cutoff_year=cutoff_year,
-            assigned_office=assigned_office
-        ).update(status="Returned")
+        # Returned batches are recomputed live until they are submitted again
+        payroll_snapshot.discard_runs(cutoff, cutoff_month, cutoff_year, batch_number, assigned_office)
 
-
-        return JsonResponse({'status': 'OK'}, status=200)
+        return JsonResponse({'status': 'OK', 'batches': workflow.batch_counts(counts)}, status=200)
 
     return JsonResponse({'error': 'Invalid request method'}, status=405)
-# Will Be Refactored Soon - Shashimii@08172025 End
 
 @login_required
 @restrict_roles(disallowed_roles=['employee'])
@@ -292,23 +247,14 @@ def release(request):
         cutoff_year = request.POST.get('cutoff_year')
         batch_number = request.POST.get('batch_number')
 
-        # Employees on the current payroll
-        employee_ids = list(BatchAssignment.objects.filter(
-            batch_number=batch_number,
-            cutoff=cutoff,
-            cutoff_month=cutoff_month,
-            cutoff_year=cutoff_year
-        ).values_list('employee_id', flat=True))
-
-        # Update their adjustment statuses
-        Adjustment.objects.filter(
-            employee_id__in=employee_ids,
-            cutoff=cutoff,
-            month=cutoff_month,
-            cutoff_year=cutoff_year
-        ).update(status="Credited")
+        pay_period = pay_period_key(cutoff_year, cutoff_month, cutoff)
+        if pay_period is None:
+            return JsonResponse({'error': 'Invalid payroll period'}, status=400)
 
-        return JsonResponse({'status': 'OK'}, status=200)
+        # Approved adjustments of the batch (every office) to Credited (one guarded UPDATE)
+        counts = workflow.transition([(None, pay_period, batch_number)], 'release')
+
+        return JsonResponse({'status': 'OK', 'batches': workflow.batch_counts(counts)}, status=200)
 
     return JsonResponse({'error': 'Invalid request method'}, status=405)
 
@@ -340,111 +286,24 @@ def batch_data(request):
             
         employees_with_adjustments = Adjustment.objects.filter(
             batch_number=batch_number,
-            cutoff=cutoff,
-            month=cutoff_month,
-            cutoff_year=cutoff_year,
+            **period_filter(cutoff_year, cutoff_month, cutoff),
             status__in=status_filter,
             assigned_office=url_assigned_office
         ).values_list('employee_id', flat=True).distinct()
         
         # Filter assignments to only include employees with pending or approved adjustments for the specific office
-        assignments = BatchAssignment.objects.filter(
-            batch_number=batch_number,
-            cutoff=cutoff,
-            cutoff_month=cutoff_month,
-            cutoff_year=cutoff_year,
-            employee_id__in=employees_with_adjustments,
-            assigned_office=url_assigned_office
-        ).select_related('employee').annotate(
-            late_order=Case(
-                When(late_assigned='NO', then=Value(0)),
-                When(late_assigned='YES', then=Value(1)),
-                default=Value(2),
-                output_field=IntegerField()
-            ),
-            removed_order=Case(
-                When(removed='NO', then=Value(0)),
-                When(removed='YES', then=Value(1)),
-                default=Value(2),
-                output_field=IntegerField()
-            ),
-            has_adjustments=Exists(
-                Adjustment.objects.filter(
-                    employee=OuterRef('employee'),
-                    batch_number=batch_number,
-                    cutoff=cutoff,
-                    month=cutoff_month,
-                    cutoff_year=cutoff_year,
-                    assigned_office=url_assigned_office
-                )
-            )
-        ).order_by('late_order', 'employee__fullname')
+        assignments = payroll_engine.batch_assignments(
+            batch_number, cutoff, cutoff_month, cutoff_year, url_assigned_office
+        ).filter(employee_id__in=employees_with_adjustments)
         batch_assigned_office = url_assigned_office
+    elif assigned_office and user_role not in ['admin', 'checker', 'accounting']:
+        # For office-specific preparators, show only their office batches
+        assignments = payroll_engine.batch_assignments(batch_number, cutoff, cutoff_month, cutoff_year, assigned_office)
+        batch_assigned_office = assigned_office
     else:
-        # Filter assignments based on user role
-        if assigned_office and user_role not in ['admin', 'checker', 'accounting']:
-            # For office-specific preparators, show only their office batches
-            assignments = BatchAssignment.objects.filter(
-                batch_number=batch_number,
-                cutoff=cutoff,
-                cutoff_month=cutoff_month,
-                cutoff_year=cutoff_year,
-                assigned_office=assigned_office
-            ).select_related('employee').annotate(
-                late_order=Case(
-                    When(late_assigned='NO', then=Value(0)),
-                    When(late_assigned='YES', then=Value(1)),
-                    default=Value(2),
-                    output_field=IntegerField()
-                ),
-                removed_order=Case(
-                    When(removed='NO', then=Value(0)),
-                    When(removed='YES', then=Value(1)),
-                    default=Value(2),
-                    output_field=IntegerField()
-                ),
-                has_adjustments=Exists(
-                    Adjustment.objects.filter(
-                        employee=OuterRef('employee'),
-                        batch_number=batch_number,
-                        cutoff=cutoff,
-                        month=cutoff_month,
-                        cutoff_year=cutoff_year
-                    )
-                )
-            ).order_by('late_order', 'employee__fullname')
-            batch_assigned_office = assigned_office
-        else:
-            # For admin and checker, show all batches
-            assignments = BatchAssignment.objects.filter(
-                batch_number=batch_number,
-                cutoff=cutoff,
-                cutoff_month=cutoff_month,
-                cutoff_year=cutoff_year
-            ).select_related('employee').annotate(
-                late_order=Case(
-                    When(late_assigned='NO', then=Value(0)),
-                    When(late_assigned='YES', then=Value(1)),
-                    default=Value(2),
-                    output_field=IntegerField()
-                ),
-                removed_order=Case(
-                    When(removed='NO', then=Value(0)),
-                    When(removed='YES', then=Value(1)),
-                    default=Value(2),
-                    output_field=IntegerField()
-                ),
-                has_adjustments=Exists(
-                    Adjustment.objects.filter(
-                        employee=OuterRef('employee'),
-                        batch_number=batch_number,
-                        cutoff=cutoff,
-                        month=cutoff_month,
-                        cutoff_year=cutoff_year
-                    )
-                )
-            ).order_by('late_order', 'employee__fullname')
-            batch_assigned_office = None
+        # For admin and checker, show all batches
+        assignments = payroll_engine.batch_assignments(batch_number, cutoff, cutoff_month, cutoff_year)
+        batch_assigned_office = None
 
     # Get the assigned_office for this batch (all employees in a batch should have the same assigned_office)
     # batch_assigned_office = None
@@ -454,39 +313,25 @@ def batch_data(request):
     # Use url_assigned_office if available, otherwise use batch_assigned_office
     office_to_check = url_assigned_office if url_assigned_office else assigned_office
 
-    # Filter adjustment status checks by assigned_office
-    adjustment_filter = {
-        'batch_number': batch_number,
-        'cutoff': cutoff,
-        'month': cutoff_month,
-        'cutoff_year': cutoff_year,
-    }
-    
-    # Only filter by assigned_office if we have a specific office to check
-    if office_to_check:
-        adjustment_filter['assigned_office'] = office_to_check
-    
-    has_pending_adjustments = Adjustment.objects.filter(
-        **adjustment_filter,
-        status="Pending"
-    ).exists()
-
-    has_approved_adjustments = Adjustment.objects.filter(
-        **adjustment_filter,
-        status="Approved"
-    ).exists()
+    # Workflow flags of the batch: one lookup on its status counters
+    if office_to_check and user_role != 'admin' and user_role != 'checker':
+        # For office-specific preparators, check last batch for their office
+        last_batch_office = office_to_check
+    else:
+        # For admin and checker, check last batch across all offices
+        last_batch_office = None
 
-    has_credited_adjustments = Adjustment.objects.filter(
-        **adjustment_filter,
-        status="Credited"
-    ).exists()
+    flags = batch_status.batch_flags(
+        batch_number,
+        pay_period_key(cutoff_year, cutoff_month, cutoff),
+        assigned_office=office_to_check,
+        last_batch_office=last_batch_office,
+    )
 
     # Filter remarks based on user role and assigned office
     remark_query = ReturnRemark.objects.filter(
         batch_number=batch_number,
-        cutoff=cutoff,
-        cutoff_month=cutoff_month,
-        cutoff_year=cutoff_year
+        **period_filter(cutoff_year, cutoff_month, cutoff, month_field='cutoff_month')
     )
     
     # Apply assigned_office filter based on user role
@@ -500,259 +345,33 @@ def batch_data(request):
     
     remark = remark_query.values_list('remark', flat=True).first()
 
-    employees = []
-
-    for assignment in assignments:
-        employee = assignment.employee
-
-        # Adjustment Deductions
-        other_deductions = Adjustment.objects.filter(
-            employee=employee,
-            type="Deduction",
-            month=cutoff_month,
-            cutoff=cutoff,
-            cutoff_year=cutoff_year,
-            status__in=["Pending", "Approved", "Credited"]
-        ).exclude(
-            Q(name__in=["Late", "Absent", "TAX", "SSS"]) | Q(name__icontains="Philhealth") | Q(name__icontains="Expanded Withholding Tax")
-        )
-        if url_assigned_office:
-            other_deductions = other_deductions.filter(assigned_office=url_assigned_office)
-        total_other_deductions = other_deductions.aggregate(Sum('amount'))['amount__sum'] or Decimal('0.00')
-
-        # Adjustment Incomes
-        incomes = Adjustment.objects.filter(
-            employee=employee,
-            type="Income",
-            month=cutoff_month,
-            cutoff=cutoff,
-            cutoff_year=cutoff_year,
-            status__in=["Pending", "Approved", "Credited"]
-        )
-        if url_assigned_office:
-            incomes = incomes.filter(assigned_office=url_assigned_office)
-        total_income = incomes.aggregate(Sum('amount'))['amount__sum'] or Decimal('0.00')
-
-        # Base salary
-        basic_salary = employee.salary
-        basic_salary_annual = basic_salary * 12
-        basic_salary_cutoff = basic_salary / 2
-
-        # Late adjustments
-        late_adjustments = Adjustment.objects.filter(
-            employee=employee,
-            name="Late",
-            month=cutoff_month,
-            cutoff=cutoff,
-            cutoff_year=cutoff_year,
-            status__in=["Pending", "Approved", "Credited"]
-        )
-        if url_assigned_office:
-            late_adjustments = late_adjustments.filter(assigned_office=url_assigned_office)
-        late_amt_total = late_adjustments.aggregate(Sum('amount'))['amount__sum'] or Decimal('0.00')
-        late_min_total = late_adjustments.aggregate(Sum('details'))['details__sum'] or Decimal('0.00')
-
-        # Absent adjustments
-        absent_adjustments = Adjustment.objects.filter(
-            employee=employee,
-            name="Absent",
-            month=cutoff_month,
-            cutoff=cutoff,
-            cutoff_year=cutoff_year,
-            status__in=["Pending", "Approved", "Credited"]
-        )
-        if url_assigned_office:
-            absent_adjustments = absent_adjustments.filter(assigned_office=url_assigned_office)
-
-        absent_amt_total = absent_adjustments.aggregate(Sum('amount'))['amount__sum'] or Decimal('0.00')
-        absent_min_total = absent_adjustments.aggregate(Sum('details'))['details__sum'] or Decimal('0.00')
-
-        # Get detailed incomes and deductions for breakdown
-        detailed_incomes = list(incomes.values('name', 'amount', 'details'))
-        detailed_deductions = list(other_deductions.values('name', 'amount', 'details'))
-
-        # Total Gross Amount
-        # Convert to Decimal Sum
-        total_adjustment_deduction = (
-            other_deductions.aggregate(total=Sum("amount"))["total"] or Decimal("0.00")
-        )
-
-        total_adjustment_income = (
-            incomes.aggregate(total=Sum("amount"))["total"] or Decimal("0.00")
-        )
-
-        total_adjustment_late = (
-            late_adjustments.aggregate(total=Sum("amount"))["total"] or Decimal("0.00")
-        )
-
-        total_adjustment_absent = (
-            absent_adjustments.aggregate(total=Sum("amount"))["total"] or Decimal("0.00")
-        )
-
-        total_gross_amount = abs(basic_salary_cutoff - total_adjustment_late - total_adjustment_absent - total_adjustment_deduction + total_adjustment_income)
-
-        # TAX DEDUCTION 
-        if (employee.tax_declaration == "yes"):
-                tax_deduction = Decimal('0.00')
-        else:
-            tax_deduction = (total_gross_amount * Decimal("0.03")).quantize(
-                Decimal("0.01"), rounding=ROUND_HALF_UP
-            )
-
-        # PHILHEALTH DEDUCTION 
-        if employee.has_philhealth == "yes":
-            philhealth = (total_gross_amount * Decimal("0.05")).quantize(
-                Decimal("0.01"), rounding=ROUND_HALF_UP
-            )
-        else:
-            philhealth = Decimal("0.00")
-
-        # PREVIOUS PHILHEALTH
-        philhealth_previous = Adjustment.objects.filter(
-            employee=employee,
-            name__icontains="Philhealth",  # Matches any name containing "Philhealth"
-            month=cutoff_month,
-            cutoff=cutoff,
-            cutoff_year=cutoff_year,
-            status__in=["Pending", "Approved", "Credited"]
-        )
-        if url_assigned_office:
-            philhealth_previous = philhealth_previous.filter(assigned_office=url_assigned_office)
-        additional_philhealth = philhealth_previous.aggregate(Sum('amount'))['amount__sum'] or Decimal('0.00')
-
-        # EXPANDED WITHHOLDING TAX
-        ewt_adjustments = Adjustment.objects.filter(
-            employee=employee,
-            name__icontains="expanded withholding tax",  # Matches any name containing "expanded withholding tax"
-            month=cutoff_month,
-            cutoff=cutoff,
-            cutoff_year=cutoff_year,
-            status__in=["Pending", "Approved", "Credited"]
-        )
-        if url_assigned_office:
-            ewt_adjustments = ewt_adjustments.filter(assigned_office=url_assigned_office)
-        ewt = ewt_adjustments.aggregate(Sum('amount'))['amount__sum'] or Decimal('0.00')
-
-        # SSS - fetch from SSS adjustments
-        sss_adjustments = Adjustment.objects.filter(
-            employee=employee,
-            name="SSS",
-            month=cutoff_month,
-            cutoff=cutoff,
-            cutoff_year=cutoff_year,
-            status__in=["Pending", "Approved", "Credited"]
-        )
-        if url_assigned_office:
-            sss_adjustments = sss_adjustments.filter(assigned_office=url_assigned_office)
-        sss = sss_adjustments.aggregate(Sum('amount'))['amount__sum'] or Decimal('0.00')
+    # Office used to check if a moved employee's previous batch was already submitted
+    if url_assigned_office:
+        previous_batch_office = url_assigned_office
+    elif assigned_office and user_role != 'admin' and user_role != 'checker':
+        previous_batch_office = assigned_office
+    else:
+        previous_batch_office = batch_assigned_office
 
-        # Final calculation
-        total_deductions = (sss + philhealth + tax_deduction + ewt + additional_philhealth).quantize(
-            Decimal("0.01")
-        )
-        net_salary = abs(total_gross_amount - total_deductions)
+    # Submitted batches read the payroll frozen at submit, Waiting batches are computed live
+    run = payroll_snapshot.find_run(batch_number, cutoff, cutoff_month, cutoff_year, url_assigned_office or assigned_office)
 
-        # Check if the employee's previous batch has been submitted (for removed employees)
-        previous_batch = assignment.previous_batch
-        previous_batch_submitted = False
-        
-        if previous_batch is not None:
-            # Check if the previous batch has any adjustments with status Pending, Approved, or Credited (filter by assigned_office)
-            previous_batch_query = Adjustment.objects.filter(
-                batch_number=previous_batch,
-                cutoff=cutoff,
-                month=cutoff_month,
-                cutoff_year=cutoff_year,
-                status__in=["Pending", "Approved", "Credited"]
-            )
-            
-            # Apply assigned_office filter based on user role and context
-            if url_assigned_office:
-                # If coming from pending page, filter by the specific office
-                previous_batch_query = previous_batch_query.filter(assigned_office=url_assigned_office)
-            elif assigned_office and user_role != 'admin' and user_role != 'checker':
-                # For office-specific preparators, only check adjustments for their assigned office
-                previous_batch_query = previous_batch_query.filter(assigned_office=assigned_office)
-            elif batch_assigned_office:
-                # If we have a batch_assigned_office, use that for filtering
-                previous_batch_query = previous_batch_query.filter(assigned_office=batch_assigned_office)
-            
-            previous_batch_submitted = previous_batch_query.exists()
-
-        # Build data
-        emp_data = model_to_dict(employee, fields=[
-            'id', 'employee_number', 'fullname', 'position', 'salary', 'tax_declaration', 'has_philhealth'
-        ])
-        emp_data['late_assigned'] = assignment.late_assigned
-        emp_data['removed'] = assignment.removed
-        emp_data['has_adjustments'] = assignment.has_adjustments
-        emp_data['previous_batch'] = previous_batch
-        emp_data['previous_batch_submitted'] = previous_batch_submitted
-        emp_data['basic_salary_cutoff'] = f"{basic_salary_cutoff:.2f}"
-        emp_data['tax_deduction'] = f"{tax_deduction:.2f}"
-        emp_data['ewt'] = f"{ewt:.2f}"
-        emp_data['philhealth'] = f"{philhealth:.2f}"
-        emp_data['previous_philhealth'] = f"{additional_philhealth}"
-        emp_data['sss'] = f"{sss:.2f}"
-        emp_data['late_amount'] = f"{late_amt_total:.2f}"
-        emp_data['late_minutes'] = f"{late_min_total:.2f}"
-        emp_data['absent_amount'] = f"{absent_amt_total:.2f}"
-        emp_data['absent_minutes'] = f"{absent_min_total:.2f}"
-        emp_data['other_deductions'] = f"{total_other_deductions:.2f}"
-        emp_data['total_deductions'] = f"{total_deductions:.2f}"
-        emp_data['income'] = f"{total_income:.2f}"
-        emp_data['total_gross_amount'] = f"{total_gross_amount:.2f}"
-        emp_data['net_salary'] = f"{net_salary:.2f}"
-        emp_data['incomes'] = detailed_incomes
-        emp_data['deductions'] = detailed_deductions
-
-        employees.append(emp_data)
-
-    # Determine if current batch is the last batch for the office
-    office_to_check = url_assigned_office if url_assigned_office else assigned_office
-    
-    if office_to_check and user_role != 'admin' and user_role != 'checker':
-        # For office-specific preparators, check last batch for their office
-        last_batch_for_office = BatchAssignment.objects.filter(
-            cutoff=cutoff,
-            cutoff_month=cutoff_month,
-            cutoff_year=cutoff_year,
-            assigned_office=office_to_check
-        ).order_by('-batch_number').first()
-        
-        is_last_batch = last_batch_for_office and last_batch_for_office.batch_number == batch_number
+    if run:
+        employees = payroll_snapshot.batch_rows(run)
     else:
-        # For admin and checker, check last batch across all offices
-        last_batch_overall = BatchAssignment.objects.filter(
-            cutoff=cutoff,
-            cutoff_month=cutoff_month,
-            cutoff_year=cutoff_year
-        ).order_by('-batch_number').first()
-        
-        is_last_batch = last_batch_overall and last_batch_overall.batch_number == batch_number
+        # Payroll rows computed set-based (constant query count per batch)
+        employees = payroll_engine.build_batch_rows(
+            assignments,
+            cutoff,
+            cutoff_month,
+            cutoff_year,
+            adjustment_office=url_assigned_office,
+            previous_batch_office=previous_batch_office,
+        )
 
     # Check if all adjustments in this batch are approved
-    approval_filter = {
-        'batch_number': batch_number,
-        'cutoff': cutoff,
-        'month': cutoff_month,
-        'cutoff_year': cutoff_year,
-    }
-    
-    # Only filter by assigned_office if we have a specific office to check
-    if office_to_check:
-        approval_filter['assigned_office'] = office_to_check
-    
-    total_adjustments = Adjustment.objects.filter(**approval_filter).count()
-    
-    approved_adjustments = Adjustment.objects.filter(
-        **approval_filter,
-        status__in=["Approved", "Credited"]
-    ).count()
-    
-    # Set approval status
     approval_status = ""
-    if total_adjustments > 0 and approved_adjustments == total_adjustments:
+    if flags['total_adjustments'] > 0 and flags['approved_adjustments'] == flags['total_adjustments']:
         approval_status = "Approved"
 
     # Determine batch_name from Batch model
@@ -777,12 +396,12 @@ def batch_data(request):
         'cutoff_year': cutoff_year,
         'batch_number': batch_number,
         'batch_name': batch_name,
-        'has_pending_adjustments': has_pending_adjustments,
-        'has_approved_adjustments': has_approved_adjustments,
-        'has_credited_adjustments': has_credited_adjustments,
+        'has_pending_adjustments': flags['has_pending_adjustments'],
+        'has_approved_adjustments': flags['has_approved_adjustments'],
+        'has_credited_adjustments': flags['has_credited_adjustments'],
         'remark': remark or "",
         'approval_status': approval_status,
-        'is_last_batch': is_last_batch,
+        'is_last_batch': flags['is_last_batch'],
         'assigned_office': batch_assigned_office,
         'formatted_office_name': get_formatted_office_name(batch_assigned_office),
         'payroll_title': get_payroll_title(batch_assigned_office),
@@ -790,7 +409,13 @@ def batch_data(request):
 
 @login_required
 @restrict_roles(disallowed_roles=['employee'])
-def batch_create(request, batch_size=15):
+@enqueueable
+def batch_create(request, batch_size=batch_creation.CHUNK_SIZE):
+    # batch_size: rows per INSERT
+    period_scope = request.POST.get('period_scope', 'period')
+    if period_scope in ['year', 'range']:
+        return batch_create_range(request, period_scope, batch_size)
+
     cutoff = request.POST.get('cutoff')
     cutoff_month = request.POST.get('cutoff_month')
     cutoff_year = request.POST.get('cutoff_year')
@@ -803,9 +428,7 @@ def batch_create(request, batch_size=15):
 
     # Check if batches already exist for the given period
     batch_filter = {
-        'cutoff': cutoff,
-        'cutoff_month': cutoff_month,
-        'cutoff_year': cutoff_year
+        **period_filter(cutoff_year, cutoff_month, cutoff, month_field='cutoff_month')
     }
 
     is_office_specific = bool(assigned_office and user_role not in ['admin', 'checker'])
@@ -822,67 +445,23 @@ def batch_create(request, batch_size=15):
                 'error': f'Batches already exist for {cutoff_month} {cutoff}, {cutoff_year}.'
             }, status=400)
 
-    # Get batch_numbers from Batch model based on office
-    if is_office_specific:
-        batch_numbers = list(
-            Batch.objects.filter(batch_assigned_office=assigned_office)
-            .values_list('batch_number', flat=True)
-        )
-    else:
-        batch_numbers = list(Batch.objects.values_list('batch_number', flat=True))
-
-    # Select employees whose employee.batch_number matches any of these batch_numbers
-    if is_office_specific:
-        all_employees = Employee.objects.filter(
-            assigned_office=assigned_office,
-            batch_number__in=batch_numbers
-        ).order_by('fullname')
-        employees_by_office = {assigned_office: list(all_employees)}
-    else:
-        all_employees = Employee.objects.filter(
-            batch_number__in=batch_numbers
-        ).order_by('fullname')
-        employees_by_office = {}
-        for employee in all_employees:
-            office = employee.assigned_office or 'unassigned'
-            employees_by_office.setdefault(office, []).append(employee)
+    # Employees whose employee.batch_number matches an existing Batch, grouped by office
+    employees_by_office = batch_creation.eligible_employees(assigned_office if is_office_specific else None)
 
     # Check if there are employees to assign
-    if not all_employees.exists():
+    if not employees_by_office:
         if is_office_specific:
             return JsonResponse({'error': f'No employees with assigned batches found in {get_formatted_office_name(assigned_office)} to create batches.'}, status=400)
         else:
             return JsonResponse({'error': 'No employees with assigned batches found to create batches.'}, status=400)
 
-    total_batches_created = 0
-    offices_processed = []
-
-    # Create batches for each office separately, grouped by employee.batch_number
-    for office, employees in employees_by_office.items():
-        if not employees:
-            continue
-
-        # Group employees by their assigned batch_number
-        grouped_by_batch = {}
-        for emp in employees:
-            if emp.batch_number is None:
-                continue
-            grouped_by_batch.setdefault(emp.batch_number, []).append(emp)
-
-        # Create BatchAssignment for each employee in each batch group
-        for batch_num, group in grouped_by_batch.items():
-            for emp in group:
-                BatchAssignment.objects.create(
-                    employee=emp,
-                    batch_number=batch_num,
-                    cutoff=cutoff,
-                    cutoff_month=cutoff_month,
-                    cutoff_year=cutoff_year,
-                    assigned_office=emp.assigned_office
-                )
-
-        total_batches_created += len(grouped_by_batch)
-        offices_processed.append(f"{get_formatted_office_name(office)} ({len(grouped_by_batch)} batches)")
+    # One BatchAssignment per employee, grouped by employee.batch_number, inserted in chunks in one transaction
+    office_counts = batch_creation.create_assignments(
+        employees_by_office,
+        [(cutoff, cutoff_month, cutoff_year)],
+        chunk_size=batch_size,
+    )
+    total_batches_created = sum(counts['batches'] for counts in office_counts.values())
 
     # Success message
     if is_office_specific:
@@ -890,10 +469,89 @@ def batch_create(request, batch_size=15):
     else:
         message = f'Batches successfully created for {cutoff_month} {cutoff}, {cutoff_year}. Total batches created: {total_batches_created} across all offices.'
 
-    return JsonResponse({'message': message})
+    return JsonResponse({'message': message, 'offices': format_office_counts(office_counts)})
+
+def format_office_counts(office_counts):
+    """
+    Per-office counts of a batch creation, for the JSON response
+    """
+    return [
+        {
+            'assigned_office': office,
+            'office_name': get_formatted_office_name(office),
+            **counts,
+        }
+        for office, counts in sorted(office_counts.items())
+    ]
+
+def batch_create_range(request, period_scope, batch_size):
+    """
+    Create the batches of several periods at once.
+    period_scope 'year': all 24 cutoffs of cutoff_year.
+    period_scope 'range': from (cutoff, cutoff_month, cutoff_year) to (end_cutoff, end_cutoff_month, end_cutoff_year).
+    Periods that already have batches (per office) are skipped.
+    """
+    cutoff_year = request.POST.get('cutoff_year')
+
+    if period_scope == 'year':
+        start_key = pay_period_key(cutoff_year, 'January', '1st')
+        end_key = pay_period_key(cutoff_year, 'December', '2nd')
+        if start_key is None:
+            return JsonResponse({'error': 'Missing or invalid year.'}, status=400)
+    else:
+        start_key = pay_period_key(cutoff_year, request.POST.get('cutoff_month'), request.POST.get('cutoff'))
+        end_key = pay_period_key(
+            request.POST.get('end_cutoff_year'),
+            request.POST.get('end_cutoff_month'),
+            request.POST.get('end_cutoff'),
+        )
+        if start_key is None or end_key is None:
+            return JsonResponse({'error': 'Missing or invalid start or end cutoff, month, or year.'}, status=400)
+        if end_key < start_key:
+            return JsonResponse({'error': 'The end period is before the start period.'}, status=400)
+        if len(batch_creation.period_range(start_key, end_key)) > batch_creation.MAX_PERIODS:
+            return JsonResponse({'error': f'Batches can be created for at most {batch_creation.MAX_PERIODS} periods at once.'}, status=400)
+
+    user_role = request.session.get('role', '')
+    assigned_office = get_user_assigned_office(user_role)
+    is_office_specific = bool(assigned_office and user_role not in ['admin', 'checker'])
+    office_scope = assigned_office if is_office_specific else None
+
+    result = batch_creation.create_period_range(start_key, end_key, office_scope, chunk_size=batch_size)
+    office_counts = result['offices']
+
+    start_cutoff, start_month, start_year = pay_period_parts(start_key)
+    end_cutoff, end_month, end_year = pay_period_parts(end_key)
+    scope_label = f'{start_month} {start_cutoff}, {start_year} to {end_month} {end_cutoff}, {end_year}'
+    if is_office_specific:
+        scope_label += f' in {get_formatted_office_name(assigned_office)}'
+
+    if not office_counts:
+        if result['skipped']:
+            return JsonResponse({'error': f'Batches already exist for every period from {scope_label}.'}, status=400)
+        return JsonResponse({'error': f'No employees with assigned batches found to create batches for {scope_label}.'}, status=400)
+
+    total_batches_created = sum(counts['batches'] for counts in office_counts.values())
+
+    message = f'Batches successfully created for {scope_label}. Total batches created: {total_batches_created}.'
+    if result['skipped']:
+        message += f' {len(result["skipped"])} office periods already had batches and were skipped.'
+
+    return JsonResponse({
+        'message': message,
+        'offices': format_office_counts(office_counts),
+        'skipped': [
+            {
+                **dict(zip(['cutoff', 'cutoff_month', 'cutoff_year'], pay_period_parts(key))),
+                'assigned_office': office,
+            }
+            for key, office in result['skipped']
+        ],
+    })
 
 @login_required
 @restrict_roles(disallowed_roles=['employee'])
+@enqueueable
 def batch_delete(request):
     cutoff_month = request.POST.get('cutoff_month')
     cutoff = request.POST.get('cutoff')
@@ -906,23 +564,26 @@ def batch_delete(request):
     try:
         # Filter by assigned_office if provided
         batch_filter = {
-            'cutoff_month': cutoff_month,
-            'cutoff': cutoff,
-            'cutoff_year': cutoff_year
+            **period_filter(cutoff_year, cutoff_month, cutoff, month_field='cutoff_month')
         }
         if assigned_office:
             batch_filter['assigned_office'] = assigned_office
 
         adj_filter = {
-            'month': cutoff_month,
-            'cutoff': cutoff,
-            'cutoff_year': cutoff_year
+            **period_filter(cutoff_year, cutoff_month, cutoff)
         }
         if assigned_office:
             adj_filter['assigned_office'] = assigned_office
 
-        batch_deleted, _ = BatchAssignment.objects.filter(**batch_filter).delete()
-        adj_deleted, _ = Adjustment.objects.filter(**adj_filter).delete()
+        with transaction.atomic():
+            # Counters of the deleted batches are removed by the refresh
+            status_keys = (
+                batch_status.assignment_keys(BatchAssignment.objects.filter(**batch_filter))
+                | batch_status.adjustment_keys(Adjustment.objects.filter(**adj_filter))
+            )
+            batch_deleted, _ = BatchAssignment.objects.filter(**batch_filter).delete()
+            adj_deleted, _ = Adjustment.objects.filter(**adj_filter).delete()
+            batch_status.refresh(status_keys)
 
         # Get user role and assigned office for remark removal
         user_role = request.session.get('role', '')
@@ -930,9 +591,7 @@ def batch_delete(request):
         
         # Filter remarks by assigned_office for preparators
         remark_filter = {
-            'cutoff_month': cutoff_month,
-            'cutoff': cutoff,
-            'cutoff_year': cutoff_year
+            **period_filter(cutoff_year, cutoff_month, cutoff, month_field='cutoff_month')
         }
         
         # For office-specific preparators, only remove remarks for their assigned office
@@ -944,6 +603,8 @@ def batch_delete(request):
         
         remark_deleted, _ = ReturnRemark.objects.filter(**remark_filter).delete()
 
+        payroll_snapshot.discard_runs(cutoff, cutoff_month, cutoff_year, assigned_office=assigned_office)
+
         if batch_deleted == 0 and adj_deleted == 0 and remark_deleted == 0:
             return JsonResponse({'error': 'No matching records found'}, status=404)
 
@@ -972,80 +633,51 @@ def batch_late(request):
         ## If employee is marked as late in the last existing batch, move them to a new batch
         ## Otherwise, move them to the last batch if it's not full, or create a new batch if it is
 
-        # Get existing batch_number before changing
-        previous_batch = BatchAssignment.objects.filter(
-            employee=employee,
-            cutoff=cutoff,
-            cutoff_month=cutoff_month,
-            cutoff_year=cutoff_year,
-        ).values_list('batch_number', flat=True).first()
-
-        # Get the last batch number for the selected payroll period and office
-        last_batch = (
-            BatchAssignment.objects
-            .filter(
-                cutoff=cutoff, 
-                cutoff_month=cutoff_month, 
+        with transaction.atomic():
+            # Batches of the office are allocated one request at a time (see batch_allocator)
+            batch_allocator.lock_period(employee.assigned_office, cutoff, cutoff_month, cutoff_year)
+
+            # Get existing batch_number before changing
+            previous_batch = BatchAssignment.objects.filter(
+                employee=employee,
+                **period_filter(cutoff_year, cutoff_month, cutoff, month_field='cutoff_month'),
+            ).values_list('batch_number', flat=True).first()
+
+            # A new batch if the employee is on the last batch or the last batch is full, otherwise the last batch
+            batch_number = batch_allocator.late_batch(employee.assigned_office, cutoff, cutoff_month, cutoff_year, previous_batch)
+
+            # Batch status counters of the batches the employee leaves and joins
+            pay_period = pay_period_key(cutoff_year, cutoff_month, cutoff)
+            status_keys = batch_status.employee_keys(employee.id, pay_period)
+
+            # Update or create the batch assignment of employee
+            BatchAssignment.objects.update_or_create(
+                employee=employee,
+                cutoff=cutoff,
+                cutoff_month=cutoff_month,
                 cutoff_year=cutoff_year,
-                assigned_office=employee.assigned_office
+                defaults={
+                    'batch_number': batch_number,
+                    'late_assigned': 'YES',
+                    'previous_batch': previous_batch,
+                    'assigned_office': employee.assigned_office,
+                }
             )
-            .order_by('-batch_number') # desc
-            .first()
-        )
 
-        if last_batch:
-            last_batch_number = last_batch.batch_number
-            
-            # Check if the employee is currently in the last batch
-            if previous_batch == last_batch_number:
-                # Employee is in the last batch, so mark them as late in a NEW batch
-                batch_number = last_batch_number + 1
-            else:
-                # Employee is not in the last batch, so move them to the last batch
-                # Count the number of employees on the last batch for this office
-                count = BatchAssignment.objects.filter(
-                    cutoff=cutoff,
-                    cutoff_month=cutoff_month,
-                    cutoff_year=cutoff_year,
-                    batch_number=last_batch_number,
-                    assigned_office=employee.assigned_office
-                ).count()
-
-                if count < 15:
-                    # If last batch not full, move to the last batch
-                    batch_number = last_batch_number
-                else:
-                    # If last batch full, create new batch
-                    batch_number = last_batch_number + 1
-        else:
-            # No existing batches for this office, create first batch
-            batch_number = 1
-
-        # Update or create the batch assignment of employee
-        BatchAssignment.objects.update_or_create(
-            employee=employee,
-            cutoff=cutoff,
-            cutoff_month=cutoff_month,
-            cutoff_year=cutoff_year,
-            defaults={
-                'batch_number': batch_number,
-                'late_assigned': 'YES',
-                'previous_batch': previous_batch,
-                'assigned_office': employee.assigned_office,
-            }
-        )
+            # Check for adjustment if theres any
+            adjustments = Adjustment.objects.filter(
+                employee=employee,
+                **period_filter(cutoff_year, cutoff_month, cutoff)
+            )
 
-        # Check for adjustment if theres any
-        adjustments = Adjustment.objects.filter(
-            employee=employee,
-            cutoff=cutoff,
-            month=cutoff_month,
-            cutoff_year=cutoff_year
-        )
+            # Adjustment exists update the adjustment batch_number identifier
+            if adjustments.exists():
+                adjustments.update(batch_number=batch_number)
 
-        # Adjustment exists update the adjustment batch_number identifier
-        if adjustments.exists():
-            adjustments.update(batch_number=batch_number)
+            # Counters and frozen runs (submitted batches) of the batches left and joined
+            moved_keys = status_keys | batch_status.employee_keys(employee.id, pay_period)
+            batch_status.refresh(moved_keys)
+            payroll_snapshot.refresh_runs(moved_keys)
 
         return JsonResponse({'status': 'OK'}, status=200)
     
@@ -1067,39 +699,52 @@ def batch_unlate(request):
         ## Use the previous_number to revert the batch_number
         ## Revert the assigned_late to NO
 
-        # Get the previous_batch
-        previous_batch = BatchAssignment.objects.filter(
-            employee=employee,
-            cutoff=cutoff,
-            cutoff_month=cutoff_month,
-            cutoff_year=cutoff_year,
-        ).values_list('previous_batch', flat=True).first()
-
-        # Update or create the batch assignment of employee
-        BatchAssignment.objects.update_or_create(
-            employee=employee,
-            cutoff=cutoff,
-            cutoff_month=cutoff_month,
-            cutoff_year=cutoff_year,
-            defaults={
-                'batch_number': previous_batch,
-                'late_assigned': 'NO',
-                'previous_batch': None,
-                'assigned_office': employee.assigned_office,
-            }
-        )
+        with transaction.atomic():
+            # Takes a slot back on the previous batch: under the allocator lock (see batch_allocator)
+            batch_allocator.lock_period(employee.assigned_office, cutoff, cutoff_month, cutoff_year)
 
-        # Check for adjustment if theres any
-        adjustments = Adjustment.objects.filter(
-            employee=employee,
-            cutoff=cutoff,
-            month=cutoff_month,
-            cutoff_year=cutoff_year
-        )
+            # Get the previous_batch
+            previous_batch = BatchAssignment.objects.filter(
+                employee=employee,
+                **period_filter(cutoff_year, cutoff_month, cutoff, month_field='cutoff_month'),
+            ).values_list('previous_batch', flat=True).first()
+
+            # The previous batch may have filled up in the meantime
+            if not batch_allocator.has_room(employee.assigned_office, cutoff, cutoff_month, cutoff_year, previous_batch):
+                return JsonResponse({'error': f'Batch {previous_batch} is full.'}, status=400)
+
+            # Batch status counters of the batches the employee leaves and joins
+            pay_period = pay_period_key(cutoff_year, cutoff_month, cutoff)
+            status_keys = batch_status.employee_keys(employee.id, pay_period)
+
+            # Update or create the batch assignment of employee
+            BatchAssignment.objects.update_or_create(
+                employee=employee,
+                cutoff=cutoff,
+                cutoff_month=cutoff_month,
+                cutoff_year=cutoff_year,
+                defaults={
+                    'batch_number': previous_batch,
+                    'late_assigned': 'NO',
+                    'previous_batch': None,
+                    'assigned_office': employee.assigned_office,
+                }
+            )
 
-        # Adjustment exists update the adjustment batch_number identifier
-        if adjustments.exists():
-            adjustments.update(batch_number=previous_batch)
+            # Check for adjustment if theres any
+            adjustments = Adjustment.objects.filter(
+                employee=employee,
+                **period_filter(cutoff_year, cutoff_month, cutoff)
+            )
+
+            # Adjustment exists update the adjustment batch_number identifier
+            if adjustments.exists():
+                adjustments.update(batch_number=previous_batch)
+
+            # Counters and frozen runs (submitted batches) of the batches left and joined
+            moved_keys = status_keys | batch_status.employee_keys(employee.id, pay_period)
+            batch_status.refresh(moved_keys)
+            payroll_snapshot.refresh_runs(moved_keys)
 
         return JsonResponse({'status': 'OK'}, status=200)
     
@@ -1118,42 +763,51 @@ def batch_remove(request):
 
         ## Same logic on the late
 
-        # Get existing batch_number before changing
-        previous_batch = BatchAssignment.objects.filter(
-            employee=employee,
-            cutoff=cutoff,
-            cutoff_month=cutoff_month,
-            cutoff_year=cutoff_year,
-        ).values_list('batch_number', flat=True).first()
-
-        # Set the batch number to 0
-        batch_number = 0
-
-        # Update or create the batch assignment of employee
-        BatchAssignment.objects.update_or_create(
-            employee=employee,
-            cutoff=cutoff,
-            cutoff_month=cutoff_month,
-            cutoff_year=cutoff_year,
-            defaults={
-                'batch_number': batch_number,
-                'removed': 'YES',
-                'previous_batch': previous_batch,
-                'assigned_office': employee.assigned_office,
-            }
-        )
+        with transaction.atomic():
+            # Frees a slot of the office's batches: under the allocator lock (see batch_allocator)
+            batch_allocator.lock_period(employee.assigned_office, cutoff, cutoff_month, cutoff_year)
 
-        # Check for adjustment if theres any
-        adjustments = Adjustment.objects.filter(
-            employee=employee,
-            cutoff=cutoff,
-            month=cutoff_month,
-            cutoff_year=cutoff_year
-        )
+            # Get existing batch_number before changing
+            previous_batch = BatchAssignment.objects.filter(
+                employee=employee,
+                **period_filter(cutoff_year, cutoff_month, cutoff, month_field='cutoff_month'),
+            ).values_list('batch_number', flat=True).first()
+
+            # Set the batch number to 0
+            batch_number = 0
 
-        # Adjustment exists update the adjustment batch_number identifier
-        if adjustments.exists():
-            adjustments.update(batch_number=batch_number)
+            # Batch status counters of the batches the employee leaves and joins
+            pay_period = pay_period_key(cutoff_year, cutoff_month, cutoff)
+            status_keys = batch_status.employee_keys(employee.id, pay_period)
+
+            # Update or create the batch assignment of employee
+            BatchAssignment.objects.update_or_create(
+                employee=employee,
+                cutoff=cutoff,
+                cutoff_month=cutoff_month,
+                cutoff_year=cutoff_year,
+                defaults={
+                    'batch_number': batch_number,
+                    'removed': 'YES',
+                    'previous_batch': previous_batch,
+                    'assigned_office': employee.assigned_office,
+                }
+            )
+
+            # Check for adjustment if theres any
+            adjustments = Adjustment.objects.filter(
+                employee=employee,
+                **period_filter(cutoff_year, cutoff_month, cutoff)
+            )
+
+            # Adjustment exists update the adjustment batch_number identifier
+            if adjustments.exists():
+                adjustments.update(batch_number=batch_number)
+
+            # Counters and frozen runs (submitted batches) of the batches left and joined
+            moved_keys = status_keys | batch_status.employee_keys(employee.id, pay_period)
+            batch_status.refresh(moved_keys)
+            payroll_snapshot.refresh_runs(moved_keys)
 
         return JsonResponse({'status': 'OK'}, status=200)
     
@@ -1174,39 +828,52 @@ def batch_unremove(request):
         ## Use the previous_number to revert the batch_number
         ## Revert the assigned_late to NO
 
-        # Get the previous_batch
-        previous_batch = BatchAssignment.objects.filter(
-            employee=employee,
-            cutoff=cutoff,
-            cutoff_month=cutoff_month,
-            cutoff_year=cutoff_year,
-        ).values_list('previous_batch', flat=True).first()
-
-        # Update or create the batch assignment of employee
-        BatchAssignment.objects.update_or_create(
-            employee=employee,
-            cutoff=cutoff,
-            cutoff_month=cutoff_month,
-            cutoff_year=cutoff_year,
-            defaults={
-                'batch_number': previous_batch,
-                'removed': 'NO',
-                'previous_batch': None,
-                'assigned_office': employee.assigned_office,
-            }
-        )
+        with transaction.atomic():
+            # Takes a slot back on the previous batch: under the allocator lock (see batch_allocator)
+            batch_allocator.lock_period(employee.assigned_office, cutoff, cutoff_month, cutoff_year)
 
-        # Check for adjustment if theres any
-        adjustments = Adjustment.objects.filter(
-            employee=employee,
-            cutoff=cutoff,
-            month=cutoff_month,
-            cutoff_year=cutoff_year
-        )
+            # Get the previous_batch
+            previous_batch = BatchAssignment.objects.filter(
+                employee=employee,
+                **period_filter(cutoff_year, cutoff_month, cutoff, month_field='cutoff_month'),
+            ).values_list('previous_batch', flat=True).first()
+
+            # The previous batch may have filled up in the meantime
+            if not batch_allocator.has_room(employee.assigned_office, cutoff, cutoff_month, cutoff_year, previous_batch):
+                return JsonResponse({'error': f'Batch {previous_batch} is full.'}, status=400)
+
+            # Batch status counters of the batches the employee leaves and joins
+            pay_period = pay_period_key(cutoff_year, cutoff_month, cutoff)
+            status_keys = batch_status.employee_keys(employee.id, pay_period)
+
+            # Update or create the batch assignment of employee
+            BatchAssignment.objects.update_or_create(
+                employee=employee,
+                cutoff=cutoff,
+                cutoff_month=cutoff_month,
+                cutoff_year=cutoff_year,
+                defaults={
+                    'batch_number': previous_batch,
+                    'removed': 'NO',
+                    'previous_batch': None,
+                    'assigned_office': employee.assigned_office,
+                }
+            )
+
+            # Check for adjustment if theres any
+            adjustments = Adjustment.objects.filter(
+                employee=employee,
+                **period_filter(cutoff_year, cutoff_month, cutoff)
+            )
 
-        # Adjustment exists update the adjustment batch_number identifier
-        if adjustments.exists():
-            adjustments.update(batch_number=previous_batch)
+            # Adjustment exists update the adjustment batch_number identifier
+            if adjustments.exists():
+                adjustments.update(batch_number=previous_batch)
+
+            # Counters and frozen runs (submitted batches) of the batches left and joined
+            moved_keys = status_keys | batch_status.employee_keys(employee.id, pay_period)
+            batch_status.refresh(moved_keys)
+            payroll_snapshot.refresh_runs(moved_keys)
 
         return JsonResponse({'status': 'OK'}, status=200)
     
@@ -1214,6 +881,7 @@ def batch_unremove(request):
 
 @login_required
 @restrict_roles(disallowed_roles=['employee'])
+@transaction.atomic
 def adjustment_create(request, emp_id):
     if request.method == 'POST':
         # Form
@@ -1224,11 +892,6 @@ def adjustment_create(request, emp_id):
         philhealth = request.POST.get('philhealth')
         sss = request.POST.get('sss')
         tax = request.POST.get('tax')
-        late_id = request.POST.get('late_id')
-        absence_id = request.POST.get('absence_id')
-        philhealth_id = request.POST.get('philhealth_id')
-        sss_id = request.POST.get('sss_id')
-        tax_id = request.POST.get('tax_id')
         deleted_ids = request.POST.getlist('deleted_ids[]')
 
         # Get multiple income and deduction data
@@ -1256,67 +919,12 @@ def adjustment_create(request, emp_id):
         # ## Check the next one
         # ## then status of every adjustment is Pending
 
-        def parse_decimal(val):
-            try:
-                return Decimal(val)
-            except:
-                return Decimal('0.00')
+        # Batch status counters of the employee's batches in the period, before any change
+        pay_period = pay_period_key(cutoff_year, cutoff_month, cutoff)
+        status_keys = batch_status.employee_keys(employee.id, pay_period)
 
-        if deleted_ids:
-            try:
-                Adjustment.objects.filter(id__in=deleted_ids).delete()
-            except (ValueError, ValidationError):
-                pass 
-
-        def save_adjustment(adj_id, name, adj_type, amount, details=''):
-            if not name or amount in [None, '', 'null']:
-                return
-
-            amount = parse_decimal(amount)
-
-            if adj_id:
-                try:
-                    adjustment = Adjustment.objects.get(id=adj_id)
-                    adjustment.name = name
-                    adjustment.type = adj_type
-                    adjustment.amount = amount
-                    adjustment.details = details
-                    adjustment.status = 'Waiting'
-                    adjustment.remarks = remarks
-                    adjustment.assigned_office = employee.assigned_office
-                    adjustment.save()
-                except Adjustment.DoesNotExist:
-                    # If ID is invalid (not found), fallback to create new
-                    Adjustment.objects.create(
-                        employee=employee,
-                        name=name,
-                        type=adj_type,
-                        amount=amount,
-                        details=details,
-                        status='Waiting',
-                        remarks=remarks,
-                        cutoff=cutoff,
-                        month=cutoff_month,
-                        cutoff_year=cutoff_year,
-                        batch_number=batch_number,
-                        assigned_office=employee.assigned_office
-                    )
-            else:
-                # Create new if no ID provided
-                Adjustment.objects.create(
-                    employee=employee,
-                    name=name,
-                    type=adj_type,
-                    amount=amount,
-                    details=details,
-                    status='Waiting',
-                    remarks=remarks,
-                    cutoff=cutoff,
-                    month=cutoff_month,
-                    cutoff_year=cutoff_year,
-                    batch_number=batch_number,
-                    assigned_office=employee.assigned_office
-                )
+        # Fixed deductions filled in: {name: (amount, details)}
+        fixed = {}
 
         # Save Late
         if late:
@@ -1328,7 +936,7 @@ def adjustment_create(request, emp_id):
             except Exception:
                 late_amount = Decimal('0.00')
 
-            save_adjustment(late_id, 'Late', 'Deduction', late_amount, details=late)
+            fixed['Late'] = (late_amount, late)
 
         # Save Absent
         if absence:
@@ -1340,29 +948,34 @@ def adjustment_create(request, emp_id):
             except Exception:
                 absent_amount = Decimal('0.00')
 
-            save_adjustment(absence_id, 'Absent', 'Deduction', absent_amount, details=absence)
+            fixed['Absent'] = (absent_amount, absence)
 
-        # Save Philhealth
-        if philhealth:
-            save_adjustment(philhealth_id, 'Philhealth', 'Deduction', philhealth)
+        # Save Philhealth / SSS / TAX
+        for name, amount in [('Philhealth', philhealth), ('SSS', sss), ('TAX', tax)]:
+            if amount and amount != 'null':
+                fixed[name] = (amount, '')
 
-        # Save SSS
-        if sss:
-            save_adjustment(sss_id, 'SSS', 'Deduction', sss)
+        # Multiple Income / Deduction adjustments
+        entries = [
+            (entry['name'], adj_type, entry['amount'])
+            for adj_type, rows in [('Income', incomes), ('Deduction', deductions)]
+            for entry in rows
+            if entry.get('name') and entry.get('amount')
+        ]
 
-        # Save TAX
-        if tax:
-            save_adjustment(tax_id, 'TAX', 'Deduction', tax)
+        # Diff against the saved adjustments: one insert, one update and one delete
+        try:
+            adjustment_form.save_form(
+                employee, cutoff, cutoff_month, cutoff_year, batch_number,
+                fixed, entries, deleted_ids=deleted_ids, remarks=remarks,
+            )
+        except ValueError as e:
+            return JsonResponse({'error': str(e)}, status=400)
 
-        # Save multiple Income adjustments
-        for income in incomes:
-            if income.get('name') and income.get('amount'):
-                save_adjustment(None, income['name'], 'Income', income['amount'])
+        batch_status.refresh(status_keys | batch_status.employee_keys(employee.id, pay_period))
 
-        # Save multiple Deduction adjustments
-        for deduction in deductions:
-            if deduction.get('name') and deduction.get('amount'):
-                save_adjustment(None, deduction['name'], 'Deduction', deduction['amount'])
+        # Edited adjustments are back to Waiting, the batch has to be submitted again
+        payroll_snapshot.discard_runs(cutoff, cutoff_month, cutoff_year, batch_number, employee.assigned_office)
 
         return JsonResponse({
             'status': 'OK',
@@ -1384,9 +997,7 @@ def adjustment_show(request, emp_id):
         adjustments = Adjustment.objects.filter(
             employee_id=emp_id,
             batch_number=batch_number,
-            cutoff=cutoff,
-            month=cutoff_month,
-            cutoff_year=cutoff_year,
+            **period_filter(cutoff_year, cutoff_month, cutoff),
             assigned_office=assigned_office
         )
 
@@ -1417,15 +1028,21 @@ def adjustment_show(request, emp_id):
 @restrict_roles(disallowed_roles=['employee'])
 def adjustment_update(request):
     if request.method == 'POST':
+        # Preparators correct their office's lines only; admin, checker and accounting name the office
+        user_role = request.session.get('role', '')
+        assigned_office = get_user_assigned_office(user_role)
+        if not assigned_office or user_role in ['admin', 'checker', 'accounting']:
+            assigned_office = request.POST.get('assigned_office')
+        if not assigned_office:
+            return JsonResponse({'error': 'assigned_office is required'}, status=400)
+
         try:
             adjustments = json.loads(request.POST.get('adjustments', '[]'))
-            for adj in adjustments:
-                Adjustment.objects.filter(id=adj['id']).update(
-                    name=adj['name'],
-                    type=adj['type'],
-                    amount=adj['amount']
-                )
-            return JsonResponse({'status': 'OK'}, status=200)
+
+            # Ids checked, lines written and submitted runs re-frozen in one transaction
+            updated_count = adjustment_form.correct_lines(adjustments, assigned_office)
+
+            return JsonResponse({'status': 'OK', 'updated': updated_count}, status=200)
         except Exception as e:
             return JsonResponse({'error': str(e)}, status=400)
     return JsonResponse({'error': 'Invalid request method'}, status=405)
@@ -1440,118 +1057,61 @@ def pending(request):
 def data(request):
     # Search query
     search_query = request.GET.get("search", "").strip().lower()
+    sort = request.GET.get("sort", "period")
+    page_number = request.GET.get("page", 1)
+    page_size = min(max(safe_int(request.GET.get("page_size"), PENDING_PAGE_SIZE), 1), MAX_PAGE_SIZE)
 
     # Get user role and filter batches accordingly
     user_role = request.session.get('role', '')
     
     # Get assigned office for the current user
     assigned_office = get_user_assigned_office(user_role)
-    
-    # Get all pending adjustments
-    pending_adjustments_query = Adjustment.objects.filter(status="Pending")
-    
-    # Apply assigned_office filter if user is office-specific preparator
-    if assigned_office and user_role != 'admin' and user_role != 'checker':
-        pending_adjustments_query = pending_adjustments_query.filter(assigned_office=assigned_office)
-    
-    # Get unique batch identifiers from pending adjustments
-    pending_batches = pending_adjustments_query.values(
-        'cutoff',
-        'month',
-        'cutoff_year',
-        'assigned_office'
-    ).distinct()
-    
-    valid_batches = []
-    
-    for pending_batch in pending_batches:
-        office = pending_batch['assigned_office']
-        if office:  # Skip if office is None
-            # Get employees with pending adjustments for this office and batch period
-            employees_with_pending = pending_adjustments_query.filter(
-                cutoff=pending_batch['cutoff'],
-                month=pending_batch['month'],
-                cutoff_year=pending_batch['cutoff_year'],
-                assigned_office=office
-            ).values_list('employee_id', flat=True).distinct()
-            
-            # Get unique batch numbers for these employees
-            batch_numbers = BatchAssignment.objects.filter(
-                employee_id__in=employees_with_pending,
-                cutoff=pending_batch['cutoff'],
-                cutoff_month=pending_batch['month'],
-                cutoff_year=pending_batch['cutoff_year'],
-                assigned_office=office
-            ).values_list('batch_number', flat=True).distinct()
-            
-            # Add each unique batch number for this office
-            for batch_number in batch_numbers:
-                # Check if all adjustments in this batch are approved
-                total_adjustments = Adjustment.objects.filter(
-                    batch_number=batch_number,
-                    cutoff=pending_batch['cutoff'],
-                    month=pending_batch['month'],
-                    cutoff_year=pending_batch['cutoff_year'],
-                    assigned_office=office
-                ).count()
-                
-                approved_adjustments = Adjustment.objects.filter(
-                    batch_number=batch_number,
-                    cutoff=pending_batch['cutoff'],
-                    month=pending_batch['month'],
-                    cutoff_year=pending_batch['cutoff_year'],
-                    status="Approved",
-                    assigned_office=office
-                ).count()
-                
-                # Set approval status
-                approval_status = ""
-                if total_adjustments > 0 and approved_adjustments == total_adjustments:
-                    approval_status = "Approved"
-
-                # Get the batch names of the batch
-                batch_obj = Batch.objects.filter(
-                    batch_number=batch_number,
-                    batch_assigned_office=office
-                ).first()
-                
-                # If not found with office filter, try without office filter
-                if not batch_obj:
-                    batch_obj = Batch.objects.filter(batch_number=batch_number).first()
-                
-                batch_name = batch_obj.batch_name if batch_obj else f"Batch {batch_number}"  
-                
-                valid_batches.append({
-                    'batch_name': batch_name,
-                    'batch_number': batch_number,
-                    'cutoff': pending_batch['cutoff'],
-                    'cutoff_month': pending_batch['month'],
-                    'cutoff_year': pending_batch['cutoff_year'],
-                    'assigned_office': office,
-                    'approval_status': approval_status
-                })
-    
-    # Remove duplicates based on batch_number, cutoff, cutoff_month, cutoff_year, and assigned_office
-    seen = set()
-    unique_batches = []
-    for batch in valid_batches:
-        key = (batch['batch_number'], batch['cutoff'], batch['cutoff_month'], batch['cutoff_year'], batch['assigned_office'])
-        if key not in seen:
-            seen.add(key)
-            # Add formatted office name and payroll title
-            batch['formatted_office_name'] = get_formatted_office_name(batch['assigned_office'])
-            batch['payroll_title'] = get_payroll_title(batch['assigned_office'])
-            unique_batches.append(batch)
-    
-    if search_query:
-        unique_batches = [
-            batch for batch in unique_batches
-            if search_query in batch['batch_name'].lower()
-            or search_query in batch['formatted_office_name'].lower()
-        ]
+    office_scope = assigned_office if assigned_office and user_role not in ['admin', 'checker'] else None
+
+    # One row per (office, period, batch) with a pending adjustment, with its adjustment counts and batch name
+    pending_batches = batch_queue.pending_batches(
+        assigned_office=office_scope,
+        search=search_query,
+        sort=sort,
+        office_names=OFFICE_NAMES,
+    )
+
+    paginator = Paginator(pending_batches, page_size)
+    page = paginator.get_page(page_number)
 
+    batches = []
+    for batch in page.object_list:
+        cutoff, cutoff_month, cutoff_year = pay_period_parts(batch['pay_period'])
+
+        # Approved once every adjustment of the batch is approved
+        total_adjustments = batch['total_adjustments'] or 0
+        approved_adjustments = batch['approved_adjustments'] or 0
+        approval_status = ""
+        if total_adjustments > 0 and approved_adjustments == total_adjustments:
+            approval_status = "Approved"
+
+        batches.append({
+            'batch_name': batch['batch_name'] or f"Batch {batch['batch_number']}",
+            'batch_number': batch['batch_number'],
+            'cutoff': cutoff,
+            'cutoff_month': cutoff_month,
+            'cutoff_year': cutoff_year,
+            'assigned_office': batch['assigned_office'],
+            'approval_status': approval_status,
+            'pending_adjustments': batch['pending_adjustments'],
+            'total_adjustments': total_adjustments,
+            'approved_adjustments': approved_adjustments,
+            'formatted_office_name': get_formatted_office_name(batch['assigned_office']),
+            'payroll_title': get_payroll_title(batch['assigned_office']),
+        })
 
-    return JsonResponse({'batches': unique_batches}, status=200)
+    return JsonResponse({
+        'batches': batches,
+        'total': paginator.count,
+        'page': page.number,
+        'num_pages': paginator.num_pages,
+        'page_size': page_size,
+    }, status=200)
 
 def show(request):
     batch_number = request.GET.get('batch_number')
@@ -1592,53 +1152,51 @@ def approved_list(request):
 def approve_data(request):
     # Search query
     search_query = request.GET.get("search", "").strip().lower()
-
-    # Get approved batches with all needed Adjustment fields
-    approved_adjustments = (
-        Adjustment.objects.filter(status="Approved")
-        .values('batch_number', 'month', 'cutoff', 'cutoff_year')
-        .distinct()
+    sort = request.GET.get("sort", "batch")
+    page_number = request.GET.get("page", 1)
+    page_size = min(max(safe_int(request.GET.get("page_size"), PENDING_PAGE_SIZE), 1), MAX_PAGE_SIZE)
+
+    # One row per approved (batch, period, office) with its adjustment counts and totals, joined to Batch
+    approved_batches = batch_queue.approved_batches(
+        search=search_query,
+        sort=sort,
+        office_names=OFFICE_NAMES,
     )
 
-    # Get batch details for those batch_numbers
-    batch_numbers = [adj['batch_number'] for adj in approved_adjustments]
-
-    batch_details = (
-        Batch.objects.filter(batch_number__in=batch_numbers)
-        .values('batch_number', 'batch_name', 'batch_assigned_office')
-        .order_by('batch_number')
-    )
-
-    # Convert to list so we can modify
-    batch_list = list(batch_details)
-
-    # Merge the month, cutoff, and cutoff_year into batch_list
-    for batch in batch_list:
-        adj_info = next((a for a in approved_adjustments if a['batch_number'] == batch['batch_number']), None)
-        if adj_info:
-            batch['month'] = adj_info['month']
-            batch['cutoff'] = adj_info['cutoff']
-            batch['cutoff_year'] = adj_info['cutoff_year']
-
-        # Apply formatted office name
-        batch['formatted_office_name'] = get_formatted_office_name(batch['batch_assigned_office'])
-
-    if search_query:
-        batch_list = [
-            b for b in batch_list
-            if search_query in b['batch_name'].lower()
-            or search_query in b['formatted_office_name'].lower()
-        ]
+    paginator = Paginator(approved_batches, page_size)
+    page = paginator.get_page(page_number)
+
+    batch_list = []
+    for batch in page.object_list:
+        batch_list.append({
+            'batch_number': batch['batch_number'],
+            'batch_name': batch['batch_name'],
+            'batch_assigned_office': batch['assigned_office'],
+            'month': batch['month'],
+            'cutoff': batch['cutoff'],
+            'cutoff_year': batch['cutoff_year'],
+            'employees': batch['employees'],
+            'adjustments': batch['adjustments'],
+            'total_income': float(batch['total_income'] or 0),
+            'total_deductions': float(batch['total_deductions'] or 0),
+            'formatted_office_name': get_formatted_office_name(batch['assigned_office']),
+        })
 
     return JsonResponse({
-        'approved_batches': batch_list
+        'approved_batches': batch_list,
+        'total': paginator.count,
+        'page': page.number,
+        'num_pages': paginator.num_pages,
+        'page_size': page_size,
     }, status=200)
 
 @login_required
 @restrict_roles(disallowed_roles=['employee'])
+@enqueueable
 def approve_office_to_credited(request):
     """
-    Update all adjustments for a specific office from 'Approved' to 'Credited' status.
+    Update all adjustments for a specific office from 'Approved' to 'Credited' status
+    (one period when cutoff / cutoff_month / cutoff_year are posted), with per-batch counts.
     This function is called when the cashier confirms the SweetAlert2 dialog.
     """
     if request.method == 'POST':
@@ -1647,48 +1205,23 @@ def approve_office_to_credited(request):
         if not assigned_office:
             return JsonResponse({'success': False, 'message': 'Assigned office is required'}, status=400)
         
+        # Optional period: only that period is credited (otherwise every period with Approved adjustments)
+        pay_period = None
+        if any(request.POST.get(field) for field in ['cutoff', 'cutoff_month', 'cutoff_year']):
+            pay_period = pay_period_key(request.POST.get('cutoff_year'), request.POST.get('cutoff_month'), request.POST.get('cutoff'))
+            if pay_period is None:
+                return JsonResponse({'success': False, 'message': 'Invalid payroll period'}, status=400)
+
         try:
-            # Get all batch numbers for this office (excluding batch_number 0)
-            office_batches = BatchAssignment.objects.filter(
-                assigned_office=assigned_office
-            ).exclude(batch_number=0).values(
-                'batch_number',
-                'cutoff',
-                'cutoff_month',
-                'cutoff_year'
-            ).distinct()
-            
-            updated_count = 0
-            
-            for batch in office_batches:
-                # Get all employee IDs in this batch for this office
-                employee_ids = BatchAssignment.objects.filter(
-                    batch_number=batch['batch_number'],
-                    cutoff=batch['cutoff'],
-                    cutoff_month=batch['cutoff_month'],
-                    cutoff_year=batch['cutoff_year'],
-                    assigned_office=assigned_office
-                ).values_list('employee_id', flat=True)
-                
-                if not employee_ids:
-                    continue
-                
-                # Update all adjustments for these employees from 'Approved' to 'Credited'
-                updated_adjustments = Adjustment.objects.filter(
-                    employee_id__in=employee_ids,
-                    cutoff=batch['cutoff'],
-                    month=batch['cutoff_month'],
-                    cutoff_year=batch['cutoff_year'],
-                    status="Approved",
-                    assigned_office=assigned_office
-                ).update(status="Credited")
-                
-                updated_count += updated_adjustments
+            # Approved adjustments of the office's batches, credited in chunks (one transaction each)
+            counts = workflow.credit_office(assigned_office, pay_period)
+            updated_count = sum(counts.values())
             
             if updated_count > 0:
                 return JsonResponse({
                     'success': True, 
-                    'message': f'Successfully updated {updated_count} adjustments to Credited status for {get_formatted_office_name(assigned_office)}'
+                    'message': f'Successfully updated {updated_count} adjustments to Credited status for {get_formatted_office_name(assigned_office)}',
+                    'batches': workflow.batch_counts(counts),
                 }, status=200)
             else:
                 return JsonResponse({
@@ -1715,6 +1248,17 @@ def approve_show(request):
         'batch_number': request.GET.get('batch_number'),
         'assigned_office': request.GET.get('assigned_office'),
     }
+
+    # Batch name as frozen on submit
+    if context['batch_number'] and context['cutoff'] and context['cutoff_month'] and context['cutoff_year']:
+        run = payroll_snapshot.find_run(
+            context['batch_number'],
+            context['cutoff'],
+            context['cutoff_month'],
+            context['cutoff_year'],
+            context['assigned_office'],
+        )
+        context['batch_name'] = run.batch_name if run else None
     return render(request, 'payroll/releasing.html', context)
 
 @login_required
@@ -1736,9 +1280,7 @@ def removed_employee_data(request):
     if assigned_office and user_role != 'admin' and user_role != 'checker':
         # For office-specific preparators, show only their office batches
         assignments = BatchAssignment.objects.filter(
-            cutoff=cutoff,
-            cutoff_month=cutoff_month,
-            cutoff_year=cutoff_year,
+            **period_filter(cutoff_year, cutoff_month, cutoff, month_field='cutoff_month'),
             previous_batch=batch_number,
             removed=removed,
             assigned_office=assigned_office
@@ -1746,79 +1288,44 @@ def removed_employee_data(request):
     else:
         # For admin and checker, show all batches
         assignments = BatchAssignment.objects.filter(
-            cutoff=cutoff,
-            cutoff_month=cutoff_month,
-            cutoff_year=cutoff_year,
+            **period_filter(cutoff_year, cutoff_month, cutoff, month_field='cutoff_month'),
             previous_batch=batch_number,
             removed=removed
         ).select_related('employee')
 
-    # Get the employee IDs for removed employees
-    removed_employee_ids = [a.employee.id for a in assignments]
-
     # Get the assigned_office for this batch (all employees in a batch should have the same assigned_office)
     batch_assigned_office = None
-    if assignments.exists():
-        batch_assigned_office = assignments.first().assigned_office
+    assignments = list(assignments)
+    if assignments:
+        batch_assigned_office = assignments[0].assigned_office
 
-    # Check for adjustment statuses for removed employees (filter by assigned_office)
-    adjustment_filter = {
-        'employee_id__in': removed_employee_ids,
-        'cutoff': cutoff,
-        'month': cutoff_month,
-        'cutoff_year': cutoff_year,
-    }
-    
-    # For office-specific preparators, only check adjustments for their assigned office
+    # For office-specific preparators, only count their assigned office
     if assigned_office and user_role != 'admin' and user_role != 'checker':
-        adjustment_filter['assigned_office'] = assigned_office
-    elif batch_assigned_office:
-        # If we have a batch_assigned_office, use that for filtering
-        adjustment_filter['assigned_office'] = batch_assigned_office
-
-    has_pending_adjustments = Adjustment.objects.filter(
-        **adjustment_filter,
-        status="Pending"
-    ).exists()
-
-    has_approved_adjustments = Adjustment.objects.filter(
-        **adjustment_filter,
-        status__in=["Approved", "Credited"]
-    ).exists()
-
-    has_credited_adjustments = Adjustment.objects.filter(
-        **adjustment_filter,
-        status="Credited"
-    ).exists()
+        flags_office = assigned_office
+    else:
+        flags_office = batch_assigned_office
+
+    # Removed employees sit on batch 0 of their office, their adjustments with them: the flags of
+    # that batch and of the batch they were removed from are two counter lookups
+    pay_period = pay_period_key(cutoff_year, cutoff_month, cutoff)
+    removed_flags = batch_status.batch_flags(0, pay_period, assigned_office=flags_office)
+    previous_flags = batch_status.batch_flags(batch_number, pay_period, assigned_office=flags_office)
+
+    has_pending_adjustments = removed_flags['has_pending_adjustments']
+    has_approved_adjustments = removed_flags['has_approved_adjustments'] or removed_flags['has_credited_adjustments']
+    has_credited_adjustments = removed_flags['has_credited_adjustments']
+
+    # The batch they were removed from has been submitted (Pending, Approved or Credited adjustments)
+    previous_batch_submitted = (
+        previous_flags['has_pending_adjustments']
+        or previous_flags['has_approved_adjustments']
+        or previous_flags['has_credited_adjustments']
+    )
 
     employees = []
 
     for a in assignments:
         emp = a.employee
-        
-        # Check if the employee's previous batch has been submitted
-        previous_batch = a.previous_batch
-        previous_batch_submitted = False
-        
-        if previous_batch is not None:
-            # Check if the previous batch has any adjustments with status Pending, Approved, or Credited (filter by assigned_office)
-            previous_batch_filter = {
-                'batch_number': previous_batch,
-                'cutoff': cutoff,
-                'month': cutoff_month,
-                'cutoff_year': cutoff_year,
-                'status__in': ["Pending", "Approved", "Credited"]
-            }
-            
-            # For office-specific preparators, only check adjustments for their assigned office
-            if assigned_office and user_role != 'admin' and user_role != 'checker':
-                previous_batch_filter['assigned_office'] = assigned_office
-            elif batch_assigned_office:
-                # If we have a batch_assigned_office, use that for filtering
-                previous_batch_filter['assigned_office'] = batch_assigned_office
-            
-            previous_batch_submitted = Adjustment.objects.filter(**previous_batch_filter).exists()
-
         employees.append({
             'id': emp.id,
             'employee_number': emp.employee_number,
@@ -1827,28 +1334,14 @@ def removed_employee_data(request):
             'salary': float(emp.salary),
             'tax_declaration': emp.tax_declaration,
             'removed': a.removed,
-            'previous_batch': previous_batch,
+            'previous_batch': a.previous_batch,
             'previous_batch_submitted': previous_batch_submitted
         })
 
     # Check if all adjustments in this batch are approved
-    total_adjustments = Adjustment.objects.filter(
-        employee_id__in=removed_employee_ids,
-        cutoff=cutoff,
-        month=cutoff_month,
-        cutoff_year=cutoff_year,
-        assigned_office=batch_assigned_office
-    ).count()
-    
-    approved_adjustments = Adjustment.objects.filter(
-        employee_id__in=removed_employee_ids,
-        cutoff=cutoff,
-        month=cutoff_month,
-        cutoff_year=cutoff_year,
-        status__in=["Approved", "Credited"],
-        assigned_office=batch_assigned_office
-    ).count()
-    
+    total_adjustments = removed_flags['total_adjustments']
+    approved_adjustments = removed_flags['approved_adjustments']
+
     # Set approval status
     approval_status = ""
     if total_adjustments > 0 and approved_adjustments == total_adjustments:
@@ -1880,18 +1373,14 @@ def release_multiple_batch(request):
 
         batches = data.get('batches', [])
 
-        updated_count = 0
-        for batch in batches:
-            filter_kwargs = {
-                'batch_number': batch.get('batch_number'),
-                'cutoff': batch.get('cutoff'),
-                'month': batch.get('month'),
-                'cutoff_year': batch.get('cutoff_year'),
-                'status': 'Approved',
-            }
-            updated_count += Adjustment.objects.filter(**filter_kwargs).update(status='Credited')
+        # Approved adjustments of every posted batch to Credited: one UPDATE in one transaction
+        units = [
+            (batch.get('assigned_office'), pay_period_key(batch.get('cutoff_year'), batch.get('month'), batch.get('cutoff')), batch.get('batch_number'))
+            for batch in batches
+        ]
+        counts = workflow.transition(units, 'release')
 
-        return JsonResponse({'status': 'OK', 'updated': updated_count}, status=200)
+        return JsonResponse({'status': 'OK', 'updated': sum(counts.values()), 'batches': workflow.batch_counts(counts)}, status=200)
 
     return JsonResponse({'error': 'Invalid request method'}, status=405)
 
@@ -1922,31 +1411,44 @@ def move_employee(request, emp_id):
             if not user_office or batch.batch_assigned_office != user_office:
                 return JsonResponse({'success': False, 'error': 'You can only assign employees to batches in your office.'})
             
-            # Batch Assignment
-            assignment = BatchAssignment.objects.filter(
-                employee_id=employee.id,
-                cutoff=cutoff,
-                cutoff_month=cutoff_month,
-                cutoff_year=cutoff_year,
-                batch_number = old_batch_number,
-                assigned_office = assigned_office,
-            ).first()
+            with transaction.atomic():
+                # Batches of the office change one request at a time (see batch_allocator)
+                batch_allocator.lock_period(assigned_office, cutoff, cutoff_month, cutoff_year)
+
+                # Batch Assignment
+                assignment = BatchAssignment.objects.filter(
+                    employee_id=employee.id,
+                    **period_filter(cutoff_year, cutoff_month, cutoff, month_field='cutoff_month'),
+                    batch_number = old_batch_number,
+                    assigned_office = assigned_office,
+                ).first()
 
-            if not assignment:
-                return JsonResponse({'success': False, 'error': 'Batch assignment not found'})
-            
-            assignment.batch_number = batch.batch_number
-            assignment.save()
+                if not assignment:
+                    return JsonResponse({'success': False, 'error': 'Batch assignment not found'})
 
-            # Adjustments
-            Adjustment.objects.filter(
-                employee_id=employee.id,
-                cutoff=cutoff,
-                month=cutoff_month,
-                cutoff_year=cutoff_year,
-                batch_number = old_batch_number,
-                assigned_office = assigned_office,
-            ).update(batch_number=batch.batch_number)
+                joins_batch = batch.batch_number != assignment.batch_number
+                if joins_batch and not batch_allocator.has_room(assigned_office, cutoff, cutoff_month, cutoff_year, batch.batch_number):
+                    return JsonResponse({'success': False, 'error': f'Batch {batch.batch_name} is full.'})
+
+                # Batch status counters of the old and the new batch
+                pay_period = pay_period_key(cutoff_year, cutoff_month, cutoff)
+                status_keys = batch_status.employee_keys(employee.id, pay_period)
+
+                assignment.batch_number = batch.batch_number
+                assignment.save()
+
+                # Adjustments
+                Adjustment.objects.filter(
+                    employee_id=employee.id,
+                    **period_filter(cutoff_year, cutoff_month, cutoff),
+                    batch_number = old_batch_number,
+                    assigned_office = assigned_office,
+                ).update(batch_number=batch.batch_number)
+
+                # Counters and frozen runs (submitted batches) of the batches left and joined
+                moved_keys = status_keys | batch_status.employee_keys(employee.id, pay_period)
+                batch_status.refresh(moved_keys)
+                payroll_snapshot.refresh_runs(moved_keys)
 
             # Employee
             employee.batch_number = batch.batch_number
@@ -1984,9 +1486,7 @@ def move_employee_available_batches(request):
         # Find pending adjustments matching same cutoff data
         pending_adjustments = Adjustment.objects.filter(
             assigned_office=user_office,
-            cutoff=cutoff,
-            month=cutoff_month,
-            cutoff_year=cutoff_year,
+            **period_filter(cutoff_year, cutoff_month, cutoff),
             status__in=["Pending", "Approved", "Credited"]
         ).values("batch_number")
 
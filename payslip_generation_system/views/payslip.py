@@ -1,15 +1,17 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.db import connection
-from django.db import transaction
-from django.http import JsonResponse
+from django.db import IntegrityError, transaction
+from django.http import JsonResponse, StreamingHttpResponse
 from django.contrib import messages
 from django.utils.dateparse import parse_date
 from django.core.paginator import Paginator
-from django.db.models import Q, Sum
+from django.db.models import Q, Sum, Count
 from decimal import Decimal, ROUND_HALF_UP
 from datetime import datetime
 from payslip_generation_system.models import Employee, Adjustment
 from payslip_generation_system.decorators import restrict_roles
+from payslip_generation_system.services import payroll_engine, payroll_snapshot, batch_status, employee_directory, adjustment_search, identity, payslip_bundle, payslip_cache
+from payslip_generation_system.pay_period import period_filter, pay_period_key
 from django.contrib.auth.models import User
 
 from django.contrib.auth.decorators import login_required
@@ -117,212 +119,116 @@ def generate(request):
         selected_month = request.POST.get('month')
         selected_cutoff = request.POST.get('cutoff')
 
+        pay_period = pay_period_key(current_year, selected_month, selected_cutoff)
+        common = {
+            'salary_period': f"{selected_month} {current_year} - {selected_cutoff} Cutoff",
+            'selected_cutoff': selected_cutoff,
+            'month_choices': month_choices,
+            'current_month': current_month,
+            'current_year' : current_year,
+        }
+
+        # Credited payslips no longer change: served from the cache
+        if role == "employee":
+            values = payslip_cache.get(employee_id, pay_period)
+            if values is not None:
+                return render(request, 'payslip/payslip.html', {**values, **common})
+
         # Fetch employee data
         employee = Employee.objects.get(id=employee_id)
-        
-        if role == "employee":
-            has_adjustments = Adjustment.objects.filter(
+
+        # Every adjustment of the period in one query; status checks and figures are read from it
+        adjustments = list(
+            Adjustment.objects.filter(
                 employee=employee,
-                month=selected_month,
-                cutoff=selected_cutoff,
-                cutoff_year=current_year,
-                status="Credited"
-            ).exists()
+                **period_filter(current_year, selected_month, selected_cutoff),
+            ).values('status', 'type', 'name', 'amount', 'details').order_by('id')
+        )
+        statuses = {adj['status'] for adj in adjustments}
+
+        has_adjustments = False
+        if role == "employee":
+            has_adjustments = "Credited" in statuses
         elif role in ['admin', 'checker', 'accounting', 'preparator_denr_nec', 'preparator_denr_prcmo', 'preparator_meo_s', 'preparator_meo_e', 'preparator_meo_w', 'preparator_meo_n']:
-            has_adjustments = Adjustment.objects.filter(
-                employee=employee,
-                month=selected_month,
-                cutoff=selected_cutoff,
-                cutoff_year=current_year,
-                status__in=["Pending", "Approved"]
-            ).exists()
+            has_adjustments = bool(statuses & {"Pending", "Approved"})
 
         if not has_adjustments:
             if role in ['admin', 'checker', 'accounting', 'preparator_denr_nec', 'preparator_denr_prcmo', 'preparator_meo_s', 'preparator_meo_e', 'preparator_meo_w', 'preparator_meo_n']:
-                has_adjustments = Adjustment.objects.filter(
-                    employee=employee,
-                    month=selected_month,
-                    cutoff=selected_cutoff,
-                    cutoff_year=current_year,
-                    status="Credited"
-                ).exists()
-
-                if has_adjustments:
+                if "Credited" in statuses:
                     messages.error(request, 'Payslip already generated.')
                     return redirect('payslip_create')
             else:
                 messages.warning(request, 'Payslip in process.')
                 return redirect('payslip_create')
-            
-        # Basic Salary
-        basic_salary = employee.salary
-        # Annual Salary
-        basic_salary_annual = basic_salary * 12
-        # Cutoff Salary
-        basic_salary_cutoff = basic_salary / 2 
-
-        # Adjustment Deduction
-        all_adjustment_minus = Adjustment.objects.filter(
-            employee=employee,
-            type="Deduction",
-            month=selected_month,
-            cutoff=selected_cutoff,
-            cutoff_year=current_year,
-            status__in=["Pending", "Approved", "Credited"]
-            # Adjusted condition to match selected month
-        ).exclude(
-            Q(name__in=["Late", "Absent", "TAX", "SSS"]) | Q(name__icontains="Philhealth") | Q(name__icontains="Expanded Withholding Tax")
-        )
-
-        # Adjustment Income
-        all_adjustment_plus = Adjustment.objects.filter(
-            employee=employee,
-            type="Income",
-            month=selected_month,
-            cutoff=selected_cutoff,
-            cutoff_year=current_year,
-            status__in=["Pending", "Approved", "Credited"]
-            # Adjusted condition to match selected month
-        )
 
-        # LATE DEDUCTION
-        late_adjustments = Adjustment.objects.filter(
-            employee=employee,
-            name="Late",
-            type="Deduction",
-            month=selected_month,
-            cutoff=selected_cutoff,
-            cutoff_year=current_year,
-            status__in=["Pending", "Approved", "Credited"]
-            # Adjusted condition to match selected month
-        )
-
-        # ABSENT DEDUCTION
-        absent_adjustments = Adjustment.objects.filter(
-            employee=employee,
-            name="Absent",
-            type="Deduction",
-            month=selected_month,
-            cutoff=selected_cutoff,
-            cutoff_year=current_year,
-            status__in=["Pending", "Approved", "Credited"]
-            # Adjusted condition to match selected month
-        )
-
-
-        # Total Adjustment Deduction & Income
-        total_adjustment_amount_minus = all_adjustment_minus.aggregate(Sum('amount'))['amount__sum'] or Decimal('0.00')
-        total_adjustment_amount_plus = all_adjustment_plus.aggregate(Sum('amount'))['amount__sum'] or Decimal('0.00')
-
-        # Fomat the Late and Absent amount and minutes/days
-        late_amt_total = late_adjustments.aggregate(Sum('amount'))['amount__sum'] or Decimal('0.00')
-        late_min_total = late_adjustments.aggregate(Sum('details'))['details__sum'] or Decimal('0.00')
-        absent_amt_total = absent_adjustments.aggregate(Sum('amount'))['amount__sum'] or Decimal('0.00')
-        absent_day_total = absent_adjustments.aggregate(Sum('details'))['details__sum'] or Decimal('0.00')
-
-        # Total Gross Amount
-        total_gross_amount = abs(basic_salary_cutoff - late_amt_total - absent_amt_total - total_adjustment_amount_minus + total_adjustment_amount_plus) 
-
-        # TAX DEDUCTION
-        if (employee.tax_declaration == "yes"):
-                tax_deduction = Decimal('0.00')
-        else:
-            tax_deduction = (total_gross_amount * Decimal("0.03")).quantize(
-                Decimal("0.01"), rounding=ROUND_HALF_UP
-            )
-        
-        # PHILHEALTH DEDUCTION 
-        if employee.has_philhealth == "yes":
-            philhealth = (total_gross_amount * Decimal("0.05")).quantize(
-                Decimal("0.01"), rounding=ROUND_HALF_UP
-            )
+        # Submitted payroll: the payslip is read from the payroll frozen at submit
+        payroll_line = payroll_snapshot.find_line(employee, selected_cutoff, selected_month, current_year)
+        payslip_adjustments = [adj for adj in adjustments if adj['status'] in payroll_engine.PAYROLL_STATUSES]
+        if payroll_line:
+            values = payroll_snapshot.payslip_values(payroll_line)
         else:
-            philhealth = Decimal('0')
-        
-        # PHILHEALTH PREVIOUS
-        philhealth_previous_queryset = Adjustment.objects.filter(
-            employee=employee,
-            name__icontains="Philhealth",  # Matches any name containing "Philhealth"
-            type="Deduction",
-            month=selected_month,
-            cutoff=selected_cutoff,
-            cutoff_year=current_year,
-            status__in=["Pending", "Approved", "Credited"]
-        )
+            values = payroll_engine.payslip_values(employee, payslip_adjustments)
 
-        philhealth_previous = philhealth_previous_queryset.aggregate(total=Sum("amount"))["total"] or Decimal("0.00")
-
-        # EXPANDED WITHHOLDING TAX
-        expanded_withholding_tax_queryset = Adjustment.objects.filter(
-            employee=employee,
-            name__icontains="Expanded Withholding Tax",  # Matches any name containing "Expanded Withholding Tax"
-            type="Deduction",
-            month=selected_month,
-            cutoff=selected_cutoff,
-            cutoff_year=current_year,
-            status__in=["Pending", "Approved", "Credited"]
-        )
+        if payslip_cache.is_final(payslip_adjustments):
+            payslip_cache.remember(employee.id, pay_period, values)
 
-        ewt = expanded_withholding_tax_queryset.aggregate(total=Sum("amount"))["total"] or Decimal("0.00")
-
-        # SSS
-        sss_queryset = Adjustment.objects.filter(
-            employee=employee,
-            name="SSS",
-            type="Deduction",
-            month=selected_month,
-            cutoff=selected_cutoff,
-            cutoff_year=current_year,
-            status__in=["Pending", "Approved", "Credited"]
-        )
-
-        sss = sss_queryset.aggregate(total=Sum("amount"))["total"] or Decimal("0.00")
-    
-        # Format the salary period
-        salary_period = f"{selected_month} {current_year} - {selected_cutoff} Cutoff"
-        
-        
-        # TOTAL DEDUCTIONS
-        total_deductions = tax_deduction + ewt + philhealth + philhealth_previous + sss + absent_amt_total + late_amt_total
-
-        # TOTAL ADJUSTMENT
-        total_adjustment_summary = (
-            - Decimal(total_adjustment_amount_minus)
-            + Decimal(total_adjustment_amount_plus)
-        ).quantize(Decimal("0.01"))
-
-        context = {
-            'employee_no': employee.employee_number,
-            'employee_name': employee.fullname,
-            'position': employee.position,
-            'monthly_rate': employee.salary,
-            'basic_salary_cutoff': basic_salary_cutoff,
-            'absent_amt_total': absent_amt_total,
-            'absent_day_total': absent_day_total,
-            'late_amt_total': late_amt_total,
-            'late_min_total': late_min_total,
-            'all_adjustment_minus': all_adjustment_minus,
-            'total_adjustment_amount_minus': total_adjustment_amount_minus,
-            'all_adjustment_plus': all_adjustment_plus,
-            'total_adjustment_amount_plus': total_adjustment_amount_plus,
-            'total_gross': total_gross_amount,
-            'sss': sss,
-            'philhealth': philhealth,
-            'tax_deduction': tax_deduction,
-            'ewt': ewt,
-            'philhealth_previous': philhealth_previous,
-            'total_deductions' : total_deductions,
-            'total_adjustment_summary': (total_adjustment_summary),
-            'net_pay': basic_salary_cutoff - total_deductions + total_adjustment_summary,
-            'salary_period': salary_period,
-            'selected_cutoff': selected_cutoff,
-            'month_choices': month_choices,
-            'current_month': current_month,
-            'current_year' : current_year,
-        }
+        context = {**values, **common}
 
     return render(request, 'payslip/payslip.html', context)
 
+@login_required
+@restrict_roles(disallowed_roles=['employee'])
+def bulk(request):
+    """
+    ZIP of the payslips of a batch (batch_number), an office's payroll (assigned_office)
+    or a selection (employee, repeatable) for a period, as HTML or PDF (format)
+    """
+    cutoff = request.GET.get('cutoff')
+    cutoff_month = request.GET.get('cutoff_month')
+    cutoff_year = request.GET.get('cutoff_year')
+    assigned_office = request.GET.get('assigned_office') or None
+    file_format = request.GET.get('format') or 'html'
+
+    if pay_period_key(cutoff_year, cutoff_month, cutoff) is None:
+        return JsonResponse({'error': 'Invalid payroll period'}, status=400)
+
+    if file_format not in payslip_bundle.FORMATS:
+        return JsonResponse({'error': 'Invalid format'}, status=400)
+    if file_format == 'pdf' and not payslip_bundle.pdf_available():
+        return JsonResponse({'error': 'PDF payslips are not available on this server'}, status=400)
+
+    try:
+        batch_number = int(request.GET['batch_number']) if request.GET.get('batch_number') else None
+        employee_ids = [int(employee_id) for employee_id in request.GET.getlist('employee') if employee_id]
+    except ValueError:
+        return JsonResponse({'error': 'Invalid batch number or employee'}, status=400)
+
+    # Preparators only download their own office's payslips
+    role = identity.request_role(request)
+    role_office = identity.ROLE_OFFICES.get(role)
+    if role_office:
+        if assigned_office and assigned_office != role_office:
+            return JsonResponse({'error': 'Forbidden'}, status=403)
+        assigned_office = role_office
+    elif role not in employee_directory.ALL_OFFICE_ROLES:
+        return JsonResponse({'error': 'Forbidden'}, status=403)
+
+    if batch_number is None and not assigned_office and not employee_ids:
+        return JsonResponse({'error': 'Select a batch, an office or employees'}, status=400)
+
+    employees = payslip_bundle.bundle_employees(cutoff, cutoff_month, cutoff_year, assigned_office, batch_number, employee_ids)
+    jobs = payslip_bundle.payslip_jobs(employees, cutoff, cutoff_month, cutoff_year, file_format)
+    if not jobs:
+        return JsonResponse({'error': 'No payslips for this selection'}, status=404)
+
+    response = StreamingHttpResponse(
+        payslip_bundle.stream(jobs, workers=payslip_bundle.default_workers()),
+        content_type=payslip_bundle.CONTENT_TYPE,
+    )
+    file_name = payslip_bundle.file_name(cutoff, cutoff_month, cutoff_year, assigned_office, batch_number)
+    response['Content-Disposition'] = f'attachment; filename="{file_name}"'
+    return response
+
 @login_required
 @restrict_roles(disallowed_roles=['employee'])
 def adjustment(request, emp_id):
@@ -356,19 +262,26 @@ def adjustment_add(request, emp_id):
             computed_amount = raw_amount  # use as is
 
         # Create the adjustment record
-        Adjustment.objects.create(
-            employee=employee,
-            name=request.POST['name'],
-            type=request.POST['type'],
-            amount=computed_amount,
-            details=request.POST.get('details', ''),
-            month=request.POST.get('month'),
-            cutoff=request.POST.get('cutoff'),
-            status=request.POST.get('status', 'Pending'),
-            remarks=request.POST.get('remarks', ''),
-            cutoff_year=current_year,
-            assigned_office=employee.assigned_office,
-        )
+        try:
+            with transaction.atomic():
+                new_adjustment = Adjustment.objects.create(
+                    employee=employee,
+                    name=request.POST['name'],
+                    type=request.POST['type'],
+                    amount=computed_amount,
+                    details=request.POST.get('details', ''),
+                    month=request.POST.get('month'),
+                    cutoff=request.POST.get('cutoff'),
+                    status=request.POST.get('status', 'Pending'),
+                    remarks=request.POST.get('remarks', ''),
+                    cutoff_year=current_year,
+                    assigned_office=employee.assigned_office,
+                )
+        except IntegrityError:
+            messages.error(request, f'{name} is already entered for this cutoff.')
+            return redirect('payslip_adjustment', emp_id=employee.id)
+        batch_status.refresh([batch_status.adjustment_key(new_adjustment)])
+        payroll_snapshot.refresh_runs_for_adjustments([new_adjustment.id])
         messages.success(request, 'Adjustment successfully added.')
         return redirect('payslip_adjustment', emp_id=employee.id)
     
@@ -395,6 +308,9 @@ def adjustment_edit(request, emp_id, adj_id):
         else:
             computed_amount = raw_amount  # use as is
 
+        # Batch status counters of the adjustment's batch before and after the edit
+        status_keys = {batch_status.adjustment_key(adjustment)}
+
         # Update the adjustment record
         adjustment.name = name
         adjustment.type = request.POST['type']
@@ -404,36 +320,30 @@ def adjustment_edit(request, emp_id, adj_id):
         adjustment.cutoff = request.POST.get('cutoff')
         adjustment.status = request.POST.get('status', 'Pending')
         adjustment.remarks = request.POST.get('remarks', '')
-        adjustment.save()
+        try:
+            with transaction.atomic():
+                adjustment.save()
+                batch_status.refresh(status_keys | {batch_status.adjustment_key(adjustment)})
+        except IntegrityError:
+            messages.error(request, f'{name} is already entered for this cutoff.')
+            return redirect('payslip_adjustment', emp_id=employee.id)
+        payroll_snapshot.refresh_runs_for_adjustments([adjustment.id])
 
         messages.success(request, 'Adjustment successfully updated.')
         return redirect('payslip_adjustment', emp_id=employee.id)
 
 @login_required
 def employee_data(request):
-    user_role = request.session.get('role')
-
-    # DataTable parameters
-    draw = int(request.GET.get('draw', 1))
-    start = int(request.GET.get('start', 0))
-    length = int(request.GET.get('length', 10))
-    search_value = request.GET.get('search[value]', '')
-    order_col_index = int(request.GET.get('order[0][column]', 0))
-    order_dir = request.GET.get('order[0][dir]', 'asc')
+    role = request.session.get('role')
 
     # Fields to retrieve
     fields = ['id', 'employee_number', 'fullname', 'position', 'fund_source', 'salary', 'assigned_office', 'tax_declaration', 'has_philhealth', 'eligibility']
 
-    # Roles
-    role = request.session.get('role')
-    
-    # Offices
-    denrncrnec = 'denr_ncr_nec'
-    denrncrprcmo = 'denr_ncr_prcmo'
-    meos = 'meo_s'
-    meoe = 'meo_e'
-    meow = 'meo_w'
-    meon = 'meo_n'
+    # Table columns, in display order (sorting)
+    columns = ['employee_number', 'fullname', 'position', 'fund_source', 'salary', 'assigned_office', 'tax_declaration', 'has_philhealth', 'eligibility']
+
+    # DataTable parameters
+    params = employee_directory.datatable_params(request.GET, columns)
 
     OFFICE_NAME_MAP = {
         'denr_ncr_nec': 'DENR NCR NEC',
@@ -444,78 +354,20 @@ def employee_data(request):
         'meo_n': 'MEO North',
     }
 
-
     # Data
-    match role:
-        case "admin":
-            queryset = Employee.objects.values(*fields)
-        case "checker":
-            queryset = Employee.objects.values(*fields)
-        case "accounting":
-            queryset = Employee.objects.values(*fields)
-        case "preparator_denr_nec":
-            queryset = Employee.objects.filter(assigned_office=denrncrnec).values(*fields)
-        case "preparator_denr_prcmo":
-            queryset = Employee.objects.filter(assigned_office=denrncrprcmo).values(*fields)
-        case "preparator_meo_s":
-            queryset = Employee.objects.filter(assigned_office=meos).values(*fields)
-        case "preparator_meo_e":
-            queryset = Employee.objects.filter(assigned_office=meoe).values(*fields)
-        case "preparator_meo_w":
-            queryset = Employee.objects.filter(assigned_office=meow).values(*fields)
-        case "preparator_meo_n":
-            queryset = Employee.objects.filter(assigned_office=meon).values(*fields)
-        case _:
-            return JsonResponse({
-                'draw': draw,
-                'recordsTotal': 0,
-                'recordsFiltered': 0,
-                'data': []
-            })
-        
-    SEARCH_OFFICE_NAME_MAP = {
-        'DENR NCR NEC': 'denr_ncr_nec',
-        'DENR NCR PRCMO': 'denr_ncr_prcmo',
-        'MEO East': 'meo_e',
-        'MEO South': 'meo_s',
-        'MEO West': 'meo_w',
-        'MEO North': 'meo_n',
-    }
-
-
-    # Search filter
-    if search_value:
-        filters = Q(employee_number__icontains=search_value) | \
-                Q(fullname__icontains=search_value) | \
-                Q(position__icontains=search_value) | \
-                Q(fund_source__icontains=search_value) | \
-                Q(tax_declaration__icontains=search_value) | \
-                Q(eligibility__icontains=search_value)
-
-        # Direct exact match from search input to the map
-        if search_value in SEARCH_OFFICE_NAME_MAP:
-            filters |= Q(assigned_office__iexact=SEARCH_OFFICE_NAME_MAP[search_value])
-        else:
-            filters |= Q(assigned_office__icontains=search_value.lower())
-
-        queryset = queryset.filter(filters)
-
-    total_records = queryset.count()
-
-    # Ordering logic
-    order_columns = fields
-    order_column = order_columns[order_col_index] if order_col_index < len(order_columns) else 'date_hired'
-    if order_dir == 'desc':
-        order_column = f'-{order_column}'
-    queryset = queryset.order_by(order_column)
+    queryset = employee_directory.scoped_employees(role)
+    if queryset is None:
+        return JsonResponse({
+            'draw': params['draw'],
+            'recordsTotal': 0,
+            'recordsFiltered': 0,
+            'data': []
+        })
 
-    # Pagination
-    paginator = Paginator(queryset, length)
-    page_number = (start // length) + 1
-    page = paginator.get_page(page_number)
+    page = employee_directory.datatable_page(queryset, fields, params, scope=role)
 
     data = []
-    for emp in page:
+    for emp in page['rows']:
         salary = f"₱{emp['salary']:,.2f}" if emp.get('salary') else ""
 
         data.append([
@@ -536,9 +388,10 @@ def employee_data(request):
         ])
 
     return JsonResponse({
-        'draw': draw,
-        'recordsTotal': total_records,
-        'recordsFiltered': total_records,
+        'draw': params['draw'],
+        'recordsTotal': page['records_total'],
+        'recordsFiltered': page['records_filtered'],
+        'next_cursor': page['next_cursor'],
         'data': data
     })
 
@@ -559,19 +412,15 @@ def adjustment_data(request, emp_id):
 
     queryset = Adjustment.objects.filter(employee=employee)
 
-    if search_value:
-        queryset = queryset.filter(
-            Q(name__icontains=search_value) |
-            Q(type__icontains=search_value) |
-            Q(amount__icontains=search_value) |
-            Q(month__icontains=search_value) |
-            Q(status__icontains=search_value) |
-            Q(remarks__icontains=search_value) |
-            Q(created_at__icontains=search_value)
-        )
+    # Typed search (status, type, period, amount, dates, words), see services.adjustment_search
+    search_filter = adjustment_search.search_filter(search_value) if search_value.strip() else None
 
-    total_records = Adjustment.objects.filter(employee=employee).count()
-    filtered_records = queryset.count()
+    # Total and filtered counts in one query
+    counts = queryset.aggregate(total=Count('id'), filtered=Count('id', filter=search_filter))
+    total_records = counts['total']
+    filtered_records = counts['filtered']
+    if search_filter is not None:
+        queryset = queryset.filter(search_filter)
 
     columns = ['name', 'type', 'amount', 'details', 'cutoff_month', 'status', 'remarks', 'created_at']
     order_col_index = safe_int(request.GET.get('order[0][column]'), 0)
@@ -715,7 +564,10 @@ def adjustment_return(request, adj_id):
 
     if request.method == "POST":
         adjustment.status = "Returned"
-        adjustment.save()
+        with transaction.atomic():
+            adjustment.save()
+            batch_status.refresh([batch_status.adjustment_key(adjustment)])
+        payroll_snapshot.refresh_runs_for_adjustments([adjustment.id])
 
         return JsonResponse({"success": True, "message": "Adjustment Returned successfully!"})
     return
@@ -727,7 +579,9 @@ def adjustment_approve(request, adj_id):
 
     if request.method == "POST":
         adjustment.status = "Approved"
-        adjustment.save()
+        with transaction.atomic():
+            adjustment.save()
+            batch_status.refresh([batch_status.adjustment_key(adjustment)])
 
         return JsonResponse({"success": True, "message": "Adjustment Approved successfully!"})
 
@@ -738,7 +592,9 @@ def adjustment_credit(request, adj_id):
 
     if request.method == "POST":
         adjustment.status = "Credited"
-        adjustment.save()
+        with transaction.atomic():
+            adjustment.save()
+            batch_status.refresh([batch_status.adjustment_key(adjustment)])
 
         return JsonResponse({"success": True, "message": "Adjustment Credited payslip is now available!"})
     return